@@ -22,4 +22,118 @@ TESSERACT_CMD = r"C:\Program Files\Tesseract-OCR\tesseract.exe"
 
 # 🔥 Hybrid Mode Settings
 HYBRID_MODE_ENABLED = True  # เปิดใช้งาน Hybrid Mode
-RULE_BASED_CONFIDENCE_THRESHOLD = 0.8  # ความมั่นใจขั้นต่ำสำหรับ Rule-based
\ No newline at end of file
+RULE_BASED_CONFIDENCE_THRESHOLD = 0.8  # ความมั่นใจขั้นต่ำสำหรับ Rule-based
+
+# 🔌 HTTP Transport (ใช้ร่วมกันทุก LLMClient)
+LLM_POOL_SIZE = 8                 # จำนวน keep-alive connection สูงสุดต่อ host
+LLM_TIMEOUTS = {                  # timeout (วินาที) แยกตามประเภทการเรียก
+    "connect": 3.05,              # เวลาเปิด TCP connection
+    "text": 60,                   # ask / ask_multimodal
+    "vision": 120,                # ask_with_image (prompt processing ของภาพนานกว่า)
+    "stream": 60,                 # เวลารอระหว่าง chunk ของ streaming
+    "probe": 5,                   # health check / warm-up
+}
+LLM_RETRY_ATTEMPTS = 2            # ลองใหม่กี่ครั้งเมื่อ connection ถูก reset
+LLM_RETRY_BACKOFF = 0.25          # backoff เริ่มต้น (วินาที) แบบ exponential + jitter
+
+# ⚙️ AsyncLLMClient: จำนวน request ที่ส่งพร้อมกันได้สูงสุดต่อ event loop
+LLM_MAX_IN_FLIGHT = 4
+
+# 💾 Response Cache (ใช้กับคำขอ deterministic เช่น CommandParser)
+LLM_CACHE_ENABLED = True
+LLM_CACHE_DIR = ".ai_cache/llm_responses"
+LLM_CACHE_MAX_ENTRIES = 256       # จำนวนรายการใน memory (LRU)
+LLM_CACHE_MAX_DISK_MB = 50        # ขนาดรวมสูงสุดบน disk
+LLM_CACHE_TTL = 24 * 3600         # อายุ cache (วินาที), 0 = ไม่หมดอายุ
+
+# 🔗 Single-flight: request ที่ payload เหมือนกันและกำลังวิ่งอยู่ จะถูกรวมเป็นครั้งเดียว
+LLM_SINGLE_FLIGHT = True
+
+# 🗜️ Chat history: จำกัด token ที่ส่งซ้ำทุกรอบ (turn เก่าถูกพับเป็นสรุป)
+CHAT_HISTORY_TOKEN_BUDGET = 3000
+CHAT_SUMMARY_MAX_TOKENS = 300
+
+# 🚦 Scheduler: LM Studio ประมวลผลได้ทีละ request -> จัดคิวตามความสำคัญ
+LLM_SCHEDULER_CONCURRENCY = 1     # จำนวน request ที่ส่งเข้า LM Studio พร้อมกัน (ต่อ 1 server)
+LLM_QUEUE_LIMITS = {              # ความยาวคิวสูงสุดต่อ class
+    "interactive": 8,             # คำถามที่ผู้ใช้รออยู่
+    "parser": 4,                  # CommandParser
+    "background": 2,              # live vision / สรุปบทสนทนา
+}
+
+# 🩺 Health check: ถ้า LM Studio ล่มจะตอบ error ทันที แล้ว probe ซ้ำแบบ backoff
+LLM_HEALTH_ENABLED = True
+LLM_HEALTH_BACKOFF = 1.0          # รอก่อน probe ซ้ำครั้งแรก (วินาที), เพิ่มเท่าตัวทุกครั้ง
+LLM_HEALTH_BACKOFF_MAX = 30.0     # รอสูงสุด
+LLM_WARMUP_ON_START = True        # ส่ง completion เล็กๆ ตอนเปิดโปรแกรมให้ LM Studio โหลดโมเดลไว้ก่อน
+
+# 🧩 CommandParser: ให้ LM Studio ตอบ JSON ตาม schema (response_format) แทนข้อความอิสระ
+PARSER_STRUCTURED_OUTPUT = True
+PARSER_MAX_TOKENS = 256           # action JSON สั้นเสมอ ไม่ต้อง generate ยาว
+PARSER_STOP = ["```", "\n\n\n"]  # หยุดทันทีถ้าโมเดลเริ่มเขียนคำอธิบายต่อท้าย
+PARSER_STRUCTURED_RETRY = 600     # server ไม่รองรับ response_format -> พักโหมด structured กี่วินาที (เผื่อเปลี่ยนโมเดล / อัปเดต)
+
+# 🧭 Model routing: เลือกโมเดลตามประเภทงาน (LLMRouter)
+# profile: server_url หรือ endpoints / model / temperature / max_tokens / timeout (ไม่ใส่ = ค่า default ของ LLMClient)
+LLM_MODEL_PROFILES = {
+    "main": {"model": LLM_MODEL},                                       # แชททั่วไป
+    "fast": {"model": LLM_MODEL, "temperature": 0, "max_tokens": 384,   # โมเดลเล็ก: แปลงคำสั่ง / สรุป
+             "timeout": 20},
+    "vision": {"model": LLM_MODEL, "temperature": 0.3, "timeout": 120}, # โมเดล multimodal
+}
+# งาน -> ลำดับ profile ที่จะลอง (ตัวแรกไม่พร้อม -> ใช้ตัวถัดไป)
+LLM_TASK_ROUTES = {
+    "parse": ["fast", "main"],
+    "chat": ["main", "fast"],
+    "vision-describe": ["vision", "main"],
+    "vision-locate": ["vision", "main"],
+    "summarize": ["fast", "main"],
+}
+
+# ⚖️ หลาย server: ใส่ URL ของ LM Studio / llama.cpp server หลายตัวเพื่อกระจายงาน (ว่าง = ใช้ LLM_SERVER_URL ตัวเดียว)
+# เช่น ["http://localhost:1234/v1/chat/completions", "http://192.168.1.20:8080/v1/chat/completions"]
+LLM_ENDPOINTS = []
+LLM_BREAKER_THRESHOLD = 3         # error ติดกันกี่ครั้งจึงพัก endpoint นั้น
+LLM_BREAKER_COOLDOWN = 10.0       # พักกี่วินาทีก่อนลองส่งใหม่ 1 request
+
+# 👁️ Screen change detection: ข้ามงาน vision เมื่อหน้าจอไม่เปลี่ยน
+VISION_CHANGE_THRESHOLD = 6.0     # ค่าเฉลี่ยระดับเทาของ cell (16x16 px) ต่างกันเกินเท่านี้ = เปลี่ยน
+VISION_CHANGE_MIN_PERCENT = 0.1   # % พื้นที่ขั้นต่ำที่นับว่าหน้าจอเปลี่ยน (กัน cursor กระพริบ)
+
+# 🖼️ Image encoder สำหรับ vision payload (ขนาดภาพ = จำนวน image token + เวลาส่ง)
+VISION_IMAGE_ENCODER = "auto"     # "auto" | "pil" | "cv2"
+VISION_IMAGE_QUALITY = 80         # JPEG quality เริ่มต้น / สูงสุด
+VISION_IMAGE_MIN_QUALITY = 40     # ลด quality ได้ต่ำสุดเท่านี้ ก่อนจะลดความละเอียดแทน
+VISION_IMAGE_TARGET_KB = 160      # ขนาดภาพสูงสุดต่อรูป (0 = ไม่จำกัด)
+VISION_IMAGE_MAX_ENCODE_MS = 80   # เวลา encode สูงสุดที่ยอมไล่หา quality ต่อรูป
+
+# 🗺️ ขนาดภาพหน้าจอที่ส่งให้ LLM: ย่อแบบคงสัดส่วนภายในงบพิกเซล (ไม่บีบเป็น 4:3)
+VISION_MAX_PIXELS = 1_572_864     # พิกเซลรวมทุกภาพใน 1 คำถาม (= 1024x768 สองภาพ, 0 = ไม่จำกัด)
+VISION_TILE_MODE = "auto"         # "auto" | "single" | "monitors" (แยกภาพต่อจอ) | "grid" (ตัดภาพกว้างเป็นช่อง)
+VISION_TILE_MAX_ASPECT = 2.0      # ภาพ/จอที่กว้าง (หรือสูง) เกินสัดส่วนนี้ถูกตัดเป็นช่องในโหมด grid/auto
+VISION_MAX_TILES = 4              # จำนวนภาพสูงสุดต่อคำถาม
+
+# 🛰️ FrameHub: จับภาพหน้าจอครั้งเดียว แชร์ให้ preview / วิเคราะห์ / OCR / ตรวจการเปลี่ยนแปลง
+VISION_HUB_RING_SIZE = 8          # จำนวนเฟรมล่าสุดที่เก็บไว้ต่อจอ
+VISION_HUB_MAX_FPS = 15           # ความถี่สูงสุดของ producer (ตาม subscriber ที่เร็วที่สุด)
+VISION_FRAME_MAX_AGE_MS = 150     # ขอภาพหน้าจอ: เฟรมที่เก่าไม่เกินเท่านี้ใช้ซ้ำได้ (0 = จับใหม่ทุกครั้ง)
+
+# 🔤 OCR cache: ผล OCR ของภาพเดิม (perceptual hash เดิม) ใช้ซ้ำได้โดยไม่ต้องเรียก Tesseract
+OCR_CACHE_MAX_ENTRIES = 64        # จำนวนผลสูงสุด (LRU)
+OCR_CACHE_MAX_MB = 16             # ขนาดรวมโดยประมาณสูงสุด
+
+# 🔠 OCR engine: engine เปิดค้างไว้ใช้ซ้ำ (ไม่ spawn tesseract ทุกครั้ง)
+OCR_ENGINE = "auto"               # "auto" (tesserocr ถ้ามี) | "tesserocr" | "pytesseract"
+OCR_POOL_SIZE = 2                 # จำนวน engine ต่อภาษา (OCR พร้อมกันได้เท่านี้, engine ละ ~50-100MB)
+OCR_TESSDATA_DIR = None           # โฟลเดอร์ tessdata (None = ข้างๆ TESSERACT_CMD / ค่าของ tesserocr)
+
+# 🧩 OCR แบบแบ่งช่อง: จอใหญ่ OCR ทีละช่อง (ซ้อนกันเล็กน้อย) และ OCR ใหม่เฉพาะช่องที่เนื้อหาเปลี่ยน
+OCR_TILED_MIN_PIXELS = 2560 * 1440  # ภาพที่มีพิกเซลตั้งแต่เท่านี้ใช้โหมดแบ่งช่อง (0 = ปิด)
+OCR_TILE_SIZE = 640               # ขนาดช่อง (px)
+OCR_TILE_OVERLAP = 96             # ส่วนที่ซ้อนกันระหว่างช่อง (ควรกว้างกว่าคำ/ปุ่มที่ยาวที่สุด)
+
+# 🧵 OCR หลาย process: ภาพเดียวแบ่งเป็นแถบ/ช่อง OCR พร้อมกันหลายคอร์ (engine ละ process ~50-100MB)
+OCR_PARALLEL = False              # เปิดใช้ (ต้องมีอย่างน้อย 3 คอร์)
+OCR_PARALLEL_WORKERS = None       # จำนวน process (None = จำนวนคอร์ - 1)
+OCR_PARALLEL_MODE = "bands"       # "bands" (แถบแนวนอนเต็มความกว้าง) | "tiles" (ช่องสี่เหลี่ยม)
+OCR_PARALLEL_TILE = 360           # ความสูงแถบ / ขนาดช่อง (px) ใช้ OCR_TILE_OVERLAP เป็นส่วนที่ซ้อนกัน
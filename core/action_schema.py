@@ -0,0 +1,173 @@
+# core/action_schema.py
+# -------------------------
+# Action schema: โครงสร้างคำสั่ง automation ที่ CommandParser ส่งให้ AutomationExecutor
+# - ACTION_JSON_SCHEMA: JSON schema สำหรับ response_format ของ LM Studio
+#   (โมเดลถูกบังคับให้ตอบ JSON ตาม schema -> ไม่ต้องหา "{" ในข้อความอีก)
+# - Action / Target: โมเดลแบบ typed ตรวจ field ที่จำเป็นของแต่ละ type
+# -------------------------
+
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Union
+
+ACTION_TYPES = ("click", "type", "press", "scroll", "move", "launch", "multi")
+
+# type พิเศษเมื่อโมเดลไม่เข้าใจคำสั่ง
+CANNOT_PARSE = "cannot_parse"
+
+# field ที่ต้องมีของแต่ละ type (ตรงกับที่ AutomationExecutor ใช้)
+REQUIRED_FIELDS = {
+    "click": ("target",),
+    "type": ("content",),
+    "press": ("keys",),
+    "scroll": ("amount",),
+    "move": ("target",),
+    "launch": ("app",),
+    "multi": ("steps",),
+}
+
+_TARGET_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "by": {"type": "string", "enum": ["text", "image", "coords"]},
+        "value": {
+            "anyOf": [
+                {"type": "string"},
+                {"type": "array", "items": {"type": "integer"}, "minItems": 2, "maxItems": 2},
+            ]
+        },
+    },
+    "required": ["by", "value"],
+}
+
+_STEP_PROPERTIES = {
+    "type": {"type": "string", "enum": list(ACTION_TYPES[:-1])},
+    "target": _TARGET_SCHEMA,
+    "app": {"type": "string"},
+    "url": {"type": "string"},
+    "button": {"type": "string", "enum": ["left", "right", "middle"]},
+    "content": {"type": "string"},
+    "keys": {"type": "array", "items": {"type": "string"}},
+    "amount": {"type": "integer"},
+    "confirm": {"type": "boolean"},
+}
+
+# multi ซ้อนได้ชั้นเดียว (grammar ของ llama.cpp ไม่รองรับ schema แบบ recursive)
+ACTION_JSON_SCHEMA = {
+    "type": "object",
+    "properties": dict(
+        _STEP_PROPERTIES,
+        type={"type": "string", "enum": list(ACTION_TYPES) + [CANNOT_PARSE]},
+        steps={
+            "type": "array",
+            "items": {"type": "object", "properties": _STEP_PROPERTIES, "required": ["type"]},
+        },
+    ),
+    "required": ["type"],
+}
+
+
+class ActionValidationError(ValueError):
+    """JSON ที่ได้มาไม่ตรงกับ action schema"""
+
+
+@dataclass
+class Target:
+    by: str
+    value: Union[str, List[int]]
+
+    @classmethod
+    def from_dict(cls, data: Any) -> "Target":
+        if not isinstance(data, dict):
+            raise ActionValidationError("target ต้องเป็น object")
+        by = data.get("by")
+        value = data.get("value")
+        if by == "coords":
+            if (not isinstance(value, (list, tuple)) or len(value) != 2
+                    or not all(isinstance(v, (int, float)) for v in value)):
+                raise ActionValidationError("target coords ต้องเป็น [x, y]")
+            value = [int(v) for v in value]
+        elif by in ("text", "image"):
+            if not isinstance(value, str) or not value.strip():
+                raise ActionValidationError(f"target {by} ต้องเป็นข้อความ")
+        else:
+            raise ActionValidationError(f"target.by ไม่รู้จัก: {by}")
+        return cls(by=by, value=value)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"by": self.by, "value": self.value}
+
+
+@dataclass
+class Action:
+    type: str
+    target: Optional[Target] = None
+    app: Optional[str] = None
+    url: Optional[str] = None
+    button: Optional[str] = None
+    content: Optional[str] = None
+    keys: List[str] = field(default_factory=list)
+    amount: Optional[int] = None
+    confirm: bool = False
+    steps: List["Action"] = field(default_factory=list)
+
+    @classmethod
+    def from_dict(cls, data: Any, allow_multi: bool = True) -> "Action":
+        """แปลง + ตรวจ dict จาก LLM (โยน ActionValidationError ถ้าไม่ถูกต้อง)"""
+        if not isinstance(data, dict):
+            raise ActionValidationError("action ต้องเป็น object")
+        action_type = data.get("type")
+        if action_type not in ACTION_TYPES or (action_type == "multi" and not allow_multi):
+            raise ActionValidationError(f"type ไม่รองรับ: {action_type}")
+
+        button = data.get("button")
+        if button is not None and button not in ("left", "right", "middle"):
+            raise ActionValidationError(f"button ไม่รู้จัก: {button}")
+        keys = data.get("keys") or []
+        if not isinstance(keys, list) or not all(isinstance(k, str) for k in keys):
+            raise ActionValidationError("keys ต้องเป็น list ของข้อความ")
+        amount = data.get("amount")
+        if amount is not None and (isinstance(amount, bool) or not isinstance(amount, (int, float))):
+            raise ActionValidationError("amount ต้องเป็นตัวเลข")
+
+        action = cls(
+            type=action_type,
+            target=Target.from_dict(data["target"]) if data.get("target") else None,
+            app=data.get("app") or None,
+            url=data.get("url") or None,
+            button=button,
+            content=data.get("content"),
+            keys=[k.lower() for k in keys],
+            amount=int(amount) if amount is not None else None,
+            confirm=bool(data.get("confirm", False)),
+            steps=[cls.from_dict(step, allow_multi=False) for step in data.get("steps") or []],
+        )
+
+        for name in REQUIRED_FIELDS[action_type]:
+            value = getattr(action, name)
+            if value is None or value == [] or value == "":
+                raise ActionValidationError(f"{action_type} ต้องมี {name}")
+        return action
+
+    def to_dict(self) -> Dict[str, Any]:
+        """dict สำหรับ AutomationExecutor (ตัด field ที่ว่างออก)"""
+        result: Dict[str, Any] = {"type": self.type}
+        if self.target is not None:
+            result["target"] = self.target.to_dict()
+        for name in ("app", "url", "button", "content", "amount"):
+            value = getattr(self, name)
+            if value is not None:
+                result[name] = value
+        if self.keys:
+            result["keys"] = list(self.keys)
+        if self.confirm:
+            result["confirm"] = True
+        if self.steps:
+            result["steps"] = [step.to_dict() for step in self.steps]
+        return result
+
+
+def parse_action(data: Any) -> Action:
+    """dict -> Action (โยน ActionValidationError ถ้าโมเดลตอบว่า cannot_parse หรือ field ไม่ครบ)"""
+    if isinstance(data, dict) and (data.get("type") == CANNOT_PARSE or data.get("error")):
+        raise ActionValidationError(CANNOT_PARSE)
+    return Action.from_dict(data)
@@ -0,0 +1,141 @@
+# core/async_llm_bridge.py
+# -------------------------
+# AsyncLLMBridge: สะพานระหว่าง AsyncLLMClient (asyncio) กับ Qt
+# - รัน asyncio event loop เดียวใน background thread
+# - Qt slot / hotkey callback เรียก submit แล้วได้ request_id กลับทันที (ไม่บล็อก)
+# - ผลลัพธ์ส่งกลับเป็น pyqtSignal (Qt จัดการข้าม thread ให้อัตโนมัติ)
+# -------------------------
+
+import asyncio
+import itertools
+import threading
+from typing import Any, Dict, List, Optional
+
+from PyQt6.QtCore import QObject, pyqtSignal
+
+from core.async_llm_client import AsyncLLMClient
+from core.llm_client import CANCELLED_REPLY
+
+
+class AsyncLLMBridge(QObject):
+    """
+    ใช้งาน:
+        bridge = AsyncLLMBridge(get_router().for_task(TASK_CHAT))
+        bridge.result_ready.connect(lambda rid, text: ...)
+        rid = bridge.ask("สวัสดี")
+    คำตอบที่ขึ้นต้นด้วย "[LLM ..." (error / busy / ถูกยกเลิก) ส่งทาง failed แทน result_ready
+    """
+
+    result_ready = pyqtSignal(int, str)     # request_id, คำตอบเต็ม
+    partial_ready = pyqtSignal(int, str)    # request_id, ข้อความสะสม (เฉพาะ stream)
+    failed = pyqtSignal(int, str)           # request_id, error
+
+    def __init__(self, llm: Any = None, max_in_flight: int = None):
+        super().__init__()
+        self._llm = llm
+        self._max_in_flight = max_in_flight
+        self._client: Optional[AsyncLLMClient] = None
+        self._ids = itertools.count(1)
+        self._futures: Dict[int, Any] = {}
+        self._lock = threading.Lock()
+
+        self._loop = asyncio.new_event_loop()
+        self._ready = threading.Event()
+        self._thread = threading.Thread(target=self._run_loop, daemon=True, name="async-llm-bridge")
+        self._thread.start()
+        self._ready.wait()
+
+    def _run_loop(self):
+        asyncio.set_event_loop(self._loop)
+        # semaphore ต้องสร้างใน loop ที่จะใช้งาน
+        self._client = AsyncLLMClient(self._llm, max_in_flight=self._max_in_flight)
+        self._ready.set()
+        self._loop.run_forever()
+
+    @property
+    def client(self) -> AsyncLLMClient:
+        return self._client
+
+    # -------------------------
+    # ส่งงานเข้า loop
+    # -------------------------
+    def _submit(self, coro_factory) -> int:
+        request_id = next(self._ids)
+
+        async def runner():
+            result = await coro_factory(request_id)
+            if result.startswith("[LLM"):
+                self.failed.emit(request_id, result)
+            else:
+                self.result_ready.emit(request_id, result)
+
+        def done(future):
+            # เรียกทุกกรณี (จบ / error / ถูกยกเลิกก่อน runner เริ่ม) -> ไม่มี request ค้างสถานะ pending
+            with self._lock:
+                self._futures.pop(request_id, None)
+            if future.cancelled():
+                self.failed.emit(request_id, CANCELLED_REPLY)
+            elif future.exception() is not None:
+                self.failed.emit(request_id, f"[LLM ERROR] {future.exception()}")
+
+        with self._lock:
+            future = asyncio.run_coroutine_threadsafe(runner(), self._loop)
+            self._futures[request_id] = future
+        future.add_done_callback(done)
+        return request_id
+
+    def _submit_stream(self, stream_factory) -> int:
+        async def consume(request_id):
+            stream = stream_factory()
+            async for _ in stream:
+                self.partial_ready.emit(request_id, stream.text)
+            if stream.cancelled:
+                return CANCELLED_REPLY
+            return stream.error or stream.text
+
+        return self._submit(consume)
+
+    def ask(self, text: str, history: Optional[List[Dict[str, str]]] = None, **kwargs) -> int:
+        return self._submit(lambda _rid: self._client.ask(text, history, **kwargs))
+
+    def ask_with_image(self, prompt_text: str, image_data_uri: Any,
+                       history: Optional[List[Dict[str, str]]] = None, **kwargs) -> int:
+        return self._submit(lambda _rid: self._client.ask_with_image(prompt_text, image_data_uri, history, **kwargs))
+
+    def ask_multimodal(self, messages: List[Dict[str, Any]], **kwargs) -> int:
+        return self._submit(lambda _rid: self._client.ask_multimodal(messages, **kwargs))
+
+    def ask_stream(self, text: str, history: Optional[List[Dict[str, str]]] = None,
+                   priority: Optional[str] = None) -> int:
+        return self._submit_stream(lambda: self._client.ask_stream(text, history, priority=priority))
+
+    def ask_with_image_stream(self, prompt_text: str, image_data_uri: Any,
+                              history: Optional[List[Dict[str, str]]] = None,
+                              priority: Optional[str] = None) -> int:
+        return self._submit_stream(
+            lambda: self._client.ask_with_image_stream(prompt_text, image_data_uri, history, priority=priority)
+        )
+
+    def is_pending(self, request_id: int) -> bool:
+        with self._lock:
+            return request_id in self._futures
+
+    def cancel(self, request_id: int) -> bool:
+        """ยกเลิก request (stream จะปิด connection ทันที)"""
+        with self._lock:
+            future = self._futures.get(request_id)
+        if future is None:
+            return False
+        return future.cancel()
+
+    def shutdown(self):
+        """ยกเลิกงานที่ค้างและหยุด event loop"""
+        if not self._loop.is_running():
+            return
+        with self._lock:
+            futures = list(self._futures.values())
+        for future in futures:
+            future.cancel()
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join(timeout=2.0)
+        self._client.close()
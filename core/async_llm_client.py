@@ -0,0 +1,174 @@
+# core/async_llm_client.py
+# -------------------------
+# AsyncLLMClient: หน้า asyncio ของ LLMClient / TaskClient
+# - API เหมือน LLMClient: ask / ask_with_image / ask_multimodal + *_stream
+# - ไม่มี HTTP stack ของตัวเอง: ทุก request วิ่งผ่าน client ตัวเดิม
+#   (scheduler / response cache / single-flight / endpoint pool / router fallback ครบ)
+#   โดยรันใน thread pool ขนาด max_in_flight
+# - จำกัดจำนวน request ที่วิ่งพร้อมกันด้วย asyncio.Semaphore (max_in_flight)
+#   ทำให้ event loop เดียวขับ chat + parser + live vision ได้โดยไม่ต้องมี thread ต่อ request
+# -------------------------
+
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional
+
+try:
+    from config import LLM_MAX_IN_FLIGHT
+except Exception:
+    LLM_MAX_IN_FLIGHT = 4
+
+# next() ของ stream คืนค่านี้เมื่อวนจบ (StopIteration ข้าม Future ไม่ได้)
+_END = object()
+
+
+class AsyncLLMStream:
+    """
+    Async iterator ของ delta ข้อความ (ห่อ LLMStream ฝั่ง sync)
+    - async for delta in stream: ...
+    - cancel(): หยุดและปิด connection (เรียกจาก thread ไหนก็ได้)
+    - text / ttft / total_time / error / finish_reason อ่านจาก stream จริง
+    """
+
+    def __init__(self, client: "AsyncLLMClient", factory: Callable[[], Any]):
+        self._client = client
+        self._factory = factory
+        self._stream = None
+        self._cancelled = False
+        self._started = False
+
+    @property
+    def text(self) -> str:
+        return self._stream.text if self._stream is not None else ""
+
+    @property
+    def ttft(self) -> Optional[float]:
+        return getattr(self._stream, "ttft", None)
+
+    @property
+    def total_time(self) -> Optional[float]:
+        return getattr(self._stream, "total_time", None)
+
+    @property
+    def error(self) -> Optional[str]:
+        return getattr(self._stream, "error", None)
+
+    @property
+    def finish_reason(self) -> Optional[str]:
+        return getattr(self._stream, "finish_reason", None)
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancelled or bool(getattr(self._stream, "cancelled", False))
+
+    def cancel(self):
+        self._cancelled = True
+        if self._stream is not None:
+            self._stream.cancel()
+
+    def __aiter__(self) -> AsyncIterator[str]:
+        if self._started:
+            raise RuntimeError("AsyncLLMStream ใช้วนได้ครั้งเดียว")
+        self._started = True
+        return self._iter_deltas()
+
+    async def _iter_deltas(self) -> AsyncIterator[str]:
+        executor = self._client._executor
+        async with self._client._semaphore:
+            if self._cancelled:
+                return
+            # สร้าง stream ตอนได้ slot (pool.acquire / single-flight เกิดตรงนี้)
+            self._stream = self._factory()
+            iterator = iter(self._stream)
+            pending = None
+            finished = False
+            try:
+                while not self._cancelled:
+                    pending = executor.submit(next, iterator, _END)
+                    delta = await asyncio.wrap_future(pending)
+                    if delta is _END:
+                        finished = True
+                        return
+                    yield delta
+                finished = True
+            finally:
+                if not finished:
+                    # ถูกยกเลิก / เลิกอ่านกลางทาง -> ปิด connection แล้วปิด generator
+                    # (ถ้า next() ยังวิ่งอยู่ต้องรอให้คืนก่อน ไม่งั้น close() จะชนกับ generator ที่กำลังทำงาน)
+                    self._stream.cancel()
+                    if pending is None:
+                        iterator.close()
+                    else:
+                        pending.add_done_callback(lambda _: iterator.close())
+
+    async def collect(self) -> str:
+        """วนจนจบแล้วคืนข้อความเต็ม"""
+        async for _ in self:
+            pass
+        return self.text
+
+
+class AsyncLLMClient:
+    """
+    ใช้งาน:
+        client = AsyncLLMClient(get_router().for_task(TASK_CHAT))
+        reply = await client.ask("สวัสดี")
+        async for delta in client.ask_stream("เล่านิทาน"):
+            ...
+    """
+
+    def __init__(self, llm: Any = None, max_in_flight: int = None):
+        if llm is None:
+            from core.llm_client import LLMClient
+            llm = LLMClient()
+        self.llm = llm
+        self.max_in_flight = max_in_flight or LLM_MAX_IN_FLIGHT
+        self._semaphore = asyncio.Semaphore(self.max_in_flight)
+        self._executor = ThreadPoolExecutor(max_workers=self.max_in_flight, thread_name_prefix="async-llm")
+
+    async def _call(self, method: str, *args, llm: Any = None, **kwargs) -> str:
+        """
+        เรียกเมธอดของ client ตัว sync ใน thread pool
+        - llm: ใช้ client/TaskClient ตัวอื่นเฉพาะครั้งนี้ (None = self.llm) แต่ยังนับ in-flight รวมกัน
+        ถ้า coroutine ถูกยกเลิก request จะวิ่งต่อจนจบเบื้องหลัง (ผลถูกทิ้ง) -> ใช้ stream ถ้าต้องหยุดกลางทาง
+        """
+        target = llm or self.llm
+        loop = asyncio.get_running_loop()
+        async with self._semaphore:
+            return await loop.run_in_executor(
+                self._executor, lambda: getattr(target, method)(*args, **kwargs)
+            )
+
+    async def ask(self, text: str, history: Optional[List[Dict[str, str]]] = None, **kwargs) -> str:
+        return await self._call("ask", text, history, **kwargs)
+
+    async def ask_with_image(self, prompt_text: str, image_data_uri: Any,
+                             history: Optional[List[Dict[str, str]]] = None, **kwargs) -> str:
+        return await self._call("ask_with_image", prompt_text, image_data_uri, history, **kwargs)
+
+    async def ask_multimodal(self, messages: List[Dict[str, Any]], **kwargs) -> str:
+        return await self._call("ask_multimodal", messages, **kwargs)
+
+    async def ask_structured(self, messages: List[Dict[str, Any]], schema: Dict[str, Any], **kwargs) -> str:
+        return await self._call("ask_structured", messages, schema, **kwargs)
+
+    def ask_stream(self, text: str, history: Optional[List[Dict[str, str]]] = None,
+                   priority: Optional[str] = None) -> AsyncLLMStream:
+        return AsyncLLMStream(self, lambda: self.llm.ask_stream(text, history, priority=priority))
+
+    def ask_with_image_stream(self, prompt_text: str, image_data_uri: Any,
+                              history: Optional[List[Dict[str, str]]] = None,
+                              priority: Optional[str] = None) -> AsyncLLMStream:
+        return AsyncLLMStream(
+            self, lambda: self.llm.ask_with_image_stream(prompt_text, image_data_uri, history, priority=priority)
+        )
+
+    def ask_multimodal_stream(self, messages: List[Dict[str, Any]], priority: Optional[str] = None) -> AsyncLLMStream:
+        return AsyncLLMStream(self, lambda: self.llm.ask_multimodal_stream(messages, priority=priority))
+
+    def cancel_all(self, priority: Optional[str] = None) -> int:
+        return self.llm.cancel_all(priority)
+
+    def close(self):
+        """ปิด thread pool (request ที่วิ่งอยู่จะวิ่งต่อจนจบ)"""
+        self._executor.shutdown(wait=False)
@@ -10,6 +10,7 @@ from core.keyboard_mouse_controller import KeyboardMouseController
 from core.tts_client import TTSClient
 from core.stt_client import STTClient
 from core.app_launcher import AppLauncher
+from core.vision_share_manager import invalidate_frames
 
 
 class AutomationExecutor:
@@ -64,13 +65,15 @@ class AutomationExecutor:
                 if target["by"] == "coords":
                     x, y = target["value"]
                 elif target["by"] == "text":
-                    element = self.km.detector.find_element_by_text(target["value"])
-                    if not element:
+                    point = self.km.locate_text(target["value"])
+                    if point is None:
                         return {"ok": False, "message": "target_not_found"}
-                    x, y = self.km.detector.get_element_center(element)
+                    x, y = point
                 else:
                     return {"ok": False, "message": "unknown_target_type"}
                 self.km.mouse.click(x, y, button=action.get("button", "left"))
+                # หน้าจอเปลี่ยนหลังคลิก -> ภาพที่ cache ไว้ใช้ไม่ได้แล้ว
+                invalidate_frames()
                 time.sleep(0.2)
                 return {"ok": True, "message": f"clicked {x},{y}"}
 
@@ -83,24 +86,26 @@ class AutomationExecutor:
                         x, y = target["value"]
                         self.km.mouse.click(x, y)
                     elif target["by"] == "text":
-                        element = self.km.detector.find_element_by_text(target["value"])
-                        if element:
-                            x, y = self.km.detector.get_element_center(element)
-                            self.km.mouse.click(x, y)
+                        point = self.km.locate_text(target["value"])
+                        if point is not None:
+                            self.km.mouse.click(*point)
                     time.sleep(0.2)
                 self.km.keyboard.type_text(txt)
+                invalidate_frames()
                 return {"ok": True, "message": f"typed {len(txt)} chars"}
 
             # ---------------------- Press Keys ----------------------
             elif t == "press":
                 keys = action.get("keys", [])
                 self.km.keyboard.press_keys(keys)
+                invalidate_frames()
                 return {"ok": True, "message": f"pressed {'+'.join(keys)}"}
 
             # ---------------------- Scroll ----------------------
             elif t == "scroll":
                 amt = action.get("amount", 100)
                 self.km.mouse.scroll(amt)
+                invalidate_frames()
                 return {"ok": True, "message": f"scrolled {amt}"}
 
             # ---------------------- Move ----------------------
@@ -111,13 +116,14 @@ class AutomationExecutor:
                 if target["by"] == "coords":
                     x, y = target["value"]
                 elif target["by"] == "text":
-                    element = self.km.detector.find_element_by_text(target["value"])
-                    if not element:
+                    point = self.km.locate_text(target["value"])
+                    if point is None:
                         return {"ok": False, "message": "target_not_found"}
-                    x, y = self.km.detector.get_element_center(element)
+                    x, y = point
                 else:
                     return {"ok": False, "message": "unknown_target_type"}
                 self.km.mouse.move_to(x, y)
+                invalidate_frames()
                 return {"ok": True, "message": f"moved to {x},{y}"}
 
             # ---------------------- Launch App / URL ----------------------
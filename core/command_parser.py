@@ -6,8 +6,23 @@
 
 import json
 import re
+import time
 from typing import Optional, Tuple, Any, Dict  # 🔥 เพิ่ม Dict ตรงนี้
-from core.llm_client import LLMClient
+from core.llm_client import LLMClient, is_unsupported_format, reply_status
+from core.llm_cache import make_cache_key
+from core.action_schema import ACTION_JSON_SCHEMA, ActionValidationError, CANNOT_PARSE, parse_action
+
+try:
+    from config import PARSER_STRUCTURED_OUTPUT, PARSER_MAX_TOKENS, PARSER_STOP
+except Exception:
+    PARSER_STRUCTURED_OUTPUT = True
+    PARSER_MAX_TOKENS = 256
+    PARSER_STOP = ["```", "\n\n\n"]
+
+try:
+    from config import PARSER_STRUCTURED_RETRY
+except Exception:
+    PARSER_STRUCTURED_RETRY = 600
 
 # 🔥 AI-powered System Prompt (เข้าใจทั้งคำสั่งเปิด app และ automation)
 PARSER_SYSTEM_PROMPT = """
@@ -40,10 +55,24 @@ Rules:
 - If you cannot understand, output: {"error":"cannot_parse"}
 """
 
+# ⚡ System prompt แบบสั้นสำหรับโหมด structured output
+# โครงสร้าง JSON ถูกบังคับด้วย schema แล้ว จึงเหลือแค่กฎการตีความคำสั่ง
+PARSER_COMPACT_PROMPT = (
+    "Convert the user's desktop command (Thai or English) into one JSON action. "
+    "open/launch/เปิด/ไปที่ -> type launch; a website -> app \"chrome\" plus url. "
+    "Several steps -> type multi with steps. Unsure -> confirm true. "
+    f"Not understandable -> type {CANNOT_PARSE}."
+)
+
+
 class CommandParser:
-    def __init__(self, llm_client: Optional[LLMClient] = None):
+    def __init__(self, llm_client: Optional[LLMClient] = None, structured_output: bool = None):
         self.llm = llm_client or LLMClient()
         self.hybrid_mode = True  # เปิดใช้งาน Hybrid Mode
+        # ใช้ response_format (JSON schema) ถ้า server รองรับ, ไม่งั้นถอยไปโหมดข้อความอิสระ
+        self.structured_output = PARSER_STRUCTURED_OUTPUT if structured_output is None else structured_output
+        # server บอกว่าไม่รองรับ response_format -> พักโหมด structured ถึงเวลานี้ (แล้วลองใหม่)
+        self._structured_retry_at = 0.0
 
     def _try_rule_based_parse(self, utterance: str) -> Optional[Dict[str, Any]]:
         """
@@ -148,18 +177,84 @@ class CommandParser:
         """
         ใช้ AI สำหรับคำสั่งที่ซับซ้อน
         """
-        system = PARSER_SYSTEM_PROMPT
         user = self._build_prompt(utterance, ocr_text, hint_image_data_uri)
+        if self.structured_output and time.time() >= self._structured_retry_at:
+            result = self._parse_structured(user)
+            if result is not None:
+                return result
+        return self._parse_freeform(user)
 
-        history = [
-            {"role": "system", "content": system},
+    def _parse_structured(self, user: str) -> Optional[Tuple[bool, Any]]:
+        """
+        ⚡ โหมด structured output: system prompt สั้น + JSON schema + จำกัด max_tokens
+        คืน None ถ้า server ปฏิเสธ request (400 / 422) ให้ถอยไปโหมดข้อความอิสระ
+        - error บอกว่าไม่รองรับ response_format -> พักโหมดนี้ PARSER_STRUCTURED_RETRY วินาที
+        - 400 อื่นๆ -> ถอยเฉพาะรอบนี้
+        """
+        messages = [
+            {"role": "system", "content": PARSER_COMPACT_PROMPT},
             {"role": "user", "content": user}
         ]
+        rejected = []
 
-        try:
-            raw = self.llm.ask(user, history=history)
-        except Exception as e:
-            return False, {"error": f"llm_error: {e}"}
+        def ask():
+            raw = self.llm.ask_structured(
+                messages, ACTION_JSON_SCHEMA, schema_name="desktop_action",
+                max_tokens=PARSER_MAX_TOKENS, stop=PARSER_STOP, temperature=0,
+                cache=False, priority="parser"
+            )
+            if reply_status(raw) in (400, 422):
+                rejected.append(raw)
+            return raw
+
+        result = self._cached_parse("structured", messages, ask)
+        if not rejected:
+            return result
+        if is_unsupported_format(rejected[0]):
+            print(f"[CommandParser] ⚠️ server ไม่รองรับ response_format → ใช้โหมดข้อความอิสระ "
+                  f"(ลองใหม่ใน {PARSER_STRUCTURED_RETRY:.0f}s)")
+            self._structured_retry_at = time.time() + PARSER_STRUCTURED_RETRY
+        else:
+            print(f"[CommandParser] ⚠️ structured ถูกปฏิเสธ ({reply_status(rejected[0])}) → ใช้โหมดข้อความอิสระรอบนี้")
+        return None
+
+    def _parse_freeform(self, user: str) -> Tuple[bool, Any]:
+        """โหมดเดิม: PARSER_SYSTEM_PROMPT เต็ม + ดึง JSON ออกจากข้อความ"""
+        messages = [
+            {"role": "system", "content": PARSER_SYSTEM_PROMPT},
+            {"role": "user", "content": user}
+        ]
+        return self._cached_parse(
+            "freeform", messages,
+            lambda: self.llm.ask_multimodal(messages, cache=False, priority="parser", temperature=0)
+        )
+
+    def _cached_parse(self, mode: str, messages, ask) -> Tuple[bool, Any]:
+        """
+        prompt เดิม -> action เดิม (คำสั่งพูดซ้ำบ่อย): cache เฉพาะ action ที่ผ่าน _validate แล้ว
+        (ถาม LLM ที่ temperature 0 เสมอ คำตอบที่ผิดรูปแบบ / error ไม่ถูกเก็บ จึงไม่ถูกเล่นซ้ำจาก cache)
+        """
+        cache = getattr(self.llm, "cache", None)
+        key = None
+        if cache is not None:
+            key = make_cache_key(self.llm.model, messages, 0, PARSER_MAX_TOKENS,
+                                 extra={"parser": mode, "stop": PARSER_STOP})
+            cached = cache.get(key)
+            if cached is not None:
+                try:
+                    return True, parse_action(json.loads(cached)).to_dict()
+                except (ValueError, ActionValidationError):
+                    pass  # รูปแบบ action เปลี่ยนไปแล้ว -> ถามใหม่
+
+        ok, result = self._validate(ask())
+        if ok and key is not None:
+            cache.put(key, json.dumps(result, ensure_ascii=False))
+        return ok, result
+
+    def _validate(self, raw: str) -> Tuple[bool, Any]:
+        """แปลงคำตอบเป็น dict แล้วตรวจกับ action schema"""
+        if raw.startswith(("[LLM ERROR]", "[LLM BUSY]", "[LLM CANCELLED]")):
+            return False, {"error": f"llm_error: {raw}"}
 
         # 🔍 ดึงเฉพาะ JSON ออกมาจากข้อความตอบกลับ
         json_text = self._extract_json(raw)
@@ -171,10 +266,14 @@ class CommandParser:
         except Exception as e:
             return False, {"error": f"invalid_json: {e}", "raw": json_text}
 
-        if "type" not in parsed:
-            return False, {"error": "missing_type", "parsed": parsed}
+        try:
+            action = parse_action(parsed)
+        except ActionValidationError as e:
+            if str(e) == CANNOT_PARSE:
+                return False, {"error": CANNOT_PARSE}
+            return False, {"error": f"invalid_action: {e}", "parsed": parsed}
 
-        return True, parsed
+        return True, action.to_dict()
 
     def _extract_json(self, text: str) -> Optional[str]:
         """
@@ -0,0 +1,111 @@
+# core/continuous_vision_system.py
+# -------------------------
+# ContinuousVisionSystem: วิเคราะห์หน้าจอเป็นระยะ (ทุก N วินาที)
+# - ขอภาพจาก FrameHub ทุกรอบ แต่ถาม AI เฉพาะเมื่อหน้าจอเปลี่ยนจากภาพที่วิเคราะห์ครั้งก่อน
+# - change_detected(percent, description) -> main.py แสดง % ที่เปลี่ยน
+# - analysis_ready(text) -> ผลวิเคราะห์จาก AI
+# -------------------------
+
+import time
+from threading import Event, Thread
+
+from PyQt6.QtCore import QObject, pyqtSignal
+
+from core.frame_change_detector import FrameChangeDetector
+from core.image_encoder import get_encoder
+from core.llm_client import LLMClient
+from core.vision_share_manager import get_frame_hub
+
+ANALYSIS_PROMPT = "อธิบายสิ่งที่เปลี่ยนไปหรือสิ่งที่เห็นบนหน้าจอนี้อย่างสั้นๆ ภาษาไทย (ไม่เกิน 80 คำ)"
+
+
+class ContinuousVisionSystem(QObject):
+    """วิเคราะห์หน้าจอต่อเนื่องใน background thread (ข้ามรอบที่หน้าจอไม่เปลี่ยน)"""
+
+    analysis_ready = pyqtSignal(str)
+    change_detected = pyqtSignal(float, str)
+    status_updated = pyqtSignal(str)
+
+    def __init__(self, llm_client: LLMClient = None, monitor=1, detector: FrameChangeDetector = None):
+        super().__init__()
+        self.llm = llm_client or LLMClient()
+        self.monitor = monitor
+        self.hub = get_frame_hub(monitor)
+        self.detector = detector or FrameChangeDetector()
+
+        self.interval = 5.0
+        self.is_running = False
+        self._stop = Event()
+        self._thread = None
+
+        # สถิติ
+        self.rounds = 0
+        self.analysis_count = 0
+        self.skipped = 0
+
+        print("[ContinuousVision] ✅ เตรียมระบบวิเคราะห์หน้าจอต่อเนื่อง")
+
+    def start(self, interval_seconds=5):
+        if self.is_running:
+            print("[ContinuousVision] ⚠️ กำลังทำงานอยู่แล้ว")
+            return
+
+        self.interval = max(1.0, float(interval_seconds))
+        self.is_running = True
+        self._stop.clear()
+        self.detector.reset()
+        self._thread = Thread(target=self._loop, daemon=True)
+        self._thread.start()
+        print(f"[ContinuousVision] 🟢 เริ่มวิเคราะห์ทุก {self.interval:.0f}s")
+
+    def stop(self):
+        if not self.is_running:
+            return
+        self.is_running = False
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout=2.0)
+        print(f"[ContinuousVision] 🔴 หยุด (วิเคราะห์ {self.analysis_count} ครั้ง, ข้าม {self.skipped} รอบ)")
+
+    def _loop(self):
+        while not self._stop.is_set():
+            try:
+                self._tick()
+            except Exception as e:
+                print(f"[ContinuousVision] ❌ Error: {e}")
+            self._stop.wait(self.interval)
+
+    def _tick(self):
+        self.rounds += 1
+        # เฟรมจาก hub (ถ้า LiveVisionStream เพิ่งจับจอเดียวกันก็ใช้ซ้ำ ไม่จับใหม่)
+        frame = self.hub.get_frame()
+
+        # เทียบกับภาพที่วิเคราะห์ครั้งก่อน (ยังไม่อัปเดตภาพอ้างอิงจนกว่า AI จะวิเคราะห์สำเร็จ)
+        change = self.detector.detect(frame, update=False)
+        if not change.changed:
+            self.skipped += 1
+            return
+
+        if not change.first:
+            self.change_detected.emit(change.percent, change.describe())
+
+        image = get_encoder().encode(frame)
+        start = time.time()
+        analysis = self.llm.ask_with_image(ANALYSIS_PROMPT, image, priority="background")
+        if analysis.startswith("[LLM"):
+            print(f"[ContinuousVision] ⏭️ ข้ามการวิเคราะห์: {analysis}")
+            return
+
+        self.detector.accept(change)
+        self.analysis_count += 1
+        print(f"[ContinuousVision] 🤖 วิเคราะห์เสร็จ ({time.time() - start:.1f}s, เปลี่ยน {change.percent:.1f}%)")
+        self.analysis_ready.emit(analysis)
+
+    def get_stats(self) -> dict:
+        return {
+            "is_running": self.is_running,
+            "rounds": self.rounds,
+            "analysis_count": self.analysis_count,
+            "skipped": self.skipped,
+            "interval": self.interval,
+        }
@@ -0,0 +1,246 @@
+# core/conversation_window.py
+# -------------------------
+# ConversationWindow: จัดการ chat history ให้อยู่ใน token budget
+# - ประมาณจำนวน token (heuristic สำหรับข้อความไทย/อังกฤษปนกัน)
+# - เก็บ system prompt + turn ล่าสุดไว้ภายใน budget
+# - turn เก่าถูกพับเป็น "สรุป" (rolling summary) ด้วย LLM ใน background thread
+# - prefix ของ messages คงที่ระหว่างการพับแต่ละรอบ -> prompt cache ของ LM Studio ยัง hit
+#   (พับทีละก้อนจนเหลือ low_water ไม่ใช่เลื่อนทีละ turn)
+# -------------------------
+
+import math
+import threading
+from typing import Any, Dict, List, Optional
+
+try:
+    from config import CHAT_HISTORY_TOKEN_BUDGET, CHAT_SUMMARY_MAX_TOKENS
+except Exception:
+    CHAT_HISTORY_TOKEN_BUDGET = 3000
+    CHAT_SUMMARY_MAX_TOKENS = 300
+
+# ภาพ 1 รูปใน Gemma3 ใช้ประมาณ 256 tokens
+IMAGE_TOKENS = 256
+# overhead ของ chat template ต่อ 1 message (role, ตัวคั่น)
+MESSAGE_OVERHEAD_TOKENS = 4
+
+SUMMARY_PREFIX = "สรุปบทสนทนาก่อนหน้า:"
+
+SUMMARY_PROMPT = (
+    "สรุปบทสนทนาต่อไปนี้ให้สั้นและครบใจความ เก็บข้อเท็จจริง ชื่อ ตัวเลข "
+    "และสิ่งที่ผู้ใช้ต้องการไว้ ตอบเป็นภาษาไทย ไม่เกิน {max_words} คำ\n\n"
+    "{previous}บทสนทนา:\n{dialogue}"
+)
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    ประมาณจำนวน token แบบไม่ต้องใช้ tokenizer จริง
+    - อักษรไทย: ไม่มีช่องว่างระหว่างคำ tokenizer มักตัดได้ ~2 ตัวอักษร/token
+    - อักษรอื่น (อังกฤษ ตัวเลข สัญลักษณ์): ~4 ตัวอักษร/token
+    """
+    if not text:
+        return 0
+    thai = 0
+    other = 0
+    for ch in text:
+        if "\u0e00" <= ch <= "\u0e7f":
+            thai += 1
+        elif not ch.isspace():
+            other += 1
+    return math.ceil(thai / 2.0 + other / 4.0)
+
+
+def estimate_message_tokens(message: Dict[str, Any]) -> int:
+    """ประมาณ token ของ 1 message (รองรับ content แบบ multimodal)"""
+    content = message.get("content", "")
+    if isinstance(content, list):
+        tokens = 0
+        for part in content:
+            if part.get("type") == "image_url":
+                tokens += IMAGE_TOKENS
+            else:
+                tokens += estimate_tokens(part.get("text", ""))
+    else:
+        tokens = estimate_tokens(str(content))
+    return tokens + MESSAGE_OVERHEAD_TOKENS
+
+
+class ConversationWindow:
+    """
+    ใช้งาน:
+        window = ConversationWindow(system_prompt, llm=llm)
+        reply = llm.ask(text, history=window.build())
+        window.add_turn(text, reply)
+    """
+
+    def __init__(self, system_prompt: str, llm=None, budget_tokens: int = None, low_water: float = 0.6,
+                 summary_max_tokens: int = None, background: bool = True):
+        """
+        - budget_tokens: token สูงสุดของ history ที่จะส่ง (ไม่รวมข้อความใหม่)
+        - low_water: เมื่อเกิน budget จะพับ turn เก่าจนเหลือไม่เกิน budget * low_water
+        - llm: LLMClient สำหรับสร้างสรุป (None = ตัดทิ้งโดยไม่สรุป)
+        - background: สร้างสรุปใน thread แยก (ไม่บล็อกการตอบ)
+        """
+        self.system_prompt = system_prompt
+        self.llm = llm
+        self.budget_tokens = budget_tokens or CHAT_HISTORY_TOKEN_BUDGET
+        self.low_water = low_water
+        self.summary_max_tokens = summary_max_tokens or CHAT_SUMMARY_MAX_TOKENS
+        self.background = background
+
+        self.summary = ""
+        self.turns: List[Dict[str, Any]] = []
+
+        self._lock = threading.Lock()
+        self._summarizing = False
+
+    # -------------------------
+    # สร้าง / แปลงจาก list ของ messages (ใช้กับไฟล์ chat_history.json)
+    # -------------------------
+    @classmethod
+    def from_messages(cls, messages: List[Dict[str, Any]], default_system_prompt: str = "", **kwargs) -> "ConversationWindow":
+        system_prompt = default_system_prompt
+        summary = ""
+        turns = []
+        for msg in messages:
+            content = msg.get("content", "")
+            if msg.get("role") == "system":
+                if isinstance(content, str) and content.startswith(SUMMARY_PREFIX):
+                    summary = content[len(SUMMARY_PREFIX):].strip()
+                elif not turns:
+                    system_prompt = content
+                continue
+            turns.append(msg)
+
+        window = cls(system_prompt, **kwargs)
+        window.summary = summary
+        window.turns = turns
+        window._maybe_fold()
+        return window
+
+    def to_messages(self) -> List[Dict[str, Any]]:
+        """ทุกอย่างที่ยังจำอยู่ (system + summary + turns ทั้งหมด) สำหรับบันทึกลงไฟล์"""
+        with self._lock:
+            return self._prefix() + list(self.turns)
+
+    # -------------------------
+    # ใช้งานหลัก
+    # -------------------------
+    def _prefix(self) -> List[Dict[str, Any]]:
+        prefix = [{"role": "system", "content": self.system_prompt}]
+        if self.summary:
+            prefix.append({"role": "system", "content": f"{SUMMARY_PREFIX}\n{self.summary}"})
+        return prefix
+
+    def build(self) -> List[Dict[str, Any]]:
+        """
+        history ที่จะส่งให้ LLM
+        ถ้ายังเกิน budget (เช่น สรุปยังทำไม่เสร็จ) จะตัด turn เก่าสุดออกจากชุดที่ส่งชั่วคราว
+        """
+        with self._lock:
+            prefix = self._prefix()
+            turns = list(self.turns)
+
+        used = sum(estimate_message_tokens(m) for m in prefix)
+        kept = []
+        for msg in reversed(turns):
+            cost = estimate_message_tokens(msg)
+            if used + cost > self.budget_tokens and kept:
+                break
+            used += cost
+            kept.append(msg)
+        kept.reverse()
+        return prefix + kept
+
+    def add_message(self, role: str, content: Any):
+        with self._lock:
+            self.turns.append({"role": role, "content": content})
+        self._maybe_fold()
+
+    def add_turn(self, user_content: Any, assistant_content: str):
+        """เพิ่มคำถาม + คำตอบ 1 รอบ"""
+        with self._lock:
+            self.turns.append({"role": "user", "content": user_content})
+            self.turns.append({"role": "assistant", "content": assistant_content})
+        self._maybe_fold()
+
+    def token_count(self) -> int:
+        with self._lock:
+            return sum(estimate_message_tokens(m) for m in self._prefix() + self.turns)
+
+    def clear(self):
+        with self._lock:
+            self.summary = ""
+            self.turns = []
+
+    # -------------------------
+    # พับ turn เก่าเป็นสรุป
+    # -------------------------
+    def _fold_count(self) -> int:
+        """จำนวน message เก่าสุดที่ต้องพับ เพื่อให้เหลือไม่เกิน low_water (พับเป็นคู่ user/assistant)"""
+        total = sum(estimate_message_tokens(m) for m in self._prefix() + self.turns)
+        if total <= self.budget_tokens:
+            return 0
+
+        target = self.budget_tokens * self.low_water
+        count = 0
+        # เก็บ turn ล่าสุดไว้อย่างน้อย 1 คู่เสมอ
+        while count < len(self.turns) - 2 and total > target:
+            total -= estimate_message_tokens(self.turns[count])
+            count += 1
+        if count % 2 == 1 and count < len(self.turns) - 2:
+            count += 1
+        return count
+
+    def _maybe_fold(self):
+        with self._lock:
+            if self._summarizing:
+                return
+            count = self._fold_count()
+            if count == 0:
+                return
+            folded = self.turns[:count]
+            previous = self.summary
+            self._summarizing = True
+
+        if self.background and self.llm is not None:
+            threading.Thread(target=self._fold, args=(folded, previous), daemon=True).start()
+        else:
+            self._fold(folded, previous)
+
+    def _fold(self, folded: List[Dict[str, Any]], previous: str):
+        try:
+            summary = self._summarize(folded, previous)
+            with self._lock:
+                # turn ใหม่อาจถูกเพิ่มระหว่างสรุป แต่ turn ที่พับอยู่ต้นลิสต์เสมอ
+                if self.turns[:len(folded)] == folded:
+                    self.turns = self.turns[len(folded):]
+                    self.summary = summary
+            print(f"[ConversationWindow] 🗜️ พับ {len(folded)} ข้อความเป็นสรุป (เหลือ ~{self.token_count()} tokens)")
+        except Exception as e:
+            print(f"[ConversationWindow] ⚠️ สรุปไม่สำเร็จ: {e}")
+        finally:
+            with self._lock:
+                self._summarizing = False
+
+    def _summarize(self, folded: List[Dict[str, Any]], previous: str) -> str:
+        if self.llm is None:
+            return previous
+
+        lines = []
+        for msg in folded:
+            content = msg.get("content", "")
+            if isinstance(content, list):
+                content = " ".join(p.get("text", "[ภาพ]") if p.get("type") == "text" else "[ภาพ]" for p in content)
+            speaker = "ผู้ใช้" if msg.get("role") == "user" else "ผู้ช่วย"
+            lines.append(f"{speaker}: {content}")
+
+        prompt = SUMMARY_PROMPT.format(
+            max_words=self.summary_max_tokens // 2,
+            previous=f"สรุปเดิม:\n{previous}\n\n" if previous else "",
+            dialogue="\n".join(lines),
+        )
+        reply = self.llm.ask(prompt, priority="background")
+        if reply.startswith(("[LLM ERROR]", "[LLM BUSY]", "[LLM CANCELLED]")):
+            raise RuntimeError(reply)
+        return reply.strip()
@@ -0,0 +1,179 @@
+# core/frame_change_detector.py
+# -------------------------
+# FrameChangeDetector: หน้าจอเปลี่ยนไปแค่ไหน (numpy ล้วน ไม่ต้องใช้ OpenCV)
+# - ย่อภาพแบบ sample ทุก N พิกเซล -> grayscale -> ค่าเฉลี่ยต่อ cell เล็กๆ
+# - cell ที่ค่าเฉลี่ยต่างจากภาพอ้างอิงเกิน threshold = เปลี่ยน
+# - รวม cell เป็น tile (ขนาดเป็นพิกเซลจริง) -> คืน % พื้นที่ที่เปลี่ยน + รายการ tile ที่เปลี่ยน
+# ใช้ข้ามงานที่ไม่จำเป็นเมื่อหน้าจอนิ่ง (preview / ส่งภาพให้ LLM / OCR)
+# -------------------------
+
+from dataclasses import dataclass, field
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+try:
+    from config import VISION_CHANGE_THRESHOLD, VISION_CHANGE_MIN_PERCENT
+except Exception:
+    VISION_CHANGE_THRESHOLD = 6.0
+    VISION_CHANGE_MIN_PERCENT = 0.1
+
+# (left, top, width, height) ในพิกัดของภาพ
+Tile = Tuple[int, int, int, int]
+
+
+@dataclass
+class ChangeResult:
+    percent: float                                  # % ของพื้นที่ (ระดับ cell) ที่เปลี่ยน
+    tiles: List[Tile] = field(default_factory=list)  # tile ที่มีอย่างน้อย 1 cell เปลี่ยน
+    size: Tuple[int, int] = (0, 0)                   # (width, height) ของภาพที่ตรวจ
+    first: bool = False                              # ยังไม่มีภาพอ้างอิง (ถือว่าเปลี่ยนทั้งจอ)
+    # ค่าเฉลี่ยต่อ cell ของภาพที่ตรวจ (ให้ FrameChangeDetector.accept() ใช้เป็นภาพอ้างอิงโดยไม่คำนวณซ้ำ)
+    cells: Optional[np.ndarray] = field(default=None, repr=False, compare=False)
+
+    @property
+    def changed(self) -> bool:
+        return self.percent > 0
+
+    def bounds(self) -> Optional[Tile]:
+        """กรอบที่ครอบ tile ที่เปลี่ยนทั้งหมด"""
+        if not self.tiles:
+            return None
+        left = min(t[0] for t in self.tiles)
+        top = min(t[1] for t in self.tiles)
+        right = max(t[0] + t[2] for t in self.tiles)
+        bottom = max(t[1] + t[3] for t in self.tiles)
+        return left, top, right - left, bottom - top
+
+    def describe(self) -> str:
+        """ข้อความสั้นๆ บอกบริเวณที่เปลี่ยน"""
+        box = self.bounds()
+        if box is None:
+            return "ไม่มีการเปลี่ยนแปลง"
+        if self.first:
+            return "ภาพแรก"
+        left, top, width, height = box
+        return f"{len(self.tiles)} บริเวณ ในกรอบ ({left}, {top}) ขนาด {width}x{height}"
+
+
+def _as_bgra(image) -> np.ndarray:
+    """Frame / numpy (H, W, 3|4) / PIL.Image -> numpy (ไม่ copy ถ้าเป็น Frame หรือ numpy อยู่แล้ว)"""
+    if hasattr(image, "bgra"):
+        return image.bgra
+    if isinstance(image, np.ndarray):
+        return image
+    # PIL (RGB) -> สลับลำดับช่องให้เป็น BGR
+    return np.asarray(image.convert("RGB"))[:, :, ::-1]
+
+
+class FrameChangeDetector:
+    """
+    ตรวจการเปลี่ยนแปลงระหว่างเฟรมปัจจุบันกับภาพอ้างอิง
+    - detect(frame): เทียบกับภาพอ้างอิง แล้วใช้ frame นี้เป็นภาพอ้างอิงต่อ (update=False = เทียบอย่างเดียว)
+    - accept(result): ใช้ frame ที่ detect(update=False) ไปแล้วเป็นภาพอ้างอิง (เมื่อรู้ทีหลังว่าจะใช้เฟรมนั้น)
+    - ใช้ 1 ตัวต่อ consumer: capture loop เทียบเฟรมติดกัน, analysis loop เทียบกับภาพที่วิเคราะห์ล่าสุด
+    """
+
+    def __init__(self, tile_size: int = 64, sample_step: int = 4, cell: int = 4,
+                 threshold: float = None, min_percent: float = None):
+        """
+        - tile_size: ขนาด tile ที่รายงาน (พิกเซลจริง ปัดเป็นพหุคูณของ sample_step * cell)
+        - sample_step: ใช้ทุก N พิกเซล (4 = ทำงานบนภาพเล็กลง 16 เท่า)
+        - cell: ขนาด cell (หน่วยพิกเซลที่ sample แล้ว) ที่เอาค่าเฉลี่ยมาเทียบ
+        - threshold: ค่าเฉลี่ยระดับเทา (0-255) ต่างกันเกินเท่านี้ = cell เปลี่ยน
+        - min_percent: % ขั้นต่ำที่นับว่าหน้าจอเปลี่ยน (ต่ำกว่านี้ percent = 0)
+        """
+        self.sample_step = max(1, sample_step)
+        self.cell = max(1, cell)
+        self.cell_px = self.sample_step * self.cell
+        self.tile_cells = max(1, tile_size // self.cell_px)
+        self.tile_size = self.tile_cells * self.cell_px
+        self.threshold = VISION_CHANGE_THRESHOLD if threshold is None else threshold
+        self.min_percent = VISION_CHANGE_MIN_PERCENT if min_percent is None else min_percent
+
+        self._reference: Optional[np.ndarray] = None
+        self._size: Optional[Tuple[int, int]] = None
+
+        # สถิติ
+        self.frames = 0
+        self.unchanged = 0
+
+    def reset(self):
+        """ลืมภาพอ้างอิง (เฟรมถัดไปถือว่าเปลี่ยนทั้งจอ)"""
+        self._reference = None
+        self._size = None
+
+    def _cell_means(self, bgra: np.ndarray) -> np.ndarray:
+        """ค่าเฉลี่ยระดับเทาต่อ cell (rows, cols) float32"""
+        step = self.sample_step
+        sampled = bgra[::step, ::step]
+        # luma แบบจำนวนเต็ม (0.114 B + 0.587 G + 0.299 R) * 256
+        gray = (sampled[:, :, 0].astype(np.uint16) * 29
+                + sampled[:, :, 1].astype(np.uint16) * 150
+                + sampled[:, :, 2].astype(np.uint16) * 77) >> 8
+
+        # เติมขอบให้หารด้วย cell ลงตัว (ขอบขวา/ล่างของจอจะได้ถูกตรวจด้วย)
+        c = self.cell
+        pad_h = -gray.shape[0] % c
+        pad_w = -gray.shape[1] % c
+        if pad_h or pad_w:
+            gray = np.pad(gray, ((0, pad_h), (0, pad_w)), mode="edge")
+        rows, cols = gray.shape[0] // c, gray.shape[1] // c
+        return gray.reshape(rows, c, cols, c).mean(axis=(1, 3), dtype=np.float32)
+
+    def detect(self, frame, update: bool = True) -> ChangeResult:
+        """เทียบ frame กับภาพอ้างอิง คืน ChangeResult"""
+        bgra = _as_bgra(frame)
+        height, width = bgra.shape[:2]
+        cells = self._cell_means(bgra)
+        self.frames += 1
+
+        reference = self._reference
+        if reference is None or self._size != (width, height):
+            # ยังไม่มีภาพอ้างอิง / ความละเอียดเปลี่ยน -> เปลี่ยนทั้งจอ
+            changed = np.ones(cells.shape, dtype=bool)
+            first = True
+        else:
+            changed = np.abs(cells - reference) > self.threshold
+            first = False
+
+        if update:
+            self._reference = cells
+            self._size = (width, height)
+
+        percent = float(changed.mean() * 100.0) if changed.size else 0.0
+        if percent < self.min_percent and not first:
+            self.unchanged += 1
+            return ChangeResult(0.0, [], (width, height), cells=cells)
+
+        return ChangeResult(percent, self._dirty_tiles(changed, width, height), (width, height), first, cells)
+
+    def accept(self, result: ChangeResult):
+        """ใช้ภาพของ result (จาก detect) เป็นภาพอ้างอิงต่อ"""
+        if result.cells is not None:
+            self._reference = result.cells
+            self._size = result.size
+
+    def _dirty_tiles(self, changed: np.ndarray, width: int, height: int) -> List[Tile]:
+        """cell ที่เปลี่ยน -> tile (พิกเซลจริง) ที่มีอย่างน้อย 1 cell เปลี่ยน"""
+        t = self.tile_cells
+        pad_r = -changed.shape[0] % t
+        pad_c = -changed.shape[1] % t
+        if pad_r or pad_c:
+            changed = np.pad(changed, ((0, pad_r), (0, pad_c)))
+        rows, cols = changed.shape[0] // t, changed.shape[1] // t
+        dirty = changed.reshape(rows, t, cols, t).any(axis=(1, 3))
+
+        size = self.tile_size
+        tiles = []
+        for row, col in zip(*np.nonzero(dirty)):
+            left, top = int(col) * size, int(row) * size
+            tiles.append((left, top, min(size, width - left), min(size, height - top)))
+        return tiles
+
+    def get_stats(self) -> dict:
+        return {
+            "frames": self.frames,
+            "unchanged": self.unchanged,
+            "skip_rate": self.unchanged / self.frames if self.frames else 0.0,
+        }
@@ -0,0 +1,314 @@
+# core/image_encoder.py
+# -------------------------
+# ImageEncoder: แปลงภาพหน้าจอเป็น JPEG/PNG สำหรับส่งให้ LLM vision
+# - backend: PIL หรือ cv2.imencode (auto: Frame/numpy -> cv2, PIL.Image -> PIL ไม่ต้องแปลงไปมา)
+# - resize filter เลือกตามอัตราย่อ (ย่อมาก -> area/box, ย่อน้อย/ขยาย -> bicubic) แทน LANCZOS ทุกครั้ง
+# - ไม่ใช้ optimize=True (Huffman pass รอบสอง ช้าแต่ลดขนาดได้นิดเดียว)
+# - max_pixels: ย่อแบบคงสัดส่วนให้จำนวนพิกเซลไม่เกินงบ (จำนวน image token ของโมเดล)
+# - target_bytes / max_encode_ms: ไล่ลด quality แล้วจึงลดความละเอียดจนขนาดไม่เกินงบ
+#   quality ที่ใช้ได้ครั้งล่าสุดถูกจำไว้เป็นจุดเริ่มของเฟรมถัดไป (ส่วนใหญ่ encode รอบเดียวจบ)
+# - cache ผลลัพธ์ต่อ frame id (ภาพเดียวกันถูกถามหลายคำถาม / หลาย consumer ไม่ต้อง encode ซ้ำ)
+# -------------------------
+
+import base64
+import io
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Optional, Tuple
+
+import numpy as np
+from PIL import Image
+
+try:
+    import cv2
+    _HAS_CV2 = True
+except ImportError:
+    _HAS_CV2 = False
+
+try:
+    from config import (VISION_IMAGE_ENCODER, VISION_IMAGE_QUALITY, VISION_IMAGE_MIN_QUALITY,
+                        VISION_IMAGE_TARGET_KB, VISION_IMAGE_MAX_ENCODE_MS)
+except Exception:
+    VISION_IMAGE_ENCODER = "auto"
+    VISION_IMAGE_QUALITY = 80
+    VISION_IMAGE_MIN_QUALITY = 40
+    VISION_IMAGE_TARGET_KB = 160
+    VISION_IMAGE_MAX_ENCODE_MS = 80
+
+try:
+    from config import VISION_MAX_PIXELS
+except Exception:
+    VISION_MAX_PIXELS = 1_572_864
+
+BACKEND_PIL = "pil"
+BACKEND_CV2 = "cv2"
+
+# ความละเอียดต่ำสุดเมื่อต้องย่อเพื่อให้ได้ขนาดตามงบ (ต่ำกว่านี้ตัวหนังสืออ่านไม่ออก)
+_MIN_WIDTH = 480
+_MAX_ATTEMPTS = 5
+
+
+@dataclass
+class EncodedImage:
+    raw_bytes: bytes
+    size: Tuple[int, int]        # (width, height) หลัง resize
+    mime: str
+    quality: Optional[int]       # None = PNG
+    backend: str
+    encode_ms: float
+    attempts: int
+    image: Any = None            # ภาพหลัง resize (PIL.Image หรือ numpy BGR ตาม backend)
+    _data_uri: Optional[str] = field(default=None, repr=False)
+
+    @property
+    def data_uri(self) -> str:
+        """data URI (สร้างเมื่อถูกขอครั้งแรก; LLMClient รับ EncodedImage ตรงๆ ได้โดยไม่ต้องสร้าง)"""
+        if self._data_uri is None:
+            self._data_uri = f"data:{self.mime};base64," + base64.b64encode(self.raw_bytes).decode("ascii")
+        return self._data_uri
+
+    def to_pil(self) -> Image.Image:
+        if isinstance(self.image, Image.Image):
+            return self.image
+        return Image.fromarray(np.ascontiguousarray(self.image[:, :, 2::-1]))
+
+
+def fit_size(size: Tuple[int, int], max_size: Tuple[int, int]) -> Tuple[int, int]:
+    """ย่อ size ให้อยู่ในกรอบ max_size โดยคงสัดส่วน (ไม่ขยาย)"""
+    width, height = size
+    scale = min(1.0, max_size[0] / width, max_size[1] / height)
+    return max(1, round(width * scale)), max(1, round(height * scale))
+
+
+def fit_pixels(size: Tuple[int, int], max_pixels: int) -> Tuple[int, int]:
+    """ย่อ size ให้มีพิกเซลไม่เกิน max_pixels โดยคงสัดส่วน (ไม่ขยาย, 0 = ไม่จำกัด)"""
+    width, height = size
+    if not max_pixels or width * height <= max_pixels:
+        return width, height
+    scale = (max_pixels / (width * height)) ** 0.5
+    return max(1, int(width * scale)), max(1, int(height * scale))
+
+
+def pil_resize(img: Image.Image, size: Tuple[int, int]) -> Image.Image:
+    """resize ด้วย filter ตามอัตราย่อ"""
+    if img.size == tuple(size):
+        return img
+    ratio = size[0] / img.width
+    if ratio < 0.5:
+        # ย่อมาก: reduce() แบบ box จำนวนเต็มก่อน แล้วค่อย bilinear ส่วนที่เหลือ (เร็วกว่า LANCZOS หลายเท่า)
+        return img.resize(size, Image.BILINEAR, reducing_gap=2.0)
+    return img.resize(size, Image.BICUBIC)
+
+
+def cv2_resize(arr: np.ndarray, size: Tuple[int, int]) -> np.ndarray:
+    """resize ด้วย interpolation ตามอัตราย่อ (ย่อ -> INTER_AREA ไม่เกิด aliasing บนตัวหนังสือ)"""
+    if (arr.shape[1], arr.shape[0]) == tuple(size):
+        return arr
+    interpolation = cv2.INTER_AREA if size[0] < arr.shape[1] else cv2.INTER_CUBIC
+    return cv2.resize(arr, size, interpolation=interpolation)
+
+
+class ImageEncoder:
+    """encoder ภาพสำหรับ payload vision (ใช้ผ่าน get_encoder())"""
+
+    def __init__(self, backend: str = None, target_kb: float = None, max_encode_ms: float = None,
+                 quality: int = None, min_quality: int = None, max_pixels: int = None, cache_size: int = 16):
+        backend = backend or VISION_IMAGE_ENCODER
+        if backend == BACKEND_CV2 and not _HAS_CV2:
+            print("[ImageEncoder] ⚠️ ไม่พบ OpenCV ใช้ PIL แทน")
+            backend = BACKEND_PIL
+        self.backend = backend
+        self.target_bytes = int((VISION_IMAGE_TARGET_KB if target_kb is None else target_kb) * 1024)
+        self.max_encode_ms = VISION_IMAGE_MAX_ENCODE_MS if max_encode_ms is None else max_encode_ms
+        self.quality = quality or VISION_IMAGE_QUALITY
+        self.min_quality = min_quality or VISION_IMAGE_MIN_QUALITY
+        self.max_pixels = VISION_MAX_PIXELS if max_pixels is None else max_pixels
+        self.cache_size = cache_size
+
+        self._cache: "OrderedDict[tuple, EncodedImage]" = OrderedDict()
+        self._lock = threading.Lock()
+        # quality ที่ผ่านงบครั้งล่าสุด -> จุดเริ่มของภาพถัดไป
+        self._learned_quality = self.quality
+
+        # สถิติ
+        self.encodes = 0
+        self.cache_hits = 0
+        self.total_attempts = 0
+
+    # -------------------------
+    # backend
+    # -------------------------
+    def _pick_backend(self, image) -> str:
+        if self.backend in (BACKEND_PIL, BACKEND_CV2):
+            return self.backend
+        if _HAS_CV2 and not isinstance(image, Image.Image):
+            return BACKEND_CV2
+        return BACKEND_PIL
+
+    @staticmethod
+    def _source(image, backend: str):
+        """ภาพต้นฉบับในรูปที่ backend ใช้ (Frame -> BGRA view / PIL ไม่ copy ถ้าไม่จำเป็น)"""
+        if backend == BACKEND_CV2:
+            if hasattr(image, "bgra"):
+                return image.bgra
+            if isinstance(image, Image.Image):
+                return cv2.cvtColor(np.asarray(image.convert("RGB")), cv2.COLOR_RGB2BGR)
+            return image
+        if hasattr(image, "to_pil"):
+            return image.to_pil()
+        if isinstance(image, np.ndarray):
+            return Image.fromarray(np.ascontiguousarray(image[:, :, 2::-1]))
+        return image if image.mode in ("RGB", "L") else image.convert("RGB")
+
+    @staticmethod
+    def _size_of(src) -> Tuple[int, int]:
+        if isinstance(src, Image.Image):
+            return src.size
+        return src.shape[1], src.shape[0]
+
+    @staticmethod
+    def _resize(src, size, backend: str):
+        if backend == BACKEND_CV2:
+            scaled = cv2_resize(src, size)
+            # ย่อบน BGRA แล้วค่อยตัด alpha (แปลงสีบนภาพเล็ก)
+            if scaled.ndim == 3 and scaled.shape[2] == 4:
+                scaled = cv2.cvtColor(scaled, cv2.COLOR_BGRA2BGR)
+            return scaled
+        return pil_resize(src, size)
+
+    @staticmethod
+    def _encode_once(scaled, fmt: str, quality: Optional[int], backend: str) -> bytes:
+        if backend == BACKEND_CV2:
+            if fmt == "PNG":
+                ok, buf = cv2.imencode(".png", scaled, [cv2.IMWRITE_PNG_COMPRESSION, 3])
+            else:
+                ok, buf = cv2.imencode(".jpg", scaled, [cv2.IMWRITE_JPEG_QUALITY, int(quality)])
+            if not ok:
+                raise ValueError("cv2.imencode ล้มเหลว")
+            return buf.tobytes()
+
+        out = io.BytesIO()
+        if fmt == "PNG":
+            scaled.save(out, format="PNG", compress_level=3)
+        else:
+            scaled.save(out, format="JPEG", quality=int(quality))
+        return out.getvalue()
+
+    # -------------------------
+    # encode
+    # -------------------------
+    def encode(self, image, fmt: str = "JPEG", resize_to: Optional[Tuple[int, int]] = None,
+               max_size: Optional[Tuple[int, int]] = None, quality: Optional[int] = None,
+               target_bytes: Optional[int] = None, max_encode_ms: Optional[float] = None,
+               max_pixels: Optional[int] = None, frame_id: Any = None) -> EncodedImage:
+        """
+        encode ภาพ (Frame / PIL.Image / numpy BGR[A])
+        - resize_to: ขนาดแน่นอน (w, h) | max_size: ย่อให้อยู่ในกรอบโดยคงสัดส่วน
+        - max_pixels: งบพิกเซล (คงสัดส่วน, ไม่ใช้เมื่อระบุ resize_to) | 0 = ไม่จำกัด | None = ค่าจาก config
+        - quality: ระบุ = ใช้ค่าตายตัว ไม่ปรับตามงบ | None = ปรับหา quality ให้ได้ขนาดไม่เกิน target_bytes
+        - target_bytes: 0 = ไม่จำกัดขนาด | None = ค่าจาก config
+        - frame_id: ระบุ (หรือส่ง Frame) = cache ผลลัพธ์ของภาพนี้ไว้
+        """
+        fmt = "PNG" if fmt.upper() == "PNG" else "JPEG"
+        adaptive = quality is None
+        target = self.target_bytes if target_bytes is None else target_bytes
+        budget_ms = self.max_encode_ms if max_encode_ms is None else max_encode_ms
+        pixels = self.max_pixels if max_pixels is None else max_pixels
+        if frame_id is None:
+            frame_id = getattr(image, "id", None)
+
+        key = None
+        if frame_id is not None:
+            key = (frame_id, fmt, resize_to, max_size, pixels, quality, target if adaptive else None)
+            with self._lock:
+                cached = self._cache.get(key)
+                if cached is not None:
+                    self._cache.move_to_end(key)
+                    self.cache_hits += 1
+                    return cached
+
+        start = time.perf_counter()
+        backend = self._pick_backend(image)
+        src = self._source(image, backend)
+        size = resize_to
+        if size is None:
+            size = fit_size(self._size_of(src), max_size) if max_size else self._size_of(src)
+            size = fit_pixels(size, pixels)
+        q = (self._learned_quality if adaptive else quality) if fmt == "JPEG" else None
+
+        attempts = 0
+        scaled, scaled_size = None, None
+        while True:
+            attempts += 1
+            if size != scaled_size:
+                # ลดแค่ quality -> ใช้ภาพที่ย่อไว้แล้วซ้ำ
+                scaled, scaled_size = self._resize(src, size, backend), size
+            raw = self._encode_once(scaled, fmt, q, backend)
+            elapsed_ms = (time.perf_counter() - start) * 1000
+
+            if not adaptive or not target or len(raw) <= target:
+                break
+            if attempts >= _MAX_ATTEMPTS or (budget_ms and elapsed_ms >= budget_ms):
+                print(f"[ImageEncoder] ⚠️ ได้ {len(raw) // 1024}KB เกินงบ {target // 1024}KB "
+                      f"(q={q}, {size[0]}x{size[1]}, {elapsed_ms:.0f}ms)")
+                break
+
+            ratio = target / len(raw)
+            if q is not None and q > self.min_quality:
+                # ขนาด JPEG ลดลงเร็วกว่า quality -> ลด quality ตามสัดส่วนที่เกินงบ
+                q = max(self.min_quality, int(q * max(0.5, ratio ** 0.7)) - 2)
+            elif size[0] > _MIN_WIDTH:
+                # quality ต่ำสุดแล้ว -> ลดความละเอียด (ขนาดไฟล์ ~ จำนวนพิกเซล)
+                scale = max(_MIN_WIDTH / size[0], min(0.9, (ratio ** 0.5) * 0.95))
+                size = (max(1, int(size[0] * scale)), max(1, int(size[1] * scale)))
+            else:
+                break
+
+        if adaptive and q is not None:
+            # จำไว้เป็นจุดเริ่มของภาพถัดไป (ผ่านงบ -> ขยับขึ้นทีละน้อย ให้ภาพที่ง่ายกว่าได้ quality สูงกลับมา)
+            self._learned_quality = min(self.quality, q + 2) if len(raw) <= (target or len(raw)) else q
+
+        mime = "image/png" if fmt == "PNG" else "image/jpeg"
+        encoded = EncodedImage(
+            raw_bytes=raw,
+            size=tuple(size),
+            mime=mime,
+            quality=q,
+            backend=backend,
+            encode_ms=(time.perf_counter() - start) * 1000,
+            attempts=attempts,
+            image=scaled,
+        )
+
+        with self._lock:
+            self.encodes += 1
+            self.total_attempts += attempts
+            if key is not None:
+                self._cache[key] = encoded
+                while len(self._cache) > self.cache_size:
+                    self._cache.popitem(last=False)
+        return encoded
+
+    def get_stats(self) -> dict:
+        return {
+            "encodes": self.encodes,
+            "cache_hits": self.cache_hits,
+            "avg_attempts": self.total_attempts / self.encodes if self.encodes else 0.0,
+            "learned_quality": self._learned_quality,
+        }
+
+
+_shared_encoder: Optional[ImageEncoder] = None
+_shared_lock = threading.Lock()
+
+
+def get_encoder() -> ImageEncoder:
+    """คืน ImageEncoder กลางของ process"""
+    global _shared_encoder
+    if _shared_encoder is None:
+        with _shared_lock:
+            if _shared_encoder is None:
+                _shared_encoder = ImageEncoder()
+    return _shared_encoder
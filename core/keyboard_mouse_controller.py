@@ -72,6 +72,11 @@ class MouseController:
         print(f"[Mouse] ลากไปที่ ({x}, {y})")
         pyautogui.dragTo(x, y, duration=duration)
 
+    def position(self) -> Tuple[int, int]:
+        """ตำแหน่งเมาส์ปัจจุบัน"""
+        x, y = pyautogui.position()
+        return int(x), int(y)
+
 
 class KeyboardMouseController:
     """
@@ -87,16 +92,26 @@ class KeyboardMouseController:
         self.detector = UIDetector(monitor=monitor)
         print(f"[Controller] ✅ พร้อมใช้งานบนจอที่ {monitor}")
 
+    def locate_text(self, text: str) -> Optional[Tuple[int, int]]:
+        """
+        จุดกึ่งกลางของข้อความ/วลีบนหน้าจอ (ผ่าน ScreenTextIndex ของเฟรมปัจจุบัน)
+        ถ้าพบหลายตำแหน่ง เลือกตามคะแนน โดยตำแหน่งที่ใกล้เมาส์ได้คะแนนเพิ่ม
+        """
+        matches = self.detector.find_elements_by_text(text, near=self.mouse.position(), limit=1)
+        if not matches:
+            return None
+        return matches[0].center
+
     def click_text(self, text: str, button="left"):
         """
         ค้นหาข้อความแล้วคลิก
         """
-        element = self.detector.find_element_by_text(text)
-        if not element:
+        point = self.locate_text(text)
+        if point is None:
             print(f"[Controller] ❌ ไม่พบข้อความ '{text}'")
             return False
         
-        x, y = self.detector.get_element_center(element)
+        x, y = point
         self.mouse.click(x, y, button=button)
         return True
 
@@ -8,10 +8,13 @@ import cv2
 import numpy as np
 import time
 from threading import Thread, Event
-from queue import Queue
 from PyQt6.QtCore import QObject, pyqtSignal, QTimer
-from core.screen_capturer import screenshot_pil
+from core.screen_capturer import get_frame_pool
+from core.vision_share_manager import get_frame_hub
+from core.frame_change_detector import FrameChangeDetector
+from core.image_encoder import get_encoder
 from core.llm_client import LLMClient
+from core.llm_router import get_router, TASK_VISION_DESCRIBE
 from datetime import datetime
 
 
@@ -35,7 +38,8 @@ class LiveVisionStream(QObject):
     
     def __init__(self, llm_client: LLMClient = None, monitor=1):
         super().__init__()
-        self.llm = llm_client or LLMClient()
+        # ไม่ได้ส่ง client มา -> ใช้โมเดลตาม route ของงาน vision-describe (fallback ได้)
+        self.llm = llm_client or get_router().for_task(TASK_VISION_DESCRIBE)
         self.monitor = monitor
         
         # Stream settings
@@ -53,8 +57,16 @@ class LiveVisionStream(QObject):
         self.analysis_thread = None
         self.stop_event = Event()
         
-        # Frame queue สำหรับ AI analysis
-        self.frame_queue = Queue(maxsize=2)
+        # รับเฟรมจาก FrameHub ของจอนี้ (ไม่จับภาพเอง): preview ตาม fps, analysis ตามช่วงวิเคราะห์
+        # (latest-only: ถ้าประมวลผลไม่ทัน จะได้เฟรมล่าสุดเสมอ ไม่ค้างเฟรมเก่า)
+        self.hub = get_frame_hub(monitor)
+        self._preview_sub = None
+        self._analysis_sub = None
+        
+        # ตรวจการเปลี่ยนแปลง: capture เทียบเฟรมติดกัน, analysis เทียบกับภาพที่วิเคราะห์ล่าสุด
+        self.capture_detector = FrameChangeDetector()
+        self.analysis_detector = FrameChangeDetector()
+        self.latest_change = None
         
         # Latest frame และ analysis
         self.latest_frame = None
@@ -62,7 +74,9 @@ class LiveVisionStream(QObject):
         
         # Statistics
         self.frame_count = 0
+        self.skipped_frames = 0
         self.analysis_count = 0
+        self.skipped_analyses = 0
         self.start_time = None
         
         print("[LiveVision] ✅ เตรียมระบบ Live Vision Stream")
@@ -86,8 +100,17 @@ class LiveVisionStream(QObject):
         self.stop_event.clear()
         
         self.frame_count = 0
+        self.skipped_frames = 0
         self.analysis_count = 0
+        self.skipped_analyses = 0
         self.start_time = time.time()
+        self.capture_detector.reset()
+        self.analysis_detector.reset()
+        
+        # สมัครรับเฟรม (producer ของ hub เริ่มเองเมื่อมี subscriber)
+        self._preview_sub = self.hub.subscribe("live-preview", max_fps=fps)
+        if self.auto_analysis:
+            self._analysis_sub = self.hub.subscribe("live-analysis", max_fps=1.0 / analysis_interval)
         
         # เริ่ม capture thread
         self.stream_thread = Thread(target=self._capture_loop, daemon=True)
@@ -109,6 +132,9 @@ class LiveVisionStream(QObject):
         
         self.is_streaming = False
         self.stop_event.set()
+        for sub in (self._preview_sub, self._analysis_sub):
+            if sub is not None:
+                sub.close()
         
         # รอให้ threads จบ
         if self.stream_thread:
@@ -124,7 +150,8 @@ class LiveVisionStream(QObject):
         self.status_updated.emit(f"⏸️ หยุด Stream (จับได้ {self.frame_count} เฟรม, {avg_fps:.1f} FPS)")
         print(f"[LiveVision] 🔴 หยุด Stream")
         print(f"  📊 เฟรมทั้งหมด: {self.frame_count}")
-        print(f"  📊 วิเคราะห์: {self.analysis_count} ครั้ง")
+        print(f"  📊 วิเคราะห์: {self.analysis_count} ครั้ง (ข้ามเพราะหน้าจอไม่เปลี่ยน {self.skipped_analyses} ครั้ง)")
+        print(f"  📊 เฟรมที่หน้าจอไม่เปลี่ยน: {self.skipped_frames}")
         print(f"  📊 FPS เฉลี่ย: {avg_fps:.1f}")
     
     def _capture_loop(self):
@@ -136,51 +163,39 @@ class LiveVisionStream(QObject):
         
         while not self.stop_event.is_set():
             try:
-                frame_start = time.time()
-                
-                # จับภาพหน้าจอ
-                img = screenshot_pil(monitor=self.monitor)
+                # เฟรมจาก hub ตามจังหวะ fps (Frame = view BGRA บน buffer ของ mss ไม่ copy)
+                captured = self._preview_sub.get(timeout=0.5)
+                if captured is None:
+                    continue
+                self.frame_count += 1
                 
-                # แปลงเป็น numpy array (สำหรับ OpenCV)
-                frame = np.array(img)
-                frame = cv2.cvtColor(frame, cv2.COLOR_RGB2BGR)
+                # หน้าจอไม่เปลี่ยนจาก preview ล่าสุด -> ไม่ต้องทำ preview ซ้ำ
+                # (เทียบกับเฟรมที่แสดงอยู่ ไม่ใช่เฟรมก่อนหน้า การเปลี่ยนทีละนิดจึงสะสมจนเกิน threshold ได้)
+                change = self.capture_detector.detect(captured, update=False)
+                if not change.changed and self.latest_frame is not None:
+                    self.skipped_frames += 1
+                    continue
+                self.capture_detector.accept(change)
+                self.latest_change = change
                 
-                # ย่อขนาดเพื่อประสิทธิภาพ
-                height, width = frame.shape[:2]
-                if width > 1280:
-                    scale = 1280 / width
-                    new_width = 1280
-                    new_height = int(height * scale)
-                    frame = cv2.resize(frame, (new_width, new_height))
+                # ย่อขนาด (บน BGRA ลง buffer ของ pool) แล้วแปลงเป็น BGR ขนาด preview
+                # frame ที่ได้เป็น array ใหม่ -> ส่งให้ GUI / เก็บเป็น latest_frame ได้โดยไม่ต้อง copy อีก
+                frame = self._to_preview(captured)
                 
                 # เพิ่ม overlay ข้อมูล
                 self._add_overlay_info(frame)
                 
                 # บันทึกเฟรมล่าสุด
-                self.latest_frame = frame.copy()
-                self.frame_count += 1
+                self.latest_frame = frame
                 
                 # ส่งสัญญาณ
                 self.frame_captured.emit(frame)
                 
-                # ใส่เข้า queue สำหรับ AI analysis (ถ้าว่าง)
-                if self.auto_analysis and not self.frame_queue.full():
-                    try:
-                        self.frame_queue.put_nowait(img)
-                    except:
-                        pass
-                
-                # รอให้ครบช่วงเวลาต่อเฟรม
-                elapsed = time.time() - frame_start
-                sleep_time = max(0, self.frame_interval - elapsed)
-                if sleep_time > 0:
-                    time.sleep(sleep_time)
-                
             except Exception as e:
                 print(f"[LiveVision] ❌ Capture Error: {e}")
                 time.sleep(0.1)
         
-        print("[LiveVision] 🛑 Capture Loop หยุด")
+        print(f"[LiveVision] 🛑 Capture Loop หยุด ({self.hub.get_stats()})")
     
     def _analysis_loop(self):
         """
@@ -191,22 +206,22 @@ class LiveVisionStream(QObject):
         
         while not self.stop_event.is_set():
             try:
-                current_time = time.time()
-                
-                # ตรวจสอบว่าถึงเวลาวิเคราะห์หรือยัง
-                if current_time - self.last_analysis_time < self.analysis_interval:
-                    time.sleep(0.5)
+                # เฟรมล่าสุดจาก hub (subscription จำกัดไว้ไม่เกิน 1 เฟรมต่อ analysis_interval)
+                img = self._analysis_sub.get(timeout=0.5)
+                if img is None:
                     continue
+                current_time = time.time()
                 
-                # ดึงเฟรมจาก queue
-                if self.frame_queue.empty():
-                    time.sleep(0.5)
+                # หน้าจอยังเหมือนตอนวิเคราะห์ครั้งก่อน -> ไม่ต้องถาม AI ซ้ำ
+                change = self.analysis_detector.detect(img, update=False)
+                if not change.changed:
+                    self.skipped_analyses += 1
+                    self.last_analysis_time = current_time
                     continue
                 
-                img = self.frame_queue.get()
-                
                 # วิเคราะห์ด้วย AI
-                self._analyze_frame(img)
+                if self._analyze_frame(img):
+                    self.analysis_detector.accept(change)
                 
                 self.last_analysis_time = current_time
                 
@@ -217,38 +232,60 @@ class LiveVisionStream(QObject):
         print("[LiveVision] 🛑 Analysis Loop หยุด")
     
     def _analyze_frame(self, img):
-        """วิเคราะห์เฟรมด้วย AI"""
+        """วิเคราะห์เฟรมด้วย AI (คืน True ถ้าส่งให้ AI จริง -> ใช้เฟรมนี้เป็นภาพอ้างอิงต่อ)"""
         try:
             self.analysis_count += 1
             print(f"[LiveVision] 🤖 กำลังวิเคราะห์ (ครั้งที่ {self.analysis_count})...")
             
-            # แปลงเป็น data URI
-            from core.screen_capturer import image_to_data_uri
-            data_uri, _ = image_to_data_uri(img, fmt="JPEG", quality=70)
+            # encode ภาพ (Frame จาก capture loop -> encode ตรงจาก BGRA ตามงบขนาด payload)
+            image = get_encoder().encode(img)
             
             # ถาม AI
             prompt = "อธิบายสิ่งที่เห็นบนหน้าจอนี้อย่างสั้นๆ ภาษาไทย (ไม่เกิน 100 คำ)"
-            analysis = self.llm.ask_with_image(prompt, data_uri)
-            
-            # บันทึกผลลัพธ์
-            self.latest_analysis = analysis
-            
-            # ส่งสัญญาณ
-            timestamp = datetime.now().strftime("%H:%M:%S")
-            result = f"[{timestamp}] {analysis}"
-            self.analysis_ready.emit(result)
             
-            print(f"[LiveVision] ✅ วิเคราะห์เสร็จ: {analysis[:50]}...")
+            # งานพื้นหลัง: ถ้ามีคำถามจากผู้ใช้เข้ามา scheduler จะให้คำถามไปก่อน
+            analysis = self.llm.ask_with_image(prompt, image, priority="background")
+            if analysis.startswith("[LLM"):
+                # BUSY / ERROR / ถูกยกเลิก -> ไม่แสดงผล และไม่ใช้เฟรมนี้เป็นภาพอ้างอิง (รอบหน้าลองใหม่)
+                print(f"[LiveVision] ⏭️ ข้ามการวิเคราะห์: {analysis}")
+                return False
+            self._publish_analysis(analysis)
+            return True
             
         except Exception as e:
             print(f"[LiveVision] ❌ AI Error: {e}")
+            return False
+    
+    def _publish_analysis(self, analysis: str):
+        """บันทึกผลวิเคราะห์และส่งสัญญาณ"""
+        self.latest_analysis = analysis
+        
+        timestamp = datetime.now().strftime("%H:%M:%S")
+        result = f"[{timestamp}] {analysis}"
+        self.analysis_ready.emit(result)
+        
+        print(f"[LiveVision] ✅ วิเคราะห์เสร็จ: {analysis[:50]}...")
+    
+    def _to_preview(self, captured, max_width=1280):
+        """Frame -> BGR สำหรับ preview (ย่อให้กว้างไม่เกิน max_width)"""
+        bgra = captured.bgra
+        height, width = bgra.shape[:2]
+        if width <= max_width:
+            return captured.to_bgr()
+        
+        pool = get_frame_pool()
+        new_height = int(height * max_width / width)
+        small = pool.acquire((new_height, max_width, 4))
+        cv2.resize(bgra, (max_width, new_height), dst=small, interpolation=cv2.INTER_AREA)
+        frame = cv2.cvtColor(small, cv2.COLOR_BGRA2BGR)
+        pool.release(small)
+        return frame
     
     def _add_overlay_info(self, frame):
         """เพิ่มข้อมูล overlay บนเฟรม"""
-        # วาดพื้นหลังโปร่งใส
-        overlay = frame.copy()
-        cv2.rectangle(overlay, (10, 10), (400, 100), (0, 0, 0), -1)
-        cv2.addWeighted(overlay, 0.6, frame, 0.4, 0, frame)
+        # วาดพื้นหลังโปร่งใส (ทำเฉพาะพื้นที่กล่อง ไม่ copy ทั้งเฟรม)
+        box = frame[10:101, 10:401]
+        np.multiply(box, 0.4, out=box, casting="unsafe")
         
         # ข้อมูลสถิติ
         duration = time.time() - self.start_time if self.start_time else 0
@@ -276,17 +313,11 @@ class LiveVisionStream(QObject):
         try:
             print(f"[LiveVision] 💬 คำถาม: {question}")
             
-            # แปลง frame เป็น PIL Image
-            from PIL import Image
-            frame_rgb = cv2.cvtColor(self.latest_frame, cv2.COLOR_BGR2RGB)
-            img = Image.fromarray(frame_rgb)
-            
-            # แปลงเป็น data URI
-            from core.screen_capturer import image_to_data_uri
-            data_uri, _ = image_to_data_uri(img, fmt="JPEG", quality=80)
+            # เฟรมเต็มจาก hub (ใช้เฟรมที่ stream เพิ่งจับซ้ำได้) -> encode ตรงจาก BGRA
+            image = get_encoder().encode(self.hub.get_frame())
             
             # ถาม AI
-            answer = self.llm.ask_with_image(question, data_uri)
+            answer = self.llm.ask_with_image(question, image)
             
             print(f"[LiveVision] 🤖 คำตอบ: {answer[:100]}...")
             return answer
@@ -305,11 +336,15 @@ class LiveVisionStream(QObject):
         """ปรับ FPS ขณะ streaming"""
         self.fps = max(1, min(fps, 30))  # จำกัด 1-30 FPS
         self.frame_interval = 1.0 / self.fps
+        if self._preview_sub is not None:
+            self._preview_sub.set_max_fps(self.fps)
         print(f"[LiveVision] ⚙️ ตั้ง FPS: {self.fps}")
     
     def set_analysis_interval(self, seconds: float):
         """ปรับระยะเวลาระหว่างการวิเคราะห์"""
         self.analysis_interval = max(1.0, seconds)
+        if self._analysis_sub is not None:
+            self._analysis_sub.set_max_fps(1.0 / self.analysis_interval)
         print(f"[LiveVision] ⚙️ ตั้งช่วงวิเคราะห์: {self.analysis_interval}s")
     
     def get_stats(self) -> dict:
@@ -321,6 +356,8 @@ class LiveVisionStream(QObject):
             "is_streaming": self.is_streaming,
             "frame_count": self.frame_count,
             "analysis_count": self.analysis_count,
+            "skipped_frames": self.skipped_frames,
+            "skipped_analyses": self.skipped_analyses,
             "duration": duration,
             "avg_fps": avg_fps,
             "target_fps": self.fps,
@@ -0,0 +1,205 @@
+# core/llm_cache.py
+# -------------------------
+# ResponseCache: cache คำตอบของ LLM แบบ 2 ชั้น
+# - ชั้น 1: LRU ใน memory (เร็วสุด)
+# - ชั้น 2: ไฟล์ JSON ใต้ .ai_cache/llm_responses/ (อยู่รอดข้ามการเปิดโปรแกรมใหม่)
+# key = sha256 ของ model + messages (รวม image data URI) + temperature + max_tokens
+# ใช้เฉพาะคำขอที่ deterministic (temperature == 0) หรือผู้เรียก opt-in เอง
+# -------------------------
+
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from core.llm_request_body import json_default
+
+try:
+    from config import LLM_CACHE_MAX_ENTRIES, LLM_CACHE_MAX_DISK_MB, LLM_CACHE_TTL, LLM_CACHE_DIR
+except Exception:
+    LLM_CACHE_MAX_ENTRIES = 256
+    LLM_CACHE_MAX_DISK_MB = 50
+    LLM_CACHE_TTL = 24 * 3600
+    LLM_CACHE_DIR = ".ai_cache/llm_responses"
+
+
+def make_cache_key(model: str, messages: List[Dict[str, Any]], temperature: float, max_tokens: int,
+                   extra: Optional[Dict[str, Any]] = None) -> str:
+    """
+    hash ของทุกอย่างที่มีผลต่อคำตอบ (ภาพ data URI ถูก hash ไปด้วย, ImageBytes ใช้ hash ของ bytes ภาพ)
+    - extra: parameter อื่นที่เปลี่ยนคำตอบ เช่น response_format / stop
+    """
+    data = {"model": model, "messages": messages, "temperature": temperature, "max_tokens": max_tokens}
+    if extra:
+        data["extra"] = extra
+    blob = json.dumps(data, sort_keys=True, ensure_ascii=False, separators=(",", ":"), default=json_default)
+    return hashlib.sha256(blob.encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    """LRU memory + disk store พร้อม TTL และตัวนับ hit/miss"""
+
+    def __init__(self, max_entries: int = None, max_disk_mb: float = None, ttl: float = None,
+                 cache_dir: str = None, use_disk: bool = True):
+        self.max_entries = max_entries or LLM_CACHE_MAX_ENTRIES
+        self.max_disk_bytes = int((max_disk_mb or LLM_CACHE_MAX_DISK_MB) * 1024 * 1024)
+        self.ttl = LLM_CACHE_TTL if ttl is None else ttl
+        self.cache_dir = Path(cache_dir or LLM_CACHE_DIR)
+        self.use_disk = use_disk
+
+        self._memory: "OrderedDict[str, tuple]" = OrderedDict()  # key -> (created, text)
+        self._lock = threading.Lock()
+
+        # สถิติ
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.stores = 0
+        self.evictions = 0
+
+        if self.use_disk:
+            try:
+                self.cache_dir.mkdir(parents=True, exist_ok=True)
+            except OSError as e:
+                print(f"[LLMCache] ⚠️ สร้างโฟลเดอร์ cache ไม่ได้: {e} → ใช้ memory อย่างเดียว")
+                self.use_disk = False
+
+    def _expired(self, created: float) -> bool:
+        return self.ttl > 0 and time.time() - created > self.ttl
+
+    def _disk_path(self, key: str) -> Path:
+        return self.cache_dir / f"{key}.json"
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                created, text = entry
+                if not self._expired(created):
+                    self._memory.move_to_end(key)
+                    self.memory_hits += 1
+                    return text
+                del self._memory[key]
+
+        if self.use_disk:
+            text = self._read_disk(key)
+            if text is not None:
+                with self._lock:
+                    self.disk_hits += 1
+                return text
+
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def put(self, key: str, text: str):
+        now = time.time()
+        with self._lock:
+            self._put_memory(key, now, text)
+            self.stores += 1
+        if self.use_disk:
+            self._write_disk(key, now, text)
+
+    def _put_memory(self, key: str, created: float, text: str):
+        self._memory[key] = (created, text)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+            self.evictions += 1
+
+    def _read_disk(self, key: str) -> Optional[str]:
+        path = self._disk_path(key)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return None
+
+        created = data.get("created", 0)
+        if self._expired(created):
+            try:
+                path.unlink()
+            except OSError:
+                pass
+            return None
+
+        text = data.get("text")
+        if isinstance(text, str):
+            # ดึงกลับขึ้น memory
+            with self._lock:
+                self._put_memory(key, created, text)
+            return text
+        return None
+
+    def _write_disk(self, key: str, created: float, text: str):
+        path = self._disk_path(key)
+        tmp = path.with_suffix(".tmp")
+        try:
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump({"created": created, "text": text}, f, ensure_ascii=False)
+            os.replace(tmp, path)
+        except OSError as e:
+            print(f"[LLMCache] ⚠️ เขียน cache ไม่ได้: {e}")
+            return
+        self._evict_disk()
+
+    def _evict_disk(self):
+        """ลบไฟล์เก่าสุดจนขนาดรวมไม่เกิน max_disk_bytes"""
+        try:
+            files = [(p.stat().st_mtime, p.stat().st_size, p) for p in self.cache_dir.glob("*.json")]
+        except OSError:
+            return
+        total = sum(size for _, size, _ in files)
+        if total <= self.max_disk_bytes:
+            return
+        for _, size, path in sorted(files):
+            try:
+                path.unlink()
+            except OSError:
+                continue
+            with self._lock:
+                self.evictions += 1
+            total -= size
+            if total <= self.max_disk_bytes:
+                break
+
+    def clear(self):
+        with self._lock:
+            self._memory.clear()
+        if self.use_disk:
+            for path in self.cache_dir.glob("*.json"):
+                try:
+                    path.unlink()
+                except OSError:
+                    pass
+
+    def get_stats(self) -> dict:
+        lookups = self.memory_hits + self.disk_hits + self.misses
+        hits = self.memory_hits + self.disk_hits
+        return {
+            "memory_entries": len(self._memory),
+            "memory_hits": self.memory_hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "stores": self.stores,
+            "evictions": self.evictions,
+            "hit_rate": hits / lookups if lookups else 0.0,
+        }
+
+
+_shared_cache: Optional[ResponseCache] = None
+_shared_lock = threading.Lock()
+
+
+def get_response_cache() -> ResponseCache:
+    """คืน ResponseCache กลางของ process"""
+    global _shared_cache
+    if _shared_cache is None:
+        with _shared_lock:
+            if _shared_cache is None:
+                _shared_cache = ResponseCache()
+    return _shared_cache
@@ -4,157 +4,644 @@
 # Format ที่ LM Studio ต้องการ:
 # - ส่ง image เป็น data URI ภายใน content array
 # - structure: {"type": "image_url", "image_url": {"url": "data:..."}}
+# - ภาพส่งเป็น data URI string หรือ EncodedImage / ImageBytes ได้
+#   (แบบหลังไม่สร้าง base64 string ทั้งก้อน: transport base64 ทีละ chunk ตอนเขียน body)
 # -------------------------
 
 import json
+import time
+import threading
+import weakref
 import requests
-from typing import List, Any, Dict, Optional
+from typing import List, Any, Dict, Optional, Iterator, Sequence
+
+from core.llm_transport import LLMTransport, get_transport
+from core.llm_cache import ResponseCache, get_response_cache, make_cache_key
+from core.llm_singleflight import SingleFlight, get_singleflight
+from core.llm_scheduler import LLMScheduler, SchedulerRejected, get_scheduler, PRIORITY_INTERACTIVE
+from core.llm_health import LLMHealth, get_health
+from core.llm_endpoint_pool import Endpoint, EndpointPool, conversation_key, get_endpoint_pool
+from core.llm_request_body import as_image_url
 
 try:
-    from config import LLM_SERVER_URL, LLM_MODEL, TEMPERATURE, MAX_TOKENS, LLM_TIMEOUT
+    from config import LLM_SERVER_URL, LLM_MODEL, TEMPERATURE, MAX_TOKENS
 except Exception:
     LLM_SERVER_URL = "http://localhost:1234/v1/chat/completions"
     LLM_MODEL = "google/gemma-3-4b"
     TEMPERATURE = 0.7
     MAX_TOKENS = 1024
-    LLM_TIMEOUT = 60
+
+try:
+    from config import LLM_CACHE_ENABLED
+except Exception:
+    LLM_CACHE_ENABLED = False
+
+try:
+    from config import LLM_SINGLE_FLIGHT
+except Exception:
+    LLM_SINGLE_FLIGHT = True
+
+try:
+    from config import LLM_HEALTH_ENABLED
+except Exception:
+    LLM_HEALTH_ENABLED = True
+
+try:
+    from config import LLM_ENDPOINTS
+except Exception:
+    LLM_ENDPOINTS = []
+
+_VISION_HINT = "\n💡 ตรวจสอบว่า LM Studio เปิดอยู่และโหลดโมเดลที่รองรับ Vision แล้ว"
+
+# key ของ payload ที่ make_cache_key รับแยกอยู่แล้ว (ที่เหลือ เช่น stop / response_format เข้า extra)
+_BASE_PAYLOAD_KEYS = ("model", "messages", "temperature", "max_tokens", "stream")
+
+# คำตอบของ ask() เมื่อ request ถูกยกเลิก (เช่น กดหยุดพูด)
+CANCELLED_REPLY = "[LLM CANCELLED]"
+
+# คำใน error ของ server ที่บอกว่าไม่รองรับ structured output
+_FORMAT_ERROR_WORDS = ("response_format", "json_schema")
+
+# sentinel: บรรทัด "data: [DONE]" ของ SSE
+_SSE_DONE = object()
+
+
+class LLMErrorReply(str):
+    """
+    ข้อความ "[LLM ERROR] ..." ที่ติด HTTP status มาด้วย (ใช้แทน str ได้ทุกที่)
+    - status: HTTP status ที่ server ตอบ error กลับมา (None = เชื่อมต่อไม่ได้ / stream ขาด / server ล่ม)
+    - body: เนื้อหา error ที่ server ส่งมา (None = ไม่มี)
+    """
+
+    def __new__(cls, text: str, status: Optional[int] = None, body: Optional[str] = None):
+        reply = super().__new__(cls, text)
+        reply.status = status
+        reply.body = body
+        return reply
+
+
+def reply_status(reply: str) -> Optional[int]:
+    """HTTP status ของคำตอบที่เป็น error (None = ไม่ใช่ error จาก HTTP status)"""
+    return getattr(reply, "status", None)
+
+
+def is_transient_error(reply: str) -> bool:
+    """error ที่ลองที่อื่นแล้วอาจได้ผล: เชื่อมต่อไม่ได้ / stream ขาด / 5xx (ไม่รวม 4xx ที่ request ผิดเอง)"""
+    if not reply.startswith("[LLM ERROR]"):
+        return False
+    status = reply_status(reply)
+    return status is None or status >= 500
+
+
+def is_unsupported_format(reply: str) -> bool:
+    """
+    server ปฏิเสธ request เพราะไม่รองรับ response_format (LM Studio / llama.cpp รุ่นเก่าตอบ 400 หรือ 422)
+    ดูจากเนื้อหา error ด้วย: 400 อื่นๆ (prompt ยาวเกิน context, โมเดลยังไม่โหลด ฯลฯ) ไม่นับ
+    """
+    if reply_status(reply) not in (400, 422):
+        return False
+    body = (getattr(reply, "body", None) or "").lower()
+    return any(word in body for word in _FORMAT_ERROR_WORDS)
+
+
+def parse_sse_line(line: bytes):
+    """
+    แปลง 1 บรรทัดของ SSE (OpenAI-compatible) -> (delta, finish_reason)
+    delta: str, None = ข้าม, _SSE_DONE = จบ stream
+    """
+    if not line:
+        return None, None
+    if isinstance(line, bytes):
+        line = line.decode("utf-8", errors="replace")
+    line = line.strip()
+    if not line.startswith("data:"):
+        return None, None
+    data = line[len("data:"):].strip()
+    if data == "[DONE]":
+        return _SSE_DONE, None
+
+    try:
+        chunk = json.loads(data)
+    except ValueError:
+        return None, None
+
+    choices = chunk.get("choices") or []
+    if not choices or not isinstance(choices[0], dict):
+        return None, None
+    first = choices[0]
+
+    delta = first.get("delta") or {}
+    content = delta.get("content") if isinstance(delta, dict) else None
+    if content is None:
+        content = first.get("text")
+    return content or None, first.get("finish_reason")
+
+
+def extract_text_from_response(resp_json: Dict[str, Any]) -> str:
+    """ดึงข้อความจาก response แบบ non-stream ของ LM Studio"""
+    try:
+        if "choices" in resp_json and isinstance(resp_json["choices"], list) and len(resp_json["choices"]) > 0:
+            first = resp_json["choices"][0]
+            if isinstance(first, dict):
+                if "message" in first and isinstance(first["message"], dict) and "content" in first["message"]:
+                    return first["message"]["content"]
+                if "text" in first:
+                    return first["text"]
+        if "output" in resp_json and isinstance(resp_json["output"], str):
+            return resp_json["output"]
+    except Exception:
+        pass
+    try:
+        return json.dumps(resp_json, ensure_ascii=False)
+    except Exception:
+        return str(resp_json)
+
+
+class LLMStream:
+    """
+    Iterator ของข้อความที่ LM Studio ส่งกลับมาแบบ streaming (SSE)
+    - วน for เพื่อรับ delta ทีละชิ้นทันทีที่โมเดล generate ออกมา
+    - cancel(): ยกเลิกและปิด connection (เรียกจาก thread อื่นได้)
+    - ttft: เวลาจนได้ token แรก (วินาที), total_time: เวลาทั้งหมด
+    - text: ข้อความที่สะสมมาแล้วทั้งหมด
+    ถ้าเชื่อมต่อไม่ได้จะ yield ข้อความ "[LLM ERROR] ..." ชิ้นเดียว (เหมือน ask())
+    ถ้าไม่ได้คิวจาก scheduler จะ yield "[LLM BUSY] ..." แทน
+    ถ้า health บอกว่า server ล่มอยู่จะ yield "[LLM ERROR] ..." ทันทีโดยไม่ส่ง request
+    """
+
+    def __init__(self, server_url: str, payload: Dict[str, Any], timeout: Optional[float] = None,
+                 error_hint: str = "", transport: Optional[LLMTransport] = None,
+                 scheduler: Optional[LLMScheduler] = None, priority: str = PRIORITY_INTERACTIVE,
+                 call_type: str = "stream", health: Optional[LLMHealth] = None):
+        self.server_url = server_url
+        self.payload = payload
+        self.call_type = call_type
+        self.timeout = timeout
+        self.error_hint = error_hint
+        self.transport = transport or get_transport()
+        self.scheduler = scheduler
+        self.priority = priority
+        self.health = health
+        self.queue_wait: Optional[float] = None
+
+        self.text = ""
+        self.ttft: Optional[float] = None
+        self.total_time: Optional[float] = None
+        self.error: Optional[str] = None
+        self.finish_reason: Optional[str] = None
+        # HTTP status ของ response (None = ยังไม่ได้ response / เชื่อมต่อไม่ได้)
+        self.status_code: Optional[int] = None
+        # เนื้อหา error ที่ server ตอบมากับ HTTP status >= 400 (ตัดไม่เกิน 500 ตัวอักษร)
+        self.error_body: Optional[str] = None
+
+        self._cancel_event = threading.Event()
+        self._resp = None
+        self._ticket = None
+        self._started = False
+        self._start_time = None
+        # allow() ผ่านแล้วแต่ยังไม่ได้แจ้งผลให้ health -> ต้อง report_cancelled ตอนจบ (คืนสิทธิ์ half-open)
+        self._outcome_pending = False
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancel_event.is_set()
+
+    def cancel(self):
+        """
+        ยกเลิก stream: ปิด HTTP connection (LM Studio หยุด generate เมื่อ client ตัดการเชื่อมต่อ)
+        และคืน slot ของ scheduler ทันที ไม่ต้องรอ thread ที่อ่านอยู่
+        """
+        self._cancel_event.set()
+        resp = self._resp
+        if resp is not None:
+            try:
+                resp.close()
+            except Exception:
+                pass
+        if self.scheduler is not None:
+            self.scheduler.release(self._ticket)
+
+    def __iter__(self) -> Iterator[str]:
+        if self._started:
+            raise RuntimeError("LLMStream ใช้วนได้ครั้งเดียว")
+        self._started = True
+        self._start_time = time.time()
+
+        try:
+            yield from self._iter_deltas()
+        finally:
+            self.total_time = time.time() - self._start_time
+            if self._resp is not None:
+                self._resp.close()
+            if self.scheduler is not None:
+                self.scheduler.release(self._ticket)
+            if self._outcome_pending:
+                # คิวเต็ม / ถูกยกเลิก / ถูกทิ้งกลางทาง ก่อนรู้ผลจาก server
+                self._outcome_pending = False
+                self.health.report_cancelled(self)
+
+    def _report(self, method: str, *args):
+        """แจ้งผลให้ health / endpoint (request นี้ไม่มีผลค้างแล้ว)"""
+        self._outcome_pending = False
+        getattr(self.health, method)(*args)
+
+    def _iter_deltas(self) -> Iterator[str]:
+        if self.cancelled:
+            return
+
+        if self.health is not None:
+            if not self.health.allow(self):
+                self.error = self.health.down_message()
+                self.text = self.error
+                yield self.error
+                return
+            self._outcome_pending = True
+
+        if self.scheduler is not None:
+            try:
+                self._ticket = self.scheduler.acquire(self.priority, cancel_event=self._cancel_event)
+                self.queue_wait = self._ticket.wait_time
+                if self.cancelled:
+                    return
+            except SchedulerRejected as e:
+                if self.cancelled:
+                    return
+                self.error = f"[LLM BUSY] {e}"
+                self.text = self.error
+                yield self.error
+                return
+
+        try:
+            self._resp = self.transport.post(self.server_url, self.payload, call_type=self.call_type,
+                                             stream=True, read_timeout=self.timeout)
+            self.status_code = self._resp.status_code
+            self._resp.raise_for_status()
+            if self.health is not None:
+                self._report("report_success")
+            if self.cancelled:
+                return
+        except requests.RequestException as e:
+            if self.cancelled:
+                return
+            response = getattr(e, "response", None)
+            if response is not None:
+                self.status_code = response.status_code
+                try:
+                    self.error_body = response.text[:500]
+                except Exception:
+                    pass
+            if self.health is not None:
+                if isinstance(e, requests.ConnectionError):
+                    self._report("report_failure", e)
+                else:
+                    self._report("report_error", e)
+            self.error = f"[LLM ERROR] ไม่สามารถเชื่อมต่อ LLM server: {e}{self.error_hint}"
+            self.text = self.error
+            yield self.error
+            return
+
+        # server บางตัวไม่รองรับ stream และตอบ JSON ก้อนเดียวกลับมา
+        if "application/json" in self._resp.headers.get("Content-Type", ""):
+            try:
+                resp_json = self._resp.json()
+                text = extract_text_from_response(resp_json)
+                choices = resp_json.get("choices") if isinstance(resp_json, dict) else None
+                first = choices[0] if choices and isinstance(choices[0], dict) else {}
+                # ได้ JSON ครบทั้งก้อนแล้ว -> ถือว่าจบปกติแม้ server ไม่ส่ง finish_reason มา
+                self.finish_reason = first.get("finish_reason") or "stop"
+            except ValueError as e:
+                text = f"[LLM ERROR] ไม่สามารถแปลง response เป็น JSON: {e}"
+                self.error = text
+            self.ttft = time.time() - self._start_time
+            self.text = text
+            yield text
+            return
+
+        try:
+            for line in self._resp.iter_lines(decode_unicode=False):
+                if self.cancelled:
+                    return
+                delta, finish_reason = parse_sse_line(line)
+                if finish_reason:
+                    self.finish_reason = finish_reason
+                if delta is None:
+                    continue
+                if delta is _SSE_DONE:
+                    break
+                if self.ttft is None:
+                    self.ttft = time.time() - self._start_time
+                self.text += delta
+                yield delta
+        except (requests.RequestException, AttributeError, ValueError) as e:
+            # resp.close() จาก cancel() ทำให้ iter_lines โยน exception ได้
+            if not self.cancelled:
+                self.error = f"[LLM ERROR] stream ขาดระหว่างทาง: {e}"
+                if self.health is not None:
+                    self._report("report_error", e)
+            return
+
+        # connection ปิดโดยไม่มี finish_reason -> คำตอบอาจไม่ครบ ห้ามถือเป็นคำตอบปกติ
+        if not self.finish_reason and not self.cancelled:
+            self.error = "[LLM ERROR] stream จบโดยไม่มี finish_reason (คำตอบอาจไม่ครบ)"
+            if self.health is not None:
+                self._report("report_error", RuntimeError(self.error))
+
+    def collect(self) -> str:
+        """วนจนจบแล้วคืนข้อความเต็ม (ใช้แทน ask() ได้)"""
+        for _ in self:
+            pass
+        return self.text
+
+
+class _TrackedLLMStream(LLMStream):
+    """
+    LLMStream ที่แจ้ง LLMClient เมื่อจบ เพื่อเอาออกจากรายการ request ที่วิ่งอยู่และคืน endpoint
+    stream ที่ถูกยกเลิก / ทิ้งก่อนเริ่มวน ไม่มี finally ของ generator ให้ทำงาน
+    -> cancel() / close() / __del__ ต้องคืนเอง (_untrack เรียกซ้ำได้)
+    """
+
+    def __init__(self, owner: "LLMClient", *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._owner = owner
+
+    def __iter__(self) -> Iterator[str]:
+        try:
+            yield from super().__iter__()
+        finally:
+            self._owner._untrack(self)
+
+    def cancel(self):
+        super().cancel()
+        self._owner._untrack(self)
+
+    def close(self):
+        """ทิ้ง stream โดยไม่อ่านต่อ (เหมือน cancel)"""
+        self.cancel()
+
+    def __del__(self):
+        owner = getattr(self, "_owner", None)
+        if owner is not None and not self._started:
+            owner._untrack(self)
+
 
 class LLMClient:
-    def __init__(self, server_url: str = None, model: str = None, temperature: float = None, max_tokens: int = None, timeout: int = None):
-        self.server_url = server_url or LLM_SERVER_URL
+    def __init__(self, server_url: str = None, model: str = None, temperature: float = None, max_tokens: int = None,
+                 timeout: int = None, transport: Optional[LLMTransport] = None,
+                 cache: Optional[ResponseCache] = None, singleflight: Optional[SingleFlight] = None,
+                 scheduler: Optional[LLMScheduler] = None, priority: str = PRIORITY_INTERACTIVE,
+                 health: Optional[LLMHealth] = None, endpoints: Optional[Sequence[str]] = None):
+        # หลาย server (LLM_ENDPOINTS) -> กระจายงานด้วย EndpointPool (ใช้เมื่อไม่ได้ระบุ server_url เอง)
+        if endpoints is None and server_url is None and LLM_ENDPOINTS:
+            endpoints = LLM_ENDPOINTS
+        self.pool: Optional[EndpointPool] = get_endpoint_pool(endpoints) if endpoints else None
+        self.server_url = server_url or (self.pool.endpoints[0].url if self.pool else LLM_SERVER_URL)
         self.model = model or LLM_MODEL
         self.temperature = TEMPERATURE if temperature is None else temperature
         self.max_tokens = MAX_TOKENS if max_tokens is None else max_tokens
-        self.timeout = LLM_TIMEOUT if timeout is None else timeout
+        # timeout=None -> ใช้ค่าตามประเภทการเรียกจาก LLM_TIMEOUTS ของ transport
+        self.timeout = timeout
+        # ทุก instance ใช้ connection pool เดียวกัน (keep-alive)
+        self.transport = transport or get_transport()
+        # response cache (ใช้เฉพาะคำขอ deterministic หรือ cache=True)
+        self.cache = cache if cache is not None else (get_response_cache() if LLM_CACHE_ENABLED else None)
+        # รวม request ซ้ำที่วิ่งพร้อมกัน (ใช้ร่วมกันทุก instance)
+        self.singleflight = singleflight if singleflight is not None else (get_singleflight() if LLM_SINGLE_FLIGHT else None)
+        # คิวกลางที่จัดลำดับงานเข้า LM Studio (interactive > parser > background)
+        self.scheduler = scheduler or get_scheduler()
+        self.priority = priority
+        # สถานะ server: ล่มอยู่ -> ตอบ error ทันทีไม่ต้องรอ timeout
+        self.health = health if health is not None else (get_health(self.server_url) if LLM_HEALTH_ENABLED else None)
+        # request ที่กำลังวิ่งอยู่ของ instance นี้ (สำหรับ cancel_all)
+        # weak: stream ที่ถูกทิ้งโดยยังไม่ได้วนต้อง GC ได้ (__del__ จะคืน endpoint)
+        self._active: "weakref.WeakSet[LLMStream]" = weakref.WeakSet()
+        # RLock: __del__ ของ stream อาจถูกเรียกจาก GC ขณะ thread เดียวกันถือ lock อยู่
+        self._active_lock = threading.RLock()
 
     def _extract_text_from_response(self, resp_json: Dict[str, Any]) -> str:
         """ดึงข้อความจาก response ของ LM Studio"""
-        try:
-            if "choices" in resp_json and isinstance(resp_json["choices"], list) and len(resp_json["choices"]) > 0:
-                first = resp_json["choices"][0]
-                if isinstance(first, dict):
-                    if "message" in first and isinstance(first["message"], dict) and "content" in first["message"]:
-                        return first["message"]["content"]
-                    if "text" in first:
-                        return first["text"]
-            if "output" in resp_json and isinstance(resp_json["output"], str):
-                return resp_json["output"]
-        except Exception:
-            pass
-        try:
-            return json.dumps(resp_json, ensure_ascii=False)
-        except Exception:
-            return str(resp_json)
-
-    def ask(self, text: str, history: Optional[List[Dict[str, str]]] = None) -> str:
-        """ส่งข้อความแบบ text-only"""
-        if history is None:
-            history = []
-
-        messages = [{"role": "system", "content": "You are a helpful assistant. Please answer in Thai when possible."}]
-        messages.extend(history)
-        messages.append({"role": "user", "content": text})
+        return extract_text_from_response(resp_json)
 
+    def _build_payload(self, messages: List[Dict[str, Any]], stream: bool = False, **options: Any) -> Dict[str, Any]:
+        """
+        สร้าง payload แบบ OpenAI-compatible
+        - options: ค่าที่ override/เพิ่มเติม เช่น max_tokens, stop, response_format (None = ไม่ใส่)
+        """
         payload = {
             "model": self.model,
             "messages": messages,
             "temperature": self.temperature,
             "max_tokens": self.max_tokens,
-            "stream": False
+            "stream": stream
         }
+        payload.update({k: v for k, v in options.items() if v is not None})
+        return payload
 
-        try:
-            resp = requests.post(self.server_url, json=payload, timeout=self.timeout)
-            resp.raise_for_status()
-        except requests.RequestException as e:
-            return f"[LLM ERROR] ไม่สามารถเชื่อมต่อ LLM server: {e}"
-
-        try:
-            data = resp.json()
-        except Exception as e:
-            return f"[LLM ERROR] ไม่สามารถแปลงผลลัพธ์เป็น JSON: {e}"
-
-        return self._extract_text_from_response(data)
+    def _build_text_messages(self, text: str, history: Optional[List[Dict[str, str]]] = None) -> List[Dict[str, Any]]:
+        messages = [{"role": "system", "content": "You are a helpful assistant. Please answer in Thai when possible."}]
+        messages.extend(history or [])
+        messages.append({"role": "user", "content": text})
+        return messages
 
-    def ask_with_image(self, prompt_text: str, image_data_uri: str, history: Optional[List[Dict[str, str]]] = None) -> str:
+    def _build_image_messages(self, prompt_text: str, image_data_uri: Any, history: Optional[List[Dict[str, str]]] = None) -> List[Dict[str, Any]]:
         """
-        ส่ง prompt + image ให้ LM Studio Vision Model
         Format ที่ LM Studio ต้องการ:
         - content เป็น array ของ objects
         - แต่ละ object มี type: "text" หรือ "image_url"
+        - image_data_uri: data URI string หรือ EncodedImage / ImageBytes (ส่งแบบ stream)
+          หรือ list ของภาพ (เช่น TiledScreenshot.images) -> 1 image_url ต่อภาพ ตามลำดับ
         """
-        if history is None:
-            history = []
-
-        # สร้าง messages
+        images = image_data_uri if isinstance(image_data_uri, (list, tuple)) else [image_data_uri]
         messages = [
             {"role": "system", "content": "You are a helpful multimodal assistant. Answer in Thai when possible."}
         ]
-        messages.extend(history)
-        
-        # สร้าง user message แบบ multimodal
-        # LM Studio ต้องการ format นี้:
-        user_message = {
+        messages.extend(history or [])
+        messages.append({
             "role": "user",
             "content": [
-                {
-                    "type": "text",
-                    "text": prompt_text
-                },
-                {
-                    "type": "image_url",
-                    "image_url": {
-                        "url": image_data_uri
-                    }
-                }
+                {"type": "text", "text": prompt_text},
+                *({"type": "image_url", "image_url": {"url": as_image_url(image)}} for image in images)
             ]
-        }
-        messages.append(user_message)
+        })
+        return messages
 
-        payload = {
-            "model": self.model,
-            "messages": messages,
-            "temperature": self.temperature,
-            "max_tokens": self.max_tokens,
-            "stream": False,
-        }
+    def _should_cache(self, payload: Dict[str, Any], cache: Optional[bool]) -> bool:
+        """cache=None -> อัตโนมัติ (เฉพาะ temperature == 0), True/False -> บังคับ"""
+        if self.cache is None or cache is False:
+            return False
+        return cache is True or payload.get("temperature") == 0
 
-        try:
-            print(f"[LLM] 📤 ส่ง payload ไปยัง {self.server_url}")
-            resp = requests.post(self.server_url, json=payload, timeout=self.timeout)
-            resp.raise_for_status()
-        except requests.RequestException as e:
-            return f"[LLM ERROR] ไม่สามารถเชื่อมต่อ LLM server: {e}\n💡 ตรวจสอบว่า LM Studio เปิดอยู่และโหลดโมเดลที่รองรับ Vision แล้ว"
+    def _payload_key(self, payload: Dict[str, Any]) -> str:
+        extra = {k: v for k, v in payload.items() if k not in _BASE_PAYLOAD_KEYS}
+        return make_cache_key(payload["model"], payload["messages"], payload["temperature"], payload["max_tokens"],
+                              extra=extra)
 
-        try:
-            data = resp.json()
-        except Exception as e:
-            return f"[LLM ERROR] ไม่สามารถแปลง response เป็น JSON: {e}\nRaw: {resp.text[:200]}"
+    def _flight_key(self, payload: Dict[str, Any], payload_key: Optional[str] = None) -> str:
+        """key ของ single-flight: ปลายทาง + payload ทั้งหมด"""
+        payload_key = payload_key or self._payload_key(payload)
+        return f"{self.server_url}|{'stream' if payload.get('stream') else 'once'}|{payload_key}"
 
-        return self._extract_text_from_response(data)
+    def _complete(self, payload: Dict[str, Any], call_type: str = "text", error_hint: str = "",
+                  cache: Optional[bool] = None, priority: Optional[str] = None) -> str:
+        """ส่ง payload แบบ non-stream แล้วคืนข้อความ (cache -> single-flight -> HTTP)"""
+        cache_key = None
+        if self._should_cache(payload, cache):
+            cache_key = self._payload_key(payload)
+            cached = self.cache.get(cache_key)
+            if cached is not None:
+                return cached
 
-    def ask_multimodal(self, messages: List[Dict[str, Any]]) -> str:
-        """ส่ง messages แบบ custom (ยืดหยุ่นสูง)"""
-        payload = {
-            "model": self.model,
-            "messages": messages,
-            "temperature": self.temperature,
-            "max_tokens": self.max_tokens,
-            "stream": False
-        }
-        try:
-            resp = requests.post(self.server_url, json=payload, timeout=self.timeout)
-            resp.raise_for_status()
-        except requests.RequestException as e:
-            return f"[LLM ERROR] ไม่สามารถเชื่อมต่อ LLM server: {e}"
+        if self.singleflight is not None:
+            text = self.singleflight.do(self._flight_key(payload, cache_key),
+                                        lambda: self._scheduled_post(payload, call_type, error_hint, priority))
+        else:
+            text = self._scheduled_post(payload, call_type, error_hint, priority)
 
-        try:
-            data = resp.json()
-        except Exception as e:
-            return f"[LLM ERROR] ไม่สามารถแปลง response เป็น JSON: {e}"
+        if cache_key is not None and not text.startswith(("[LLM ERROR]", "[LLM BUSY]", CANCELLED_REPLY)):
+            self.cache.put(cache_key, text)
+        return text
+
+    def _new_stream(self, payload: Dict[str, Any], call_type: str, error_hint: str = "",
+                    priority: Optional[str] = None, exclude: Sequence[Endpoint] = ()) -> LLMStream:
+        """สร้าง LLMStream ที่ถูกติดตามไว้ให้ cancel_all() ยกเลิกได้"""
+        server_url, health, endpoint = self.server_url, self.health, None
+        if self.pool is not None:
+            # บทสนทนาเดิม -> endpoint เดิม (prompt cache), คำถามเดี่ยว -> ตัวที่งานค้างน้อยสุด
+            endpoint = self.pool.acquire(conversation_key(payload["messages"]), exclude=exclude)
+            server_url, health = endpoint.url, endpoint
+        stream = _TrackedLLMStream(
+            self, server_url, payload, self.timeout, error_hint=error_hint, transport=self.transport,
+            scheduler=self.scheduler, priority=priority or self.priority, call_type=call_type,
+            health=health
+        )
+        stream._endpoint = endpoint
+        with self._active_lock:
+            self._active.add(stream)
+        return stream
+
+    def _untrack(self, stream: LLMStream):
+        with self._active_lock:
+            self._active.discard(stream)
+            endpoint, stream._endpoint = getattr(stream, "_endpoint", None), None
+        if endpoint is not None:
+            self.pool.release(endpoint)
+
+    def _scheduled_post(self, payload: Dict[str, Any], call_type: str, error_hint: str = "",
+                        priority: Optional[str] = None) -> str:
+        """
+        ส่งแบบ SSE แล้วรวมเป็นข้อความเดียว
+        (ใช้ stream ภายในเสมอ เพื่อให้ยกเลิกกลางทางได้และคืน GPU ให้ LM Studio ทันที)
+        """
+        failed: List[Endpoint] = []
+        while True:
+            stream = self._new_stream(dict(payload, stream=True), call_type, error_hint, priority, exclude=failed)
+            endpoint = stream._endpoint
+            text = stream.collect()
+            if stream.cancelled:
+                return CANCELLED_REPLY
+            # stream ขาดกลางทาง / ไม่มี finish_reason -> ข้อความที่ได้ไม่ครบ คืนเป็น error แทน (ไม่ถูก cache)
+            if stream.error is None:
+                return text
+            status = stream.status_code if stream.status_code and stream.status_code >= 400 else None
+            text = LLMErrorReply(stream.error, status, stream.error_body)
+            # หลาย endpoint: ตัวนี้ error -> ส่งซ้ำที่ตัวอื่นที่ยังดีอยู่
+            if endpoint is None or not text.startswith("[LLM ERROR]"):
+                return text
+            failed.append(endpoint)
+            if not self.pool.has_available(exclude=failed):
+                return text
+            print(f"[LLM] ↪️ {endpoint.url} ตอบ error → ส่งซ้ำที่ endpoint อื่น")
+
+    def cancel_all(self, priority: Optional[str] = None) -> int:
+        """
+        ยกเลิก request ที่กำลังรอคิว/กำลังวิ่งอยู่ทั้งหมดของ instance นี้
+        - priority: ยกเลิกเฉพาะ class นั้น (None = ทั้งหมด)
+        คืนจำนวน request ที่ถูกยกเลิก
+        """
+        with self._active_lock:
+            targets = [s for s in self._active if priority is None or s.priority == priority]
+        for stream in targets:
+            stream.cancel()  # _TrackedLLMStream.cancel() เอาออกจากรายการและคืน endpoint ด้วย
+        if targets:
+            print(f"[LLM] ⏹️ ยกเลิก {len(targets)} request")
+        return len(targets)
 
-        return self._extract_text_from_response(data)
+    def ask(self, text: str, history: Optional[List[Dict[str, str]]] = None, cache: Optional[bool] = None,
+            priority: Optional[str] = None) -> str:
+        """
+        ส่งข้อความแบบ text-only
+        - cache: None = อัตโนมัติ (temperature 0), True = ใช้ response cache
+        - priority: "interactive" / "parser" / "background" (None = ค่าของ instance)
+        """
+        messages = self._build_text_messages(text, history)
+        return self._complete(self._build_payload(messages), call_type="text", cache=cache, priority=priority)
+
+    def ask_with_image(self, prompt_text: str, image_data_uri: Any, history: Optional[List[Dict[str, str]]] = None,
+                       cache: Optional[bool] = None, priority: Optional[str] = None) -> str:
+        """
+        ส่ง prompt + image ให้ LM Studio Vision Model
+        (ดู format ใน _build_image_messages)
+        """
+        messages = self._build_image_messages(prompt_text, image_data_uri, history)
+        print(f"[LLM] 📤 ส่ง payload ไปยัง {self.server_url}")
+        return self._complete(self._build_payload(messages), call_type="vision", error_hint=_VISION_HINT,
+                              cache=cache, priority=priority)
+
+    def ask_multimodal(self, messages: List[Dict[str, Any]], cache: Optional[bool] = None,
+                       priority: Optional[str] = None, temperature: Optional[float] = None) -> str:
+        """ส่ง messages แบบ custom (ยืดหยุ่นสูง) - temperature: None = ค่าของ instance"""
+        payload = self._build_payload(messages)
+        if temperature is not None:
+            payload["temperature"] = temperature
+        return self._complete(payload, call_type="text", cache=cache, priority=priority)
+
+    def ask_structured(self, messages: List[Dict[str, Any]], schema: Dict[str, Any], schema_name: str = "response",
+                       max_tokens: Optional[int] = None, stop: Optional[List[str]] = None,
+                       temperature: Optional[float] = None, cache: Optional[bool] = None,
+                       priority: Optional[str] = None) -> str:
+        """
+        ส่ง messages พร้อมบังคับให้ตอบเป็น JSON ตาม schema (response_format แบบ json_schema ของ LM Studio)
+        - max_tokens / stop: จำกัดความยาวคำตอบ (None = ค่าของ instance)
+        คืนข้อความ JSON (หรือ "[LLM ERROR] ..." ถ้า server ไม่รองรับ -> ตรวจด้วย is_unsupported_format())
+        """
+        payload = self._build_payload(
+            messages, max_tokens=max_tokens, stop=stop,
+            response_format={"type": "json_schema",
+                             "json_schema": {"name": schema_name, "strict": True, "schema": schema}},
+        )
+        if temperature is not None:
+            payload["temperature"] = temperature
+        return self._complete(payload, call_type="text", cache=cache, priority=priority)
+
+    # =====================================================
+    # ⚡ Streaming (SSE) - ได้ token แรกเร็ว ไม่ต้องรอทั้งคำตอบ
+    # =====================================================
+
+    def _open_stream(self, payload: Dict[str, Any], error_hint: str = "", priority: Optional[str] = None,
+                     call_type: str = "stream"):
+        """สร้าง LLMStream (ถ้ามี stream เดียวกันวิ่งอยู่จะได้ view ที่อ่านร่วมกัน)"""
+        def factory():
+            return self._new_stream(payload, call_type, error_hint, priority)
 
+        if self.singleflight is None:
+            return factory()
+        return self.singleflight.share_stream(self._flight_key(payload), factory)
+
+    def ask_stream(self, text: str, history: Optional[List[Dict[str, str]]] = None,
+                   priority: Optional[str] = None) -> LLMStream:
+        """เหมือน ask() แต่คืน LLMStream ให้วน for รับ delta"""
+        messages = self._build_text_messages(text, history)
+        return self._open_stream(self._build_payload(messages, stream=True), priority=priority)
+
+    def ask_with_image_stream(self, prompt_text: str, image_data_uri: Any, history: Optional[List[Dict[str, str]]] = None,
+                              priority: Optional[str] = None) -> LLMStream:
+        """เหมือน ask_with_image() แต่คืน LLMStream"""
+        messages = self._build_image_messages(prompt_text, image_data_uri, history)
+        return self._open_stream(self._build_payload(messages, stream=True), error_hint=_VISION_HINT, priority=priority,
+                                 call_type="vision")
+
+    def ask_multimodal_stream(self, messages: List[Dict[str, Any]], priority: Optional[str] = None) -> LLMStream:
+        """เหมือน ask_multimodal() แต่คืน LLMStream"""
+        return self._open_stream(self._build_payload(messages, stream=True), priority=priority)
 
 if __name__ == "__main__":
     print("=== [LLMClient: manual test] ===")
@@ -168,4 +655,10 @@ if __name__ == "__main__":
     # ทดสอบด้วย fake data URI
     fake_image = "data:image/jpeg;base64,/9j/4AAQSkZJRg..."
     reply2 = client.ask_with_image("นี่คือภาพอะไร?", fake_image)
-    print("Response:", reply2)
\ No newline at end of file
+    print("Response:", reply2)
+
+    print("\n[TEST 3] Streaming query")
+    stream = client.ask_stream("นับเลข 1 ถึง 10")
+    for delta in stream:
+        print(delta, end="", flush=True)
+    print(f"\nTTFT: {stream.ttft}s | Total: {stream.total_time:.2f}s")
\ No newline at end of file
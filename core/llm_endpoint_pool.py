@@ -0,0 +1,251 @@
+# core/llm_endpoint_pool.py
+# -------------------------
+# EndpointPool: กระจาย request ไปหลาย LM Studio / llama.cpp server (OpenAI-compatible)
+# - least-outstanding: เลือก endpoint ที่มีงานค้างน้อยที่สุด
+# - circuit breaker ต่อ endpoint: error ติดกัน N ครั้ง -> เปิดวงจร (ไม่ส่งงาน) ช่วง cooldown
+#   แล้วลองส่ง 1 request (half-open) ถ้าผ่านจึงปิดวงจรกลับมาใช้ตามปกติ
+# - sticky: บทสนทนาเดียวกันไปลง endpoint เดิม เพื่อให้ prompt cache ของ server นั้นยัง hit
+# Endpoint มี interface เดียวกับ LLMHealth (allow / report_success / report_failure / report_cancelled)
+# จึงส่งให้ LLMStream ใช้แทน health ได้เลย
+# -------------------------
+
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Sequence
+
+from core.llm_health import LLMHealth, get_health
+from core.llm_request_body import json_default
+
+try:
+    from config import LLM_BREAKER_THRESHOLD, LLM_BREAKER_COOLDOWN
+except Exception:
+    LLM_BREAKER_THRESHOLD = 3
+    LLM_BREAKER_COOLDOWN = 10.0
+
+BREAKER_CLOSED = "closed"
+BREAKER_OPEN = "open"
+BREAKER_HALF_OPEN = "half-open"
+
+# จำนวนบทสนทนาที่จำ endpoint ไว้ (LRU)
+_MAX_STICKY = 256
+
+
+def conversation_key(messages: List[Dict[str, Any]]) -> Optional[str]:
+    """
+    key ของบทสนทนา = hash ของ 3 message แรก (system prompt + ต้นบทสนทนา/สรุป)
+    คำถามเดี่ยว (ไม่มี history) คืน None -> ไม่ sticky ใช้ least-outstanding ตามปกติ
+    """
+    if len(messages) <= 2:
+        return None
+    blob = json.dumps(messages[:3], sort_keys=True, ensure_ascii=False, default=json_default)
+    return hashlib.sha1(blob.encode("utf-8")).hexdigest()
+
+
+class Endpoint:
+    """server 1 ตัวใน pool: นับงานค้าง + circuit breaker + LLMHealth ของ url นั้น"""
+
+    def __init__(self, url: str, failure_threshold: int = None, cooldown: float = None,
+                 health: Optional[LLMHealth] = None):
+        self.url = url
+        self.health = health or get_health(url)
+        self.failure_threshold = failure_threshold or LLM_BREAKER_THRESHOLD
+        self.cooldown = LLM_BREAKER_COOLDOWN if cooldown is None else cooldown
+
+        self.outstanding = 0
+        self.breaker = BREAKER_CLOSED
+        self.consecutive_failures = 0
+        self.opened_at: Optional[float] = None
+        self._trial_in_flight = False
+        self._trial_owner: Any = None
+        self._lock = threading.Lock()
+
+        # สถิติ
+        self.requests = 0
+        self.failures = 0
+        self.trips = 0
+
+    # -------------------------
+    # สถานะ
+    # -------------------------
+    def _refresh(self):
+        """open -> half-open เมื่อครบ cooldown (เรียกภายใต้ lock)"""
+        if self.breaker == BREAKER_OPEN and time.time() - self.opened_at >= self.cooldown:
+            self.breaker = BREAKER_HALF_OPEN
+            self._trial_in_flight = False
+            self._trial_owner = None
+
+    def available(self) -> bool:
+        """รับงานใหม่ได้หรือไม่ (ไม่จองอะไร)"""
+        with self._lock:
+            self._refresh()
+            if self.breaker == BREAKER_OPEN:
+                return False
+            if self.breaker == BREAKER_HALF_OPEN and self._trial_in_flight:
+                return False
+        return self.health.state != "down"
+
+    # -------------------------
+    # interface แบบ LLMHealth (LLMStream เรียก)
+    # -------------------------
+    def allow(self, owner: Any = None) -> bool:
+        """
+        ส่ง request ได้หรือไม่ (half-open: ให้ owner เป็นคนลองคนเดียว)
+        owner ที่ได้ True ต้องจบด้วย report_success / report_failure / report_error / report_cancelled เสมอ
+        """
+        with self._lock:
+            self._refresh()
+            if self.breaker == BREAKER_OPEN:
+                return False
+            if self.breaker == BREAKER_HALF_OPEN:
+                if self._trial_in_flight:
+                    return False
+                # ปล่อย 1 request ไปลองก่อน
+                self._trial_in_flight = True
+                self._trial_owner = owner
+        if self.health.allow():
+            return True
+        self.report_cancelled(owner)
+        return False
+
+    def down_message(self) -> str:
+        if self.breaker != BREAKER_CLOSED:
+            wait = max(0.0, self.cooldown - (time.time() - (self.opened_at or 0)))
+            return f"[LLM ERROR] endpoint {self.url} ถูกพักชั่วคราว (ลองใหม่ใน {wait:.0f}s)"
+        return self.health.down_message()
+
+    def report_success(self):
+        with self._lock:
+            if self.breaker != BREAKER_CLOSED:
+                print(f"[EndpointPool] ✅ {self.url} กลับมาใช้งานได้")
+            self.breaker = BREAKER_CLOSED
+            self.consecutive_failures = 0
+            self._trial_in_flight = False
+            self._trial_owner = None
+        self.health.report_success()
+
+    def report_failure(self, error: Exception):
+        """เชื่อมต่อไม่ได้"""
+        self._record_failure(error)
+        self.health.report_failure(error)
+
+    def report_error(self, error: Exception):
+        """server ตอบ error (5xx / read timeout) -> นับเข้า circuit breaker แต่ไม่ถือว่าล่ม"""
+        self._record_failure(error)
+
+    def report_cancelled(self, owner: Any = None):
+        """request ที่ได้ allow() แล้วแต่ไม่ได้ผลลัพธ์ (คิวเต็ม / ถูกยกเลิก / server ล่ม) -> คืนสิทธิ์ลองของ half-open"""
+        with self._lock:
+            if self._trial_in_flight and self._trial_owner is owner:
+                self._trial_in_flight = False
+                self._trial_owner = None
+
+    def _record_failure(self, error: Exception):
+        with self._lock:
+            self.failures += 1
+            self.consecutive_failures += 1
+            trip = (self.breaker == BREAKER_HALF_OPEN
+                    or (self.breaker == BREAKER_CLOSED and self.consecutive_failures >= self.failure_threshold))
+            if trip:
+                self.breaker = BREAKER_OPEN
+                self.opened_at = time.time()
+                self._trial_in_flight = False
+                self._trial_owner = None
+                self.trips += 1
+        if trip:
+            print(f"[EndpointPool] 🔌 พัก {self.url} {self.cooldown:.0f}s (error ติดกัน {self.consecutive_failures} ครั้ง: {error})")
+
+    def get_stats(self) -> dict:
+        return {
+            "outstanding": self.outstanding,
+            "breaker": self.breaker,
+            "health": self.health.state,
+            "requests": self.requests,
+            "failures": self.failures,
+            "trips": self.trips,
+        }
+
+
+class EndpointPool:
+    """กลุ่ม endpoint ที่ LLMClient ใช้ร่วมกัน (ใช้ผ่าน get_endpoint_pool(urls))"""
+
+    def __init__(self, urls: Sequence[str], failure_threshold: int = None, cooldown: float = None):
+        if not urls:
+            raise ValueError("EndpointPool ต้องมีอย่างน้อย 1 endpoint")
+        self.endpoints = [Endpoint(url, failure_threshold, cooldown) for url in urls]
+        self._sticky: "OrderedDict[str, Endpoint]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._rr = 0
+
+        # สถิติ
+        self.sticky_hits = 0
+
+    def acquire(self, sticky_key: Optional[str] = None, exclude: Sequence[Endpoint] = ()) -> Endpoint:
+        """
+        เลือก endpoint แล้วนับงานค้าง +1 (ต้อง release ทุกครั้ง)
+        - exclude: endpoint ที่เพิ่งล้มเหลวกับ request นี้ (ใช้ตอนส่งซ้ำ)
+        """
+        with self._lock:
+            candidates = [ep for ep in self.endpoints if ep not in exclude and ep.available()]
+
+            endpoint = None
+            if sticky_key is not None:
+                endpoint = self._sticky.get(sticky_key)
+                if endpoint is not None and endpoint in candidates:
+                    self._sticky.move_to_end(sticky_key)
+                    self.sticky_hits += 1
+                else:
+                    endpoint = None
+
+            if endpoint is None:
+                # ไม่มีตัวไหนพร้อม -> ใช้ทุกตัว (request จะ fail fast ตาม allow())
+                pool = candidates or self.endpoints
+                # เริ่มไล่จากตำแหน่งหมุนเวียน เพื่อให้ตัวที่งานค้างเท่ากันได้งานสลับกัน
+                self._rr = (self._rr + 1) % len(pool)
+                ordered = pool[self._rr:] + pool[:self._rr]
+                endpoint = min(ordered, key=lambda ep: ep.outstanding)
+                if sticky_key is not None:
+                    self._sticky[sticky_key] = endpoint
+                    while len(self._sticky) > _MAX_STICKY:
+                        self._sticky.popitem(last=False)
+
+            endpoint.outstanding += 1
+            endpoint.requests += 1
+        return endpoint
+
+    def release(self, endpoint: Endpoint):
+        with self._lock:
+            endpoint.outstanding = max(0, endpoint.outstanding - 1)
+
+    def has_available(self, exclude: Sequence[Endpoint] = ()) -> bool:
+        return any(ep.available() for ep in self.endpoints if ep not in exclude)
+
+    @property
+    def healths(self) -> List[LLMHealth]:
+        return [ep.health for ep in self.endpoints]
+
+    def get_stats(self) -> dict:
+        return {
+            "endpoints": {ep.url: ep.get_stats() for ep in self.endpoints},
+            "sticky_conversations": len(self._sticky),
+            "sticky_hits": self.sticky_hits,
+        }
+
+
+_shared_pools: Dict[tuple, EndpointPool] = {}
+_shared_lock = threading.Lock()
+
+
+def get_endpoint_pool(urls: Sequence[str]) -> EndpointPool:
+    """คืน EndpointPool กลางของชุด url นี้ (client ทุกตัวที่ใช้ชุดเดียวกันเห็นงานค้างร่วมกัน)"""
+    key = tuple(urls)
+    pool = _shared_pools.get(key)
+    if pool is None:
+        with _shared_lock:
+            pool = _shared_pools.get(key)
+            if pool is None:
+                pool = EndpointPool(key)
+                _shared_pools[key] = pool
+    return pool
@@ -0,0 +1,253 @@
+# core/llm_health.py
+# -------------------------
+# LLMHealth: สถานะสุขภาพของ LM Studio + warm-up ตอนเปิดโปรแกรม
+# - probe: GET /v1/models (timeout สั้น) เช็คว่า server ตอบและมีโมเดลที่ตั้งไว้หรือไม่
+# - warm-up: ส่ง completion เล็กๆ (text + vision) ให้ LM Studio โหลดโมเดลไว้ก่อน (JIT loading)
+#   คำถามแรกของผู้ใช้จึงไม่ต้องรอโหลดโมเดล
+# - fail fast: ถ้า server ล่ม LLMClient จะคืน error ทันที แทนที่จะรอ timeout 60 วินาที
+#   แล้ว probe ซ้ำใน background ด้วย exponential backoff จนกลับมาใช้ได้
+# -------------------------
+
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+import requests
+
+from core.llm_transport import LLMTransport, get_transport
+
+try:
+    from config import LLM_SERVER_URL, LLM_MODEL
+except Exception:
+    LLM_SERVER_URL = "http://localhost:1234/v1/chat/completions"
+    LLM_MODEL = "google/gemma-3-4b"
+
+try:
+    from config import LLM_HEALTH_BACKOFF, LLM_HEALTH_BACKOFF_MAX
+except Exception:
+    LLM_HEALTH_BACKOFF = 1.0
+    LLM_HEALTH_BACKOFF_MAX = 30.0
+
+STATE_UNKNOWN = "unknown"
+STATE_UP = "up"
+STATE_DOWN = "down"
+
+# PNG 1x1 พิกเซล สำหรับ warm-up ส่วน vision (ไม่ต้องพึ่ง PIL)
+_WARMUP_IMAGE = (
+    "data:image/png;base64,"
+    "iVBORw0KGgoAAAANSUhEUgAAAAEAAAABCAYAAAAfFcSJAAAADUlEQVR42mNkYPhfDwAChwGA60e6kgAAAABJRU5ErkJggg=="
+)
+
+
+def models_url(server_url: str) -> str:
+    """.../v1/chat/completions -> .../v1/models"""
+    base = server_url.rstrip("/")
+    for suffix in ("/chat/completions", "/completions"):
+        if base.endswith(suffix):
+            return base[: -len(suffix)] + "/models"
+    return base + "/models"
+
+
+class LLMHealth:
+    """
+    สถานะของ endpoint 1 ตัว (ใช้ผ่าน get_health(server_url))
+    - unknown: ยังไม่เคย probe -> ปล่อยทุก request ผ่าน
+    - up: ใช้งานได้
+    - down: เชื่อมต่อไม่ได้ -> allow() คืน False และมี thread probe ซ้ำอยู่เบื้องหลัง
+    """
+
+    def __init__(self, server_url: str = None, model: str = None, transport: Optional[LLMTransport] = None,
+                 backoff: float = None, backoff_max: float = None):
+        self.server_url = server_url or LLM_SERVER_URL
+        self.model = model or LLM_MODEL
+        self.transport = transport or get_transport()
+        self.backoff = backoff or LLM_HEALTH_BACKOFF
+        self.backoff_max = backoff_max or LLM_HEALTH_BACKOFF_MAX
+
+        self.state = STATE_UNKNOWN
+        self.models: List[str] = []
+        self.model_available: Optional[bool] = None
+        self.last_error: Optional[str] = None
+        self.last_probe: Optional[float] = None
+        self.next_probe: Optional[float] = None
+        self.warmed_up = {"text": False, "vision": False}
+
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._reprobe_thread: Optional[threading.Thread] = None
+        self._listeners: List[Callable[[str], None]] = []
+
+        # สถิติ
+        self.probe_count = 0
+        self.fast_failures = 0
+
+    # -------------------------
+    # สถานะ
+    # -------------------------
+    def add_listener(self, callback: Callable[[str], None]):
+        """callback(state) ถูกเรียกทุกครั้งที่สถานะเปลี่ยน (จาก thread ใดก็ได้)"""
+        self._listeners.append(callback)
+
+    def _set_state(self, state: str, error: Optional[str] = None):
+        with self._lock:
+            changed = state != self.state
+            self.state = state
+            self.last_error = error
+        if not changed:
+            return
+        if state == STATE_UP:
+            print(f"[LLMHealth] ✅ LM Studio พร้อมใช้งาน ({self.server_url})")
+        elif state == STATE_DOWN:
+            print(f"[LLMHealth] ❌ LM Studio ไม่ตอบสนอง: {error}")
+        for callback in list(self._listeners):
+            try:
+                callback(state)
+            except Exception as e:
+                print(f"[LLMHealth] ⚠️ listener error: {e}")
+
+    def allow(self, owner: Any = None) -> bool:
+        """ควรส่ง request หรือไม่ (False = server ล่มอยู่ ให้ตอบ error ทันที), owner ใช้กับ Endpoint"""
+        if self.state != STATE_DOWN:
+            return True
+        with self._lock:
+            self.fast_failures += 1
+        return False
+
+    def down_message(self) -> str:
+        """ข้อความ error สำหรับ request ที่ถูกปฏิเสธเพราะ server ล่ม"""
+        wait = ""
+        if self.next_probe is not None:
+            wait = f" (ตรวจใหม่ใน {max(0.0, self.next_probe - time.time()):.0f}s)"
+        return f"[LLM ERROR] LM Studio ไม่ตอบสนอง{wait}: {self.last_error}"
+
+    def report_success(self):
+        """LLMClient ได้ response กลับมา"""
+        if self.state != STATE_UP:
+            self._set_state(STATE_UP)
+
+    def report_failure(self, error: Exception):
+        """LLMClient เชื่อมต่อไม่ได้ -> ตั้งเป็น down และเริ่ม probe ซ้ำเบื้องหลัง"""
+        self._set_state(STATE_DOWN, str(error))
+        self._ensure_reprobe()
+
+    def report_error(self, error: Exception):
+        """server ตอบ error (5xx / read timeout) แต่ยังเชื่อมต่อได้ -> ไม่ถือว่าล่ม"""
+        pass
+
+    def report_cancelled(self, owner: Any = None):
+        """request ที่ allow() แล้วจบโดยไม่ได้ผล (คิวเต็ม / ถูกยกเลิก) -> ไม่มีอะไรต้องคืน"""
+        pass
+
+    # -------------------------
+    # probe / warm-up
+    # -------------------------
+    def probe(self) -> bool:
+        """GET /v1/models ด้วย timeout สั้น คืน True ถ้า server ตอบ"""
+        self.last_probe = time.time()
+        self.probe_count += 1
+        try:
+            resp = self.transport.get(models_url(self.server_url), call_type="probe")
+            resp.raise_for_status()
+            data = resp.json()
+        except (requests.RequestException, ValueError) as e:
+            self._set_state(STATE_DOWN, str(e))
+            return False
+
+        self.models = [m.get("id", "") for m in data.get("data", []) if isinstance(m, dict)]
+        self.model_available = self.model in self.models if self.models else None
+        if self.model_available is False:
+            print(f"[LLMHealth] ⚠️ ไม่พบโมเดล {self.model} ใน LM Studio (มี: {', '.join(self.models[:5])})")
+        self._set_state(STATE_UP)
+        return True
+
+    def warm_up(self, vision: bool = True, model: str = None):
+        """ส่ง completion 1 token ให้ LM Studio โหลดโมเดล (และ vision encoder) ไว้ก่อน"""
+        from core.llm_client import LLMClient
+
+        model = model or self.model
+        client = LLMClient(server_url=self.server_url, model=model, temperature=0, max_tokens=1, health=self)
+        start = time.time()
+        reply = client.ask("hi", cache=False, priority="background")
+        text_ok = not reply.startswith("[LLM")
+        self.warmed_up["text"] = self.warmed_up["text"] or text_ok
+        print(f"[LLMHealth] 🔥 warm-up text {model} {'สำเร็จ' if text_ok else 'ไม่สำเร็จ'} "
+              f"({time.time() - start:.2f}s)")
+
+        if vision and text_ok:
+            start = time.time()
+            reply = client.ask_with_image("hi", _WARMUP_IMAGE, cache=False, priority="background")
+            vision_ok = not reply.startswith("[LLM")
+            self.warmed_up["vision"] = self.warmed_up["vision"] or vision_ok
+            print(f"[LLMHealth] 🔥 warm-up vision {model} {'สำเร็จ' if vision_ok else 'ไม่สำเร็จ'} "
+                  f"({time.time() - start:.2f}s)")
+
+    def start(self, warm_up: bool = True, vision: bool = True,
+              models: Optional[Dict[str, bool]] = None) -> threading.Thread:
+        """
+        probe + warm-up ใน background thread (ไม่บล็อกการเปิด UI)
+        - models: {ชื่อโมเดล: warm-up vision ด้วยหรือไม่} (None = เฉพาะ self.model)
+        """
+        models = models or {self.model: vision}
+
+        def run():
+            if self.probe():
+                if warm_up:
+                    for model, with_vision in models.items():
+                        if self.models and model not in self.models:
+                            continue
+                        self.warm_up(vision=with_vision, model=model)
+            else:
+                self._ensure_reprobe()
+
+        thread = threading.Thread(target=run, daemon=True)
+        thread.start()
+        return thread
+
+    def _ensure_reprobe(self):
+        with self._lock:
+            if self._reprobe_thread is not None and self._reprobe_thread.is_alive():
+                return
+            self._reprobe_thread = threading.Thread(target=self._reprobe_loop, daemon=True)
+            self._reprobe_thread.start()
+
+    def _reprobe_loop(self):
+        """probe ซ้ำด้วย exponential backoff จนกว่า server จะกลับมา"""
+        delay = self.backoff
+        while self.state == STATE_DOWN and not self._stop.is_set():
+            self.next_probe = time.time() + delay
+            if self._stop.wait(delay):
+                break
+            if self.probe():
+                break
+            delay = min(self.backoff_max, delay * 2)
+        self.next_probe = None
+
+    def stop(self):
+        self._stop.set()
+
+    def get_stats(self) -> dict:
+        return {
+            "state": self.state,
+            "model_available": self.model_available,
+            "warmed_up": dict(self.warmed_up),
+            "probe_count": self.probe_count,
+            "fast_failures": self.fast_failures,
+            "last_error": self.last_error,
+        }
+
+
+_shared_health = {}
+_shared_lock = threading.Lock()
+
+
+def get_health(server_url: str = None) -> LLMHealth:
+    """คืน LLMHealth กลางของ endpoint นั้น (1 ตัวต่อ server_url)"""
+    server_url = server_url or LLM_SERVER_URL
+    health = _shared_health.get(server_url)
+    if health is None:
+        with _shared_lock:
+            health = _shared_health.get(server_url)
+            if health is None:
+                health = LLMHealth(server_url)
+                _shared_health[server_url] = health
+    return health
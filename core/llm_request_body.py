@@ -0,0 +1,168 @@
+# core/llm_request_body.py
+# -------------------------
+# JSONBodyStream: เขียน request body (JSON) แบบ stream ลง HTTP โดยตรง
+# - ภาพใน payload ใส่เป็น ImageBytes (bytes ของ JPEG/PNG) แทน data URI string
+# - body ถูกสร้างทีละชิ้น: ส่วน JSON รอบๆ + base64 ของภาพทีละ chunk
+#   ไม่ต้องมี base64 string ทั้งก้อน / data URI / JSON ทั้งก้อน ค้างอยู่ใน memory พร้อมกัน
+#   (memory ต่อ request ~ ขนาดไฟล์ภาพ + 1 chunk)
+# - รู้ความยาวล่วงหน้า -> requests ส่ง Content-Length ตามปกติ (ไม่ใช้ chunked encoding)
+# -------------------------
+
+import base64
+import hashlib
+import json
+import uuid
+from typing import Any, Dict, Iterator, List, Optional, Union
+
+# ขนาด bytes ของภาพต่อ chunk (หาร 3 ลงตัว -> base64 ต่อกันได้ไม่มี padding กลางทาง)
+CHUNK_SIZE = 48 * 1024
+
+
+class ImageBytes:
+    """ภาพที่ยังไม่ได้แปลงเป็น base64 (ใส่แทน data URI ใน {"image_url": {"url": ...}} ได้)"""
+
+    __slots__ = ("raw", "mime", "_digest")
+
+    def __init__(self, raw: bytes, mime: str = "image/jpeg"):
+        self.raw = raw
+        self.mime = mime
+        self._digest: Optional[str] = None
+
+    @property
+    def prefix(self) -> bytes:
+        return f"data:{self.mime};base64,".encode("ascii")
+
+    @property
+    def encoded_length(self) -> int:
+        """ความยาวของ data URI เมื่อเขียนลง body"""
+        return len(self.prefix) + 4 * ((len(self.raw) + 2) // 3)
+
+    def digest(self) -> str:
+        """hash ของภาพ (ใช้ใน cache key แทนการ hash base64 ทั้งก้อน)"""
+        if self._digest is None:
+            self._digest = hashlib.sha256(self.raw).hexdigest()
+        return self._digest
+
+    def to_data_uri(self) -> str:
+        """data URI แบบเต็ม (สำหรับที่ที่ยังต้องการ string)"""
+        return f"data:{self.mime};base64," + base64.b64encode(self.raw).decode("ascii")
+
+    def iter_encoded(self, chunk_size: int = CHUNK_SIZE) -> Iterator[bytes]:
+        yield self.prefix
+        raw = memoryview(self.raw)
+        for start in range(0, len(raw), chunk_size):
+            yield base64.b64encode(raw[start:start + chunk_size])
+
+    def __repr__(self) -> str:
+        return f"ImageBytes({self.mime}, {len(self.raw)} bytes)"
+
+
+def as_image_url(image: Any) -> Union[str, ImageBytes]:
+    """
+    ค่าที่ใส่ใน image_url.url ได้:
+    - str (data URI / URL) -> ใช้ตามเดิม
+    - ImageBytes -> ใช้ตามเดิม
+    - EncodedImage (มี raw_bytes + mime) -> ImageBytes (ไม่สร้าง base64 string)
+    """
+    if isinstance(image, (str, ImageBytes)):
+        return image
+    if hasattr(image, "raw_bytes") and hasattr(image, "mime"):
+        return ImageBytes(image.raw_bytes, image.mime)
+    raise TypeError(f"ไม่รู้จักรูปแบบภาพ: {type(image).__name__}")
+
+
+def json_default(obj: Any) -> Any:
+    """default ของ json.dumps สำหรับ cache key / conversation key: ภาพ -> hash"""
+    if isinstance(obj, ImageBytes):
+        return f"image:{obj.mime}:{obj.digest()}"
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def has_image_bytes(payload: Dict[str, Any]) -> bool:
+    """payload มี ImageBytes หรือไม่ (ต้องส่งผ่าน JSONBodyStream)"""
+    for message in payload.get("messages") or []:
+        content = message.get("content") if isinstance(message, dict) else None
+        if not isinstance(content, list):
+            continue
+        for part in content:
+            if isinstance(part, dict) and isinstance((part.get("image_url") or {}).get("url"), ImageBytes):
+                return True
+    return False
+
+
+class JSONBodyStream:
+    """
+    request body แบบ file-like / iterable (requests อ่านทีละ block ผ่าน read())
+    - rewind(): เริ่มอ่านใหม่ตั้งแต่ต้น (transport เรียกก่อนส่งซ้ำ)
+    """
+
+    def __init__(self, payload: Dict[str, Any], chunk_size: int = CHUNK_SIZE):
+        self.chunk_size = chunk_size - chunk_size % 3 or 3
+        self._segments: List[Union[bytes, ImageBytes]] = self._split(payload)
+        self.length = sum(len(s) if isinstance(s, bytes) else s.encoded_length for s in self._segments)
+        self.rewind()
+
+    @staticmethod
+    def _split(payload: Dict[str, Any]) -> List[Union[bytes, ImageBytes]]:
+        """JSON ของ payload แยกเป็นชิ้น: bytes ของ JSON สลับกับ ImageBytes ตรงตำแหน่ง string ของภาพ"""
+        images: List[ImageBytes] = []
+        marker = f"__img_{uuid.uuid4().hex}_"
+
+        def default(obj: Any) -> Any:
+            if isinstance(obj, ImageBytes):
+                images.append(obj)
+                return f"{marker}{len(images) - 1}"
+            raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+        text = json.dumps(payload, ensure_ascii=False, default=default)
+        segments: List[Union[bytes, ImageBytes]] = []
+        for index, piece in enumerate(text.split(marker)):
+            if index == 0:
+                segments.append(piece.encode("utf-8"))
+                continue
+            # piece = "<เลขภาพ>" + JSON ต่อจาก string ของภาพ
+            digits = len(piece) - len(piece.lstrip("0123456789"))
+            segments.append(images[int(piece[:digits])])
+            segments.append(piece[digits:].encode("utf-8"))
+        return segments
+
+    def __len__(self) -> int:
+        return self.length
+
+    def _iter_chunks(self) -> Iterator[bytes]:
+        for segment in self._segments:
+            if isinstance(segment, bytes):
+                if segment:
+                    yield segment
+            else:
+                yield from segment.iter_encoded(self.chunk_size)
+
+    def __iter__(self) -> Iterator[bytes]:
+        return self._iter_chunks()
+
+    def rewind(self):
+        self._chunks = self._iter_chunks()
+        self._buffer = b""
+        self._position = 0
+
+    def tell(self) -> int:
+        return self._position
+
+    def read(self, size: int = -1) -> bytes:
+        """อ่านไม่เกิน size bytes (-1 = ที่เหลือทั้งหมด)"""
+        if size is None or size < 0:
+            data = self._buffer + b"".join(self._chunks)
+            self._buffer = b""
+        else:
+            while len(self._buffer) < size:
+                chunk = next(self._chunks, None)
+                if chunk is None:
+                    break
+                self._buffer += chunk
+            data, self._buffer = self._buffer[:size], self._buffer[size:]
+        self._position += len(data)
+        return data
+
+    def getvalue(self) -> bytes:
+        """body ทั้งก้อน (ใช้ทดสอบ / debug เท่านั้น)"""
+        return b"".join(self._iter_chunks())
@@ -0,0 +1,217 @@
+# core/llm_router.py
+# -------------------------
+# LLMRouter: เลือกโมเดล/endpoint ตามประเภทงาน
+# - parse / summarize -> โมเดลเล็กที่เร็ว
+# - chat -> โมเดลหลัก
+# - vision-describe / vision-locate -> โมเดล multimodal
+# แต่ละ profile มี temperature / max_tokens / timeout ของตัวเอง (ตั้งใน LLM_MODEL_PROFILES)
+# และชี้ไป server_url เดียว หรือ endpoints หลายตัว (EndpointPool)
+# ถ้าโมเดลที่ต้องการไม่พร้อม (server ล่ม หรือไม่มีโมเดลนั้น) จะไล่ใช้ profile ถัดไปใน LLM_TASK_ROUTES
+# (ตอบ error ระหว่างทาง: fallback เฉพาะ transport / 5xx ไม่ใช่ 4xx)
+# -------------------------
+
+import threading
+from typing import Any, Dict, List, Optional
+
+from core.llm_client import LLMClient, is_transient_error
+from core.llm_health import LLMHealth
+
+try:
+    from config import LLM_MODEL
+except Exception:
+    LLM_MODEL = "google/gemma-3-4b"
+
+try:
+    from config import LLM_MODEL_PROFILES, LLM_TASK_ROUTES
+except Exception:
+    LLM_MODEL_PROFILES = {"main": {"model": LLM_MODEL}}
+    LLM_TASK_ROUTES = {}
+
+TASK_PARSE = "parse"
+TASK_CHAT = "chat"
+TASK_VISION_DESCRIBE = "vision-describe"
+TASK_VISION_LOCATE = "vision-locate"
+TASK_SUMMARIZE = "summarize"
+
+TASKS = (TASK_PARSE, TASK_CHAT, TASK_VISION_DESCRIBE, TASK_VISION_LOCATE, TASK_SUMMARIZE)
+VISION_TASKS = (TASK_VISION_DESCRIBE, TASK_VISION_LOCATE)
+
+
+class TaskClient:
+    """
+    ตัวแทน LLMClient ของงานประเภทหนึ่ง (ส่งให้ CommandParser / VisionSystem ฯลฯ แทน LLMClient ได้เลย)
+    ทุกครั้งที่เรียกจะถาม router ว่าควรใช้ profile ไหน จึง fallback ได้ระหว่างการทำงาน
+    """
+
+    def __init__(self, router: "LLMRouter", task: str):
+        self.router = router
+        self.task = task
+
+    def ask(self, *args, **kwargs) -> str:
+        return self.router.call(self.task, "ask", *args, **kwargs)
+
+    def ask_with_image(self, *args, **kwargs) -> str:
+        return self.router.call(self.task, "ask_with_image", *args, **kwargs)
+
+    def ask_multimodal(self, *args, **kwargs) -> str:
+        return self.router.call(self.task, "ask_multimodal", *args, **kwargs)
+
+    def ask_structured(self, *args, **kwargs) -> str:
+        return self.router.call(self.task, "ask_structured", *args, **kwargs)
+
+    # stream เลือก profile ตอนเริ่ม (fallback กลาง stream ไม่ได้)
+    def ask_stream(self, *args, **kwargs):
+        return self.router.client_for(self.task).ask_stream(*args, **kwargs)
+
+    def ask_with_image_stream(self, *args, **kwargs):
+        return self.router.client_for(self.task).ask_with_image_stream(*args, **kwargs)
+
+    def ask_multimodal_stream(self, *args, **kwargs):
+        return self.router.client_for(self.task).ask_multimodal_stream(*args, **kwargs)
+
+    def cancel_all(self, priority: Optional[str] = None) -> int:
+        """ยกเลิก request ของทุก profile (ปุ่มหยุดต้องหยุดทุกงาน ไม่ใช่แค่งานประเภทนี้)"""
+        return self.router.cancel_all(priority)
+
+    def __getattr__(self, name: str) -> Any:
+        # server_url / model / health ฯลฯ -> ของ profile ที่ใช้อยู่ตอนนี้
+        return getattr(self.router.client_for(self.task), name)
+
+
+class LLMRouter:
+    """ตัวเลือก profile ตามงาน (ใช้ผ่าน get_router())"""
+
+    def __init__(self, profiles: Optional[Dict[str, Dict[str, Any]]] = None,
+                 routes: Optional[Dict[str, List[str]]] = None):
+        self.profiles = profiles or LLM_MODEL_PROFILES
+        self.routes = routes if routes is not None else LLM_TASK_ROUTES
+        self.default_profile = next(iter(self.profiles))
+
+        self._clients: Dict[str, LLMClient] = {}
+        self._lock = threading.Lock()
+
+        # สถิติ
+        self.calls = {task: 0 for task in TASKS}
+        self.fallbacks = 0
+
+    # -------------------------
+    # profile
+    # -------------------------
+    def client(self, profile: str) -> LLMClient:
+        """LLMClient ของ profile (สร้างครั้งแรกเมื่อถูกใช้ แล้วใช้ซ้ำ)"""
+        client = self._clients.get(profile)
+        if client is None:
+            with self._lock:
+                client = self._clients.get(profile)
+                if client is None:
+                    spec = self.profiles[profile]
+                    client = LLMClient(
+                        server_url=spec.get("server_url"),
+                        endpoints=spec.get("endpoints"),
+                        model=spec.get("model") or LLM_MODEL,
+                        temperature=spec.get("temperature"),
+                        max_tokens=spec.get("max_tokens"),
+                        timeout=spec.get("timeout"),
+                    )
+                    self._clients[profile] = client
+        return client
+
+    def chain(self, task: str) -> List[str]:
+        """ลำดับ profile ที่จะลองสำหรับงานนี้"""
+        chain = [p for p in self.routes.get(task, []) if p in self.profiles]
+        return chain or [self.default_profile]
+
+    def is_available(self, profile: str) -> bool:
+        """endpoint ไม่ล่ม และ (ถ้า probe แล้ว) มีโมเดลนี้อยู่ใน LM Studio"""
+        client = self.client(profile)
+        if client.pool is not None:
+            return client.pool.has_available()
+        health: Optional[LLMHealth] = client.health
+        if health is None:
+            return True
+        if health.state == "down":
+            return False
+        return not health.models or client.model in health.models
+
+    def client_for(self, task: str) -> LLMClient:
+        """profile แรกใน chain ที่พร้อมใช้งาน (ถ้าไม่มีเลยใช้ตัวแรก ซึ่งจะตอบ error ทันที)"""
+        chain = self.chain(task)
+        for profile in chain:
+            if self.is_available(profile):
+                return self.client(profile)
+        return self.client(chain[0])
+
+    def for_task(self, task: str) -> TaskClient:
+        return TaskClient(self, task)
+
+    # -------------------------
+    # เรียกใช้ + fallback
+    # -------------------------
+    def call(self, task: str, method: str, *args, **kwargs) -> str:
+        """
+        เรียก method ของ LLMClient ตาม chain
+        ลอง profile ถัดไปเฉพาะเมื่อเชื่อมต่อไม่ได้ / stream ขาด / 5xx
+        (4xx = request ผิดเอง เช่น response_format ไม่รองรับ -> คืนให้ผู้เรียกตัดสินใจ ไม่ส่งซ้ำ)
+        """
+        self.calls[task] = self.calls.get(task, 0) + 1
+        chain = self.chain(task)
+        candidates = [p for p in chain if self.is_available(p)] or chain[:1]
+
+        reply = ""
+        for i, profile in enumerate(candidates):
+            reply = getattr(self.client(profile), method)(*args, **kwargs)
+            if not is_transient_error(reply) or i == len(candidates) - 1:
+                return reply
+            self.fallbacks += 1
+            print(f"[LLMRouter] ↪️ {task}: {profile} ใช้ไม่ได้ → ลอง {candidates[i + 1]}")
+        return reply
+
+    def cancel_all(self, priority: Optional[str] = None) -> int:
+        with self._lock:
+            clients = list(self._clients.values())
+        return sum(client.cancel_all(priority) for client in clients)
+
+    # -------------------------
+    # health / warm-up
+    # -------------------------
+    def start_health(self, warm_up: bool = True, listener=None):
+        """probe ทุก endpoint ที่ถูกใช้ + warm-up ทุกโมเดลใน route (vision เฉพาะโมเดลของงาน vision)"""
+        endpoints: Dict[int, tuple] = {}
+        for task in TASKS:
+            for profile in self.chain(task):
+                client = self.client(profile)
+                healths = client.pool.healths if client.pool is not None else [client.health]
+                for health in healths:
+                    if health is None:
+                        continue
+                    health, models = endpoints.setdefault(id(health), (health, {}))
+                    models[client.model] = models.get(client.model, False) or task in VISION_TASKS
+
+        for health, models in endpoints.values():
+            # model_available ของ health ให้หมายถึงโมเดลที่ route ใช้จริงบน endpoint นี้
+            if health.model not in models:
+                health.model = next(iter(models))
+            if listener is not None:
+                health.add_listener(listener)
+            health.start(warm_up=warm_up, models=models)
+
+    def get_stats(self) -> dict:
+        return {
+            "calls": dict(self.calls),
+            "fallbacks": self.fallbacks,
+            "available": {p: self.is_available(p) for p in self._clients},
+        }
+
+
+_shared_router: Optional[LLMRouter] = None
+_shared_lock = threading.Lock()
+
+
+def get_router() -> LLMRouter:
+    """คืน LLMRouter กลางของ process"""
+    global _shared_router
+    if _shared_router is None:
+        with _shared_lock:
+            if _shared_router is None:
+                _shared_router = LLMRouter()
+    return _shared_router
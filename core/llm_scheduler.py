@@ -0,0 +1,209 @@
+# core/llm_scheduler.py
+# -------------------------
+# LLMScheduler: คิวแบบมีลำดับความสำคัญก่อนส่งงานเข้า LM Studio
+# LM Studio บนเครื่องเราประมวลผลได้ทีละ request -> งานพื้นหลัง (live vision)
+# ไม่ควรมาแย่งคิวกับคำถามที่ผู้ใช้กำลังรอฟังคำตอบอยู่
+# - priority: interactive > parser > background
+# - จำกัดความยาวคิวแยกตาม class (admission control)
+# - งาน background ที่ยังรอคิวอยู่จะถูก drop เมื่อมีงาน interactive เข้ามา
+# - เก็บสถิติเวลารอคิว (queue wait) ต่อ class
+# -------------------------
+
+import threading
+import time
+from collections import deque
+from typing import Dict, Optional
+
+try:
+    from config import LLM_SCHEDULER_CONCURRENCY, LLM_QUEUE_LIMITS
+except Exception:
+    LLM_SCHEDULER_CONCURRENCY = 1
+    LLM_QUEUE_LIMITS = {"interactive": 8, "parser": 4, "background": 2}
+
+try:
+    from config import LLM_ENDPOINTS
+except Exception:
+    LLM_ENDPOINTS = []
+
+PRIORITY_INTERACTIVE = "interactive"
+PRIORITY_PARSER = "parser"
+PRIORITY_BACKGROUND = "background"
+
+# ลำดับจากสำคัญมากไปน้อย
+PRIORITIES = (PRIORITY_INTERACTIVE, PRIORITY_PARSER, PRIORITY_BACKGROUND)
+
+
+class SchedulerRejected(Exception):
+    """request ไม่ได้รับเข้าคิว (คิวเต็ม) หรือถูก drop ระหว่างรอ"""
+
+
+class _Ticket:
+    def __init__(self, priority: str):
+        self.priority = priority
+        self.enqueued_at = time.time()
+        self.admitted_at: Optional[float] = None
+        self.dropped_reason: Optional[str] = None
+        self.released = False
+
+    @property
+    def wait_time(self) -> float:
+        end = self.admitted_at if self.admitted_at is not None else time.time()
+        return end - self.enqueued_at
+
+
+class _Slot:
+    """context manager: with scheduler.slot("interactive"): ..."""
+
+    def __init__(self, scheduler: "LLMScheduler", priority: str, cancel_event: Optional[threading.Event]):
+        self._scheduler = scheduler
+        self._priority = priority
+        self._cancel_event = cancel_event
+        self.ticket: Optional[_Ticket] = None
+
+    def __enter__(self) -> _Ticket:
+        self.ticket = self._scheduler.acquire(self._priority, cancel_event=self._cancel_event)
+        return self.ticket
+
+    def __exit__(self, exc_type, exc, tb):
+        self._scheduler.release(self.ticket)
+        return False
+
+
+class LLMScheduler:
+    """ตัวจัดคิวกลางของ process (ใช้ผ่าน get_scheduler())"""
+
+    def __init__(self, concurrency: int = None, queue_limits: Optional[Dict[str, int]] = None,
+                 drop_background: bool = True):
+        # LLM_SCHEDULER_CONCURRENCY เป็นค่าต่อ server -> หลาย endpoint ส่งพร้อมกันได้มากขึ้นตามจำนวน
+        self.concurrency = concurrency or LLM_SCHEDULER_CONCURRENCY * max(1, len(LLM_ENDPOINTS))
+        self.queue_limits = dict(LLM_QUEUE_LIMITS)
+        if queue_limits:
+            self.queue_limits.update(queue_limits)
+        self.drop_background = drop_background
+
+        self._cond = threading.Condition()
+        self._queues: Dict[str, deque] = {p: deque() for p in PRIORITIES}
+        self._running = 0
+
+        # สถิติต่อ class
+        self._stats = {p: {"admitted": 0, "rejected": 0, "dropped": 0, "wait_total": 0.0, "wait_max": 0.0}
+                       for p in PRIORITIES}
+
+    def slot(self, priority: str = PRIORITY_INTERACTIVE, cancel_event: Optional[threading.Event] = None) -> _Slot:
+        return _Slot(self, priority, cancel_event)
+
+    def _normalize(self, priority: Optional[str]) -> str:
+        return priority if priority in self._queues else PRIORITY_INTERACTIVE
+
+    def _is_next(self, ticket: _Ticket) -> bool:
+        """ticket นี้อยู่หัวคิวของ class ที่สำคัญที่สุดที่มีงานรออยู่หรือไม่"""
+        for p in PRIORITIES:
+            queue = self._queues[p]
+            if queue:
+                return queue[0] is ticket
+        return False
+
+    def _drop_queued_background(self, reason: str):
+        queue = self._queues[PRIORITY_BACKGROUND]
+        while queue:
+            ticket = queue.popleft()
+            ticket.dropped_reason = reason
+            self._stats[PRIORITY_BACKGROUND]["dropped"] += 1
+
+    def acquire(self, priority: str = PRIORITY_INTERACTIVE, timeout: Optional[float] = None,
+                cancel_event: Optional[threading.Event] = None) -> _Ticket:
+        """
+        รอจนได้ slot แล้วคืน ticket (ต้อง release ทุกครั้ง)
+        โยน SchedulerRejected ถ้าคิวเต็ม / ถูก drop / หมดเวลา / ถูกยกเลิก
+        """
+        priority = self._normalize(priority)
+        ticket = _Ticket(priority)
+
+        with self._cond:
+            queue = self._queues[priority]
+            if len(queue) >= self.queue_limits.get(priority, 8):
+                self._stats[priority]["rejected"] += 1
+                raise SchedulerRejected(f"คิว {priority} เต็ม ({len(queue)} งาน)")
+
+            # งานที่ผู้ใช้รออยู่มาแล้ว -> ทิ้งงานพื้นหลังที่ยังไม่ได้เริ่ม
+            if priority == PRIORITY_INTERACTIVE and self.drop_background and self._queues[PRIORITY_BACKGROUND]:
+                self._drop_queued_background("preempted by interactive request")
+                self._cond.notify_all()
+
+            queue.append(ticket)
+            deadline = None if timeout is None else time.time() + timeout
+
+            while True:
+                if ticket.dropped_reason:
+                    raise SchedulerRejected(ticket.dropped_reason)
+                if cancel_event is not None and cancel_event.is_set():
+                    self._remove(ticket)
+                    raise SchedulerRejected("cancelled while queued")
+                if self._running < self.concurrency and self._is_next(ticket):
+                    break
+                remaining = None if deadline is None else deadline - time.time()
+                if remaining is not None and remaining <= 0:
+                    self._remove(ticket)
+                    raise SchedulerRejected(f"รอคิว {priority} เกิน {timeout}s")
+                # ตื่นเป็นระยะเพื่อตรวจ cancel_event
+                self._cond.wait(0.1 if remaining is None else min(0.1, remaining))
+
+            queue.popleft()
+            self._running += 1
+            ticket.admitted_at = time.time()
+
+            stats = self._stats[priority]
+            stats["admitted"] += 1
+            stats["wait_total"] += ticket.wait_time
+            stats["wait_max"] = max(stats["wait_max"], ticket.wait_time)
+
+        if ticket.wait_time > 0.5:
+            print(f"[Scheduler] ⏳ {priority} รอคิว {ticket.wait_time:.2f}s")
+        return ticket
+
+    def _remove(self, ticket: _Ticket):
+        try:
+            self._queues[ticket.priority].remove(ticket)
+        except ValueError:
+            pass
+        self._cond.notify_all()
+
+    def release(self, ticket: Optional[_Ticket]):
+        """คืน slot (เรียกซ้ำได้ ไม่มีผล)"""
+        if ticket is None or ticket.admitted_at is None:
+            return
+        with self._cond:
+            if ticket.released:
+                return
+            ticket.released = True
+            self._running -= 1
+            self._cond.notify_all()
+
+    def get_stats(self) -> dict:
+        with self._cond:
+            result = {"running": self._running, "concurrency": self.concurrency}
+            for p in PRIORITIES:
+                s = self._stats[p]
+                result[p] = {
+                    "queued": len(self._queues[p]),
+                    "admitted": s["admitted"],
+                    "rejected": s["rejected"],
+                    "dropped": s["dropped"],
+                    "avg_wait": s["wait_total"] / s["admitted"] if s["admitted"] else 0.0,
+                    "max_wait": s["wait_max"],
+                }
+            return result
+
+
+_shared_scheduler: Optional[LLMScheduler] = None
+_shared_lock = threading.Lock()
+
+
+def get_scheduler() -> LLMScheduler:
+    """คืน LLMScheduler กลางของ process"""
+    global _shared_scheduler
+    if _shared_scheduler is None:
+        with _shared_lock:
+            if _shared_scheduler is None:
+                _shared_scheduler = LLMScheduler()
+    return _shared_scheduler
@@ -0,0 +1,247 @@
+# core/llm_singleflight.py
+# -------------------------
+# SingleFlight: รวม request ที่เหมือนกันทุก byte ซึ่งกำลังวิ่งอยู่พร้อมกันให้เหลือครั้งเดียว
+# เช่น LiveVisionStream.ask_about_screen + analysis loop + vision command
+# ส่งภาพเดียวกันภายในวินาทีเดียว -> ยิงไป LM Studio แค่ครั้งเดียว คนที่มาทีหลังรอผลเดียวกัน
+# - do(key, fn): แบบ non-stream (คนที่มาทีหลังรอ future ของคนแรก)
+# - share_stream(key, factory): แบบ stream (ทุกคนได้ view ที่อ่าน delta ชุดเดียวกัน)
+# -------------------------
+
+import threading
+import time
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+
+class _Call:
+    """request ที่กำลังวิ่งอยู่ 1 ตัว (non-stream)"""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Any = None
+        self.exception: Optional[BaseException] = None
+        self.waiters = 0
+
+
+class SharedStream:
+    """
+    ห่อ LLMStream ตัวจริง 1 ตัวให้หลาย view อ่านร่วมกัน
+    view ไหนกำลังอ่านจะเป็นคนดึง chunk ถัดไป (ไม่ต้องมี thread เพิ่ม)
+    """
+
+    def __init__(self, stream, on_finished: Callable[[], None]):
+        self._stream = stream
+        self._iter = None
+        self._on_finished = on_finished
+        self._deltas: List[str] = []
+        self._finished = False
+        self._pull_lock = threading.Lock()
+        self._views = 0
+        self._active_views = 0
+        self._views_lock = threading.Lock()
+
+    @property
+    def error(self) -> Optional[str]:
+        return self._stream.error
+
+    @property
+    def finish_reason(self) -> Optional[str]:
+        return self._stream.finish_reason
+
+    def open_view(self) -> "SharedStreamView":
+        with self._views_lock:
+            self._views += 1
+            self._active_views += 1
+        return SharedStreamView(self)
+
+    def _release_view(self, cancelled: bool):
+        with self._views_lock:
+            self._active_views -= 1
+            abandon = cancelled and self._active_views == 0 and not self._finished
+        if abandon:
+            # ไม่มีใครอ่านต่อแล้ว -> ยกเลิก request จริง
+            self._stream.cancel()
+            self._finish()
+
+    def _finish(self):
+        if not self._finished:
+            self._finished = True
+            self._on_finished()
+
+    def _get(self, index: int):
+        """คืน delta ลำดับที่ index, None = จบ stream"""
+        if index < len(self._deltas):
+            return self._deltas[index]
+        with self._pull_lock:
+            # ระหว่างรอ lock อาจมี view อื่นดึงมาให้แล้ว
+            if index < len(self._deltas):
+                return self._deltas[index]
+            if self._finished:
+                return None
+            if self._iter is None:
+                self._iter = iter(self._stream)
+            try:
+                delta = next(self._iter)
+            except StopIteration:
+                self._finish()
+                return None
+            self._deltas.append(delta)
+            return delta
+
+
+class SharedStreamView:
+    """view ของ SharedStream ที่มีหน้าตาเหมือน LLMStream (text, ttft, cancel, collect)"""
+
+    def __init__(self, shared: SharedStream):
+        self._shared = shared
+        self.text = ""
+        self.ttft: Optional[float] = None
+        self.total_time: Optional[float] = None
+        self._cancelled = False
+        self._released = False
+        self._completed = False
+        self._created = time.time()
+
+    @property
+    def error(self) -> Optional[str]:
+        return self._shared.error
+
+    @property
+    def finish_reason(self) -> Optional[str]:
+        return self._shared.finish_reason
+
+    @property
+    def cancelled(self) -> bool:
+        """view นี้ถูกยกเลิก หรือ request จริงถูกยกเลิก (เช่น LLMClient.cancel_all())"""
+        return self._cancelled or getattr(self._shared._stream, "cancelled", False)
+
+    def cancel(self):
+        """ยกเลิกเฉพาะ view นี้ (request จริงถูกยกเลิกเมื่อไม่มี view ไหนอ่านแล้ว)"""
+        self._cancelled = True
+        self._release(cancelled=True)
+
+    def close(self):
+        """
+        เลิกใช้ view นี้ (อ่านไม่จบ/ไม่ได้อ่านเลยก็ได้) -> คืน slot ของ view
+        ถ้าเป็น view สุดท้ายที่ยังค้างอยู่ request จริงจะถูกยกเลิก
+        """
+        self._release(cancelled=not self._completed)
+
+    def __del__(self):
+        # view ที่ถูกทิ้งไปเฉยๆ (เช่น follower ที่ไม่ได้วนอ่าน) ต้องไม่ถือ request จริงไว้
+        try:
+            self.close()
+        except Exception:
+            pass
+
+    def _release(self, cancelled: bool):
+        if not self._released:
+            self._released = True
+            self._shared._release_view(cancelled)
+
+    def __iter__(self) -> Iterator[str]:
+        index = 0
+        try:
+            while not self.cancelled:
+                delta = self._shared._get(index)
+                if delta is None:
+                    self._completed = True
+                    return
+                index += 1
+                if self.ttft is None:
+                    self.ttft = time.time() - self._created
+                self.text += delta
+                yield delta
+        finally:
+            self.total_time = time.time() - self._created
+            self._release(cancelled=self._cancelled or not self._completed)
+
+    def collect(self) -> str:
+        for _ in self:
+            pass
+        return self.text
+
+
+class SingleFlight:
+    """ตัวรวม request ซ้ำที่วิ่งพร้อมกัน (ใช้ร่วมกันทั้ง process ผ่าน get_singleflight())"""
+
+    def __init__(self):
+        self._calls: Dict[str, _Call] = {}
+        self._streams: Dict[str, SharedStream] = {}
+        self._lock = threading.Lock()
+
+        # สถิติ
+        self.leaders = 0
+        self.coalesced = 0
+
+    def do(self, key: str, fn: Callable[[], Any]) -> Any:
+        """เรียก fn() ครั้งเดียวต่อ key ที่กำลังวิ่งอยู่ คนที่มาซ้ำจะได้ผลลัพธ์เดียวกัน"""
+        with self._lock:
+            call = self._calls.get(key)
+            if call is not None:
+                call.waiters += 1
+                self.coalesced += 1
+                leader = False
+            else:
+                call = _Call()
+                self._calls[key] = call
+                self.leaders += 1
+                leader = True
+
+        if not leader:
+            print(f"[SingleFlight] 🔗 รวม request ซ้ำ (รอผลจาก request แรก)")
+            call.done.wait()
+            if call.exception is not None:
+                raise call.exception
+            return call.result
+
+        try:
+            call.result = fn()
+        except BaseException as e:
+            call.exception = e
+            raise
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+            call.done.set()
+        return call.result
+
+    def share_stream(self, key: str, factory: Callable[[], Any]) -> SharedStreamView:
+        """คืน view ของ stream ที่กำลังวิ่งอยู่ (หรือสร้างใหม่ด้วย factory())"""
+        with self._lock:
+            shared = self._streams.get(key)
+            if shared is not None and not shared._finished:
+                self.coalesced += 1
+                print(f"[SingleFlight] 🔗 รวม stream ซ้ำ")
+                return shared.open_view()
+
+            self.leaders += 1
+            shared = SharedStream(factory(), on_finished=lambda: self._drop_stream(key))
+            self._streams[key] = shared
+            return shared.open_view()
+
+    def _drop_stream(self, key: str):
+        with self._lock:
+            shared = self._streams.get(key)
+            if shared is not None and shared._finished:
+                del self._streams[key]
+
+    def get_stats(self) -> dict:
+        return {
+            "in_flight": len(self._calls) + len(self._streams),
+            "leaders": self.leaders,
+            "coalesced": self.coalesced,
+        }
+
+
+_shared_singleflight: Optional[SingleFlight] = None
+_shared_lock = threading.Lock()
+
+
+def get_singleflight() -> SingleFlight:
+    """คืน SingleFlight กลางของ process"""
+    global _shared_singleflight
+    if _shared_singleflight is None:
+        with _shared_lock:
+            if _shared_singleflight is None:
+                _shared_singleflight = SingleFlight()
+    return _shared_singleflight
@@ -0,0 +1,130 @@
+# core/llm_transport.py
+# -------------------------
+# LLMTransport: ชั้น HTTP กลางที่ LLMClient ทุกตัวใช้ร่วมกัน
+# - requests.Session + connection pool แบบ keep-alive (ไม่ต้อง TCP handshake ทุก request)
+# - timeout แยกตามประเภทการเรียก (text / vision / stream / probe)
+# - retry เมื่อ connection ถูก reset ด้วย exponential backoff + jitter
+# - payload ที่มีภาพ (ImageBytes) ถูกเขียนลง body แบบ stream (JSONBodyStream)
+# -------------------------
+
+import random
+import threading
+import time
+from typing import Any, Dict, Optional, Tuple
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from core.llm_request_body import JSONBodyStream, has_image_bytes
+
+try:
+    from config import LLM_POOL_SIZE, LLM_TIMEOUTS, LLM_RETRY_ATTEMPTS, LLM_RETRY_BACKOFF
+except Exception:
+    LLM_POOL_SIZE = 8
+    LLM_TIMEOUTS = {"connect": 3.05, "text": 60, "vision": 120, "stream": 60, "probe": 5}
+    LLM_RETRY_ATTEMPTS = 2
+    LLM_RETRY_BACKOFF = 0.25
+
+# error ที่ปลอดภัยจะส่งซ้ำ (ยังไม่ได้ response กลับมา)
+_RETRYABLE_ERRORS = (requests.ConnectionError,)
+
+
+class LLMTransport:
+    """
+    HTTP transport ที่ใช้ร่วมกันทั้ง process
+    ใช้ get_transport() เพื่อดึง instance กลาง แทนการสร้างเอง
+    """
+
+    def __init__(self, pool_size: int = None, timeouts: Optional[Dict[str, float]] = None,
+                 retry_attempts: int = None, retry_backoff: float = None, backoff_max: float = 4.0):
+        self.pool_size = pool_size or LLM_POOL_SIZE
+        self.timeouts = dict(LLM_TIMEOUTS)
+        if timeouts:
+            self.timeouts.update(timeouts)
+        self.retry_attempts = LLM_RETRY_ATTEMPTS if retry_attempts is None else retry_attempts
+        self.retry_backoff = LLM_RETRY_BACKOFF if retry_backoff is None else retry_backoff
+        self.backoff_max = backoff_max
+
+        self.session = requests.Session()
+        # retry เราจัดการเองด้านล่าง (มี jitter) จึงปิด retry ของ urllib3
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=self.pool_size, max_retries=0)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+        # สถิติ
+        self.request_count = 0
+        self.retry_count = 0
+        self._lock = threading.Lock()
+
+    def timeout_for(self, call_type: str, read_timeout: Optional[float] = None) -> Tuple[float, float]:
+        """คืน (connect, read) timeout ของประเภทการเรียกนั้นๆ"""
+        connect = self.timeouts.get("connect", 3.05)
+        if read_timeout is None:
+            read_timeout = self.timeouts.get(call_type, self.timeouts.get("text", 60))
+        return (connect, read_timeout)
+
+    def _backoff_delay(self, attempt: int) -> float:
+        """Full jitter: สุ่มในช่วง [0, min(max, base * 2^attempt)]"""
+        cap = min(self.backoff_max, self.retry_backoff * (2 ** attempt))
+        return random.uniform(0, cap)
+
+    def request(self, method: str, url: str, call_type: str = "text", read_timeout: Optional[float] = None,
+                **kwargs: Any) -> requests.Response:
+        """ส่ง HTTP request ผ่าน session กลาง + retry เมื่อ connection ถูก reset"""
+        timeout = self.timeout_for(call_type, read_timeout)
+        attempt = 0
+        while True:
+            with self._lock:
+                self.request_count += 1
+            body = kwargs.get("data")
+            if isinstance(body, JSONBodyStream):
+                # ส่งซ้ำ -> อ่าน body ใหม่ตั้งแต่ต้น
+                body.rewind()
+            try:
+                return self.session.request(method, url, timeout=timeout, **kwargs)
+            except _RETRYABLE_ERRORS as e:
+                if attempt >= self.retry_attempts or isinstance(e, requests.ConnectTimeout):
+                    raise
+                delay = self._backoff_delay(attempt)
+                attempt += 1
+                with self._lock:
+                    self.retry_count += 1
+                print(f"[Transport] 🔁 connection reset ({e.__class__.__name__}) ลองใหม่ครั้งที่ {attempt} ใน {delay:.2f}s")
+                time.sleep(delay)
+
+    def post(self, url: str, payload: Dict[str, Any], call_type: str = "text", stream: bool = False,
+             read_timeout: Optional[float] = None) -> requests.Response:
+        """POST JSON payload (ใช้กับ /v1/chat/completions)"""
+        if has_image_bytes(payload):
+            # ภาพถูก base64 ทีละ chunk ตอนส่ง ไม่สร้าง JSON ทั้งก้อนใน memory
+            return self.request("POST", url, call_type=call_type, read_timeout=read_timeout,
+                                data=JSONBodyStream(payload), headers={"Content-Type": "application/json"},
+                                stream=stream)
+        return self.request("POST", url, call_type=call_type, read_timeout=read_timeout, json=payload, stream=stream)
+
+    def get(self, url: str, call_type: str = "probe", read_timeout: Optional[float] = None) -> requests.Response:
+        return self.request("GET", url, call_type=call_type, read_timeout=read_timeout)
+
+    def get_stats(self) -> dict:
+        return {
+            "pool_size": self.pool_size,
+            "request_count": self.request_count,
+            "retry_count": self.retry_count,
+        }
+
+    def close(self):
+        self.session.close()
+
+
+_shared_transport: Optional[LLMTransport] = None
+_shared_lock = threading.Lock()
+
+
+def get_transport() -> LLMTransport:
+    """คืน LLMTransport กลางของ process (สร้างครั้งแรกเมื่อถูกเรียก)"""
+    global _shared_transport
+    if _shared_transport is None:
+        with _shared_lock:
+            if _shared_transport is None:
+                _shared_transport = LLMTransport()
+    return _shared_transport
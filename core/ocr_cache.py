@@ -0,0 +1,175 @@
+# core/ocr_cache.py
+# -------------------------
+# OCRCache: cache ผล OCR (pytesseract ใช้เวลาเป็นวินาที) ด้วย key จากเนื้อภาพ
+# - key = perceptual hash ของภาพ/region + ภาษา + config + ชนิดผลลัพธ์ (words / text)
+#   perceptual hash: grayscale เฉลี่ยทุกพิกเซลต่อ cell 8x8 px แล้วปัดลง 128 ระดับ
+#   -> noise เล็กๆ ของ encoder/compositor ไม่ทำให้ cache miss แต่ตัวอักษรเปลี่ยน 1 ตัวทำให้ key เปลี่ยน
+# - หน้าจอเปลี่ยน = ภาพเปลี่ยน = key ใหม่ (ผลเก่าไม่มีทางถูกใช้กับภาพที่เปลี่ยนแล้ว)
+#   ผลของหน้าจอเก่าค่อยๆ หลุดออกตาม LRU (จำกัดทั้งจำนวนรายการและขนาดโดยประมาณ)
+# - Frame เดิม (id เดิม เช่นเฟรมจาก FrameHub ที่ใช้ซ้ำ) ไม่ต้อง hash ซ้ำ
+# -------------------------
+
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Optional, Tuple
+
+import numpy as np
+from PIL import Image
+
+try:
+    from config import OCR_CACHE_MAX_ENTRIES, OCR_CACHE_MAX_MB
+except Exception:
+    OCR_CACHE_MAX_ENTRIES = 64
+    OCR_CACHE_MAX_MB = 16
+
+# ขนาด cell (พิกเซลจริง) และจำนวนระดับเทาที่ใช้ทำ hash
+_HASH_CELL = 8      # cell = 8x8 พิกเซลจริง (เฉลี่ยทุกพิกเซล ไม่ sample -> เส้น/จุด 1 px ตรงไหนก็ไม่หลุด)
+_HASH_SHIFT = 1     # 256 >> 1 = 128 ระดับ: จุด 1 px ที่ต่างกัน >= 128 ทำให้ค่าเฉลี่ย (ปัดเศษ) ข้ามระดับเสมอ
+
+
+def _cell_means(image) -> Tuple[np.ndarray, Tuple[int, int]]:
+    """Frame / numpy (BGR[A] หรือเทา) / PIL -> (ความสว่างเฉลี่ยต่อ cell (uint8, ปัดเศษ) จากทุกพิกเซล, ขนาดภาพ)"""
+    if hasattr(image, "bgra"):
+        image = image.bgra
+    if isinstance(image, Image.Image):
+        image = np.asarray(image.convert("L"))
+    height, width = image.shape[:2]
+    # ภาพเล็กกว่า 1 cell -> ใช้ทีละพิกเซล
+    c = _HASH_CELL if height >= _HASH_CELL and width >= _HASH_CELL else 1
+    rows, cols = height // c, width // c
+    # รวมทีละแถว/คอลัมน์ของ cell ด้วยการบวก slice (เร็วกว่า sum(axis=(1, 3)) บน view 5 มิติหลายเท่า)
+    strips = image[:rows * c, :cols * c].reshape(rows, c, -1)
+    acc = strips[:, 0].astype(np.uint16)
+    for i in range(1, c):
+        acc += strips[:, i]
+    acc = acc.reshape(rows, cols, c, *image.shape[2:])
+    sums = acc[:, :, 0].astype(np.uint32)
+    for i in range(1, c):
+        sums += acc[:, :, i]
+    if sums.ndim == 3:
+        # luma แบบจำนวนเต็ม (เหมือน FrameChangeDetector) คิดจากผลรวมของแต่ละช่องสี
+        sums = (sums[:, :, 0] * 29 + sums[:, :, 1] * 150 + sums[:, :, 2] * 77) >> 8
+    area = c * c
+    return ((sums + area // 2) // area).astype(np.uint8), (width, height)
+
+
+def perceptual_hash(image) -> str:
+    """hash ของเนื้อภาพ (ทนต่อ noise เล็กน้อย แต่ไวต่อข้อความที่เปลี่ยน แม้แค่ 1 พิกเซล)"""
+    cells, (width, height) = _cell_means(image)
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(f"{width}x{height}".encode("ascii"))
+    digest.update((cells >> _HASH_SHIFT).tobytes())
+    return digest.hexdigest()
+
+
+def _estimate_size(value: Any) -> int:
+    """ขนาดโดยประมาณ (bytes) ของผล OCR สำหรับจำกัด memory"""
+    if isinstance(value, str):
+        return 64 + len(value.encode("utf-8"))
+    if isinstance(value, (list, tuple)):
+        return 64 + sum(_estimate_size(v) for v in value)
+    if isinstance(value, dict):
+        return 240 + sum(_estimate_size(v) for v in value.values() if isinstance(v, (str, list, dict)))
+    if hasattr(value, "approx_bytes"):   # เช่น ScreenTextIndex
+        return value.approx_bytes()
+    return 64
+
+
+class OCRCache:
+    """LRU ของผล OCR (ใช้ผ่าน get_ocr_cache())"""
+
+    def __init__(self, max_entries: int = None, max_mb: float = None):
+        self.max_entries = max_entries or OCR_CACHE_MAX_ENTRIES
+        self.max_bytes = int((max_mb or OCR_CACHE_MAX_MB) * 1024 * 1024)
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()   # key -> (value, size)
+        self._frame_hashes: "OrderedDict[int, str]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+        # สถิติ
+        self.hits = 0
+        self.misses = 0
+
+    def image_hash(self, image) -> str:
+        """perceptual hash (Frame ที่เคย hash แล้วใช้ค่าเดิม)"""
+        frame_id = getattr(image, "id", None)
+        if frame_id is not None:
+            with self._lock:
+                cached = self._frame_hashes.get(frame_id)
+            if cached is not None:
+                return cached
+        value = perceptual_hash(image)
+        if frame_id is not None:
+            with self._lock:
+                self._frame_hashes[frame_id] = value
+                while len(self._frame_hashes) > self.max_entries:
+                    self._frame_hashes.popitem(last=False)
+        return value
+
+    def make_key(self, image, lang: str, config: str = "", kind: str = "words") -> str:
+        return f"{kind}|{lang}|{config}|{self.image_hash(image)}"
+
+    def get(self, key: str) -> Optional[Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, key: str, value: Any):
+        size = _estimate_size(value)
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._bytes -= old[1]
+            self._entries[key] = (value, size)
+            self._bytes += size
+            while self._entries and (len(self._entries) > self.max_entries or self._bytes > self.max_bytes):
+                _, (_, evicted) = self._entries.popitem(last=False)
+                self._bytes -= evicted
+
+    def get_or_compute(self, image, lang: str, compute: Callable[[], Any], config: str = "",
+                       kind: str = "words") -> Any:
+        """ผลจาก cache หรือเรียก compute() (OCR จริง) แล้วเก็บไว้ - compute คืน None = ไม่ cache"""
+        key = self.make_key(image, lang, config, kind)
+        value = self.get(key)
+        if value is None:
+            value = compute()
+            if value is not None:
+                self.put(key, value)
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._frame_hashes.clear()
+            self._bytes = 0
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / total if total else 0.0,
+            }
+
+
+_shared_cache: Optional[OCRCache] = None
+_shared_lock = threading.Lock()
+
+
+def get_ocr_cache() -> OCRCache:
+    """OCRCache กลางของ process (UIDetector / ScreenReader ใช้ร่วมกัน)"""
+    global _shared_cache
+    if _shared_cache is None:
+        with _shared_lock:
+            if _shared_cache is None:
+                _shared_cache = OCRCache()
+    return _shared_cache
@@ -0,0 +1,294 @@
+# core/ocr_engine.py
+# -------------------------
+# OCR engine ที่เปิดค้างไว้ใช้ซ้ำ (แทน pytesseract ที่ spawn tesseract.exe + เขียนไฟล์ภาพชั่วคราวทุกครั้ง)
+# - TesserocrEngine: Tesseract C-API ผ่าน tesserocr โหลด traineddata (tha+eng) ครั้งเดียวตอนสร้าง
+#   ส่งภาพให้ engine ทาง memory (SetImage) ไม่ผ่านไฟล์
+# - SubprocessEngine: pytesseract แบบเดิม (ใช้เมื่อไม่มี tesserocr)
+# - OCREnginePool: engine หลายตัวต่อภาษา (1 engine ใช้ได้ทีละ thread) สร้างเมื่อต้องใช้ จำกัดด้วย OCR_POOL_SIZE
+#   ใช้ผ่าน get_ocr_pool(lang)
+#   ไม่มี tesserocr -> pool ยังจำกัดจำนวนงานพร้อมกันได้ แต่ทุกครั้งยัง spawn tesseract (degraded ใน get_stats)
+# ผลลัพธ์ image_to_words: [{"text", "x", "y", "w", "h", "confidence", "line"}] (line = ลำดับบรรทัด)
+# -------------------------
+
+import os
+import threading
+import time
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional
+
+from PIL import Image
+
+try:
+    import tesserocr
+    _HAS_TESSEROCR = True
+except ImportError:
+    _HAS_TESSEROCR = False
+
+try:
+    import pytesseract
+    _HAS_PYTESSERACT = True
+except ImportError:
+    _HAS_PYTESSERACT = False
+
+try:
+    from config import OCR_ENGINE, OCR_POOL_SIZE, OCR_TESSDATA_DIR
+except Exception:
+    OCR_ENGINE = "auto"
+    OCR_POOL_SIZE = 2
+    OCR_TESSDATA_DIR = None
+
+try:
+    from config import TESSERACT_CMD
+except Exception:
+    TESSERACT_CMD = None
+
+BACKEND_TESSEROCR = "tesserocr"
+BACKEND_SUBPROCESS = "pytesseract"
+
+if _HAS_PYTESSERACT and TESSERACT_CMD and os.path.exists(TESSERACT_CMD):
+    pytesseract.pytesseract.tesseract_cmd = TESSERACT_CMD
+
+if not _HAS_TESSEROCR and OCR_ENGINE != BACKEND_SUBPROCESS:
+    print("[WARNING] ไม่พบ tesserocr: OCR pool ทำงานแบบ degraded "
+          "(spawn tesseract + โหลด traineddata ทุกครั้ง) ดูวิธีติดตั้ง tesserocr ใน README")
+
+
+def _tessdata_dir() -> Optional[str]:
+    """โฟลเดอร์ tessdata: ค่าจาก config หรือข้างๆ tesseract.exe (None = ให้ tesserocr หาเอง)"""
+    if OCR_TESSDATA_DIR:
+        return OCR_TESSDATA_DIR
+    if TESSERACT_CMD:
+        candidate = os.path.join(os.path.dirname(TESSERACT_CMD), "tessdata")
+        if os.path.isdir(candidate):
+            return candidate
+    return None
+
+
+class OCREngine(ABC):
+    """engine 1 ตัว (ไม่ thread-safe: ใช้ผ่าน OCREnginePool)"""
+
+    backend = ""
+
+    def __init__(self, lang: str):
+        self.lang = lang
+
+    @abstractmethod
+    def image_to_words(self, img: Image.Image) -> List[Dict]:
+        """คำทั้งหมดในภาพ (รูปแบบตามหัวไฟล์)"""
+
+    @abstractmethod
+    def image_to_string(self, img: Image.Image) -> str:
+        """ข้อความทั้งภาพ"""
+
+    def close(self):
+        pass
+
+
+class TesserocrEngine(OCREngine):
+    """Tesseract C-API: traineddata ถูกโหลดครั้งเดียวตอนสร้าง"""
+
+    backend = BACKEND_TESSEROCR
+
+    def __init__(self, lang: str):
+        super().__init__(lang)
+        path = _tessdata_dir()
+        kwargs = {"lang": lang}
+        if path:
+            kwargs["path"] = path
+        self._api = tesserocr.PyTessBaseAPI(**kwargs)
+
+    def image_to_words(self, img: Image.Image) -> List[Dict]:
+        api = self._api
+        api.SetImage(img)
+        api.Recognize()
+        words = []
+        level = tesserocr.RIL.WORD
+        iterator = api.GetIterator()
+        line = -1
+        for item in tesserocr.iterate_level(iterator, level):
+            if item.IsAtBeginningOf(tesserocr.RIL.TEXTLINE):
+                line += 1
+            text = item.GetUTF8Text(level)
+            box = item.BoundingBox(level)
+            if not text or not text.strip() or box is None:
+                continue
+            x1, y1, x2, y2 = box
+            words.append({
+                "text": text.strip(),
+                "x": x1,
+                "y": y1,
+                "w": x2 - x1,
+                "h": y2 - y1,
+                "confidence": float(item.Confidence(level)),
+                "line": max(line, 0),
+            })
+        api.Clear()
+        return words
+
+    def image_to_string(self, img: Image.Image) -> str:
+        self._api.SetImage(img)
+        text = self._api.GetUTF8Text()
+        self._api.Clear()
+        return text
+
+    def close(self):
+        self._api.End()
+
+
+class SubprocessEngine(OCREngine):
+    """pytesseract: spawn tesseract + ไฟล์ภาพชั่วคราวทุกครั้ง (แบบเดิม)"""
+
+    backend = BACKEND_SUBPROCESS
+
+    def image_to_words(self, img: Image.Image) -> List[Dict]:
+        data = pytesseract.image_to_data(img, lang=self.lang, output_type=pytesseract.Output.DICT)
+        words = []
+        lines: Dict[tuple, int] = {}
+        for i in range(len(data['text'])):
+            text = data['text'][i]
+            if not text.strip():  # ข้ามข้อความว่าง
+                continue
+            line_key = (data['block_num'][i], data['par_num'][i], data['line_num'][i])
+            words.append({
+                "text": text,
+                "x": data['left'][i],
+                "y": data['top'][i],
+                "w": data['width'][i],
+                "h": data['height'][i],
+                "confidence": float(data['conf'][i]),
+                "line": lines.setdefault(line_key, len(lines)),
+            })
+        return words
+
+    def image_to_string(self, img: Image.Image) -> str:
+        return pytesseract.image_to_string(img, lang=self.lang)
+
+
+def _pick_backend(backend: Optional[str]) -> str:
+    backend = backend or OCR_ENGINE
+    if backend == BACKEND_TESSEROCR and not _HAS_TESSEROCR:
+        return BACKEND_SUBPROCESS
+    if backend in (BACKEND_TESSEROCR, BACKEND_SUBPROCESS):
+        return backend
+    return BACKEND_TESSEROCR if _HAS_TESSEROCR else BACKEND_SUBPROCESS
+
+
+class OCREnginePool:
+    """
+    engine ของภาษาเดียว ใช้ร่วมกันหลาย thread
+    - engine ถูกสร้างเมื่อไม่มีตัวว่างและยังไม่เกิน size (โหลด traineddata ครั้งเดียวต่อ engine)
+    - เกิน size -> รอ engine ว่าง
+    """
+
+    def __init__(self, lang: str = "tha+eng", size: int = None, backend: str = None):
+        self.lang = lang
+        self.size = max(1, size or OCR_POOL_SIZE)
+        self.backend = _pick_backend(backend)
+        # pytesseract ไม่มี engine ให้เปิดค้าง -> pool ไม่ได้ช่วยเรื่องโหลด traineddata ซ้ำ
+        self.degraded = self.backend == BACKEND_SUBPROCESS
+        self._idle: List[OCREngine] = []
+        self._created = 0
+        self._cond = threading.Condition()
+
+        # สถิติ
+        self.calls = 0
+        self.ocr_time = 0.0
+        self.wait_time = 0.0
+        self.load_time = 0.0
+
+    def _create(self) -> OCREngine:
+        start = time.perf_counter()
+        engine = TesserocrEngine(self.lang) if self.backend == BACKEND_TESSEROCR else SubprocessEngine(self.lang)
+        self.load_time += time.perf_counter() - start
+        print(f"[OCREngine] ✅ สร้าง engine {self.backend} ({self.lang}) "
+              f"{(time.perf_counter() - start) * 1000:.0f} ms")
+        return engine
+
+    @contextmanager
+    def acquire(self, timeout: Optional[float] = None) -> Iterator[OCREngine]:
+        """ยืม engine 1 ตัว (คืนเข้า pool อัตโนมัติ)"""
+        start = time.perf_counter()
+        engine = None
+        create = False
+        with self._cond:
+            while not self._idle and self._created >= self.size:
+                if not self._cond.wait(timeout):
+                    raise TimeoutError(f"ไม่มี OCR engine ว่างภายใน {timeout}s")
+            if self._idle:
+                engine = self._idle.pop()
+            else:
+                self._created += 1
+                create = True
+        self.wait_time += time.perf_counter() - start
+
+        if create:
+            try:
+                engine = self._create()
+            except Exception:
+                with self._cond:
+                    self._created -= 1
+                    self._cond.notify()
+                raise
+        try:
+            yield engine
+        finally:
+            with self._cond:
+                self._idle.append(engine)
+                self._cond.notify()
+
+    def _run(self, method: str, img: Image.Image):
+        with self.acquire() as engine:
+            start = time.perf_counter()
+            try:
+                return getattr(engine, method)(img)
+            finally:
+                self.calls += 1
+                self.ocr_time += time.perf_counter() - start
+
+    def image_to_words(self, img: Image.Image) -> List[Dict]:
+        """OCR ระดับคำ (รูปแบบเดียวกับ UIDetector.find_all_text + line)"""
+        return self._run("image_to_words", img)
+
+    def image_to_string(self, img: Image.Image) -> str:
+        return self._run("image_to_string", img)
+
+    def warm_up(self):
+        """สร้าง engine แรกล่วงหน้า (โหลด traineddata ก่อนผู้ใช้สั่งงานครั้งแรก)"""
+        with self.acquire():
+            pass
+
+    def close(self):
+        with self._cond:
+            engines, self._idle = self._idle, []
+            self._created -= len(engines)
+        for engine in engines:
+            engine.close()
+
+    def get_stats(self) -> dict:
+        return {
+            "backend": self.backend,
+            "degraded": self.degraded,
+            "lang": self.lang,
+            "engines": self._created,
+            "calls": self.calls,
+            "avg_ocr_ms": self.ocr_time / self.calls * 1000 if self.calls else 0.0,
+            "total_wait_ms": self.wait_time * 1000,
+            "load_ms": self.load_time * 1000,
+        }
+
+
+_pools: Dict[str, OCREnginePool] = {}
+_pools_lock = threading.Lock()
+
+
+def get_ocr_pool(lang: str = "tha+eng") -> OCREnginePool:
+    """OCREnginePool กลางของภาษา lang"""
+    pool = _pools.get(lang)
+    if pool is None:
+        with _pools_lock:
+            pool = _pools.get(lang)
+            if pool is None:
+                pool = OCREnginePool(lang)
+                _pools[lang] = pool
+    return pool
@@ -0,0 +1,196 @@
+# core/parallel_ocr.py
+# -------------------------
+# OCR ภาพใหญ่ (4K) แบบขนานหลาย process
+# - Tesseract 1 ครั้งใช้ได้ 1 คอร์ -> ตัดภาพเป็นแถบ (bands) หรือช่อง (tiles) ที่ซ้อนกัน (กันคำถูกตัด)
+#   แล้วส่งให้ ProcessPoolExecutor ทำพร้อมกัน
+# - แต่ละ process มี engine เปิดค้างของตัวเอง (สร้างครั้งเดียวตอนเริ่ม process ใน _worker_init)
+# - ส่งภาพเป็น grayscale bytes (เล็กกว่า RGB 3 เท่า, Tesseract แปลงเป็นเทาอยู่แล้ว)
+# - รวมผลด้วย merge_tile_words (ตัดคำซ้ำในส่วนที่ซ้อนกัน, คำยาวข้ามรอยต่อ OCR กรอบรวมใหม่)
+#   -> รูปแบบเดียวกับ UIDetector.find_all_text
+# ใช้ผ่าน get_parallel_ocr(lang) เมื่อ OCR_PARALLEL = True
+# -------------------------
+
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+from PIL import Image
+
+from core.ocr_engine import BACKEND_SUBPROCESS, BACKEND_TESSEROCR, SubprocessEngine, TesserocrEngine, _pick_backend
+from core.tiled_ocr import Rect, merge_tile_words, plan_ocr_tiles
+
+try:
+    from config import OCR_PARALLEL, OCR_PARALLEL_WORKERS, OCR_PARALLEL_MODE, OCR_PARALLEL_TILE
+except Exception:
+    OCR_PARALLEL = False
+    OCR_PARALLEL_WORKERS = None
+    OCR_PARALLEL_MODE = "bands"
+    OCR_PARALLEL_TILE = 360
+
+try:
+    from config import OCR_TILE_OVERLAP
+except Exception:
+    OCR_TILE_OVERLAP = 96
+
+MODE_BANDS = "bands"
+MODE_TILES = "tiles"
+
+# -------------------------
+# ฝั่ง worker process
+# -------------------------
+_worker_read: Optional[Callable[[Image.Image], List[Dict]]] = None
+
+
+def _worker_init(lang: str, backend: str, reader: Optional[Callable] = None):
+    """สร้าง engine ของ process นี้ครั้งเดียว (reader = ฟังก์ชัน OCR แทน engine ใช้ใน benchmark)"""
+    global _worker_read
+    if reader is not None:
+        _worker_read = reader
+    elif backend == BACKEND_TESSEROCR:
+        _worker_read = TesserocrEngine(lang).image_to_words
+    else:
+        _worker_read = SubprocessEngine(lang).image_to_words
+
+
+def _worker_ocr(job: Tuple[Tuple[int, int], bytes]) -> List[Dict]:
+    size, data = job
+    return _worker_read(Image.frombytes("L", size, data))
+
+
+# -------------------------
+# ฝั่งผู้เรียก
+# -------------------------
+def _gray_array(image) -> np.ndarray:
+    """Frame (BGRA) / PIL / numpy -> grayscale uint8 (numpy BGR[A] ที่ตัดมาแล้วแปลงเฉพาะส่วนนั้น)"""
+    if hasattr(image, "bgra"):
+        image = image.bgra
+    if isinstance(image, Image.Image):
+        return np.asarray(image.convert("L"))
+    if image.ndim == 2:
+        return image
+    # luma แบบจำนวนเต็ม (ลำดับช่องสี BGR เหมือน Frame)
+    return ((image[:, :, 0].astype(np.uint16) * 29
+             + image[:, :, 1].astype(np.uint16) * 150
+             + image[:, :, 2].astype(np.uint16) * 77) >> 8).astype(np.uint8)
+
+
+def _pixels(image) -> np.ndarray:
+    """Frame -> BGRA view (ไม่ copy), PIL -> grayscale, numpy ใช้ตรงๆ"""
+    if hasattr(image, "bgra"):
+        return image.bgra
+    if isinstance(image, Image.Image):
+        return _gray_array(image)
+    return image
+
+
+def default_workers() -> int:
+    """จำนวน process: ค่าจาก config หรือจำนวนคอร์ - 1 (เหลือ 1 คอร์ให้ UI / เสียง)"""
+    return max(1, OCR_PARALLEL_WORKERS or (os.cpu_count() or 2) - 1)
+
+
+class ParallelOCR:
+    """
+    OCR ภาพเดียวด้วยหลาย process
+    - mode "bands": แถบแนวนอนกว้างเต็มภาพ สูง tile px (บรรทัดข้อความไม่ถูกตัดแนวนอน)
+      mode "tiles": ช่องสี่เหลี่ยม tile x tile px
+    - overlap: ส่วนที่ซ้อนกันระหว่างแถบ/ช่อง (ควรสูงกว่าตัวอักษรที่ใหญ่ที่สุด)
+    """
+
+    def __init__(self, lang: str = "tha+eng", workers: int = None, mode: str = None, tile: int = None,
+                 overlap: int = None, backend: str = None, reader: Callable = None):
+        self.lang = lang
+        self.workers = workers or default_workers()
+        self.mode = mode or OCR_PARALLEL_MODE
+        self.tile = tile or OCR_PARALLEL_TILE
+        self.overlap = OCR_TILE_OVERLAP if overlap is None else overlap
+        self.backend = _pick_backend(backend) if reader is None else "custom"
+        self._reader = reader
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+
+        # สถิติ
+        self.calls = 0
+        self.jobs = 0
+        self.total_time = 0.0
+
+    def _pool(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    self._executor = ProcessPoolExecutor(
+                        max_workers=self.workers, initializer=_worker_init,
+                        initargs=(self.lang, self.backend, self._reader))
+                    print(f"[ParallelOCR] ✅ เริ่ม {self.workers} process ({self.backend}, {self.lang})")
+        return self._executor
+
+    def plan(self, size: Tuple[int, int]) -> List[Rect]:
+        """แถบ/ช่องที่จะใช้กับภาพขนาด size"""
+        tile = (size[0], self.tile) if self.mode == MODE_BANDS else (self.tile, self.tile)
+        return plan_ocr_tiles(size, tile, self.overlap)
+
+    def read_tiles(self, image, rects: Sequence[Rect]) -> List[List[Dict]]:
+        """OCR เฉพาะช่อง rects (พร้อมกัน) -> คำของแต่ละช่องในพิกัดของช่อง (ลำดับเดียวกับ rects)"""
+        pixels = _pixels(image)
+        jobs = []
+        for x, y, w, h in rects:
+            gray = np.ascontiguousarray(_gray_array(pixels[y:y + h, x:x + w]))
+            jobs.append(((w, h), gray.tobytes()))
+        results = list(self._pool().map(_worker_ocr, jobs))
+        self.jobs += len(jobs)
+        return results
+
+    def image_to_words(self, image) -> List[Dict]:
+        """OCR ทั้งภาพ (รูปแบบเดียวกับ UIDetector.find_all_text)"""
+        start = time.perf_counter()
+        pixels = _pixels(image)
+        size = (pixels.shape[1], pixels.shape[0])
+        rects = self.plan(size)
+        words = merge_tile_words(list(zip(rects, self.read_tiles(pixels, rects))), size,
+                                 reread=lambda rect: self.read_tiles(pixels, [rect])[0])
+        self.calls += 1
+        self.total_time += time.perf_counter() - start
+        return words
+
+    def warm_up(self):
+        """เริ่ม process ทั้งหมดล่วงหน้า (สร้าง engine / โหลด traineddata ก่อนใช้งานจริง)"""
+        blank = np.full((32, 32), 255, dtype=np.uint8)
+        self.read_tiles(blank, [(0, 0, 32, 32)] * self.workers)
+
+    def close(self):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True)
+
+    def get_stats(self) -> dict:
+        return {
+            "backend": self.backend,
+            "degraded": self.backend == BACKEND_SUBPROCESS,
+            "workers": self.workers,
+            "mode": self.mode,
+            "tile": self.tile,
+            "calls": self.calls,
+            "jobs": self.jobs,
+            "avg_ms": self.total_time / self.calls * 1000 if self.calls else 0.0,
+        }
+
+
+_parallel: Dict[str, ParallelOCR] = {}
+_parallel_lock = threading.Lock()
+
+
+def get_parallel_ocr(lang: str = "tha+eng") -> Optional[ParallelOCR]:
+    """ParallelOCR กลางของภาษา lang (None = ปิดไว้ใน config หรือมีคอร์เดียว)"""
+    if not OCR_PARALLEL or default_workers() < 2:
+        return None
+    parallel = _parallel.get(lang)
+    if parallel is None:
+        with _parallel_lock:
+            parallel = _parallel.get(lang)
+            if parallel is None:
+                parallel = ParallelOCR(lang)
+                _parallel[lang] = parallel
+    return parallel
@@ -2,13 +2,296 @@
 # -------------------------
 # จับภาพหน้าจอ + แปลงเป็น base64
 # ใช้ร่วมกับ ScreenReader (OCR) และ VisionSystem (LLM Multimodal)
+# - CaptureSession: เปิด mss ค้างไว้ + จำ geometry ของจอ ใช้ซ้ำทุกเฟรม
+#   (mss ผูก handle กับ thread ที่สร้าง -> 1 session ต่อ thread ผ่าน get_capture_session())
+# - Frame: numpy view (H, W, 4 BGRA) บน buffer ที่ mss จับมา ไม่ copy
+#   แปลงเป็น BGR / PIL เฉพาะตอนที่ผู้ใช้ต้องการจริง (ครั้งเดียว)
+# - FrameBufferPool: buffer ขนาดคงที่ใช้ซ้ำสำหรับผลลัพธ์ชั่วคราวต่อเฟรม (BGR, ภาพย่อ)
+# - screenshot_tiles: ภาพสำหรับ LLM คงสัดส่วน แยกต่อจอ / ตัดภาพกว้างเป็นช่อง ภายในงบพิกเซล
+#
+# ownership:
+#   1. Frame เป็นเจ้าของ buffer ของ mss (mss สร้าง buffer ใหม่ทุกครั้งที่ grab)
+#      frame.bgra เป็น read-only -> แชร์ให้หลาย consumer / หลาย thread อ่านพร้อมกันได้
+#      view ที่ได้จาก frame (bgra, crop) ใช้ได้จนกว่าจะ release() / ออกจาก with
+#   2. buffer จาก pool (to_bgr(pool=...), acquire) เป็นของผู้ที่ acquire จนกว่าจะ release คืน
+#      ห้ามส่งต่อให้ thread อื่นหรือเก็บไว้หลัง release (เฟรมถัดไปจะเขียนทับ)
+#   3. ของที่ต้องส่งข้าม thread / เก็บไว้นาน (เช่น preview ที่ emit ให้ GUI) ต้องเป็น array ใหม่
+#      (to_bgr() ไม่ส่ง pool) หรือ Frame ทั้งก้อน
 # -------------------------
 
-import io
-import base64
+import itertools
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
 import mss
+import numpy as np
+from mss.exception import ScreenShotError
 from PIL import Image
 
+from core.image_encoder import get_encoder
+from core.screen_tiles import TiledScreenshot, plan_tiles, scaled_size, tile_scale
+
+Region = Tuple[int, int, int, int]
+
+# id ประจำเฟรม (ใช้เป็น key ของ cache ที่ผูกกับภาพ เช่น ImageEncoder)
+_frame_ids = itertools.count(1)
+
+
+class FrameBufferPool:
+    """
+    buffer numpy ที่ใช้ซ้ำได้ แยกตาม (shape, dtype)
+    ใช้กับงานที่ต้องการ array ชั่วคราวขนาดเดิมทุกเฟรม (แปลงสี / ย่อภาพ) แทนการ allocate ใหม่
+    """
+
+    def __init__(self, max_per_shape: int = 4):
+        self.max_per_shape = max_per_shape
+        self._free: Dict[tuple, List[np.ndarray]] = {}
+        self._lock = threading.Lock()
+
+        # สถิติ
+        self.allocations = 0
+        self.reuses = 0
+
+    def acquire(self, shape: Tuple[int, ...], dtype=np.uint8) -> np.ndarray:
+        """buffer ขนาด shape (เนื้อหาเดิมค้างอยู่ ผู้ใช้ต้องเขียนทับเอง)"""
+        key = (tuple(shape), np.dtype(dtype).str)
+        with self._lock:
+            free = self._free.get(key)
+            if free:
+                self.reuses += 1
+                return free.pop()
+            self.allocations += 1
+        return np.empty(shape, dtype=dtype)
+
+    def release(self, buf: Optional[np.ndarray]):
+        """คืน buffer เข้า pool (ต้องเป็น array ที่ได้จาก acquire ไม่ใช่ view)"""
+        if buf is None or buf.base is not None:
+            return
+        key = (buf.shape, buf.dtype.str)
+        with self._lock:
+            free = self._free.setdefault(key, [])
+            if len(free) < self.max_per_shape and not any(b is buf for b in free):
+                free.append(buf)
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            pooled = sum(len(v) for v in self._free.values())
+        return {"allocations": self.allocations, "reuses": self.reuses, "pooled": pooled}
+
+
+_frame_pool: Optional[FrameBufferPool] = None
+_frame_pool_lock = threading.Lock()
+
+
+def get_frame_pool() -> FrameBufferPool:
+    """FrameBufferPool กลางของ process"""
+    global _frame_pool
+    if _frame_pool is None:
+        with _frame_pool_lock:
+            if _frame_pool is None:
+                _frame_pool = FrameBufferPool()
+    return _frame_pool
+
+
+class Frame:
+    """
+    ภาพหน้าจอ 1 เฟรมแบบไม่ copy: bgra = numpy view (H, W, 4) บน buffer ของ mss
+    - left / top: ตำแหน่งมุมซ้ายบนบน virtual desktop (แปลงพิกัดในภาพ -> พิกัดจอ)
+    - ดู ownership ที่หัวไฟล์
+    """
+
+    def __init__(self, bgra: np.ndarray, left: int = 0, top: int = 0,
+                 timestamp: Optional[float] = None, monitor: Optional[int] = None, _source=None):
+        self.bgra = bgra
+        self.left = left
+        self.top = top
+        self.timestamp = time.time() if timestamp is None else timestamp
+        self.monitor = monitor
+        self.id = next(_frame_ids)
+        self._source = _source  # mss ScreenShot ที่เป็นเจ้าของ buffer
+
+    @classmethod
+    def from_screenshot(cls, sct_img, monitor: Optional[int] = None) -> "Frame":
+        width, height = sct_img.size
+        bgra = np.frombuffer(sct_img.raw, dtype=np.uint8).reshape(height, width, 4)
+        bgra.flags.writeable = False
+        return cls(bgra, sct_img.left, sct_img.top, monitor=monitor, _source=sct_img)
+
+    @property
+    def width(self) -> int:
+        return self.bgra.shape[1]
+
+    @property
+    def height(self) -> int:
+        return self.bgra.shape[0]
+
+    @property
+    def size(self) -> Tuple[int, int]:
+        return self.width, self.height
+
+    def crop(self, region: Region) -> "Frame":
+        """ตัดส่วน (left, top, width, height) ในพิกัดของภาพ -> Frame ใหม่ที่เป็น view (ไม่ copy)"""
+        left, top, width, height = region
+        view = self.bgra[top:top + height, left:left + width]
+        return Frame(view, self.left + left, self.top + top, self.timestamp, self.monitor, self)
+
+    def to_bgr(self, pool: Optional[FrameBufferPool] = None) -> np.ndarray:
+        """
+        BGR (H, W, 3) สำหรับ OpenCV: copy 1 ครั้ง
+        - pool: ใช้ buffer จาก pool (ผู้เรียกต้อง pool.release(ผลลัพธ์) เมื่อใช้เสร็จ)
+        """
+        shape = (self.height, self.width, 3)
+        out = pool.acquire(shape) if pool is not None else np.empty(shape, dtype=np.uint8)
+        np.copyto(out, self.bgra[:, :, :3])
+        return out
+
+    def to_pil(self) -> Image.Image:
+        """PIL.Image (RGB): PIL decode BGRX -> RGB ตรงจาก buffer (copy 1 ครั้ง)"""
+        bgra = np.ascontiguousarray(self.bgra)
+        return Image.frombuffer("RGB", self.size, bgra, "raw", "BGRX", 0, 1)
+
+    def release(self):
+        """ปล่อย buffer ของ mss (view ที่ยืมไปจาก frame นี้ห้ามใช้ต่อ)"""
+        self._source = None
+        self.bgra = np.empty((0, 0, 4), dtype=np.uint8)
+
+    def __enter__(self) -> "Frame":
+        return self
+
+    def __exit__(self, *exc):
+        self.release()
+
+
+class CaptureSession:
+    """
+    ตัวจับภาพที่เปิดค้างไว้ (แทนการเปิด/ปิด mss.mss() ทุกครั้ง)
+    - ใช้ได้เฉพาะ thread ที่สร้าง: thread ทั่วไปใช้ get_capture_session(),
+      thread ที่จับภาพต่อเนื่อง (เช่น capture loop) สร้างของตัวเองแล้ว close() ตอนจบ
+    - geometry ของจอถูก cache ไว้ เรียก refresh() เมื่อจอเปลี่ยน
+      (grab ที่ล้มเหลวจะเปิด mss ใหม่ + อ่าน geometry ใหม่ให้อัตโนมัติ 1 ครั้ง)
+    """
+
+    def __init__(self):
+        self._sct = None
+        self._monitors: List[Dict[str, int]] = []
+        self._owner = threading.get_ident()
+
+        # สถิติ
+        self.frames = 0
+        self.grab_time = 0.0
+        self.reopens = 0
+
+    # -------------------------
+    # lifecycle
+    # -------------------------
+    def _open(self):
+        self._sct = mss.mss()
+        self._monitors = [dict(mon) for mon in self._sct.monitors]
+
+    def refresh(self):
+        """เปิด mss ใหม่ + อ่าน geometry ของจอใหม่ (เสียบ/ถอดจอ, เปลี่ยนความละเอียด)"""
+        self.close()
+        self._open()
+
+    def close(self):
+        if self._sct is not None:
+            try:
+                self._sct.close()
+            except Exception:
+                pass
+            self._sct = None
+
+    def __del__(self):
+        # session ของ thread ที่จบไปแล้ว (threading.local ถูกเก็บกวาด) -> คืน handle ของ mss
+        self.close()
+
+    def __enter__(self) -> "CaptureSession":
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    # -------------------------
+    # geometry
+    # -------------------------
+    @property
+    def monitors(self) -> List[Dict[str, int]]:
+        """เหมือน mss.monitors: [0] = ทุกจอรวมกัน, [1] = จอหลัก, [2+] = จออื่นๆ"""
+        if self._sct is None:
+            self._open()
+        return self._monitors
+
+    def monitor_rect(self, region: Optional[Region] = None, monitor: int = 0) -> Dict[str, int]:
+        """region (left, top, width, height) หรือ geometry ของจอที่เลือก"""
+        if region:
+            left, top, width, height = region
+            return {"left": left, "top": top, "width": width, "height": height}
+        return self.monitors[monitor]
+
+    # -------------------------
+    # จับภาพ
+    # -------------------------
+    def _grab_raw(self, region: Optional[Region] = None, monitor: int = 0):
+        """mss ScreenShot (BGRA) ของ region/จอ"""
+        if threading.get_ident() != self._owner:
+            raise RuntimeError("CaptureSession ใช้ได้เฉพาะ thread ที่สร้าง (ใช้ get_capture_session())")
+
+        start = time.perf_counter()
+        rect = self.monitor_rect(region, monitor)
+        try:
+            sct_img = self._sct.grab(rect)
+        except ScreenShotError:
+            # display เปลี่ยน / handle หมดอายุ -> เปิดใหม่แล้วลองอีกครั้ง
+            self.reopens += 1
+            self.refresh()
+            sct_img = self._sct.grab(self.monitor_rect(region, monitor))
+        self.frames += 1
+        self.grab_time += time.perf_counter() - start
+        return sct_img
+
+    def grab(self, region: Optional[Region] = None, monitor: int = 0) -> Image.Image:
+        """
+        จับภาพแล้วคืน PIL.Image (RGB)
+        - region: (left, top, width, height) หรือ None -> ทั้งจอ
+        - monitor: 0 = all monitors, 1 = จอหลัก, 2+ = จออื่นๆ
+        """
+        sct_img = self._grab_raw(region, monitor)
+        # BGRX -> RGB ใน decoder ของ PIL (ไม่ต้องผ่าน sct_img.rgb ที่สร้าง bytes ใหม่ทั้งภาพ)
+        return Image.frombuffer("RGB", sct_img.size, sct_img.raw, "raw", "BGRX", 0, 1)
+
+    def grab_frame(self, region: Optional[Region] = None, monitor: int = 0) -> Frame:
+        """จับภาพแล้วคืน Frame (numpy view BGRA บน buffer ของ mss ไม่ copy)"""
+        return Frame.from_screenshot(self._grab_raw(region, monitor), monitor=monitor)
+
+    def get_stats(self) -> dict:
+        return {
+            "frames": self.frames,
+            "avg_grab_ms": self.grab_time / self.frames * 1000 if self.frames else 0.0,
+            "reopens": self.reopens,
+        }
+
+
+_local = threading.local()
+
+
+def get_capture_session() -> CaptureSession:
+    """CaptureSession ของ thread ปัจจุบัน (สร้างครั้งแรกที่ใช้ แล้วใช้ซ้ำตลอดอายุ thread)"""
+    session = getattr(_local, "session", None)
+    if session is None:
+        session = CaptureSession()
+        _local.session = session
+    return session
+
+
+def screenshot_frame(region=None, monitor=0) -> Frame:
+    """
+    ถ่าย screenshot แล้วคืนค่าเป็น Frame (ไม่ copy)
+    - ใช้แทน screenshot_pil เมื่อจะประมวลผลด้วย numpy / OpenCV
+    """
+    return get_capture_session().grab_frame(region=region, monitor=monitor)
+
+
 def screenshot_pil(region=None, monitor=0, resize_to=None, fmt="PNG"):
     """
     ถ่าย screenshot แล้วคืนค่าเป็น PIL.Image
@@ -17,20 +300,7 @@ def screenshot_pil(region=None, monitor=0, resize_to=None, fmt="PNG"):
     - resize_to: (w, h) ถ้าต้องการย่อภาพ
     - fmt: "PNG" หรือ "JPEG"
     """
-    with mss.mss() as sct:
-        # เลือก monitor
-        if monitor == 0:
-            mon = sct.monitors[0]   # all monitors
-        else:
-            mon = sct.monitors[monitor]
-
-        # ถ้ามี region ก็ตัดเฉพาะส่วนนั้น
-        if region:
-            left, top, width, height = region
-            mon = {"left": left, "top": top, "width": width, "height": height}
-
-        sct_img = sct.grab(mon)
-        img = Image.frombytes("RGB", sct_img.size, sct_img.rgb)
+    img = get_capture_session().grab(region=region, monitor=monitor)
 
     # resize ถ้าระบุ
     if resize_to:
@@ -39,36 +309,67 @@ def screenshot_pil(region=None, monitor=0, resize_to=None, fmt="PNG"):
     return img
 
 
-def image_to_data_uri(img: Image.Image, fmt="JPEG", quality=80):
+def image_to_data_uri(img, fmt="JPEG", quality=80):
     """
-    แปลง PIL.Image เป็น Data URI (base64)
+    แปลงภาพ (PIL.Image / Frame) เป็น Data URI (base64) ด้วย quality ตายตัว
     - fmt: 'JPEG' หรือ 'PNG'
     - quality: ใช้เมื่อ JPEG (0-100)
     คืนค่า -> (data_uri, raw_bytes)
     """
-    buf = io.BytesIO()
-    if fmt.upper() == "JPEG":
-        img.save(buf, format="JPEG", quality=quality, optimize=True)
-        mime = "image/jpeg"
-    else:
-        img.save(buf, format="PNG", optimize=True)
-        mime = "image/png"
+    encoded = get_encoder().encode(img, fmt=fmt, quality=quality, target_bytes=0, max_pixels=0)
+    return encoded.data_uri, encoded.raw_bytes
+
+
+def screenshot_image(region=None, monitor=0, resize_to=None, fmt="JPEG", quality=None,
+                     target_bytes=None, frame: Optional[Frame] = None):
+    """
+    จับภาพหน้าจอ -> EncodedImage (ส่งให้ LLMClient.ask_with_image ได้ตรงๆ ไม่ต้องสร้าง data URI)
+    - resize_to: None = ย่อแบบคงสัดส่วนให้อยู่ในงบ VISION_MAX_PIXELS | (w, h) = ขนาดตายตัว
+    - quality: None = ImageEncoder ปรับ quality/ความละเอียดให้ได้ขนาดไม่เกิน target_bytes
+      (ค่าเริ่มต้นจาก VISION_IMAGE_TARGET_KB), ระบุตัวเลข = quality ตายตัว
+    - frame: ใช้เฟรมที่มีอยู่แล้ว (เช่นจาก FrameHub) แทนการจับใหม่
+    """
+    if frame is None:
+        frame = screenshot_frame(region=region, monitor=monitor)
+    return get_encoder().encode(frame, fmt=fmt, resize_to=resize_to, quality=quality, target_bytes=target_bytes)
+
+
+def screenshot_tiles(region=None, monitor=0, mode=None, max_pixels=None, fmt="JPEG", quality=None,
+                     target_bytes=None, frame: Optional[Frame] = None) -> TiledScreenshot:
+    """
+    จับภาพหน้าจอ 1 ครั้ง -> TiledScreenshot (ส่ง .images ให้ ask_with_image พร้อม .prompt(คำถาม))
+    - mode: "auto" | "single" | "monitors" | "grid" (None = VISION_TILE_MODE)
+    - max_pixels: พิกเซลรวมทุกภาพ (None = VISION_MAX_PIXELS) ทุกภาพย่อด้วยอัตราเดียวกัน
+    - tile เป็น view ของเฟรมเดียวกัน (Frame.crop ไม่ copy)
+    - frame: เฟรมของ region/monitor นี้ที่มีอยู่แล้ว (เช่นจาก FrameHub) แทนการจับใหม่
+    """
+    session = get_capture_session()
+    if frame is None:
+        frame = session.grab_frame(region=region, monitor=monitor)
+    # ภาพทุกจอรวมกัน -> ส่ง geometry ของจอจริงให้แบ่งตามจอได้
+    monitors = session.monitors[1:] if monitor == 0 and not region else None
+    tiles = plan_tiles(frame.size, (frame.left, frame.top), monitors, mode,
+                       label="หน้าจอ" if monitor == 0 or region else f"จอ {monitor}",
+                       monitor=None if region else monitor)
 
-    raw_bytes = buf.getvalue()
-    b64 = base64.b64encode(raw_bytes).decode("ascii")
-    data_uri = f"data:{mime};base64,{b64}"
-    return data_uri, raw_bytes
+    encoder = get_encoder()
+    scale = tile_scale(tiles, encoder.max_pixels if max_pixels is None else max_pixels)
+    images = [
+        encoder.encode(frame.crop(tile.rect), fmt=fmt, resize_to=scaled_size(tile, scale), quality=quality,
+                       target_bytes=target_bytes)
+        for tile in tiles
+    ]
+    return TiledScreenshot(images, tiles, (frame.left, frame.top), scale)
 
 
-def screenshot_data_uri(region=None, monitor=0, resize_to=(1024, 768), fmt="JPEG", quality=80):
+def screenshot_data_uri(region=None, monitor=0, resize_to=None, fmt="JPEG", quality=None,
+                        target_bytes=None):
     """
     จับภาพหน้าจอ -> แปลงเป็น Data URI + raw bytes
-    - resize_to = (1024,768) เพื่อลด payload ก่อนส่งไป LLM
     คืนค่า -> (data_uri, raw_bytes, PIL.Image)
     """
-    img = screenshot_pil(region=region, monitor=monitor, resize_to=resize_to, fmt=fmt)
-    data_uri, raw_bytes = image_to_data_uri(img, fmt=fmt, quality=quality)
-    return data_uri, raw_bytes, img
+    encoded = screenshot_image(region, monitor, resize_to, fmt, quality, target_bytes)
+    return encoded.data_uri, encoded.raw_bytes, encoded.to_pil()
 
 
 # ✅ ทดสอบ standalone
@@ -1,14 +1,16 @@
 # core/screen_reader.py
 # -------------------------
 # จัดการ OCR (อ่านข้อความจากหน้าจอ)
+# - OCR ผ่าน OCREnginePool + ผลถูก cache ตามเนื้อภาพ (OCRCache)
 # -------------------------
 
 import sys, os
 sys.path.append(os.path.dirname(os.path.dirname(__file__)))  # ให้เจอ config และ core อื่นๆ
 
-import pytesseract
 from PIL import Image
-from core.screen_capturer import screenshot_pil
+from core.vision_share_manager import get_frame_hub
+from core.ocr_cache import get_ocr_cache
+from core.ocr_engine import get_ocr_pool
 
 class ScreenReader:
     def __init__(self, lang="eng", default_monitor=0, default_region=None):
@@ -32,12 +34,18 @@ class ScreenReader:
         monitor = monitor if monitor is not None else self.default_monitor
         region = region if region is not None else self.default_region
 
-        # จับภาพหน้าจอ
-        img = screenshot_pil(region=region)
+        # ภาพหน้าจอจาก FrameHub (เฟรมที่เพิ่งจับใช้ซ้ำได้)
+        frame = get_frame_hub(monitor).get_frame(region=region)
 
-        # OCR
-        text = pytesseract.image_to_string(img, lang=self.lang)
-        return text.strip()
+        def run_ocr():
+            # decode เป็นภาพสำหรับ OCR เฉพาะเมื่อไม่มีผลใน cache
+            img = frame.to_pil()
+            if resize_to:
+                img = img.resize(resize_to, Image.LANCZOS)
+            return get_ocr_pool(self.lang).image_to_string(img).strip()
+
+        # หน้าจอ/region เดิม -> ใช้ผล OCR เดิมจาก OCRCache
+        return get_ocr_cache().get_or_compute(frame, self.lang, run_ocr, config=f"resize={resize_to}", kind="text")
 
 # ✅ Test Mode
 if __name__ == "__main__":
@@ -52,36 +60,12 @@ if __name__ == "__main__":
     # print("OCR Result:", sr.read_text())
 
 # =============== เพิ่มส่วนนี้ที่ท้ายไฟล์ ===============
-import io
-import base64
-
-def screenshot_data_uri(resize_to=(1024, 768), fmt="JPEG", quality=80):
+def screenshot_data_uri(resize_to=None, fmt="JPEG", quality=80):
     """
     จับภาพหน้าจอ → แปลงเป็น data URI (สำหรับส่งให้ LLM Vision)
+    ใช้ตัวเดียวกับ core.screen_capturer (CaptureSession + ImageEncoder)
     Returns:
         tuple: (data_uri: str, raw_bytes: bytes, pil_image: Image)
     """
-    from core.screen_capturer import screenshot_pil
-    
-    # จับภาพหน้าจอ
-    img = screenshot_pil()
-    
-    # resize ถ้าต้องการ
-    if resize_to:
-        from PIL import Image
-        img = img.resize(resize_to, Image.LANCZOS)
-    
-    # แปลงเป็น bytes
-    img_byte_arr = io.BytesIO()
-    if fmt.upper() == "PNG":
-        img.save(img_byte_arr, format="PNG")
-    else:
-        img.save(img_byte_arr, format="JPEG", quality=quality)
-    img_bytes = img_byte_arr.getvalue()
-    
-    # แปลงเป็น base64
-    base64_str = base64.b64encode(img_bytes).decode('utf-8')
-    mime_type = "image/jpeg" if fmt.upper() != "PNG" else "image/png"
-    data_uri = f"data:{mime_type};base64,{base64_str}"
-    
-    return data_uri, img_bytes, img
\ No newline at end of file
+    from core.screen_capturer import screenshot_data_uri as _capture_data_uri
+    return _capture_data_uri(resize_to=resize_to, fmt=fmt, quality=quality)
@@ -0,0 +1,271 @@
+# core/screen_text_index.py
+# -------------------------
+# ScreenTextIndex: ดัชนีข้อความบนหน้าจอ สร้างจาก OCR 1 ครั้งต่อเฟรม แล้วค้นได้หลายครั้ง
+# - จัดคำเป็นบรรทัด (เรียงซ้าย -> ขวา) และค้นแบบวลีหลายคำได้ ("Save As", "บันทึกเป็น")
+# - key ปกติ: NFC + casefold + ตัดช่องว่าง/zero-width (Tesseract มักเว้นวรรคกลางคำไทย)
+#   key หลวม: ตัดวรรณยุกต์/สระบน-ล่าง (combining marks) และเครื่องหมายวรรคตอนด้วย
+# - trigram -> บรรทัด: เลือกบรรทัดที่น่าจะตรงก่อนค้นแบบ fuzzy (OCR อ่านผิดบางตัว)
+#   prefix: รายการคำเรียงตาม key ค้นด้วย bisect
+# - ผลลัพธ์หลายรายการ จัดอันดับตามคุณภาพการตรง + confidence ของ OCR + ระยะจากจุดอ้างอิง (near)
+# พิกัดของผลลัพธ์เป็นพิกัดจอจริง (origin ของเฟรม + พิกัดในภาพ)
+# -------------------------
+
+import bisect
+import math
+import unicodedata
+from dataclasses import dataclass, field
+from difflib import SequenceMatcher
+from typing import Dict, List, Optional, Sequence, Set, Tuple
+
+# คุณภาพการตรงแต่ละแบบ (ใช้จัดอันดับ)
+MATCH_EXACT = "exact"
+MATCH_LOOSE = "loose"
+MATCH_FUZZY = "fuzzy"
+_QUALITY = {MATCH_EXACT: 1.0, MATCH_LOOSE: 0.9}
+
+# fuzzy: อัตราส่วนความเหมือนขั้นต่ำ / สัดส่วน trigram ที่ต้องมีร่วมกันก่อนจะลองเทียบ
+FUZZY_MIN_RATIO = 0.75
+FUZZY_MIN_TRIGRAMS = 0.3
+
+_ZERO_WIDTH = dict.fromkeys(map(ord, "​‌‍⁠﻿"))
+
+
+def normalize_key(text: str) -> str:
+    """key ปกติ: NFC + casefold + ไม่มีช่องว่าง"""
+    text = unicodedata.normalize("NFC", text).translate(_ZERO_WIDTH).casefold()
+    return "".join(text.split())
+
+
+def loose_key(text: str) -> str:
+    """key หลวม: ตัด combining marks (วรรณยุกต์ไทย ฯลฯ) + เครื่องหมายวรรคตอน + ช่องว่าง"""
+    return "".join(ch for ch in normalize_key(text) if unicodedata.category(ch)[0] not in "MPZ")
+
+
+def _keyed(words: Sequence[Dict], indices: Sequence[int], keyer) -> Tuple[str, List[int]]:
+    """ต่อ key ของคำในบรรทัด + ตารางว่าแต่ละตัวอักษรมาจากคำไหน"""
+    chars, owners = [], []
+    for index in indices:
+        key = keyer(words[index]["text"])
+        chars.append(key)
+        owners.extend([index] * len(key))
+    return "".join(chars), owners
+
+
+def _trigrams(key: str) -> Set[str]:
+    if len(key) < 3:
+        return {key} if key else set()
+    return {key[i:i + 3] for i in range(len(key) - 2)}
+
+
+@dataclass
+class TextLine:
+    words: List[int]            # index ของคำ (เรียงซ้าย -> ขวา)
+    text: str                   # ข้อความที่อ่านได้ (คำคั่นด้วยช่องว่าง)
+    key: str
+    owners: List[int]
+    loose: str
+    loose_owners: List[int]
+
+
+@dataclass
+class TextMatch:
+    text: str
+    x: int
+    y: int
+    w: int
+    h: int
+    confidence: float
+    score: float
+    kind: str
+    line: int
+    words: List[int] = field(default_factory=list)
+
+    @property
+    def center(self) -> Tuple[int, int]:
+        return self.x + self.w // 2, self.y + self.h // 2
+
+    def to_element(self) -> Dict:
+        """รูปแบบเดียวกับ UIDetector.find_element_by_text"""
+        return {"x": self.x, "y": self.y, "w": self.w, "h": self.h,
+                "confidence": self.confidence, "text": self.text, "score": self.score}
+
+
+class ScreenTextIndex:
+    """
+    ดัชนีข้อความของเฟรมเดียว (ไม่แก้ไขหลังสร้าง -> ใช้ร่วมกันหลาย thread ได้)
+    - words: ผล OCR ระดับคำ [{"text", "x", "y", "w", "h", "confidence", "line"?}] ในพิกัดของภาพ
+    - origin: (left, top) ของภาพบนจอจริง
+    """
+
+    def __init__(self, words: Sequence[Dict], origin: Tuple[int, int] = (0, 0)):
+        self.words = list(words)
+        self.origin = origin
+        self.lines: List[TextLine] = self._group_lines()
+
+        self._trigram_lines: Dict[str, Set[int]] = {}
+        for number, line in enumerate(self.lines):
+            for gram in _trigrams(line.loose):
+                self._trigram_lines.setdefault(gram, set()).add(number)
+
+        # prefix: (key หลวมของคำ, index คำ) เรียงตาม key
+        self._prefix = sorted((loose_key(word["text"]), index) for index, word in enumerate(self.words))
+        self._prefix_keys = [key for key, _ in self._prefix]
+
+    def __len__(self) -> int:
+        return len(self.words)
+
+    def approx_bytes(self) -> int:
+        """ขนาดโดยประมาณ (ใช้จำกัด memory ของ OCRCache)"""
+        chars = sum(len(line.key) + len(line.loose) for line in self.lines)
+        return 300 * len(self.words) + 40 * chars + 100 * len(self._trigram_lines)
+
+    # -------------------------
+    # สร้างดัชนี
+    # -------------------------
+    def _group_lines(self) -> List[TextLine]:
+        """คำ -> บรรทัด: ใช้เลขบรรทัดจาก OCR ถ้ามี ไม่เช่นนั้นจัดตามแนวตั้งที่ซ้อนกัน"""
+        groups: Dict[int, List[int]] = {}
+        if all("line" in word for word in self.words):
+            for index, word in enumerate(self.words):
+                groups.setdefault(word["line"], []).append(index)
+        else:
+            rows: List[Tuple[float, float, List[int]]] = []  # (top, bottom, คำ)
+            for index in sorted(range(len(self.words)), key=lambda i: self.words[i]["y"]):
+                word = self.words[index]
+                middle = word["y"] + word["h"] / 2
+                for row_index, (top, bottom, members) in enumerate(rows):
+                    if top <= middle <= bottom:
+                        members.append(index)
+                        rows[row_index] = (min(top, word["y"]), max(bottom, word["y"] + word["h"]), members)
+                        break
+                else:
+                    rows.append((word["y"], word["y"] + word["h"], [index]))
+            groups = {number: members for number, (_, _, members) in enumerate(rows)}
+
+        lines = []
+        for members in groups.values():
+            members.sort(key=lambda i: self.words[i]["x"])
+            key, owners = _keyed(self.words, members, normalize_key)
+            loose, loose_owners = _keyed(self.words, members, loose_key)
+            text = " ".join(self.words[i]["text"].strip() for i in members)
+            lines.append(TextLine(members, text, key, owners, loose, loose_owners))
+        lines.sort(key=lambda line: (self.words[line.words[0]]["y"], self.words[line.words[0]]["x"]))
+        return lines
+
+    # -------------------------
+    # ค้นหา
+    # -------------------------
+    def _match(self, word_indices: Sequence[int], kind: str, quality: float, line: int,
+               near: Optional[Tuple[int, int]]) -> TextMatch:
+        """คำที่ตรง -> TextMatch (กรอบรวม + confidence เฉลี่ย + คะแนน)"""
+        indices = sorted(set(word_indices), key=lambda i: self.words[i]["x"])
+        words = [self.words[i] for i in indices]
+        left = min(w["x"] for w in words)
+        top = min(w["y"] for w in words)
+        right = max(w["x"] + w["w"] for w in words)
+        bottom = max(w["y"] + w["h"] for w in words)
+        confidence = sum(max(0.0, float(w["confidence"])) for w in words) / len(words)
+
+        x, y = self.origin[0] + left, self.origin[1] + top
+        score = 0.7 * quality + 0.2 * min(confidence, 100.0) / 100.0
+        if near is not None:
+            distance = math.hypot(x + (right - left) / 2 - near[0], y + (bottom - top) / 2 - near[1])
+            score += 0.1 * max(0.0, 1.0 - distance / 1500.0)
+        return TextMatch(" ".join(w["text"].strip() for w in words), x, y, right - left, bottom - top,
+                         confidence, score, kind, line, indices)
+
+    @staticmethod
+    def _occurrences(haystack: str, needle: str) -> List[int]:
+        found, start = [], haystack.find(needle)
+        while start != -1:
+            found.append(start)
+            start = haystack.find(needle, start + 1)
+        return found
+
+    def _fuzzy(self, line: TextLine, query: str) -> Optional[Tuple[float, int, int]]:
+        """ช่วงใน line.loose ที่คล้าย query ที่สุด -> (ratio, start, end)"""
+        best = None
+        size = len(query)
+        matcher = SequenceMatcher(autojunk=False)
+        matcher.set_seq2(query)
+        for length in {max(1, size - 1), size, size + 1}:
+            for start in range(0, max(1, len(line.loose) - length + 1)):
+                matcher.set_seq1(line.loose[start:start + length])
+                if matcher.real_quick_ratio() < FUZZY_MIN_RATIO or matcher.quick_ratio() < FUZZY_MIN_RATIO:
+                    continue
+                ratio = matcher.ratio()
+                if ratio >= FUZZY_MIN_RATIO and (best is None or ratio > best[0]):
+                    best = (ratio, start, start + length)
+        return best
+
+    def find(self, query: str, near: Optional[Tuple[int, int]] = None, limit: int = 5,
+             fuzzy: bool = True) -> List[TextMatch]:
+        """
+        ค้นคำ/วลี -> รายการที่ตรง เรียงตามคะแนน (มากไปน้อย)
+        - ตรงทุกตัวอักษร (exact) > ตรงเมื่อไม่สนวรรณยุกต์/วรรคตอน (loose) > คล้าย (fuzzy)
+        - near: (x, y) จุดอ้างอิง เช่นตำแหน่งเมาส์ / คลิกครั้งก่อน -> ผลที่ใกล้กว่าได้คะแนนเพิ่ม
+        """
+        key, loose = normalize_key(query), loose_key(query)
+        if not key:
+            return []
+
+        matches: List[TextMatch] = []
+        seen: Set[Tuple[int, ...]] = set()
+
+        def add(word_indices, kind, quality, line_number):
+            words = tuple(sorted(set(word_indices)))
+            if words and words not in seen:
+                seen.add(words)
+                matches.append(self._match(words, kind, quality, line_number, near))
+
+        # ตรง exact/loose ได้ต้องมี trigram หลวมของ query ครบทุกตัว -> ตรวจเฉพาะบรรทัดที่ผ่าน
+        candidates = range(len(self.lines))
+        if len(loose) >= 3:
+            sets = sorted((self._trigram_lines.get(gram, set()) for gram in _trigrams(loose)), key=len)
+            candidates = sorted(set.intersection(*sets))
+
+        for number in candidates:
+            line = self.lines[number]
+            for start in self._occurrences(line.key, key):
+                add(line.owners[start:start + len(key)], MATCH_EXACT, _QUALITY[MATCH_EXACT], number)
+            if loose:
+                for start in self._occurrences(line.loose, loose):
+                    add(line.loose_owners[start:start + len(loose)], MATCH_LOOSE, _QUALITY[MATCH_LOOSE], number)
+
+        if not matches and fuzzy and len(loose) >= 3:
+            grams = _trigrams(loose)
+            votes: Dict[int, int] = {}
+            for gram in grams:
+                for number in self._trigram_lines.get(gram, ()):
+                    votes[number] = votes.get(number, 0) + 1
+            for number, count in votes.items():
+                if count / len(grams) < FUZZY_MIN_TRIGRAMS:
+                    continue
+                line = self.lines[number]
+                best = self._fuzzy(line, loose)
+                if best is not None:
+                    ratio, start, end = best
+                    add(line.loose_owners[start:end], MATCH_FUZZY, 0.8 * ratio, number)
+
+        matches.sort(key=lambda m: m.score, reverse=True)
+        return matches[:limit]
+
+    def find_prefix(self, prefix: str, near: Optional[Tuple[int, int]] = None, limit: int = 5) -> List[TextMatch]:
+        """คำที่ขึ้นต้นด้วย prefix (ระดับคำ ใช้กับปุ่ม/เมนูที่ถูกตัดท้าย เช่น "Sett" -> "Settings")"""
+        key = loose_key(prefix)
+        if not key:
+            return []
+        start = bisect.bisect_left(self._prefix_keys, key)
+        line_of = {index: number for number, line in enumerate(self.lines) for index in line.words}
+        matches = []
+        for word_key, index in self._prefix[start:]:
+            if not word_key.startswith(key):
+                break
+            line = line_of.get(index, -1)
+            matches.append(self._match([index], MATCH_LOOSE, len(key) / max(len(word_key), 1), line, near))
+        matches.sort(key=lambda m: m.score, reverse=True)
+        return matches[:limit]
+
+    def text(self) -> str:
+        """ข้อความทั้งหมดเรียงตามบรรทัด"""
+        return "\n".join(line.text for line in self.lines)
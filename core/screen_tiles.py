@@ -0,0 +1,144 @@
+# core/screen_tiles.py
+# -------------------------
+# วางแผนแบ่งภาพหน้าจอเป็นหลายภาพก่อนส่งให้ LLM vision (ไม่ต้องจับหน้าจอ -> ทดสอบได้ด้วยขนาดอย่างเดียว)
+# - ทุกภาพถูกย่อด้วยอัตราส่วนเดียวกัน (ตัวหนังสือขนาดเท่ากันทุกภาพ) ให้พิกเซลรวมไม่เกินงบ
+# - "monitors": virtual desktop ที่มีหลายจอ -> 1 ภาพต่อจอ (ไม่มีพื้นที่ว่างนอกจอ ไม่บีบจอกว้างรวมเป็นภาพเดียว)
+# - "grid": ภาพ/จอที่กว้าง (หรือสูง) เกิน max_aspect -> ตัดเป็นช่องที่สัดส่วนปกติ
+# - "single": ภาพเดียว คงสัดส่วน
+# - "auto": หลายจอ -> monitors, ไม่เช่นนั้น -> grid (ภาพสัดส่วนปกติ = 1 ช่อง)
+# -------------------------
+
+import math
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+try:
+    from config import VISION_TILE_MODE, VISION_TILE_MAX_ASPECT, VISION_MAX_TILES
+except Exception:
+    VISION_TILE_MODE = "auto"
+    VISION_TILE_MAX_ASPECT = 2.0
+    VISION_MAX_TILES = 4
+
+MODE_AUTO = "auto"
+MODE_SINGLE = "single"
+MODE_MONITORS = "monitors"
+MODE_GRID = "grid"
+
+# (left, top, width, height)
+Region = Tuple[int, int, int, int]
+
+
+@dataclass
+class ScreenTile:
+    rect: Region                   # ตำแหน่งในภาพที่จับมา
+    label: str                     # ชื่อที่บอก LLM เช่น "จอ 2" / "ส่วน 1/2"
+    monitor: Optional[int] = None  # เลขจอแบบ mss (1 = จอหลัก)
+
+
+def _grid(rect: Region, max_aspect: float, max_tiles: int) -> List[Region]:
+    """ตัด rect เป็นช่องเท่าๆ กัน ให้แต่ละช่องกว้าง/สูงไม่เกิน max_aspect"""
+    left, top, width, height = rect
+    if not max_aspect or width <= 0 or height <= 0:
+        return [rect]
+    cols = max(1, min(max_tiles, math.ceil(width / height / max_aspect - 1e-6)))
+    rows = max(1, min(max(1, max_tiles // cols), math.ceil(height / width / max_aspect - 1e-6)))
+    xs = [left + width * i // cols for i in range(cols + 1)]
+    ys = [top + height * i // rows for i in range(rows + 1)]
+    return [(xs[c], ys[r], xs[c + 1] - xs[c], ys[r + 1] - ys[r]) for r in range(rows) for c in range(cols)]
+
+
+def _split(rect: Region, label: str, monitor: Optional[int], max_aspect: float, max_tiles: int) -> List[ScreenTile]:
+    parts = _grid(rect, max_aspect, max_tiles)
+    if len(parts) == 1:
+        return [ScreenTile(rect, label, monitor)]
+    return [ScreenTile(part, f"{label} ส่วน {n}/{len(parts)}", monitor) for n, part in enumerate(parts, start=1)]
+
+
+def _intersect(a: Region, b: Region) -> Optional[Region]:
+    left, top = max(a[0], b[0]), max(a[1], b[1])
+    right, bottom = min(a[0] + a[2], b[0] + b[2]), min(a[1] + a[3], b[1] + b[3])
+    if right <= left or bottom <= top:
+        return None
+    return left, top, right - left, bottom - top
+
+
+def plan_tiles(size: Tuple[int, int], origin: Tuple[int, int] = (0, 0),
+               monitors: Optional[Sequence[Dict[str, int]]] = None, mode: str = None,
+               label: str = "หน้าจอ", monitor: Optional[int] = None,
+               max_aspect: float = None, max_tiles: int = None) -> List[ScreenTile]:
+    """
+    แบ่งภาพขนาด size (จับมาจากตำแหน่ง origin บน virtual desktop) เป็น tile
+    - monitors: geometry ของจอจริง (mss.monitors[1:]) ใช้เมื่อภาพเป็นทุกจอรวมกัน
+    - label / monitor: ชื่อและเลขจอของภาพ (เมื่อไม่ได้แยกตามจอ)
+    """
+    mode = mode or VISION_TILE_MODE
+    max_aspect = VISION_TILE_MAX_ASPECT if max_aspect is None else max_aspect
+    max_tiles = max(1, VISION_MAX_TILES if max_tiles is None else max_tiles)
+    full = (0, 0, size[0], size[1])
+
+    if mode == MODE_AUTO:
+        mode = MODE_MONITORS if monitors and len(monitors) > 1 else MODE_GRID
+
+    if mode == MODE_MONITORS and monitors and len(monitors) > 1:
+        screens = []
+        for index, mon in enumerate(monitors, start=1):
+            rect = _intersect((mon["left"] - origin[0], mon["top"] - origin[1], mon["width"], mon["height"]), full)
+            if rect is not None:
+                screens.append((rect, index))
+        if 1 < len(screens) <= max_tiles:
+            # จอที่กว้างเกินถูกตัดต่อได้ถ้ายังไม่เกินจำนวนภาพสูงสุด
+            tiles = [tile for rect, index in screens
+                     for tile in _split(rect, f"จอ {index}", index, max_aspect, max_tiles)]
+            if len(tiles) <= max_tiles:
+                return tiles
+            return [ScreenTile(rect, f"จอ {index}", index) for rect, index in screens]
+        mode = MODE_GRID
+
+    if mode == MODE_GRID:
+        return _split(full, label, monitor, max_aspect, max_tiles)
+    return [ScreenTile(full, label, monitor)]
+
+
+def tile_scale(tiles: Sequence[ScreenTile], max_pixels: int) -> float:
+    """อัตราย่อเดียวกันทุก tile ให้พิกเซลรวมไม่เกิน max_pixels (ไม่ขยาย, 0 = ไม่จำกัด)"""
+    area = sum(t.rect[2] * t.rect[3] for t in tiles)
+    if not max_pixels or area <= max_pixels:
+        return 1.0
+    return math.sqrt(max_pixels / area)
+
+
+def scaled_size(tile: ScreenTile, scale: float) -> Tuple[int, int]:
+    return max(1, int(tile.rect[2] * scale)), max(1, int(tile.rect[3] * scale))
+
+
+@dataclass
+class TiledScreenshot:
+    """ภาพหน้าจอที่แบ่งเป็น tile แล้ว: images[i] (EncodedImage) คู่กับ tiles[i]"""
+    images: List[Any]
+    tiles: List[ScreenTile]
+    origin: Tuple[int, int] = (0, 0)   # มุมซ้ายบนของภาพที่จับ บน virtual desktop
+    scale: float = 1.0
+
+    def describe(self) -> str:
+        """คำอธิบายการแบ่งภาพสำหรับใส่ใน prompt (ภาพเดียว = ว่าง)"""
+        if len(self.images) <= 1:
+            return ""
+        lines = [f"ภาพหน้าจอถูกแบ่งเป็น {len(self.images)} ภาพ (ย่อ {self.scale * 100:.0f}% เท่ากันทุกภาพ) ตามลำดับ:"]
+        for number, tile in enumerate(self.tiles, start=1):
+            left, top, width, height = tile.rect
+            lines.append(f"- ภาพที่ {number}: {tile.label} ตำแหน่งบนจอ ({self.origin[0] + left}, "
+                         f"{self.origin[1] + top}) ขนาด {width}x{height}")
+        return "\n".join(lines)
+
+    def prompt(self, text: str) -> str:
+        """text + คำอธิบายการแบ่งภาพ (ถ้ามีหลายภาพ)"""
+        description = self.describe()
+        return f"{description}\n\n{text}" if description else text
+
+    def to_screen(self, index: int, x: float, y: float) -> Tuple[int, int]:
+        """พิกัดในภาพที่ index (ที่ส่งให้ LLM) -> พิกัดบนจอจริง"""
+        left, top, width, height = self.tiles[index].rect
+        # encoder อาจย่อภาพเพิ่มเพื่อให้ได้ขนาดไฟล์ตามงบ -> ใช้ขนาดจริงของภาพนั้น
+        image_w, image_h = getattr(self.images[index], "size", None) or scaled_size(self.tiles[index], self.scale)
+        return (self.origin[0] + left + int(round(x * width / image_w)),
+                self.origin[1] + top + int(round(y * height / image_h)))
@@ -0,0 +1,401 @@
+# core/tiled_ocr.py
+# -------------------------
+# OCR แบบแบ่งช่อง (สำหรับจอ 1440p ขึ้นไป)
+# - ตัดภาพเป็นช่อง (tile) ที่ซ้อนกัน OCR_TILE_OVERLAP px -> คำที่อยู่บนรอยต่อยังอยู่ครบในช่องใดช่องหนึ่ง
+# - แต่ละช่องมี fingerprint (perceptual hash เดียวกับ OCRCache) หลังคลิก/เลื่อน มักเปลี่ยนแค่บางช่อง
+#   -> OCR ใหม่เฉพาะช่องที่ fingerprint เปลี่ยน ช่องอื่นใช้คำเดิม
+# - รวมคำทุกช่องเป็นรายการเดียวในพิกัดของภาพ (รูปแบบเดียวกับ UIDetector.find_all_text):
+#   คำซ้ำในส่วนที่ซ้อนกันเก็บตัวที่ confidence สูงกว่า, คำยาวกว่าช่องซ้อนที่ถูกตัดทั้งสองฝั่ง
+#   รวมชิ้นเป็นคำเดียว (OCR กรอบรวมใหม่), แล้วจัดเลขบรรทัดใหม่ทั้งภาพ
+# ใช้ผ่าน get_tiled_ocr(monitor) (1 ตัวต่อจอ เพราะ fingerprint ผูกกับตำแหน่งช่องบนจอนั้น)
+# -------------------------
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+from PIL import Image
+
+from core.ocr_cache import perceptual_hash
+from core.ocr_engine import get_ocr_pool
+
+try:
+    from config import OCR_TILED_MIN_PIXELS, OCR_TILE_SIZE, OCR_TILE_OVERLAP
+except Exception:
+    OCR_TILED_MIN_PIXELS = 2560 * 1440
+    OCR_TILE_SIZE = 640
+    OCR_TILE_OVERLAP = 96
+
+Rect = Tuple[int, int, int, int]  # (x, y, w, h) ในพิกัดของภาพ
+
+# คำที่ห่างจากขอบช่องด้านใน (ด้านที่มีช่องอื่นต่อ) ไม่เกินเท่านี้ถือว่าอาจถูกตัด
+_EDGE_PX = 2
+
+
+def _spans(length: int, tile: int, overlap: int) -> List[Tuple[int, int]]:
+    """(เริ่ม, ขนาด) ของช่องตามแนวหนึ่ง: จำนวนช่องน้อยที่สุดที่ขนาดไม่เกิน tile แล้วเฉลี่ยขนาดให้เท่ากัน"""
+    if length <= tile:
+        return [(0, length)]
+    overlap = min(overlap, tile // 2)
+    count = -(-(length - overlap) // (tile - overlap))          # ceil
+    size = -(-(length + (count - 1) * overlap) // count)
+    stride = size - overlap
+    return [(min(i * stride, length - size), size) for i in range(count)]
+
+
+def plan_ocr_tiles(size: Tuple[int, int], tile: Tuple[int, int] = None, overlap: int = None) -> List[Rect]:
+    """
+    ช่องที่ครอบทั้งภาพ เรียงซ้าย -> ขวา บน -> ล่าง
+    - tile: (กว้าง, สูง) สูงสุดของช่อง (ค่าเริ่มต้น OCR_TILE_SIZE ทั้งสองด้าน) ใช้ (กว้างเต็มภาพ, สูง) = แบ่งเป็นแถบแนวนอน
+      ช่องจริงอาจเล็กกว่านี้เล็กน้อย เพื่อให้ทุกช่องขนาดเท่ากันและไม่ซ้อนกันเกินจำเป็น
+    - overlap: ส่วนที่ซ้อนกันระหว่างช่องติดกัน
+    """
+    width, height = size
+    tile_w, tile_h = tile or (OCR_TILE_SIZE, OCR_TILE_SIZE)
+    overlap = OCR_TILE_OVERLAP if overlap is None else overlap
+    return [(x, y, w, h)
+            for y, h in _spans(height, tile_h, overlap)
+            for x, w in _spans(width, tile_w, overlap)]
+
+
+def _overlap_ratio(a: Dict, b: Dict) -> float:
+    """พื้นที่ที่ทับกัน / พื้นที่ของกรอบที่เล็กกว่า"""
+    w = min(a["x"] + a["w"], b["x"] + b["w"]) - max(a["x"], b["x"])
+    h = min(a["y"] + a["h"], b["y"] + b["h"]) - max(a["y"], b["y"])
+    if w <= 0 or h <= 0:
+        return 0.0
+    return w * h / max(1, min(a["w"] * a["h"], b["w"] * b["h"]))
+
+
+class _WordGrid:
+    """คำที่เก็บแล้ว แบ่งตามช่องตาราง _CELL px (ตรวจการทับกันเฉพาะคำใกล้ๆ ไม่ต้องเทียบทุกคู่)"""
+
+    _CELL = 128
+
+    def __init__(self):
+        self.words: List[Dict] = []
+        self._cells: Dict[Tuple[int, int], List[Dict]] = {}
+
+    def _keys(self, word: Dict):
+        c = self._CELL
+        for cy in range(word["y"] // c, (word["y"] + word["h"]) // c + 1):
+            for cx in range(word["x"] // c, (word["x"] + word["w"]) // c + 1):
+                yield cx, cy
+
+    def overlaps(self, word: Dict, threshold: float) -> bool:
+        return any(_overlap_ratio(word, other) > threshold
+                   for key in self._keys(word) for other in self._cells.get(key, ()))
+
+    def add(self, word: Dict):
+        self.words.append(word)
+        for key in self._keys(word):
+            self._cells.setdefault(key, []).append(word)
+
+
+def _assign_lines(words: List[Dict]) -> List[Dict]:
+    """
+    จัดเลขบรรทัดใหม่ทั้งภาพ: คำที่แนวตั้งซ้อนกันอยู่แถวเดียวกัน
+    แล้วแยกแถวเป็นหลายบรรทัดเมื่อช่องว่างแนวนอนกว้างเกิน ~3 เท่าความสูงตัวอักษร (คนละคอลัมน์/คนละปุ่ม)
+    """
+    rows: List[List[Dict]] = []
+    bounds: List[Tuple[float, float]] = []
+    for word in sorted(words, key=lambda w: w["y"] + w["h"] / 2):
+        middle = word["y"] + word["h"] / 2
+        if bounds and bounds[-1][0] <= middle <= bounds[-1][1]:
+            rows[-1].append(word)
+            top, bottom = bounds[-1]
+            bounds[-1] = (min(top, word["y"]), max(bottom, word["y"] + word["h"]))
+        else:
+            rows.append([word])
+            bounds.append((word["y"], word["y"] + word["h"]))
+
+    line = -1
+    ordered = []
+    for row in rows:
+        row.sort(key=lambda w: w["x"])
+        right = None
+        for word in row:
+            if right is None or word["x"] - right > 3 * max(word["h"], 1):
+                line += 1
+            word["line"] = line
+            right = word["x"] + word["w"] if right is None else max(right, word["x"] + word["w"])
+            ordered.append(word)
+    return ordered
+
+
+def _same_line(a: Dict, b: Dict) -> bool:
+    """แนวตั้งทับกันอย่างน้อยครึ่งหนึ่งของคำที่เตี้ยกว่า"""
+    h = min(a["y"] + a["h"], b["y"] + b["h"]) - max(a["y"], b["y"])
+    return h >= 0.5 * min(a["h"], b["h"])
+
+
+def _touching(a: Dict, b: Dict) -> bool:
+    """แนวนอนแตะหรือทับกัน (เผื่อ _EDGE_PX)"""
+    return a["x"] <= b["x"] + b["w"] + _EDGE_PX and b["x"] <= a["x"] + a["w"] + _EDGE_PX
+
+
+def _group_fragments(cut: List[Tuple[int, Dict]]) -> List[List[Dict]]:
+    """ชิ้นคำจากคนละช่องที่อยู่บรรทัดเดียวกันและแตะ/ทับกัน -> กลุ่มเดียวกัน (= คำเดียวที่ยาวกว่าช่องซ้อน)"""
+    parent = list(range(len(cut)))
+
+    def find(i: int) -> int:
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    for i, (tile_a, a) in enumerate(cut):
+        for j in range(i + 1, len(cut)):
+            tile_b, b = cut[j]
+            if tile_a != tile_b and _same_line(a, b) and _touching(a, b):
+                parent[find(i)] = find(j)
+
+    groups: Dict[int, List[Dict]] = {}
+    for i, (_, word) in enumerate(cut):
+        groups.setdefault(find(i), []).append(word)
+    return list(groups.values())
+
+
+def _overlap_chars(lt: str, rt: str, expected: int) -> Optional[int]:
+    """จำนวนตัวอักษรที่ท้าย lt ซ้ำกับต้น rt (เลือกค่าที่ใกล้ expected ที่สุด, None = ไม่ตรงกันเลย)"""
+    matches = [k for k in range(1, min(len(lt), len(rt)) + 1)
+               if lt.endswith(rt[:k]) and abs(k - expected) <= 2]
+    return min(matches, key=lambda k: abs(k - expected)) if matches else None
+
+
+def _join_text(left: Dict, right: Dict) -> str:
+    """
+    ต่อข้อความของชิ้นซ้าย + ชิ้นขวาที่ทับกันในส่วนซ้อน
+    1. ท้ายชิ้นซ้าย = ต้นชิ้นขวา (จำนวนตัวอักษรใกล้กับความกว้างที่ทับกัน) -> ตัดส่วนซ้ำออก
+       ลองอีกครั้งโดยตัดตัวอักษรที่ขอบช่องออก (ตัวที่ถูกตัดครึ่งตัว OCR มักอ่านผิด)
+    2. ไม่งั้นแบ่งที่กึ่งกลางส่วนที่ทับกันตามสัดส่วนความกว้าง
+    """
+    lt, rt = left["text"], right["text"]
+    overlap = left["x"] + left["w"] - right["x"]
+    if overlap <= 0:
+        return lt + rt
+    expected = round(len(rt) * overlap / max(1, right["w"]))
+    k = _overlap_chars(lt, rt, expected)
+    if k is not None:
+        return lt + rt[k:]
+    k = _overlap_chars(lt[:-1], rt[1:], expected - 1)
+    if k is not None:
+        return lt[:-1] + rt[1 + k:]
+    middle = (left["x"] + left["w"] + right["x"]) / 2
+    keep = round(len(lt) * (middle - left["x"]) / max(1, left["w"]))
+    skip = round(len(rt) * (middle - right["x"]) / max(1, right["w"]))
+    return lt[:keep] + rt[skip:]
+
+
+def _join_fragments(parts: List[Dict], size: Tuple[int, int],
+                    reread: Optional[Callable[[Rect], List[Dict]]]) -> List[Dict]:
+    """ชิ้นของคำเดียว -> คำเต็ม: OCR กรอบรวมใหม่ (ถ้ามี reread) ไม่งั้นต่อข้อความของแต่ละชิ้น"""
+    parts = sorted(parts, key=lambda w: w["x"])
+    x0, y0 = min(w["x"] for w in parts), min(w["y"] for w in parts)
+    x1, y1 = max(w["x"] + w["w"] for w in parts), max(w["y"] + w["h"] for w in parts)
+    if reread is not None:
+        pad = max(4, (y1 - y0) // 4)
+        left, top = max(0, x0 - pad), max(0, y0 - pad)
+        rect = (left, top, min(size[0], x1 + pad) - left, min(size[1], y1 + pad) - top)
+        words = reread(rect)
+        if words:
+            return [dict(w, x=w["x"] + left, y=w["y"] + top) for w in words]
+
+    word = parts[0]
+    for part in parts[1:]:
+        word = dict(word, text=_join_text(word, part),
+                    w=max(word["x"] + word["w"], part["x"] + part["w"]) - word["x"],
+                    confidence=min(float(word["confidence"]), float(part["confidence"])))
+    return [dict(word, x=x0, y=y0, w=x1 - x0, h=y1 - y0)]
+
+
+def merge_tile_words(results: Sequence[Tuple[Rect, List[Dict]]], size: Tuple[int, int],
+                     reread: Optional[Callable[[Rect], List[Dict]]] = None) -> List[Dict]:
+    """
+    คำของแต่ละช่อง (พิกัดในช่อง) -> คำทั้งภาพ (พิกัดในภาพ) ไม่ซ้ำ
+    1. คำเต็มที่ซ้ำกัน (อยู่ในส่วนซ้อนของ 2 ช่อง) เก็บตัวที่ confidence สูงกว่า
+    2. คำที่แตะขอบช่องด้านในถือว่าอาจถูกตัด: ชิ้นจากคนละช่องที่ต่อกันข้ามรอยต่อ (คำยาวกว่าช่องซ้อน)
+       รวมเป็นคำเดียว - reread(rect) = OCR กรอบรวมใหม่ (พิกัดใน rect) ไม่มีก็ต่อข้อความของแต่ละชิ้น
+    3. ชิ้นเดี่ยวใช้เฉพาะเมื่อไม่มีคำอื่นทับตำแหน่งนั้น (ปกติช่องข้างๆ เห็นคำนั้นเต็มอยู่แล้ว)
+    """
+    width, height = size
+    whole, cut = [], []
+    for index, ((tx, ty, tw, th), words) in enumerate(results):
+        for word in words:
+            merged = dict(word, x=word["x"] + tx, y=word["y"] + ty)
+            touches = ((tx > 0 and word["x"] <= _EDGE_PX)
+                       or (tx + tw < width and word["x"] + word["w"] >= tw - _EDGE_PX)
+                       or (ty > 0 and word["y"] <= _EDGE_PX)
+                       or (ty + th < height and word["y"] + word["h"] >= th - _EDGE_PX))
+            if touches:
+                cut.append((index, merged))
+            else:
+                whole.append(merged)
+
+    kept = _WordGrid()
+    for word in sorted(whole, key=lambda w: -float(w["confidence"])):
+        if not kept.overlaps(word, 0.5):
+            kept.add(word)
+
+    singles = []
+    for group in _group_fragments(cut):
+        # ชิ้นเดียวกันที่เห็นจาก 2 ช่อง (เช่นช่องบน/ล่างที่รอยต่อแนวตั้งตรงกัน) -> เก็บตัวเดียว
+        parts = []
+        for word in sorted(group, key=lambda w: -float(w["confidence"])):
+            if not any(_overlap_ratio(word, other) > 0.8 for other in parts):
+                parts.append(word)
+        if len(parts) == 1:
+            singles.append(parts[0])
+            continue
+        for word in _join_fragments(parts, size, reread):
+            if not kept.overlaps(word, 0.5):
+                kept.add(word)
+
+    for word in sorted(singles, key=lambda w: -w["w"]):
+        if not kept.overlaps(word, 0.0):
+            kept.add(word)
+    return _assign_lines(kept.words)
+
+
+def _array(image) -> np.ndarray:
+    """Frame -> BGRA view, PIL -> numpy (ใช้ทำ fingerprint ของช่อง)"""
+    if hasattr(image, "bgra"):
+        return image.bgra
+    if isinstance(image, Image.Image):
+        return np.asarray(image)
+    return image
+
+
+def _crop_pil(image, rect: Rect) -> Image.Image:
+    x, y, w, h = rect
+    if hasattr(image, "crop") and hasattr(image, "to_pil"):      # Frame: view ไม่ copy
+        return image.crop(rect).to_pil()
+    if isinstance(image, Image.Image):
+        return image.crop((x, y, x + w, y + h))
+    return Image.fromarray(np.ascontiguousarray(image[y:y + h, x:x + w]))
+
+
+class TiledOCR:
+    """
+    OCR ทีละช่อง + จำคำของแต่ละช่องไว้ตาม fingerprint
+    - words(image): คำทั้งภาพ (OCR ใหม่เฉพาะช่องที่เปลี่ยน)
+    - ocr: ฟังก์ชัน PIL -> คำ (ค่าเริ่มต้น OCREnginePool ของภาษา lang) ช่องที่เปลี่ยนหลายช่อง OCR พร้อมกันตามขนาด pool
+      หรือส่งให้ ParallelOCR (หลาย process) เมื่อเปิด OCR_PARALLEL
+    """
+
+    def __init__(self, lang: str = "tha+eng", tile: Tuple[int, int] = None, overlap: int = None,
+                 ocr: Callable[[Image.Image], List[Dict]] = None, workers: int = None):
+        self.lang = lang
+        self.tile = tile
+        self.overlap = overlap
+        self._ocr = ocr
+        self.workers = workers or (get_ocr_pool(lang).size if ocr is None else 1)
+        self._tiles: Dict[Rect, Tuple[str, List[Dict]]] = {}   # ช่อง -> (fingerprint, คำในพิกัดช่อง)
+        self._joins: Dict[Rect, Tuple[str, List[Dict]]] = {}   # กรอบคำยาวที่ OCR ใหม่ -> (fingerprint, คำ)
+        self._size: Optional[Tuple[int, int]] = None
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._lock = threading.Lock()
+
+        # สถิติ
+        self.passes = 0
+        self.tiles_ocr = 0
+        self.tiles_reused = 0
+        self.last_ms = 0.0
+
+    def _read(self, image: Image.Image) -> List[Dict]:
+        if self._ocr is not None:
+            return self._ocr(image)
+        return get_ocr_pool(self.lang).image_to_words(image)
+
+    def words(self, image) -> List[Dict]:
+        """คำทั้งภาพ (รูปแบบเดียวกับ find_all_text) - OCR ล้มเหลวจะ raise ให้ผู้เรียกจัดการ"""
+        start = time.perf_counter()
+        array = _array(image)
+        size = (array.shape[1], array.shape[0])
+        with self._lock:
+            if size != self._size:       # ขนาดภาพเปลี่ยน (เปลี่ยนความละเอียดจอ) -> ช่องเดิมใช้ไม่ได้
+                self._tiles.clear()
+                self._size = size
+            rects = plan_ocr_tiles(size, self.tile, self.overlap)
+
+            fingerprints = {rect: perceptual_hash(array[rect[1]:rect[1] + rect[3], rect[0]:rect[0] + rect[2]])
+                            for rect in rects}
+            changed = [rect for rect in rects
+                       if rect not in self._tiles or self._tiles[rect][0] != fingerprints[rect]]
+
+            from core.parallel_ocr import get_parallel_ocr  # import ตรงนี้: parallel_ocr ใช้ plan/merge ของโมดูลนี้
+            parallel = get_parallel_ocr(self.lang) if self._ocr is None and len(changed) > 1 else None
+            if parallel is not None:
+                results = parallel.read_tiles(image, changed)
+            elif len(changed) > 1 and self.workers > 1:
+                crops = [_crop_pil(image, rect) for rect in changed]
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="tiled-ocr")
+                results = list(self._executor.map(self._read, crops))
+            else:
+                results = [self._read(_crop_pil(image, rect)) for rect in changed]
+
+            for rect, words in zip(changed, results):
+                self._tiles[rect] = (fingerprints[rect], words)
+
+            self.passes += 1
+            self.tiles_ocr += len(changed)
+            self.tiles_reused += len(rects) - len(changed)
+            joins: Dict[Rect, Tuple[str, List[Dict]]] = {}
+
+            def reread(rect: Rect) -> List[Dict]:
+                # คำยาวข้ามรอยต่อ: OCR กรอบรวมใหม่ (ใช้ผลเดิมถ้าเนื้อภาพในกรอบไม่เปลี่ยน)
+                x, y, w, h = rect
+                fingerprint = perceptual_hash(array[y:y + h, x:x + w])
+                cached = self._joins.get(rect)
+                if cached is None or cached[0] != fingerprint:
+                    cached = (fingerprint, self._read(_crop_pil(image, rect)))
+                joins[rect] = cached
+                return cached[1]
+
+            merged = merge_tile_words([(rect, self._tiles[rect][1]) for rect in rects], size, reread)
+            self._joins = joins
+        self.last_ms = (time.perf_counter() - start) * 1000
+        return merged
+
+    def reset(self):
+        """ลืม fingerprint ทุกช่อง (OCR ใหม่ทั้งภาพในครั้งถัดไป)"""
+        with self._lock:
+            self._tiles.clear()
+            self._joins.clear()
+            self._size = None
+
+    def get_stats(self) -> dict:
+        total = self.tiles_ocr + self.tiles_reused
+        return {
+            "passes": self.passes,
+            "tiles": len(self._tiles),
+            "tiles_ocr": self.tiles_ocr,
+            "tiles_reused": self.tiles_reused,
+            "reuse_rate": self.tiles_reused / total if total else 0.0,
+            "last_ms": self.last_ms,
+        }
+
+
+def use_tiled_ocr(size: Tuple[int, int]) -> bool:
+    """ภาพขนาดนี้ควรใช้ OCR แบบแบ่งช่องหรือไม่ (ตาม OCR_TILED_MIN_PIXELS)"""
+    return bool(OCR_TILED_MIN_PIXELS) and size[0] * size[1] >= OCR_TILED_MIN_PIXELS
+
+
+_tiled: Dict[Tuple[int, str], TiledOCR] = {}
+_tiled_lock = threading.Lock()
+
+
+def get_tiled_ocr(monitor: int = 1, lang: str = "tha+eng") -> TiledOCR:
+    """TiledOCR กลางของจอ monitor (UIDetector ทุกตัวของจอเดียวกันใช้ fingerprint ชุดเดียวกัน)"""
+    key = (monitor, lang)
+    tiled = _tiled.get(key)
+    if tiled is None:
+        with _tiled_lock:
+            tiled = _tiled.get(key)
+            if tiled is None:
+                tiled = TiledOCR(lang)
+                _tiled[key] = tiled
+    return tiled
@@ -5,13 +5,23 @@
 # - หาตำแหน่งข้อความด้วย OCR
 # - หาภาพด้วย Template Matching
 # - คำนวณ Bounding Box และจุดศูนย์กลาง
+# - ผล OCR ถูก cache ตามเนื้อภาพ (OCRCache) หน้าจอนิ่ง = ไม่ต้อง OCR ซ้ำ
+# - OCR ผ่าน OCREnginePool (engine เปิดค้าง โหลด traineddata ครั้งเดียว)
+# - จอใหญ่ (1440p+) OCR แบบแบ่งช่อง: OCR ใหม่เฉพาะช่องที่เปลี่ยน (TiledOCR)
+# - OCR_PARALLEL: OCR ภาพเดียวด้วยหลาย process (ParallelOCR แบ่งแถบ/ช่อง)
+# - ค้นข้อความผ่าน ScreenTextIndex (สร้างครั้งเดียวต่อเฟรม ค้นวลี/fuzzy/หลายผลลัพธ์ได้)
 # -------------------------
 
 import cv2
 import numpy as np
-import pytesseract
 from PIL import Image
-from core.screen_capturer import screenshot_pil
+from core.screen_capturer import Frame, get_frame_pool
+from core.vision_share_manager import get_frame_hub
+from core.ocr_cache import get_ocr_cache
+from core.ocr_engine import get_ocr_pool
+from core.screen_text_index import ScreenTextIndex, TextMatch
+from core.tiled_ocr import get_tiled_ocr, use_tiled_ocr
+from core.parallel_ocr import get_parallel_ocr
 from typing import Optional, Tuple, List, Dict
 
 
@@ -27,47 +37,45 @@ class UIDetector:
         self.monitor = monitor
         print(f"[UIDetector] ✅ เตรียมระบบตรวจจับ UI บนจอที่ {monitor}")
 
-    def find_element_by_text(self, text: str, screenshot=None) -> Optional[Dict]:
+    def find_element_by_text(self, text: str, screenshot=None, near: Optional[Tuple[int, int]] = None) -> Optional[Dict]:
         """
-        หา element บนหน้าจอด้วยข้อความ (OCR)
+        หา element บนหน้าจอด้วยข้อความ (OCR) - ผลที่คะแนนดีที่สุดจาก find_elements_by_text
         
         Returns:
-            Dict หรือ None
-            {"x": int, "y": int, "w": int, "h": int, "confidence": float}
+            Dict หรือ None (พิกัดจอจริง)
+            {"x": int, "y": int, "w": int, "h": int, "confidence": float, "text": str, "score": float}
         """
-        if screenshot is None:
-            screenshot = screenshot_pil(monitor=self.monitor)
+        matches = self.find_elements_by_text(text, screenshot, near=near, limit=1)
+        if not matches:
+            print(f"[UIDetector] ไม่พบข้อความ '{text}' บนหน้าจอ")
+            return None
+        return matches[0].to_element()
 
-        # แปลงเป็น numpy array สำหรับ pytesseract
-        img_np = np.array(screenshot)
+    def find_elements_by_text(self, text: str, screenshot=None, near: Optional[Tuple[int, int]] = None,
+                              limit: int = 5) -> List[TextMatch]:
+        """
+        หาข้อความ/วลีทุกตำแหน่งบนหน้าจอ เรียงตามคะแนน (ตรงทุกตัว > ไม่สนวรรณยุกต์ > คล้าย, confidence, ระยะจาก near)
+        """
+        index = self.text_index(screenshot)
+        if index is None:
+            return []
+        return index.find(text, near=near, limit=limit)
 
-        # ใช้ pytesseract หาข้อความและตำแหน่ง
-        try:
-            data = pytesseract.image_to_data(img_np, lang="tha+eng", output_type=pytesseract.Output.DICT)
-        except Exception as e:
-            print(f"[UIDetector ERROR] OCR ล้มเหลว: {e}")
-            return None
+    def text_index(self, screenshot=None) -> Optional[ScreenTextIndex]:
+        """
+        ScreenTextIndex ของภาพ (None = OCR ล้มเหลว)
+        สร้างจาก OCR ครั้งเดียว แล้วเก็บใน OCRCache คู่กับผล OCR -> ค้นซ้ำกี่ครั้งก็ได้จนกว่าหน้าจอจะเปลี่ยน
+        """
+        if screenshot is None:
+            screenshot = get_frame_hub(self.monitor).get_frame()
+        origin = (getattr(screenshot, "left", 0), getattr(screenshot, "top", 0))
 
-        # ค้นหาข้อความที่ตรงกัน
-        text_lower = text.lower()
-        for i, word in enumerate(data['text']):
-            if word and text_lower in word.lower():
-                x = data['left'][i]
-                y = data['top'][i]
-                w = data['width'][i]
-                h = data['height'][i]
-                conf = data['conf'][i]
-                
-                return {
-                    "x": x,
-                    "y": y,
-                    "w": w,
-                    "h": h,
-                    "confidence": conf
-                }
-
-        print(f"[UIDetector] ไม่พบข้อความ '{text}' บนหน้าจอ")
-        return None
+        def build():
+            words = self._ocr_words(screenshot)
+            return ScreenTextIndex(words, origin) if words is not None else None
+
+        return get_ocr_cache().get_or_compute(screenshot, "tha+eng", build,
+                                              config=f"origin={origin[0]},{origin[1]}", kind="index")
 
     def find_element_by_image(self, template_path: str, screenshot=None, threshold=0.8) -> Optional[Dict]:
         """
@@ -75,18 +83,12 @@ class UIDetector:
         
         Parameters:
             template_path: path ไปยังภาพ template
-            screenshot: PIL Image (ถ้าไม่ระบุจะจับภาพใหม่)
+            screenshot: PIL Image หรือ Frame (ถ้าไม่ระบุจะจับภาพใหม่)
             threshold: ความแม่นยำขั้นต่ำ (0-1)
         
         Returns:
             Dict หรือ None
         """
-        if screenshot is None:
-            screenshot = screenshot_pil(monitor=self.monitor)
-
-        # แปลงเป็น OpenCV format
-        screen_cv = cv2.cvtColor(np.array(screenshot), cv2.COLOR_RGB2BGR)
-        
         try:
             template = cv2.imread(template_path)
             if template is None:
@@ -96,8 +98,20 @@ class UIDetector:
             print(f"[UIDetector ERROR] โหลดภาพล้มเหลว: {e}")
             return None
 
+        # แปลงเป็น OpenCV format (Frame -> BGR ลง buffer ของ pool, copy ครั้งเดียว)
+        pool = get_frame_pool()
+        pooled = None
+        if screenshot is None or isinstance(screenshot, Frame):
+            frame = screenshot if screenshot is not None else get_frame_hub(self.monitor).get_frame()
+            screen_cv = pooled = frame.to_bgr(pool)
+        else:
+            screen_cv = cv2.cvtColor(np.array(screenshot), cv2.COLOR_RGB2BGR)
+
         # Template matching
-        result = cv2.matchTemplate(screen_cv, template, cv2.TM_CCOEFF_NORMED)
+        try:
+            result = cv2.matchTemplate(screen_cv, template, cv2.TM_CCOEFF_NORMED)
+        finally:
+            pool.release(pooled)
         min_val, max_val, min_loc, max_loc = cv2.minMaxLoc(result)
 
         if max_val >= threshold:
@@ -114,6 +128,38 @@ class UIDetector:
         print(f"[UIDetector] ไม่พบภาพที่ตรงกับ template (max_val={max_val:.2f})")
         return None
 
+    def _ocr_words(self, screenshot=None) -> Optional[List[Dict]]:
+        """
+        OCR ทั้งภาพ -> รายการคำ (รูปแบบเดียวกับ find_all_text) None = OCR ล้มเหลว
+        ภาพเดิม (perceptual hash เดิม) ใช้ผลจาก OCRCache ไม่ต้อง OCR ซ้ำ
+        ภาพใหญ่: OCR แบบแบ่งช่อง เฉพาะช่องที่เปลี่ยนจากครั้งก่อน
+        """
+        if screenshot is None:
+            screenshot = get_frame_hub(self.monitor).get_frame()
+
+        def run_ocr():
+            try:
+                if use_tiled_ocr(screenshot.size):
+                    return get_tiled_ocr(self.monitor, "tha+eng").words(screenshot)
+                parallel = get_parallel_ocr("tha+eng")
+                if parallel is not None:
+                    return parallel.image_to_words(screenshot)
+                img = self._ocr_image(screenshot)
+                return get_ocr_pool("tha+eng").image_to_words(img)
+            except Exception as e:
+                print(f"[UIDetector ERROR] OCR ล้มเหลว: {e}")
+                return None
+
+        return get_ocr_cache().get_or_compute(screenshot, "tha+eng", run_ocr, kind="words")
+
+    def _ocr_image(self, screenshot=None) -> Image.Image:
+        """ภาพสำหรับ OCR engine: PIL ใช้ตรงๆ, Frame / ไม่ระบุ -> decode จาก buffer ของ mss ครั้งเดียว"""
+        if screenshot is None:
+            screenshot = get_frame_hub(self.monitor).get_frame()
+        if isinstance(screenshot, Frame):
+            return screenshot.to_pil()
+        return screenshot
+
     def get_element_center(self, element: Dict) -> Tuple[int, int]:
         """
         คำนวณจุดศูนย์กลางของ element
@@ -138,31 +184,9 @@ class UIDetector:
         Returns:
             List of Dict
         """
-        if screenshot is None:
-            screenshot = screenshot_pil(monitor=self.monitor)
-
-        img_np = np.array(screenshot)
-        
-        try:
-            data = pytesseract.image_to_data(img_np, lang="tha+eng", output_type=pytesseract.Output.DICT)
-        except Exception as e:
-            print(f"[UIDetector ERROR] OCR ล้มเหลว: {e}")
-            return []
-
-        results = []
-        for i in range(len(data['text'])):
-            word = data['text'][i]
-            if word.strip():  # ข้ามข้อความว่าง
-                results.append({
-                    "text": word,
-                    "x": data['left'][i],
-                    "y": data['top'][i],
-                    "w": data['width'][i],
-                    "h": data['height'][i],
-                    "confidence": data['conf'][i]
-                })
-        
-        return results
+        words = self._ocr_words(screenshot)
+        # copy รายการ (ผลใน cache ใช้ร่วมกัน ผู้เรียกแก้ไข list ได้โดยไม่กระทบ cache)
+        return list(words) if words is not None else []
 
 
 # ✅ Test Mode
@@ -178,6 +202,10 @@ if __name__ == "__main__":
     else:
         print("❌ ไม่พบ")
 
+    print("\n=== ทดสอบค้นหาวลี (หลายผลลัพธ์) ===")
+    for match in detector.find_elements_by_text("Save As"):
+        print(f"- {match.text} @ {match.center} [{match.kind}] score={match.score:.2f}")
+
     print("\n=== ข้อความทั้งหมดบนหน้าจอ ===")
     all_text = detector.find_all_text()
     print(f"พบ {len(all_text)} ข้อความ")
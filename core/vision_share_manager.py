@@ -0,0 +1,312 @@
+# core/vision_share_manager.py
+# -------------------------
+# FrameHub: ศูนย์กลางภาพหน้าจอ (1 hub ต่อจอ ผ่าน get_frame_hub(monitor))
+# - producer thread เดียวจับภาพ (CaptureSession ของตัวเอง) แล้วเก็บลง ring buffer ขนาดคงที่
+#   ทำงานเฉพาะเมื่อมี subscriber และจับเร็วเท่าที่ subscriber ที่เร็วที่สุดต้องการ
+# - subscribe(name, max_fps): ได้ FrameSubscription แบบ latest-only (ช้ากว่า producer = ข้ามเฟรมเก่า)
+#   จำกัดความถี่แยกต่อ consumer (preview 10 FPS, analysis ทุก 3 วินาที ...)
+#   หรือส่ง callback = ถูกเรียกบน producer thread (ต้องทำงานเร็ว)
+# - get_frame(max_age_ms): ขอเฟรมที่เก่าไม่เกิน N ms -> ใช้เฟรมใน ring ซ้ำ ไม่ต้องจับใหม่
+#   (UIDetector / ScreenReader / VisionSystem / หน้าต่าง interactive ขอภาพของช่วงเวลาเดียวกันได้ภาพเดียวกัน)
+# - invalidate_frames(): หลังคลิก/พิมพ์ ภาพใน ring ถือว่าเก่า (ขอครั้งถัดไปจับใหม่)
+#
+# Frame ใน ring เป็นของ hub: consumer อ่าน (frame.bgra read-only) / crop ได้ แต่ห้าม release()
+# -------------------------
+
+import threading
+import time
+from collections import deque
+from typing import Callable, Dict, List, Optional, Tuple
+
+from core.screen_capturer import CaptureSession, Frame, get_capture_session
+
+try:
+    from config import VISION_HUB_RING_SIZE, VISION_HUB_MAX_FPS, VISION_FRAME_MAX_AGE_MS
+except Exception:
+    VISION_HUB_RING_SIZE = 8
+    VISION_HUB_MAX_FPS = 15
+    VISION_FRAME_MAX_AGE_MS = 150
+
+Region = Tuple[int, int, int, int]
+
+
+class FrameSubscription:
+    """
+    ผู้รับเฟรมจาก FrameHub 1 ราย
+    - get(timeout): รอเฟรมใหม่ (ใหม่กว่าที่เคยได้) ตามความถี่ max_fps คืน None เมื่อหมดเวลา / ถูกปิด
+    - poll(): เหมือน get แต่ไม่รอ
+    """
+
+    def __init__(self, hub: "FrameHub", name: str, max_fps: Optional[float] = None,
+                 callback: Optional[Callable[[Frame], None]] = None):
+        self.hub = hub
+        self.name = name
+        self.callback = callback
+        self.active = True
+        self.set_max_fps(max_fps)
+
+        self._cond = threading.Condition()
+        self._pending: Optional[Frame] = None
+        self._last_delivery = 0.0
+
+        # สถิติ
+        self.delivered = 0
+        self.dropped = 0
+
+    def set_max_fps(self, max_fps: Optional[float]):
+        """None / 0 = รับทุกเฟรมที่ producer จับ"""
+        self.max_fps = max_fps
+        self.interval = 1.0 / max_fps if max_fps else 0.0
+
+    def _offer(self, frame: Frame):
+        """producer ส่งเฟรมใหม่ (เก็บเฉพาะเฟรมล่าสุด)"""
+        if self.callback is not None:
+            now = time.monotonic()
+            if now - self._last_delivery < self.interval:
+                self.dropped += 1
+                return
+            self._last_delivery = now
+            self.delivered += 1
+            try:
+                self.callback(frame)
+            except Exception as e:
+                print(f"[FrameHub] ❌ callback '{self.name}' error: {e}")
+            return
+
+        with self._cond:
+            if self._pending is not None:
+                self.dropped += 1
+            self._pending = frame
+            self._cond.notify_all()
+
+    def get(self, timeout: Optional[float] = None) -> Optional[Frame]:
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            while self.active:
+                now = time.monotonic()
+                rate_wait = self._last_delivery + self.interval - now
+                if self._pending is not None and rate_wait <= 0:
+                    frame, self._pending = self._pending, None
+                    self._last_delivery = now
+                    self.delivered += 1
+                    return frame
+
+                remaining = None if deadline is None else deadline - now
+                if remaining is not None and remaining <= 0:
+                    return None
+                # มีเฟรมรออยู่แต่ยังไม่ถึงรอบ -> รอแค่ถึงรอบ (ระหว่างนั้นเฟรมใหม่กว่าจะมาแทน)
+                waits = [w for w in (remaining, rate_wait if self._pending is not None else None) if w is not None]
+                self._cond.wait(min(waits) if waits else None)
+        return None
+
+    def poll(self) -> Optional[Frame]:
+        return self.get(timeout=0)
+
+    def close(self):
+        """เลิกรับเฟรม (producer หยุดเองเมื่อไม่มี subscriber เหลือ)"""
+        if not self.active:
+            return
+        self.active = False
+        with self._cond:
+            self._pending = None
+            self._cond.notify_all()
+        self.hub._unsubscribe(self)
+
+    def __enter__(self) -> "FrameSubscription":
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def get_stats(self) -> dict:
+        return {"max_fps": self.max_fps, "delivered": self.delivered, "dropped": self.dropped}
+
+
+class FrameHub:
+    """
+    ภาพหน้าจอของจอเดียว แชร์ให้ทุก consumer (ใช้ผ่าน get_frame_hub(monitor))
+    - ring: เฟรมล่าสุด ring_size เฟรม (เก่าสุดหลุดออกเอง)
+    - producer: เริ่มเองเมื่อมี subscriber แรก, พักเมื่อไม่มี subscriber
+      (producer=False = ไม่จับภาพเอง รับเฟรมจาก publish() เท่านั้น)
+    """
+
+    def __init__(self, monitor: int = 1, ring_size: int = None, max_fps: float = None, producer: bool = True):
+        self.monitor = monitor
+        self.producer = producer
+        self.max_fps = max_fps or VISION_HUB_MAX_FPS
+        self._ring: "deque[Frame]" = deque(maxlen=ring_size or VISION_HUB_RING_SIZE)
+        self._lock = threading.Lock()
+        self._subscribers: List[FrameSubscription] = []
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        # เฟรมที่จับก่อนเวลานี้ถือว่าเก่า (invalidate)
+        self._valid_after = 0.0
+
+        # สถิติ
+        self.produced = 0
+        self.on_demand = 0
+        self.cache_hits = 0
+
+    # -------------------------
+    # ring buffer
+    # -------------------------
+    def publish(self, frame: Frame):
+        """เก็บเฟรมลง ring แล้วส่งให้ subscriber ทุกราย"""
+        with self._lock:
+            self._ring.append(frame)
+            subscribers = list(self._subscribers)
+        for sub in subscribers:
+            sub._offer(frame)
+
+    def latest(self, max_age_ms: Optional[float] = None) -> Optional[Frame]:
+        """เฟรมล่าสุดใน ring (None = ไม่มี / เก่ากว่า max_age_ms)"""
+        with self._lock:
+            frame = self._ring[-1] if self._ring else None
+        if frame is None or frame.timestamp < self._valid_after:
+            return None
+        if max_age_ms is not None and (time.time() - frame.timestamp) * 1000 > max_age_ms:
+            return None
+        return frame
+
+    def frames(self) -> List[Frame]:
+        """สำเนารายการเฟรมใน ring (เก่า -> ใหม่)"""
+        with self._lock:
+            return list(self._ring)
+
+    def invalidate(self):
+        """เฟรมที่มีอยู่ถือว่าเก่า (หน้าจอกำลังจะเปลี่ยนเพราะคลิก/พิมพ์)"""
+        self._valid_after = time.time()
+
+    def get_frame(self, region: Optional[Region] = None, max_age_ms: Optional[float] = None) -> Frame:
+        """
+        เฟรมของจอนี้ที่เก่าไม่เกิน max_age_ms (None = VISION_FRAME_MAX_AGE_MS, 0 = จับใหม่เสมอ)
+        - region: (left, top, width, height) พิกัดจอจริง -> crop จากเฟรมเต็ม (view ไม่ copy)
+        - ไม่มีเฟรมที่ใหม่พอ -> จับบน thread ที่เรียก แล้วเก็บลง ring ให้ consumer อื่นใช้ต่อ
+        """
+        max_age_ms = VISION_FRAME_MAX_AGE_MS if max_age_ms is None else max_age_ms
+        frame = self.latest(max_age_ms) if max_age_ms > 0 else None
+        if frame is not None:
+            self.cache_hits += 1
+        else:
+            frame = get_capture_session().grab_frame(monitor=self.monitor)
+            self.on_demand += 1
+            self.publish(frame)
+        if region is None:
+            return frame
+        return self._crop(frame, region)
+
+    @staticmethod
+    def _crop(frame: Frame, region: Region) -> Frame:
+        left, top, width, height = region
+        x, y = left - frame.left, top - frame.top
+        if x < 0 or y < 0 or x + width > frame.width or y + height > frame.height:
+            # region อยู่นอกจอนี้ -> จับเฉพาะ region ตรงๆ
+            return get_capture_session().grab_frame(region=region)
+        return frame.crop((x, y, width, height))
+
+    # -------------------------
+    # subscribers + producer
+    # -------------------------
+    def subscribe(self, name: str, max_fps: Optional[float] = None,
+                  callback: Optional[Callable[[Frame], None]] = None) -> FrameSubscription:
+        """สมัครรับเฟรม (producer เริ่มอัตโนมัติ)"""
+        sub = FrameSubscription(self, name, max_fps, callback)
+        with self._lock:
+            self._subscribers.append(sub)
+        self._ensure_producer()
+        self._wake.set()
+        print(f"[FrameHub] ➕ จอ {self.monitor}: '{name}' ({f'{max_fps:g} FPS' if max_fps else 'ทุกเฟรม'})")
+        return sub
+
+    def _unsubscribe(self, sub: FrameSubscription):
+        with self._lock:
+            if sub in self._subscribers:
+                self._subscribers.remove(sub)
+
+    def _producer_interval(self) -> Optional[float]:
+        """ช่วงเวลาระหว่างเฟรมตาม subscriber ที่ต้องการเร็วที่สุด (None = ไม่มี subscriber)"""
+        with self._lock:
+            rates = [sub.max_fps or self.max_fps for sub in self._subscribers]
+        if not rates:
+            return None
+        return 1.0 / min(self.max_fps, max(rates))
+
+    def _ensure_producer(self):
+        if not self.producer:
+            return
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._produce_loop, daemon=True)
+            self._thread.start()
+
+    def _produce_loop(self):
+        # session ของ producer thread (เปิด mss ครั้งเดียว)
+        capture = CaptureSession()
+        while not self._stop.is_set():
+            interval = self._producer_interval()
+            if interval is None:
+                # ไม่มีใครรับ -> พักจนกว่าจะมี subscriber ใหม่
+                self._wake.clear()
+                self._wake.wait(1.0)
+                continue
+
+            start = time.monotonic()
+            try:
+                self.publish(capture.grab_frame(monitor=self.monitor))
+                self.produced += 1
+            except Exception as e:
+                print(f"[FrameHub] ❌ Capture Error: {e}")
+            self._stop.wait(max(0.0, interval - (time.monotonic() - start)))
+        capture.close()
+
+    def stop(self):
+        """หยุด producer + ปิด subscription ทั้งหมด"""
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for sub in subscribers:
+            sub.close()
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout=2.0)
+            self._thread = None
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            subscribers = {sub.name: sub.get_stats() for sub in self._subscribers}
+            ring = len(self._ring)
+        return {
+            "monitor": self.monitor,
+            "produced": self.produced,
+            "on_demand": self.on_demand,
+            "cache_hits": self.cache_hits,
+            "ring": ring,
+            "subscribers": subscribers,
+        }
+
+
+_hubs: Dict[int, FrameHub] = {}
+_hubs_lock = threading.Lock()
+
+
+def get_frame_hub(monitor: int = 1) -> FrameHub:
+    """FrameHub กลางของจอ monitor (0 = ทุกจอรวมกัน)"""
+    hub = _hubs.get(monitor)
+    if hub is None:
+        with _hubs_lock:
+            hub = _hubs.get(monitor)
+            if hub is None:
+                hub = FrameHub(monitor)
+                _hubs[monitor] = hub
+    return hub
+
+
+def invalidate_frames():
+    """ภาพที่ cache ไว้ทุกจอถือว่าเก่า (เรียกหลังส่ง input ที่ทำให้หน้าจอเปลี่ยน)"""
+    with _hubs_lock:
+        hubs = list(_hubs.values())
+    for hub in hubs:
+        hub.invalidate()
@@ -2,10 +2,12 @@
 # -------------------------
 # VisionSystem = รวมพลัง Screenshot + LLM Vision
 # ใช้สำหรับถามคำถามที่เกี่ยวกับภาพหน้าจอโดยตรง
+# - ภาพคงสัดส่วนภายในงบพิกเซล: หลายจอ -> 1 ภาพต่อจอ, จอกว้างมาก -> ตัดเป็นช่อง (screenshot_tiles)
 # -------------------------
 
-from core.screen_capturer import screenshot_data_uri
+from core.screen_capturer import screenshot_image, screenshot_tiles
 from core.llm_client import LLMClient
+from core.vision_share_manager import get_frame_hub
 
 
 class VisionSystem:
@@ -13,25 +15,40 @@ class VisionSystem:
         # ถ้าไม่ได้ส่ง LLMClient เข้ามา จะสร้างใหม่อัตโนมัติ
         self.llm = llm or LLMClient()
 
-    def ask_with_screenshot(self, user_prompt, region=None, monitor=0, resize_to=(1024, 768)):
+    @staticmethod
+    def _capture(user_prompt, region, monitor, resize_to, tile_mode):
+        """(prompt, ภาพ) - resize_to ระบุ = ภาพเดียวขนาดตายตัวแบบเดิม, None = tile ตามงบพิกเซล"""
+        # เฟรมจาก FrameHub: ถ้า consumer อื่นเพิ่งจับจอเดียวกันก็ใช้ซ้ำ
+        frame = get_frame_hub(monitor).get_frame(region=region)
+        if resize_to:
+            return user_prompt, screenshot_image(resize_to=resize_to, frame=frame)
+        shot = screenshot_tiles(region=region, monitor=monitor, mode=tile_mode, frame=frame)
+        return shot.prompt(user_prompt), shot.images
+
+    def ask_with_screenshot(self, user_prompt, region=None, monitor=0, resize_to=None, tile_mode=None):
         """
-        📸 ถ่ายภาพหน้าจอ -> แปลงเป็น base64 (Data URI) -> ส่งเข้า LLM
+        📸 ถ่ายภาพหน้าจอ -> ส่งเข้า LLM (base64 ทีละ chunk ตอนเขียน request body)
         - user_prompt: คำถามที่ผู้ใช้ต้องการให้ AI วิเคราะห์
         - region: (left, top, width, height) ถ้าไม่ระบุ = ทั้งจอ
         - monitor: เลือกจอ (0 = all, 1 = main, 2+ = จออื่น)
-        - resize_to: ขนาดย่อเพื่อประหยัดเวลาและ bandwidth
+        - resize_to: ขนาดตายตัว (w, h) | None = คงสัดส่วนภายใน VISION_MAX_PIXELS
+        - tile_mode: "auto" | "single" | "monitors" | "grid" (None = VISION_TILE_MODE)
         """
         try:
-            data_uri, raw, img = screenshot_data_uri(
-                region=region, 
-                monitor=monitor,  # เพิ่ม parameter นี้
-                resize_to=resize_to
-            )
-            reply = self.llm.ask_with_image(user_prompt, data_uri)
+            prompt, images = self._capture(user_prompt, region, monitor, resize_to, tile_mode)
+            reply = self.llm.ask_with_image(prompt, images)
             return reply
         except Exception as e:
             return f"[VISION ERROR] เกิดปัญหาในการประมวลผล: {e}"
 
+    def ask_with_screenshot_stream(self, user_prompt, region=None, monitor=0, resize_to=None, tile_mode=None):
+        """
+        ⚡ เหมือน ask_with_screenshot แต่คืน LLMStream
+        ให้ UI แสดงคำตอบบางส่วนได้ทันทีที่ได้ token แรก
+        """
+        prompt, images = self._capture(user_prompt, region, monitor, resize_to, tile_mode)
+        return self.llm.ask_with_image_stream(prompt, images)
+
     def analyze(self, user_prompt: str = "อธิบายสิ่งที่เห็นบนหน้าจอ", region=None, monitor=0):
         """
         🔍 ฟังก์ชัน wrapper เพื่อให้เรียกสั้น ๆ จาก assistant/main.py
@@ -12,6 +12,7 @@ from PyQt6.QtCore import Qt, pyqtSignal, pyqtSlot
 from PyQt6.QtGui import QImage, QPixmap, QFont
 from core.live_vision_stream import LiveVisionStream
 from core.llm_client import LLMClient
+from core.llm_router import get_router, TASK_VISION_DESCRIBE
 
 
 class LiveVisionPanel(QWidget):
@@ -30,7 +31,8 @@ class LiveVisionPanel(QWidget):
     
     def __init__(self, llm_client: LLMClient = None):
         super().__init__()
-        self.llm = llm_client or LLMClient()
+        # ไม่ได้ส่ง client มา -> ใช้โมเดลตาม route ของงาน vision-describe (fallback ได้)
+        self.llm = llm_client or get_router().for_task(TASK_VISION_DESCRIBE)
         self.live_vision = LiveVisionStream(llm_client=self.llm, monitor=1)
         
         self.setup_ui()
@@ -18,7 +18,8 @@ class VisionPanel(QWidget):
         layout.addWidget(self.label)
 
         self.monitor_select = QComboBox()
-        self.monitor_select.addItems(["Monitor 1", "Monitor 2"])
+        # index = เลขจอของ mss (0 = ทุกจอ -> ส่งแยกภาพต่อจอ)
+        self.monitor_select.addItems(["ทุกจอ", "Monitor 1", "Monitor 2"])
         layout.addWidget(self.monitor_select)
 
         self.capture_btn = QPushButton("📸 ถ่ายภาพหน้าจอและวิเคราะห์")
@@ -41,7 +42,7 @@ class VisionPanel(QWidget):
         self.ask_btn.clicked.connect(self._on_ask)
 
     def _on_capture(self):
-        reply = self.vision.analyze("อธิบายสิ่งที่เห็นบนหน้าจอ", monitor=0)
+        reply = self.vision.analyze("อธิบายสิ่งที่เห็นบนหน้าจอ", monitor=self.monitor_select.currentIndex())
         self.result_label.setText(reply)
 
     def _on_ask(self):
@@ -49,5 +50,5 @@ class VisionPanel(QWidget):
         if not user_prompt:
             self.result_label.setText("⚠️ โปรดพิมพ์คำถามก่อน")
             return
-        reply = self.vision.ask_with_screenshot(user_prompt, monitor=0)
+        reply = self.vision.ask_with_screenshot(user_prompt, monitor=self.monitor_select.currentIndex())
         self.result_label.setText(reply)
@@ -6,6 +6,7 @@
 
 import re
 import sys
+import threading
 import urllib.parse
 from PyQt6.QtWidgets import QApplication, QWidget, QVBoxLayout, QLabel, QPushButton, QHBoxLayout, QScrollArea, QFrame
 from PyQt6.QtCore import QObject, pyqtSignal, pyqtSlot, QThread
@@ -14,14 +15,18 @@ import sounddevice as sd
 import numpy as np
 
 # Import core modules
-from core.llm_client import LLMClient
+from core.llm_router import get_router, TASK_CHAT, TASK_PARSE, TASK_SUMMARIZE, TASK_VISION_DESCRIBE, TASK_VISION_LOCATE
+from core.llm_client import CANCELLED_REPLY
+from core.async_llm_bridge import AsyncLLMBridge
 from core.stt_client import STTClient
 from core.tts_client import TTSClient
 from core.vision_system import VisionSystem
 from core.command_parser import CommandParser
+from core.conversation_window import ConversationWindow
 from core.automation_executor import AutomationExecutor
-from core.screen_capturer import screenshot_data_uri, screenshot_pil
+from core.screen_capturer import screenshot_image
 from core.screen_reader import ScreenReader
+from core.vision_share_manager import get_frame_hub
 from core.hotkey_listener import HotkeyListener
 from core.app_launcher import AppLauncher
 from core.smart_app_launcher import SmartAppLauncher 
@@ -39,6 +44,11 @@ except ImportError as e:
     print(f"[WARNING] ไม่พบ Vision Systems: {e}")
     _HAS_VISION_SYSTEMS = False
 
+try:
+    from config import LLM_WARMUP_ON_START
+except Exception:
+    LLM_WARMUP_ON_START = True
+
 # Import for Copilot Vision
 try:
     import mss
@@ -387,6 +397,7 @@ class AssistantCore(QObject):
     
     status_updated = pyqtSignal(str)
     response_ready = pyqtSignal(str)
+    response_partial = pyqtSignal(str)  # คำตอบบางส่วนระหว่าง streaming
     voice_input_received = pyqtSignal(str)
     
     def __init__(self):
@@ -397,11 +408,19 @@ class AssistantCore(QObject):
         """ตั้งค่าระบบทั้งหมด"""
         try:
             # Core modules
-            self.llm = LLMClient()
+            # แต่ละงานใช้โมเดลของตัวเอง (ดู LLM_MODEL_PROFILES / LLM_TASK_ROUTES ใน config.py)
+            self.router = get_router()
+            self.llm = self.router.for_task(TASK_CHAT)
             self.stt = STTClient(model_size="medium", language="th")
             self.tts = TTSClient(lang="th")
-            self.vision = VisionSystem()
-            self.parser = CommandParser(llm_client=self.llm)
+            self.vision = VisionSystem(llm=self.router.for_task(TASK_VISION_DESCRIBE))
+            
+            # คำถามจาก Qt slot (Interactive Vision) -> ส่งเข้า event loop ของ bridge ไม่บล็อก UI thread
+            self.llm_bridge = AsyncLLMBridge(self.router.for_task(TASK_VISION_DESCRIBE))
+            self.llm_bridge.result_ready.connect(self.on_bridge_result)
+            self.llm_bridge.failed.connect(self.on_bridge_failed)
+            self._bridge_requests = {}  # request_id -> (mode, งานที่ทำต่อหลังได้คำตอบ)
+            self.parser = CommandParser(llm_client=self.router.for_task(TASK_PARSE))
             self.executor = AutomationExecutor(monitor=1)
             self.launcher = AppLauncher()
             self.smart_launcher = SmartAppLauncher()
@@ -414,11 +433,11 @@ class AssistantCore(QObject):
             self.voice_recorder = VoiceRecorder(self.stt)
             self.voice_recorder.recording_stopped.connect(self.on_audio_recorded)
             
-            # Chat history
-            self.chat_history = [{
-                "role": "system", 
-                "content": "คุณคือผู้ช่วยที่ตอบเป็นภาษาไทยอย่างเป็นมิตรและเป็นธรรมชาติ"
-            }]
+            # Chat history (จำกัด token + พับ turn เก่าเป็นสรุป)
+            self.conversation = ConversationWindow(
+                system_prompt="คุณคือผู้ช่วยที่ตอบเป็นภาษาไทยอย่างเป็นมิตรและเป็นธรรมชาติ",
+                llm=self.router.for_task(TASK_SUMMARIZE)
+            )
             
             # Hotkey Listener
             self.hotkey_listener = HotkeyListener(
@@ -430,6 +449,9 @@ class AssistantCore(QObject):
             # ✅ Setup Vision Systems
             self.setup_vision_systems()
             
+            # 🩺 ตรวจ LM Studio + warm-up โมเดลเบื้องหลัง (คำถามแรกไม่ต้องรอโหลดโมเดล)
+            self.router.start_health(warm_up=LLM_WARMUP_ON_START, listener=self.on_llm_health_changed)
+            
             self.status_updated.emit("ระบบพร้อมใช้งาน ✅")
             print("=== 🤖 AI Assistant (Complete with Full Copilot Vision) ===")
             
@@ -455,7 +477,7 @@ class AssistantCore(QObject):
             
             # 2️⃣ Continuous Vision
             self.continuous_vision = ContinuousVisionSystem(
-                llm_client=self.llm,
+                llm_client=self.router.for_task(TASK_VISION_DESCRIBE),
                 monitor=1
             )
             self.continuous_vision.analysis_ready.connect(self.on_continuous_analysis)
@@ -521,6 +543,9 @@ class AssistantCore(QObject):
         self.status_updated.emit("หยุดการพูดแล้ว")
         self.response_ready.emit("⏹️ หยุดการพูดแล้ว")
         
+        # หยุดคำตอบที่ LLM กำลัง generate อยู่ด้วย (คืน GPU ให้ LM Studio ทันที)
+        self.cancel_llm_requests()
+        
         try:
             if hasattr(self.tts, 'stop_speaking'):
                 self.tts.stop_speaking()
@@ -529,6 +554,31 @@ class AssistantCore(QObject):
         except Exception as e:
             print(f"[AssistantCore] ❌ Stop Error: {e}")
 
+    def on_llm_health_changed(self, state: str):
+        """เรียกจาก thread ของ LLMHealth (signal ข้าม thread ได้)"""
+        if state == "down":
+            self.status_updated.emit("⚠️ เชื่อมต่อ LM Studio ไม่ได้")
+        elif state == "up":
+            self.status_updated.emit("ระบบพร้อมใช้งาน ✅")
+
+    def cancel_llm_requests(self) -> int:
+        """ยกเลิกคำถาม/การแปลงคำสั่งที่ยังวิ่งอยู่ (ไม่ยุ่งกับงานสรุปบทสนทนาเบื้องหลัง)"""
+        return (self.llm.cancel_all(priority="interactive")
+                + self.llm.cancel_all(priority="parser"))
+
+    def _start_llm_task(self, target, command: str):
+        """รันงานที่รอ LLM ใน thread แยก เพื่อให้ปุ่มหยุด/คำสั่งใหม่กดได้ระหว่างรอคำตอบ"""
+        thread = threading.Thread(target=self._run_llm_task, args=(target, command), daemon=True)
+        thread.start()
+
+    def _run_llm_task(self, target, command: str):
+        try:
+            target(command)
+        except Exception as e:
+            self.response_ready.emit(f"ข้อผิดพลาด: {str(e)}")
+            self.status_updated.emit("เกิดข้อผิดพลาด")
+            print(f"[ERROR] {e}")
+
     # =====================================================
     # 🎨 Vision Overlay Methods
     # =====================================================
@@ -614,7 +664,7 @@ class AssistantCore(QObject):
     def on_point_selected(self, x, y, mode):
         print(f"[InteractiveVision] 👆 ({x}, {y}) - {mode}")
         
-        data_uri, _, img = screenshot_data_uri(monitor=1)
+        image = screenshot_image(frame=get_frame_hub(1).get_frame())
         
         prompts = {
             "อธิบาย": f"อธิบายสิ่งที่อยู่รอบๆ ตำแหน่ง ({x}, {y}) บนหน้าจอนี้",
@@ -627,22 +677,51 @@ class AssistantCore(QObject):
         prompt = prompts.get(mode, prompts["อธิบาย"])
         
         self.status_updated.emit(f"🔍 กำลังวิเคราะห์ ({x}, {y})...")
-        reply = self.llm.ask_with_image(prompt, data_uri)
         
+        def show_marker():
+            if self.vision_overlay:
+                self.vision_overlay.clear_annotations()
+                self.vision_overlay.add_text(x + 10, y - 10, "👆 คุณคลิกที่นี่")
+                self.vision_overlay.show_temporary(3000)
+        
+        self._ask_vision_async(mode, prompt, image, after=show_marker)
+    
+    def _vision_llm_for_mode(self, mode: str):
+        """โหมด "หา Element" ต้องระบุตำแหน่ง UI -> ใช้ route vision-locate"""
+        task = TASK_VISION_LOCATE if mode == "หา Element" else TASK_VISION_DESCRIBE
+        return self.router.for_task(task)
+    
+    def _ask_vision_async(self, mode: str, prompt: str, image, after=None):
+        """ส่งคำถาม Vision ผ่าน AsyncLLMBridge (slot คืนทันที คำตอบมาทาง on_bridge_result)"""
+        request_id = self.llm_bridge.ask_with_image(prompt, image, llm=self._vision_llm_for_mode(mode))
+        self._bridge_requests[request_id] = (mode, after)
+    
+    @pyqtSlot(int, str)
+    def on_bridge_result(self, request_id, reply):
+        mode, after = self._bridge_requests.pop(request_id, (None, None))
+        if mode is None:
+            return
         self.response_ready.emit(f"🤖 [{mode}] {reply}")
         self.tts.speak(reply)
-        
-        if self.vision_overlay:
-            self.vision_overlay.clear_annotations()
-            self.vision_overlay.add_text(x + 10, y - 10, "👆 คุณคลิกที่นี่")
-            self.vision_overlay.show_temporary(3000)
+        if after:
+            after()
     
+    @pyqtSlot(int, str)
+    def on_bridge_failed(self, request_id, error):
+        mode, _ = self._bridge_requests.pop(request_id, (None, None))
+        if mode is None or error == CANCELLED_REPLY:
+            # ถูกยกเลิก (ปุ่มหยุด / คำสั่งใหม่) -> ไม่ต้องแจ้ง
+            return
+        print(f"[InteractiveVision] ❌ {error}")
+        self.response_ready.emit(f"❌ [{mode}] {error}")
+        self.status_updated.emit("วิเคราะห์ไม่สำเร็จ")
+
     @pyqtSlot(int, int, int, int, str)
     def on_region_selected(self, x, y, w, h, mode):
         print(f"[InteractiveVision] 📦 ({x}, {y}, {w}, {h}) - {mode}")
         
         region = (x, y, w, h)
-        data_uri, _, img = screenshot_data_uri(region=region, monitor=1)
+        image = screenshot_image(frame=get_frame_hub(1).get_frame(region=region))
         
         prompts = {
             "อธิบาย": "อธิบายสิ่งที่เห็นในภาพนี้อย่างละเอียด",
@@ -655,15 +734,14 @@ class AssistantCore(QObject):
         prompt = prompts.get(mode, prompts["อธิบาย"])
         
         self.status_updated.emit(f"🔍 กำลังวิเคราะห์พื้นที่ {w}x{h}px...")
-        reply = self.llm.ask_with_image(prompt, data_uri)
         
-        self.response_ready.emit(f"🤖 [{mode}] {reply}")
-        self.tts.speak(reply)
+        def show_region():
+            if self.vision_overlay:
+                self.vision_overlay.clear_annotations()
+                self.vision_overlay.add_box(x, y, w, h, f"{w}x{h}px")
+                self.vision_overlay.show_temporary(5000)
         
-        if self.vision_overlay:
-            self.vision_overlay.clear_annotations()
-            self.vision_overlay.add_box(x, y, w, h, f"{w}x{h}px")
-            self.vision_overlay.show_temporary(5000)
+        self._ask_vision_async(mode, prompt, image, after=show_region)
 
     # =====================================================
     # 🧠 Copilot Vision (Original)
@@ -743,6 +821,10 @@ class AssistantCore(QObject):
             self.status_updated.emit("กำลังประมวลผล...")
             cmd_lower = command.lower()
             
+            # คำสั่งใหม่มาแทนคำสั่งเดิม -> ยกเลิกคำตอบเก่าที่ยังไม่เสร็จ
+            if self.cancel_llm_requests():
+                print("[AssistantCore] ⏭️ ยกเลิกคำตอบเดิม เพราะมีคำสั่งใหม่")
+            
             # คำสั่งออกจากโปรแกรม
             if cmd_lower in ["exit", "quit", "q"]:
                 self.tts.speak("ลาก่อนครับ")
@@ -805,7 +887,7 @@ class AssistantCore(QObject):
             
             # Vision Mode
             if cmd_lower.startswith("vision"):
-                self.process_vision_command(command)
+                self._start_llm_task(self.process_vision_command, command)
                 return
             
             # Automation
@@ -815,7 +897,7 @@ class AssistantCore(QObject):
             
             # โหมดแชทปกติ
             if command.strip():
-                self.process_chat_command(command)
+                self._start_llm_task(self.process_chat_command, command)
                 
         except Exception as e:
             error_msg = f"ข้อผิดพลาด: {str(e)}"
@@ -871,7 +953,10 @@ class AssistantCore(QObject):
             self.status_updated.emit(f"กำลังวิเคราะห์ภาพจอที่ {monitor}...")
             
             try:
-                reply_text = self.vision.analyze(vision_prompt, monitor=monitor)
+                stream = self.vision.ask_with_screenshot_stream(vision_prompt, monitor=monitor)
+                reply_text = self._consume_stream(stream, f"🤖 ผู้ช่วย (Vision-{monitor}): ")
+                if stream.cancelled:
+                    return
                 self.context.record_command(f"vision: {vision_prompt}", "วิเคราะห์ภาพ")
                 self.response_ready.emit(f"🤖 ผู้ช่วย (Vision-{monitor}): {reply_text}")
                 self.tts.speak(reply_text)
@@ -890,10 +975,11 @@ class AssistantCore(QObject):
         data_uri = None
         if any(w in command.lower() for w in ["ปุ่ม", "หน้าจอ", "ไอคอน"]):
             try:
+                # OCR และภาพ hint ใช้เฟรมเดียวกันจาก FrameHub (จับครั้งเดียว)
+                frame = get_frame_hub(1).get_frame()
                 sr = ScreenReader(lang="tha+eng")
-                img = screenshot_pil(monitor=1)
                 ocr_text = sr.read_text(monitor=1)
-                data_uri, _, _ = screenshot_data_uri(monitor=1, resize_to=(1200, 800))
+                data_uri = screenshot_image(frame=frame).data_uri
             except Exception as e:
                 print(f"[WARN] OCR/Vision ไม่พร้อม: {e}")
 
@@ -921,15 +1007,28 @@ class AssistantCore(QObject):
         """ประมวลผลคำสั่งแชทปกติ"""
         self.status_updated.emit("กำลังคิดคำตอบ...")
         
-        reply_text = self.llm.ask(command, history=self.chat_history)
-        self.chat_history.append({"role": "user", "content": command})
-        self.chat_history.append({"role": "assistant", "content": reply_text})
+        stream = self.llm.ask_stream(command, history=self.conversation.build())
+        reply_text = self._consume_stream(stream, "🤖 ผู้ช่วย: ")
+        if stream.cancelled:
+            # ถูกหยุดกลางทาง -> ไม่พูดและไม่บันทึกคำตอบครึ่งๆ กลางๆ ลง history
+            return
+        self.conversation.add_turn(command, reply_text)
         self.context.record_command(command, "แชทปกติ")
         
         self.response_ready.emit(f"🤖 ผู้ช่วย: {reply_text}")
         self.tts.speak(reply_text)
         self.status_updated.emit("พร้อมใช้งาน")
 
+    def _consume_stream(self, stream, prefix: str = "") -> str:
+        """วน LLMStream แล้วส่งคำตอบบางส่วนให้ UI ระหว่างทาง คืนข้อความเต็ม"""
+        for _ in stream:
+            if stream.cancelled:
+                break
+            self.response_partial.emit(f"{prefix}{stream.text}")
+        if stream.ttft is not None:
+            print(f"[LLM] ⚡ TTFT {stream.ttft:.2f}s | ทั้งหมด {stream.total_time:.2f}s")
+        return stream.text
+
 
 def main():
     """ฟังก์ชันหลัก - Full Version"""
@@ -948,9 +1047,13 @@ def main():
     assistant_core.response_ready.connect(
         lambda text: assistant_bar.show_ai_response(text, speak=False)
     )
+    assistant_core.response_partial.connect(
+        lambda text: assistant_bar.show_ai_response(text, speak=False)
+    )
     
     assistant_bar.text_submitted.connect(assistant_core.process_command)
     assistant_bar.close_requested.connect(app.quit)
+    app.aboutToQuit.connect(assistant_core.llm_bridge.shutdown)
     assistant_bar.mic_pressed.connect(assistant_core.start_recording)
     assistant_bar.mic_released.connect(assistant_core.stop_recording)
     assistant_bar.stop_speaking_requested.connect(assistant_core.stop_speaking)
@@ -16,10 +16,11 @@ if str(ROOT_DIR) not in sys.path:
     sys.path.insert(0, str(ROOT_DIR))
 
 # ตอนนี้ import จาก core ได้แล้ว!
-from core.llm_client import LLMClient
+from core.llm_router import get_router, TASK_CHAT, TASK_SUMMARIZE, TASK_VISION_DESCRIBE
 from core.stt_client import STTClient
 from core.tts_client import TTSClient
-from core.screen_reader import screenshot_data_uri
+from core.screen_capturer import screenshot_tiles
+from core.conversation_window import ConversationWindow
 
 import json
 
@@ -32,17 +33,18 @@ class AssistantService:
         self.history_file = Path(history_file)
         self._ensure_history_dir()
 
-        # โหลดประวัติเดิม ถ้ามี
-        self.history = self._load_history()
-        
-        # ถ้าไม่มีประวัติ (หรือไฟล์ว่าง) → ใช้ค่าเริ่มต้น
-        if not self.history:
-            self.history = [
-                {"role": "system", "content": "คุณคือผู้ช่วย AI ที่ตอบเป็นภาษาไทยอย่างสุภาพ เป็นมิตร และอธิบายเข้าใจง่าย"}
-            ]
-
-        # โมดูลอื่นๆ
-        self.llm = LLMClient()
+        # โมดูลอื่นๆ (แต่ละงานใช้โมเดลตาม route ใน config.py)
+        router = get_router()
+        self.llm = router.for_task(TASK_CHAT)
+        self.vision_llm = router.for_task(TASK_VISION_DESCRIBE)
+
+        # โหลดประวัติเดิม ถ้ามี (ถ้าไม่มี/ไฟล์ว่าง → ใช้ system prompt เริ่มต้น)
+        # ConversationWindow คุมไม่ให้ history ที่ส่งไป LLM เกิน token budget
+        self.window = ConversationWindow.from_messages(
+            self._load_history(),
+            default_system_prompt="คุณคือผู้ช่วย AI ที่ตอบเป็นภาษาไทยอย่างสุภาพ เป็นมิตร และอธิบายเข้าใจง่าย",
+            llm=router.for_task(TASK_SUMMARIZE)
+        )
         self.stt = STTClient(model_size="medium", language=lang) if use_stt else None
         self.tts = TTSClient(lang=lang) if use_tts else None
 
@@ -70,7 +72,7 @@ class AssistantService:
         """บันทึกประวัติลงไฟล์ JSON"""
         try:
             with open(self.history_file, "w", encoding="utf-8") as f:
-                json.dump(self.history, f, ensure_ascii=False, indent=2)
+                json.dump(self.window.to_messages(), f, ensure_ascii=False, indent=2)
         except IOError as e:
             print(f"[❌] บันทึกประวัติไม่ได้: {e}")
 
@@ -81,11 +83,10 @@ class AssistantService:
         if not user_text or not user_text.strip():
             return "[Assistant] ไม่พบข้อความ กรุณาลองใหม่"
 
-        reply = self.llm.ask(user_text, history=self.history)
+        reply = self.llm.ask(user_text, history=self.window.build())
 
         # อัปเดตประวัติ
-        self.history.append({"role": "user", "content": user_text})
-        self.history.append({"role": "assistant", "content": reply})
+        self.window.add_turn(user_text, reply)
 
         # 🔥 บันทึกทันทีหลังอัปเดต!
         self._save_history()
@@ -110,13 +111,13 @@ class AssistantService:
         return self.handle_text_query(user_text)  # ← จะบันทึกอัตโนมัติ
 
     def handle_screen_query(self, user_instruction="โปรดอธิบายสิ่งที่เห็นบนหน้าจอเป็นภาษาไทยสั้นๆ"):
-        data_uri, _, _ = screenshot_data_uri(resize_to=(1024, 768), fmt="JPEG", quality=80)
-        prompt = user_instruction + "\n\nหมายเหตุ: โปรดตอบเป็นภาษาไทย"
-        reply = self.llm.ask_with_image(prompt, data_uri, history=self.history)
+        # ทุกจอ: แยกภาพต่อจอ คงสัดส่วน ภายในงบพิกเซล
+        shot = screenshot_tiles(fmt="JPEG", quality=80)
+        prompt = shot.prompt(user_instruction + "\n\nหมายเหตุ: โปรดตอบเป็นภาษาไทย")
+        reply = self.vision_llm.ask_with_image(prompt, shot.images, history=self.window.build())
 
         # อัปเดตประวัติ
-        self.history.append({"role": "user", "content": user_instruction + " [SCREENSHOT]"})
-        self.history.append({"role": "assistant", "content": reply})
+        self.window.add_turn(user_instruction + " [SCREENSHOT]", reply)
 
         # 🔥 บันทึกทันที!
         self._save_history()
@@ -0,0 +1,90 @@
+# bench_capture.py
+# -------------------------
+# วัด overhead ต่อเฟรมของการจับภาพหน้าจอ (ต้องมีจอจริง / X display)
+#   1. เปิด-ปิด mss.mss() ทุกครั้ง + sct_img.rgb + Image.frombytes (แบบเดิม)
+#   2. CaptureSession.grab (mss เปิดค้าง + geometry cache + decode BGRX ใน PIL)
+#   3. เฉพาะ mss.grab บน session เดิม (ต้นทุนขั้นต่ำของ OS)
+#   4. เส้นทางเฟรมของ LiveVisionStream: PIL -> np.array -> cvtColor -> resize -> copy (เดิม)
+#      เทียบกับ Frame (view BGRA) -> resize ลง pool -> BGR (ใหม่)
+# รัน: python -m tests.bench_capture [monitor]
+# -------------------------
+
+import statistics
+import sys
+import time
+
+import cv2
+import mss
+import numpy as np
+from PIL import Image
+
+from core.screen_capturer import CaptureSession, get_frame_pool
+
+ROUNDS = 60
+
+
+def bench(name: str, fn, rounds: int = ROUNDS):
+    fn()  # warm-up
+    times = []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        fn()
+        times.append((time.perf_counter() - start) * 1000)
+    times.sort()
+    p95 = times[int(len(times) * 0.95) - 1]
+    median = statistics.median(times)
+    print(f"{name:<40} median {median:7.2f} ms | p95 {p95:7.2f} ms | ~{1000 / median:5.1f} FPS")
+    return median
+
+
+def grab_per_call(monitor: int) -> Image.Image:
+    """screenshot_pil แบบเดิม (ก่อนมี CaptureSession)"""
+    with mss.mss() as sct:
+        sct_img = sct.grab(sct.monitors[monitor])
+        return Image.frombytes("RGB", sct_img.size, sct_img.rgb)
+
+
+def preview_old(session: CaptureSession, monitor: int) -> np.ndarray:
+    """LiveVisionStream._capture_loop ก่อนมี Frame (ใช้ session เดียวกัน วัดเฉพาะการ copy)"""
+    sct_img = session._grab_raw(monitor=monitor)
+    img = Image.frombytes("RGB", sct_img.size, sct_img.rgb)
+    frame = cv2.cvtColor(np.array(img), cv2.COLOR_RGB2BGR)
+    height, width = frame.shape[:2]
+    if width > 1280:
+        frame = cv2.resize(frame, (1280, int(height * 1280 / width)))
+    overlay = frame.copy()
+    cv2.addWeighted(overlay, 0.6, frame, 0.4, 0, frame)
+    return frame.copy()
+
+
+def preview_new(session: CaptureSession, monitor: int) -> np.ndarray:
+    frame = session.grab_frame(monitor=monitor)
+    if frame.width <= 1280:
+        return frame.to_bgr()
+    pool = get_frame_pool()
+    height = int(frame.height * 1280 / frame.width)
+    small = pool.acquire((height, 1280, 4))
+    cv2.resize(frame.bgra, (1280, height), dst=small, interpolation=cv2.INTER_AREA)
+    out = cv2.cvtColor(small, cv2.COLOR_BGRA2BGR)
+    pool.release(small)
+    return out
+
+
+if __name__ == "__main__":
+    monitor = int(sys.argv[1]) if len(sys.argv) > 1 else 1
+
+    with CaptureSession() as session:
+        mon = session.monitors[monitor]
+        print(f"\n=== [จับภาพจอ {monitor}: {mon['width']}x{mon['height']}, {ROUNDS} รอบ / รายการ] ===")
+
+        before = bench("mss.mss() ต่อครั้ง (แบบเดิม)", lambda: grab_per_call(monitor))
+        after = bench("CaptureSession.grab", lambda: session.grab(monitor=monitor))
+        floor = bench("mss.grab อย่างเดียว (ขั้นต่ำ)", lambda: session._grab_raw(monitor=monitor))
+
+        print(f"\nลด overhead ต่อเฟรม {before - after:.2f} ms ({(1 - after / before) * 100:.0f}%)"
+              f" | เหลือเหนือขั้นต่ำ {after - floor:.2f} ms")
+
+        print(f"\n=== [เส้นทางเฟรม preview ของ LiveVisionStream] ===")
+        old = bench("PIL -> numpy -> cvtColor -> copy (เดิม)", lambda: preview_old(session, monitor))
+        new = bench("Frame view -> pool -> BGR (ใหม่)", lambda: preview_new(session, monitor))
+        print(f"\nเร็วขึ้น {old - new:.2f} ms/เฟรม | pool: {get_frame_pool().get_stats()}")
@@ -0,0 +1,65 @@
+# bench_llm_overhead.py
+# -------------------------
+# วัด overhead ของโค้ดเราเอง (ไม่รวมเวลาโมเดล) โดยใช้ FakeLMStudio แทน LM Studio จริง
+# server ปลอมตอบทันที (ttft=0, tps=0) -> เวลาที่วัดได้คือ overhead ของ
+#   1. requests ตรงๆ (baseline)
+#   2. LLMClient.ask / ask_stream (scheduler + single-flight + SSE parser)
+#   3. CommandParser (AI path: prompt + JSON extract)
+#   4. LLMClient.ask_with_image (payload ภาพขนาดจริง)
+# รัน: python -m tests.bench_llm_overhead
+# -------------------------
+
+import base64
+import io
+import statistics
+import time
+
+import requests
+from PIL import Image
+
+from core.llm_client import LLMClient
+from core.command_parser import CommandParser
+from tests.fake_lm_studio import FakeLMStudio
+
+ROUNDS = 50
+
+
+def bench(name: str, fn, rounds: int = ROUNDS):
+    fn()  # warm-up (เปิด connection)
+    times = []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        fn()
+        times.append((time.perf_counter() - start) * 1000)
+    times.sort()
+    p95 = times[int(len(times) * 0.95) - 1]
+    print(f"{name:<34} median {statistics.median(times):7.2f} ms | p95 {p95:7.2f} ms")
+
+
+def make_data_uri(size=(1024, 768)) -> str:
+    img = Image.new("RGB", size, (40, 120, 200))
+    buf = io.BytesIO()
+    img.save(buf, format="JPEG", quality=85)
+    return "data:image/jpeg;base64," + base64.b64encode(buf.getvalue()).decode()
+
+
+if __name__ == "__main__":
+    with FakeLMStudio() as fake:
+        fake.add_rule(r"COMMAND:", '{"type": "press", "keys": ["ctrl", "s"]}')
+
+        # ปิด response cache เพื่อวัดเส้นทาง HTTP จริงทุกรอบ
+        client = LLMClient(server_url=fake.url)
+        client.cache = None
+        parser = CommandParser(llm_client=client)
+        session = requests.Session()
+        payload = client._build_payload(client._build_text_messages("สวัสดี"))
+        data_uri = make_data_uri()
+
+        print(f"\n=== [LLM overhead: {ROUNDS} รอบ / รายการ] ===")
+        bench("requests.post (baseline)", lambda: session.post(fake.url, json=payload).json())
+        bench("LLMClient.ask", lambda: client.ask("สวัสดี"))
+        bench("LLMClient.ask_stream + collect", lambda: client.ask_stream("สวัสดี").collect())
+        bench("CommandParser.parse (AI)", lambda: parser._parse_with_ai("บันทึกไฟล์ให้หน่อย"))
+        bench("LLMClient.ask_with_image 1024x768", lambda: client.ask_with_image("นี่คืออะไร", data_uri))
+
+        print(f"\nserver stats: {fake.stats}")
@@ -0,0 +1,90 @@
+# bench_ocr_engine.py
+# -------------------------
+# เทียบเวลา OCR ต่อครั้ง (ต้องติดตั้ง Tesseract + traineddata ที่ใช้)
+#   1. pytesseract: spawn tesseract + เขียนไฟล์ภาพชั่วคราว + โหลด traineddata ทุกครั้ง (แบบเดิม)
+#   2. OCREnginePool (tesserocr): engine เปิดค้าง ส่งภาพทาง memory (ครั้งแรกรวมเวลาโหลด traineddata)
+#   3. OCREnginePool ขนาด 1 vs 2 เมื่อมี 4 thread ขอ OCR พร้อมกัน
+# ภาพทดสอบ: ข้อความหลายบรรทัดบนพื้นขาว (จำลองหน้าต่างโปรแกรม)
+# รัน: python -m tests.bench_ocr_engine [lang] [rounds]
+# -------------------------
+
+import statistics
+import sys
+import threading
+import time
+
+from PIL import Image, ImageDraw
+
+from core.ocr_engine import (BACKEND_SUBPROCESS, BACKEND_TESSEROCR, OCREnginePool,
+                             _HAS_PYTESSERACT, _HAS_TESSEROCR)
+
+LANG = sys.argv[1] if len(sys.argv) > 1 else "eng"
+ROUNDS = int(sys.argv[2]) if len(sys.argv) > 2 else 10
+
+
+def make_screen(width=1280, height=720) -> Image.Image:
+    img = Image.new("RGB", (width, height), "white")
+    draw = ImageDraw.Draw(img)
+    labels = ["File", "Edit", "View", "Insert", "Format", "Tools", "Help"]
+    for i, label in enumerate(labels):
+        draw.text((20 + i * 90, 10), label, fill="black")
+    for row in range(20):
+        draw.text((40, 60 + row * 30), f"Line {row + 1}: The quick brown fox jumps over the lazy dog", fill="black")
+    return img.resize((width * 2, height * 2))  # ตัวอักษรใหญ่ขึ้นให้ Tesseract อ่านได้
+
+
+def bench(name: str, fn, rounds: int = ROUNDS) -> float:
+    times = []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        fn()
+        times.append((time.perf_counter() - start) * 1000)
+    median = statistics.median(times)
+    print(f"{name:<38} median {median:8.1f} ms | min {min(times):8.1f} ms")
+    return median
+
+
+def concurrent(pool: OCREnginePool, img: Image.Image, threads: int = 4, per_thread: int = 3) -> float:
+    def worker():
+        for _ in range(per_thread):
+            pool.image_to_words(img)
+
+    start = time.perf_counter()
+    workers = [threading.Thread(target=worker) for _ in range(threads)]
+    for w in workers:
+        w.start()
+    for w in workers:
+        w.join()
+    return (time.perf_counter() - start) * 1000 / (threads * per_thread)
+
+
+if __name__ == "__main__":
+    screen = make_screen()
+    print(f"ภาพ {screen.size[0]}x{screen.size[1]} | lang={LANG} | {ROUNDS} รอบ\n")
+
+    baseline = None
+    if _HAS_PYTESSERACT:
+        subprocess_pool = OCREnginePool(LANG, size=1, backend=BACKEND_SUBPROCESS)
+        baseline = bench("pytesseract (subprocess ต่อครั้ง)", lambda: subprocess_pool.image_to_words(screen))
+    else:
+        print("⚠️ ไม่มี pytesseract ข้ามแบบเดิม")
+
+    if not _HAS_TESSEROCR:
+        print("⚠️ ไม่มี tesserocr (pip install tesserocr) ข้ามการทดสอบ engine เปิดค้าง")
+        sys.exit(0)
+
+    pool = OCREnginePool(LANG, size=1, backend=BACKEND_TESSEROCR)
+    start = time.perf_counter()
+    words = pool.image_to_words(screen)
+    print(f"{'tesserocr ครั้งแรก (รวมโหลด traineddata)':<38} {(time.perf_counter() - start) * 1000:8.1f} ms "
+          f"({len(words)} คำ)")
+    fast = bench("tesserocr (engine เปิดค้าง)", lambda: pool.image_to_words(screen))
+    if baseline:
+        print(f"\n⚡ เร็วขึ้น {baseline / fast:.1f}x ต่อครั้ง (ประหยัด {baseline - fast:.0f} ms)")
+
+    print("\n=== 4 thread ขอ OCR พร้อมกัน (ms ต่อภาพ) ===")
+    for size in (1, 2):
+        sized = OCREnginePool(LANG, size=size, backend=BACKEND_TESSEROCR)
+        sized.warm_up()
+        print(f"pool size {size}: {concurrent(sized, screen):8.1f} ms/ภาพ | {sized.get_stats()}")
+        sized.close()
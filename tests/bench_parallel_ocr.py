@@ -0,0 +1,108 @@
+# bench_parallel_ocr.py
+# -------------------------
+# วัดการขยายตัว (scaling) ของ ParallelOCR ตามจำนวน process และขนาดแถบ/ช่อง บนภาพ 4K
+#   - มี Tesseract (tesserocr / pytesseract): ใช้ข้อความจริงบนพื้นขาว
+#   - ไม่มี: OCR จำลองที่ใช้ CPU จริงตามจำนวนพิกเซล (คำ = สี่เหลี่ยมทึบ ระดับเทาบอกเลขคำ)
+# baseline = OCR ทั้งภาพใน process เดียว (แบบเดิม)
+# speedup = baseline / เวลา, efficiency = speedup / จำนวน process (1.0 = ขยายตัวเต็มที่)
+# รัน: python -m tests.bench_parallel_ocr [lang] [rounds]
+# -------------------------
+
+import os
+import statistics
+import sys
+import time
+
+import numpy as np
+from PIL import Image, ImageDraw
+
+from core.ocr_engine import OCREnginePool, _HAS_PYTESSERACT, _HAS_TESSEROCR
+from core.parallel_ocr import MODE_BANDS, MODE_TILES, ParallelOCR
+
+LANG = sys.argv[1] if len(sys.argv) > 1 else "eng"
+ROUNDS = int(sys.argv[2]) if len(sys.argv) > 2 else 3
+WIDTH, HEIGHT = 3840, 2160
+CONFIGS = [(MODE_BANDS, 180), (MODE_BANDS, 360), (MODE_BANDS, 720), (MODE_TILES, 512), (MODE_TILES, 1024)]
+
+
+def simulated_reader(img: Image.Image):
+    """OCR จำลอง: ใช้ CPU ตามจำนวนพิกเซล แล้วคืนกรอบของแต่ละระดับเทา (= 1 คำ)"""
+    gray = np.asarray(img.convert("L"))
+    for _ in range(4):
+        np.sort(gray, axis=1)
+    ys, xs = np.nonzero(gray != 255)
+    values = gray[ys, xs]
+    order = np.argsort(values, kind="stable")
+    values, ys, xs = values[order], ys[order], xs[order]
+    bounds = np.flatnonzero(np.diff(values)) + 1
+    return [{"text": f"w{v[0]}", "x": int(x.min()), "y": int(y.min()), "w": int(x.max() - x.min() + 1),
+             "h": int(y.max() - y.min() + 1), "confidence": 90.0, "line": 0}
+            for y, x, v in zip(np.split(ys, bounds), np.split(xs, bounds), np.split(values, bounds)) if len(v)]
+
+
+def make_text_screen() -> Image.Image:
+    img = Image.new("L", (WIDTH // 2, HEIGHT // 2), 255)
+    draw = ImageDraw.Draw(img)
+    for row in range(HEIGHT // 2 // 24):
+        draw.text((20, 8 + row * 24), f"Row {row}: The quick brown fox jumps over the lazy dog " * 2, fill=0)
+    return img.resize((WIDTH, HEIGHT))   # ตัวอักษรใหญ่ขึ้นให้ Tesseract อ่านได้
+
+
+def make_block_screen() -> np.ndarray:
+    rng = np.random.default_rng(2)
+    screen = np.full((HEIGHT, WIDTH), 255, dtype=np.uint8)
+    for value in range(1, 250):
+        w, x, y = int(rng.integers(40, 120)), int(rng.integers(0, WIDTH - 120)), int(rng.integers(0, HEIGHT // 24)) * 24
+        if (screen[y:y + 16, max(0, x - 8):x + w + 8] == 255).all():
+            screen[y:y + 16, x:x + w] = value
+    return screen
+
+
+def timed(fn) -> float:
+    times = []
+    for _ in range(ROUNDS):
+        start = time.perf_counter()
+        fn()
+        times.append((time.perf_counter() - start) * 1000)
+    return statistics.median(times)
+
+
+if __name__ == "__main__":
+    real = _HAS_TESSEROCR or _HAS_PYTESSERACT
+    if real:
+        screen = make_text_screen()
+        single = OCREnginePool(LANG, size=1)
+        baseline_fn = lambda: single.image_to_words(screen)
+        reader = None
+        print(f"OCR จริง ({single.backend}, lang={LANG})")
+    else:
+        screen = make_block_screen()
+        baseline_fn = lambda: simulated_reader(Image.fromarray(screen))
+        reader = simulated_reader
+        print("⚠️ ไม่มี Tesseract ใช้ OCR จำลอง (ใช้ CPU ตามจำนวนพิกเซล)")
+
+    cores = os.cpu_count() or 1
+    counts = sorted({n for n in (1, 2, 4, 8, 12, 16) if n <= cores} | {cores})
+    baseline_words = len(baseline_fn())
+    baseline = timed(baseline_fn)
+    print(f"ภาพ {WIDTH}x{HEIGHT} | {cores} คอร์ | {ROUNDS} รอบ | baseline 1 process ทั้งภาพ "
+          f"{baseline:.0f} ms ({baseline_words} คำ)\n")
+    if cores < 2:
+        print("⚠️ เครื่องนี้มีคอร์เดียว ผลด้านล่างแสดงเฉพาะ overhead (ไม่มีการขยายตัว)\n")
+
+    print(f"{'โหมด':<8}{'ขนาด':>6}{'ชิ้น':>6} | " + " | ".join(f"{n:>2}p ms  spd  eff" for n in counts))
+    for mode, tile in CONFIGS:
+        cells = []
+        jobs = None
+        for workers in counts:
+            parallel = ParallelOCR(LANG, workers=workers, mode=mode, tile=tile, reader=reader)
+            parallel.warm_up()
+            words = parallel.image_to_words(screen)
+            jobs = len(parallel.plan((WIDTH, HEIGHT)))
+            elapsed = timed(lambda: parallel.image_to_words(screen))
+            parallel.close()
+            speedup = baseline / elapsed
+            mark = "" if real or len(words) == baseline_words else "!"
+            cells.append(f"{elapsed:5.0f}{mark:1}{speedup:4.1f}x {speedup / workers:4.2f}")
+        print(f"{mode:<8}{tile:>6}{jobs:>6} | " + " | ".join(cells))
+    print("\n(! = จำนวนคำไม่เท่า baseline)")
@@ -0,0 +1,76 @@
+# bench_vision_payload_memory.py
+# -------------------------
+# วัด peak memory (tracemalloc) ของการสร้าง request body ที่มีภาพ 1 ภาพ
+#   1. แบบเดิม: bytes -> base64 string -> data URI -> json.dumps -> encode (ทั้งก้อนหลายสำเนา)
+#   2. แบบใหม่: ImageBytes -> JSONBodyStream อ่านทีละ block (เหมือนที่ requests ส่งลง socket)
+# ไม่ต้องจับหน้าจอจริง (ใช้ภาพ noise ซึ่งบีบอัดได้น้อย = ไฟล์ใหญ่)
+# รัน: python -m tests.bench_vision_payload_memory [width] [height]
+# -------------------------
+
+import base64
+import io
+import json
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+from PIL import Image
+
+from core.llm_request_body import ImageBytes, JSONBodyStream
+
+BLOCK = 16 * 1024  # ขนาด block ที่ http.client อ่านจาก body ทีละครั้ง
+
+
+def make_payload(url) -> dict:
+    return {
+        "model": "bench",
+        "stream": True,
+        "messages": [{"role": "user", "content": [
+            {"type": "text", "text": "อธิบายภาพนี้"},
+            {"type": "image_url", "image_url": {"url": url}},
+        ]}],
+    }
+
+
+def old_body(raw: bytes) -> int:
+    data_uri = "data:image/png;base64," + base64.b64encode(raw).decode("ascii")
+    body = json.dumps(make_payload(data_uri), ensure_ascii=False).encode("utf-8")
+    return len(body)
+
+
+def streamed_body(raw: bytes) -> int:
+    stream = JSONBodyStream(make_payload(ImageBytes(raw, "image/png")))
+    sent = 0
+    while True:
+        block = stream.read(BLOCK)
+        if not block:
+            break
+        sent += len(block)
+    return sent
+
+
+def measure(name: str, fn, raw: bytes):
+    tracemalloc.start()
+    start = time.perf_counter()
+    size = fn(raw)
+    elapsed = (time.perf_counter() - start) * 1000
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"{name:<28} body {size / 1e6:6.2f} MB | peak {peak / 1e6:6.2f} MB | {elapsed:6.1f} ms")
+    return size
+
+
+if __name__ == "__main__":
+    width = int(sys.argv[1]) if len(sys.argv) > 1 else 1920
+    height = int(sys.argv[2]) if len(sys.argv) > 2 else 1080
+
+    image = Image.fromarray(np.random.randint(0, 256, (height, width, 3), dtype=np.uint8))
+    buffer = io.BytesIO()
+    image.save(buffer, format="PNG")
+    raw = buffer.getvalue()
+    print(f"ภาพ PNG {width}x{height}: {len(raw) / 1e6:.2f} MB\n")
+
+    old_size = measure("เดิม (data URI + json.dumps)", old_body, raw)
+    new_size = measure("ใหม่ (JSONBodyStream)", streamed_body, raw)
+    print(f"\nขนาด body ตรงกัน: {old_size == new_size}")
@@ -0,0 +1,368 @@
+# fake_lm_studio.py
+# -------------------------
+# FakeLMStudio: server ปลอมที่ตอบแบบ OpenAI-compatible เหมือน LM Studio
+# ใช้วัด overhead ของโค้ดเรา (LLMClient / CommandParser / VisionSystem) แบบ offline ไม่ต้องมี GPU
+# - POST /v1/chat/completions: stream (SSE) และ non-stream, รองรับ payload ที่มีภาพ (image_url)
+# - GET  /v1/models: รายชื่อโมเดล
+# - ตั้ง latency (เวลาก่อน token แรก) และ tokens_per_second ได้
+# - คำตอบแบบ canned (ตามลำดับ) หรือ rule-based (regex -> คำตอบ / ฟังก์ชัน)
+# - error injection: HTTP status, ตัด connection กลาง stream, ตอบช้าเกิน timeout
+#
+# ใช้งานในสคริปต์:
+#     with FakeLMStudio(ttft=0.05, tokens_per_second=200) as fake:
+#         client = LLMClient(server_url=fake.url)
+#
+# หรือรันแทน LM Studio จริง:
+#     python -m tests.fake_lm_studio --port 1234 --ttft 0.2 --tps 40
+# -------------------------
+
+import json
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, List, Optional, Union
+
+# คำตอบ = ข้อความ หรือฟังก์ชันที่รับ payload แล้วคืนข้อความ
+Reply = Union[str, Callable[[Dict[str, Any]], str]]
+
+DEFAULT_REPLY = "สวัสดีครับ นี่คือคำตอบจาก fake LM Studio"
+DEFAULT_VISION_REPLY = "บนหน้าจอมีหน้าต่างโปรแกรมและปุ่มต่างๆ"
+
+
+def split_tokens(text: str) -> List[str]:
+    """แบ่งข้อความเป็น "token" ปลอม (คำ + ช่องว่าง, ข้อความไทยยาวๆ ตัดทีละ 2 ตัวอักษร)"""
+    tokens = []
+    for word in re.findall(r"\S+\s*|\s+", text):
+        if len(word) > 8 and not word.isascii():
+            tokens.extend(word[i:i + 2] for i in range(0, len(word), 2))
+        else:
+            tokens.append(word)
+    return tokens
+
+
+def last_user_text(payload: Dict[str, Any]) -> str:
+    """ข้อความของ user ล่าสุดใน payload (content แบบ multimodal เอาเฉพาะส่วน text)"""
+    for msg in reversed(payload.get("messages", [])):
+        if msg.get("role") != "user":
+            continue
+        content = msg.get("content", "")
+        if isinstance(content, list):
+            return " ".join(p.get("text", "") for p in content if p.get("type") == "text")
+        return str(content)
+    return ""
+
+
+def has_image(payload: Dict[str, Any]) -> bool:
+    for msg in payload.get("messages", []):
+        content = msg.get("content")
+        if isinstance(content, list) and any(p.get("type") == "image_url" for p in content):
+            return True
+    return False
+
+
+class FakeLMStudio:
+    """
+    server ปลอม 1 ตัว (รันใน daemon thread)
+    - ttft: วินาทีก่อนส่ง token แรก (จำลองเวลา prefill)
+    - tokens_per_second: ความเร็ว generate (0 = ส่งทันที)
+    - replies: คำตอบ canned ใช้ตามลำดับ (หมดแล้วใช้ default_reply)
+    - error_rate / error_status: สุ่มตอบ error ตามสัดส่วน
+    - seed: ทำให้การสุ่ม error ซ้ำได้ทุกครั้ง
+    """
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, ttft: float = 0.0, tokens_per_second: float = 0.0,
+                 default_reply: str = DEFAULT_REPLY, vision_reply: str = DEFAULT_VISION_REPLY,
+                 replies: Optional[List[Reply]] = None, models: Optional[List[str]] = None,
+                 error_rate: float = 0.0, error_status: int = 500, seed: Optional[int] = None):
+        self.host = host
+        self.port = port
+        self.ttft = ttft
+        self.tokens_per_second = tokens_per_second
+        self.default_reply = default_reply
+        self.vision_reply = vision_reply
+        self.models = models or ["google/gemma-3-12b"]
+        self.error_rate = error_rate
+        self.error_status = error_status
+
+        self._replies: List[Reply] = list(replies or [])
+        self._rules: List[tuple] = []   # (regex, reply)
+        self._faults: List[Dict[str, Any]] = []
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._server: Optional[ThreadingHTTPServer] = None
+        self._thread: Optional[threading.Thread] = None
+
+        self.reset_stats()
+
+    # -------------------------
+    # ตั้งค่าคำตอบ / error
+    # -------------------------
+    def add_rule(self, pattern: str, reply: Reply):
+        """ถ้าข้อความ user ล่าสุดตรงกับ regex จะตอบด้วย reply (เช็คตามลำดับที่เพิ่ม)"""
+        with self._lock:
+            self._rules.append((re.compile(pattern, re.IGNORECASE), reply))
+
+    def queue_reply(self, reply: Reply):
+        """เพิ่มคำตอบ canned ต่อท้ายคิว"""
+        with self._lock:
+            self._replies.append(reply)
+
+    def fail_next(self, count: int = 1, status: int = 500, mode: str = "status", after_tokens: int = 0,
+                  delay: float = 0.0, message: str = "injected error"):
+        """
+        ทำให้ request ถัดไป count ครั้งล้มเหลว
+        - mode="status": ตอบ HTTP status (เช่น 500, 503)
+        - mode="disconnect": ตัด connection หลังส่งไป after_tokens token (stream) / ก่อนส่ง header (non-stream)
+        - mode="hang": รอ delay วินาทีก่อนตอบ (ใช้ทดสอบ timeout)
+        - message: ข้อความ error ใน body (mode="status")
+        """
+        with self._lock:
+            for _ in range(count):
+                self._faults.append({"mode": mode, "status": status, "after_tokens": after_tokens, "delay": delay,
+                                     "message": message})
+
+    def reset_stats(self):
+        with self._lock:
+            self.stats = {
+                "requests": 0,
+                "streams": 0,
+                "vision": 0,
+                "errors": 0,
+                "disconnects": 0,
+                "client_aborts": 0,
+                "tokens_sent": 0,
+            }
+            self.last_payload: Optional[Dict[str, Any]] = None
+
+    # -------------------------
+    # เลือกคำตอบ
+    # -------------------------
+    def _next_fault(self) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            if self._faults:
+                return self._faults.pop(0)
+            if self.error_rate > 0 and self._random.random() < self.error_rate:
+                return {"mode": "status", "status": self.error_status, "after_tokens": 0, "delay": 0.0}
+        return None
+
+    def _pick_reply(self, payload: Dict[str, Any]) -> str:
+        text = last_user_text(payload)
+        with self._lock:
+            reply = None
+            for pattern, rule_reply in self._rules:
+                if pattern.search(text):
+                    reply = rule_reply
+                    break
+            if reply is None and self._replies:
+                reply = self._replies.pop(0)
+        if reply is None:
+            reply = self.vision_reply if has_image(payload) else self.default_reply
+        return reply(payload) if callable(reply) else reply
+
+    def _record(self, payload: Dict[str, Any]):
+        with self._lock:
+            self.stats["requests"] += 1
+            if payload.get("stream"):
+                self.stats["streams"] += 1
+            if has_image(payload):
+                self.stats["vision"] += 1
+            self.last_payload = payload
+
+    def _count(self, key: str, amount: int = 1):
+        with self._lock:
+            self.stats[key] += amount
+
+    # -------------------------
+    # รัน / หยุด
+    # -------------------------
+    @property
+    def base_url(self) -> str:
+        return f"http://{self.host}:{self.port}"
+
+    @property
+    def url(self) -> str:
+        """URL ของ chat completions (ใช้เป็น server_url ของ LLMClient)"""
+        return f"{self.base_url}/v1/chat/completions"
+
+    def start(self) -> "FakeLMStudio":
+        handler = type("_BoundHandler", (_Handler,), {"fake": self})
+        self._server = ThreadingHTTPServer((self.host, self.port), handler)
+        self._server.daemon_threads = True
+        self.port = self._server.server_address[1]
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        print(f"[FakeLMStudio] 🧪 พร้อมที่ {self.url}")
+        return self
+
+    def stop(self):
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def __enter__(self) -> "FakeLMStudio":
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stop()
+        return False
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # header กับ body เขียนแยกกัน -> ปิด Nagle ไม่งั้นโดน delayed ACK ~40ms ทุก request
+    disable_nagle_algorithm = True
+    fake: FakeLMStudio = None
+
+    def log_message(self, *args):
+        pass
+
+    def handle(self):
+        # client ปิด keep-alive connection ทิ้ง (เช่น หลังได้ error) ไม่ใช่ความผิดของ server
+        try:
+            super().handle()
+        except (ConnectionResetError, BrokenPipeError):
+            pass
+
+    def _send_json(self, status: int, data: Dict[str, Any]):
+        body = json.dumps(data, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _write_chunk(self, data: bytes):
+        self.wfile.write(b"%x\r\n%s\r\n" % (len(data), data))
+        self.wfile.flush()
+
+    def do_GET(self):
+        if self.path.rstrip("/") == "/v1/models":
+            self._send_json(200, {"object": "list",
+                                  "data": [{"id": m, "object": "model"} for m in self.fake.models]})
+        else:
+            self._send_json(404, {"error": f"unknown path {self.path}"})
+
+    def do_POST(self):
+        fake = self.fake
+        if self.path.rstrip("/") != "/v1/chat/completions":
+            self._send_json(404, {"error": f"unknown path {self.path}"})
+            return
+        try:
+            length = int(self.headers.get("Content-Length", 0))
+            payload = json.loads(self.rfile.read(length) or b"{}")
+        except ValueError as e:
+            self._send_json(400, {"error": f"invalid JSON: {e}"})
+            return
+
+        fake._record(payload)
+        fault = fake._next_fault()
+        if fault is not None:
+            if fault["mode"] == "hang":
+                time.sleep(fault["delay"])
+            elif fault["mode"] == "disconnect" and not payload.get("stream"):
+                fake._count("disconnects")
+                self.close_connection = True
+                return
+            elif fault["mode"] == "status":
+                fake._count("errors")
+                self._send_json(fault["status"], {"error": {"message": fault["message"], "code": fault["status"]}})
+                return
+
+        reply = fake._pick_reply(payload)
+        tokens = split_tokens(reply)
+        max_tokens = payload.get("max_tokens")
+        if isinstance(max_tokens, int) and max_tokens > 0:
+            tokens = tokens[:max_tokens]
+        finish_reason = "length" if len(tokens) < len(split_tokens(reply)) else "stop"
+
+        if fake.ttft > 0:
+            time.sleep(fake.ttft)
+
+        try:
+            if payload.get("stream"):
+                after = fault["after_tokens"] if fault and fault["mode"] == "disconnect" else None
+                self._stream(payload, tokens, finish_reason, after)
+            else:
+                self._complete(payload, tokens, finish_reason)
+        except (BrokenPipeError, ConnectionResetError):
+            # client ยกเลิก (เช่น LLMStream.cancel())
+            fake._count("client_aborts")
+            self.close_connection = True
+
+    def _token_delay(self) -> float:
+        tps = self.fake.tokens_per_second
+        return 1.0 / tps if tps > 0 else 0.0
+
+    def _complete(self, payload: Dict[str, Any], tokens: List[str], finish_reason: str):
+        # non-stream: LM Studio ส่ง header หลัง generate เสร็จ -> จำลองเวลา generate ก่อน
+        delay = self._token_delay()
+        if delay:
+            time.sleep(delay * len(tokens))
+        self.fake._count("tokens_sent", len(tokens))
+        self._send_json(200, {
+            "id": "chatcmpl-fake",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": payload.get("model", self.fake.models[0]),
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": "".join(tokens)},
+                         "finish_reason": finish_reason}],
+            "usage": {"prompt_tokens": 0, "completion_tokens": len(tokens), "total_tokens": len(tokens)},
+        })
+
+    def _stream(self, payload: Dict[str, Any], tokens: List[str], finish_reason: str, disconnect_after: Optional[int]):
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+
+        delay = self._token_delay()
+        model = payload.get("model", self.fake.models[0])
+        for i, token in enumerate(tokens):
+            if disconnect_after is not None and i >= disconnect_after:
+                self.fake._count("disconnects")
+                self.close_connection = True
+                return
+            if delay and i > 0:
+                time.sleep(delay)
+            chunk = {"id": "chatcmpl-fake", "object": "chat.completion.chunk", "model": model,
+                     "choices": [{"index": 0, "delta": {"content": token}, "finish_reason": None}]}
+            self._write_chunk(f"data: {json.dumps(chunk, ensure_ascii=False)}\n\n".encode("utf-8"))
+            self.fake._count("tokens_sent")
+
+        if disconnect_after is not None:
+            self.fake._count("disconnects")
+            self.close_connection = True
+            return
+        final = {"id": "chatcmpl-fake", "object": "chat.completion.chunk", "model": model,
+                 "choices": [{"index": 0, "delta": {}, "finish_reason": finish_reason}]}
+        self._write_chunk(f"data: {json.dumps(final)}\n\n".encode("utf-8"))
+        self._write_chunk(b"data: [DONE]\n\n")
+        self.wfile.write(b"0\r\n\r\n")
+        self.wfile.flush()
+
+
+# ✅ รันเป็น server แยก (แทน LM Studio จริงที่ localhost:1234)
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Fake LM Studio (OpenAI-compatible) สำหรับทดสอบ offline")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=1234)
+    parser.add_argument("--ttft", type=float, default=0.2, help="วินาทีก่อน token แรก")
+    parser.add_argument("--tps", type=float, default=40.0, help="tokens ต่อวินาที (0 = ทันที)")
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--reply", default=DEFAULT_REPLY)
+    args = parser.parse_args()
+
+    fake = FakeLMStudio(host=args.host, port=args.port, ttft=args.ttft, tokens_per_second=args.tps,
+                        default_reply=args.reply, error_rate=args.error_rate)
+    fake.start()
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        fake.stop()
+        print("\n[FakeLMStudio] 👋 ปิด server")
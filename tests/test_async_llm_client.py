@@ -0,0 +1,80 @@
+# test_async_llm_client.py
+# -------------------------
+# ทดสอบ AsyncLLMClient กับ FakeLMStudio (ไม่ต้องมี LM Studio จริง)
+#   1. ask พร้อมกันหลายคำถาม -> ไม่เกิน max_in_flight ที่ server เห็นพร้อมกัน
+#   2. ask_stream -> ได้ delta ครบ, ข้อความตรงกับ ask
+#   3. ยกเลิก task ระหว่าง stream -> request ถูกยกเลิก, endpoint ไม่มีงานค้าง
+# รัน: python -m tests.test_async_llm_client
+# -------------------------
+
+import asyncio
+import time
+
+from core.async_llm_client import AsyncLLMClient
+from core.llm_cache import ResponseCache
+from core.llm_client import LLMClient
+from core.llm_scheduler import LLMScheduler
+from core.llm_singleflight import SingleFlight
+from tests.fake_lm_studio import FakeLMStudio
+
+
+def check(name, ok):
+    print(f"{'✅' if ok else '❌'} {name}")
+    return ok
+
+
+async def run(fake, results):
+    llm = LLMClient(endpoints=[fake.url], scheduler=LLMScheduler(concurrency=8),
+                    cache=ResponseCache(use_disk=False), singleflight=SingleFlight())
+    client = AsyncLLMClient(llm, max_in_flight=2)
+    endpoint = llm.pool.endpoints[0]
+
+    print("=== [1] ask พร้อมกัน 6 คำถาม (max_in_flight=2) ===")
+    peak = 0
+
+    async def watch():
+        nonlocal peak
+        while True:
+            peak = max(peak, endpoint.outstanding)
+            await asyncio.sleep(0.01)
+
+    watcher = asyncio.create_task(watch())
+    start = time.time()
+    replies = await asyncio.gather(*(client.ask(f"คำถามที่ {i}") for i in range(6)))
+    watcher.cancel()
+    print(f"ใช้เวลา {time.time() - start:.2f}s | outstanding สูงสุด {peak}")
+    results.append(check("ได้คำตอบครบ", all(r == fake.default_reply for r in replies)))
+    results.append(check("ไม่เกิน max_in_flight", peak <= 2))
+
+    print("\n=== [2] ask_stream ===")
+    stream = client.ask_stream("เล่าเรื่องสั้นๆ")
+    deltas = [delta async for delta in stream]
+    results.append(check("ได้หลาย delta", len(deltas) > 1))
+    results.append(check("ข้อความตรงกับคำตอบ", stream.text == "".join(deltas) == fake.default_reply))
+
+    print("\n=== [3] ยกเลิก task ระหว่าง stream ===")
+    stream = client.ask_stream("อีกเรื่อง")
+
+    async def consume():
+        async for _ in stream:
+            pass
+
+    task = asyncio.create_task(consume())
+    await asyncio.sleep(0.3)
+    task.cancel()
+    try:
+        await task
+    except asyncio.CancelledError:
+        pass
+    await asyncio.sleep(0.3)
+    results.append(check("stream ถูกยกเลิก", stream.cancelled))
+    results.append(check("endpoint ไม่มีงานค้าง", endpoint.outstanding == 0))
+    results.append(check("ไม่มี request ค้างใน client", len(llm._active) == 0))
+
+    client.close()
+
+
+results = []
+with FakeLMStudio(ttft=0.1, tokens_per_second=20) as fake:
+    asyncio.run(run(fake, results))
+print(f"\nผ่าน {sum(results)}/{len(results)}")
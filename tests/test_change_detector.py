@@ -0,0 +1,63 @@
+# test_change_detector.py
+# -------------------------
+# ทดสอบ FrameChangeDetector ด้วยภาพสังเคราะห์ 1920x1080 (ไม่ต้องจับหน้าจอจริง)
+#   1. ภาพเดิมซ้ำ -> 0%
+#   2. ข้อความบรรทัดเดียวเปลี่ยน -> % เล็กๆ + tile ตรงตำแหน่ง
+#   3. cursor กระพริบ -> ถูกกรองทิ้ง
+#   4. เปลี่ยนหน้าต่างทั้งบาน -> % สูง
+#   5. detect(update=False) แล้ว accept() -> ใช้ผลเดิมเป็นภาพอ้างอิงโดยไม่คำนวณซ้ำ
+#   6. เวลาต่อเฟรม
+# รัน: python -m tests.test_change_detector
+# -------------------------
+
+import time
+
+import numpy as np
+
+from core.frame_change_detector import FrameChangeDetector
+
+detector = FrameChangeDetector()
+desktop = np.full((1080, 1920, 4), 230, dtype=np.uint8)
+desktop[:, :, 3] = 255
+
+first = detector.detect(desktop)
+print(f"ภาพแรก: {first.percent:.0f}% ({first.describe()})")
+
+print("\n=== [1] ภาพเดิมซ้ำ ===")
+result = detector.detect(desktop.copy())
+print(f"เปลี่ยน {result.percent:.2f}% | tiles: {len(result.tiles)}")
+
+print("\n=== [2] ข้อความบรรทัดเดียวเปลี่ยน ===")
+text_line = desktop.copy()
+text_line[600:616, 300:700, :3] = 20
+result = detector.detect(text_line)
+print(f"เปลี่ยน {result.percent:.2f}% | {result.describe()}")
+
+print("\n=== [3] cursor กระพริบ ===")
+caret = text_line.copy()
+caret[600:616, 702:704, :3] = 0
+result = detector.detect(caret)
+print(f"เปลี่ยน {result.percent:.2f}% (ควรเป็น 0)")
+
+print("\n=== [4] เปิดหน้าต่างใหม่ ===")
+window = caret.copy()
+window[100:900, 200:1500, :3] = (250, 120, 40)
+result = detector.detect(window)
+print(f"เปลี่ยน {result.percent:.1f}% | tiles: {len(result.tiles)} | กรอบ: {result.bounds()}")
+
+print("\n=== [5] เทียบอย่างเดียว แล้ว accept ===")
+probe = FrameChangeDetector()
+probe.detect(desktop)
+pending = probe.detect(text_line, update=False)
+again = probe.detect(text_line, update=False)
+print(f"ก่อน accept: {pending.percent:.2f}% -> {again.percent:.2f}% (ภาพอ้างอิงยังเป็นภาพเดิม)")
+probe.accept(pending)
+result = probe.detect(text_line, update=False)
+print(f"หลัง accept: {result.percent:.2f}% (ควรเป็น 0)")
+
+print("\n=== [6] เวลาต่อเฟรม ===")
+rounds = 100
+start = time.perf_counter()
+for i in range(rounds):
+    detector.detect(window if i % 2 else caret)
+print(f"{(time.perf_counter() - start) / rounds * 1000:.2f} ms/เฟรม | {detector.get_stats()}")
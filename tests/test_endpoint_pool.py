@@ -0,0 +1,83 @@
+# test_endpoint_pool.py
+# -------------------------
+# ทดสอบ EndpointPool กับ FakeLMStudio 2 ตัว (ไม่ต้องมี LM Studio จริง)
+#   1. least-outstanding: คำถามพร้อมกันถูกกระจายไปทั้ง 2 server
+#   2. sticky: บทสนทนาเดียวกันไปลง server เดิมทุกรอบ
+#   3. circuit breaker: server ที่ตอบ 500 ติดกันถูกพัก แล้วกลับมาหลัง cooldown
+#   4. half-open: request ที่ได้สิทธิ์ลองแต่คิวเต็ม / ถูกยกเลิกระหว่างรอคิว ต้องคืนสิทธิ์ลอง
+#   5. SharedStream ที่ทุก view ถูกทิ้งโดยยังไม่ได้วน -> endpoint ต้องไม่มีงานค้าง
+# รัน: python -m tests.test_endpoint_pool
+# -------------------------
+
+import gc
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from core.llm_client import LLMClient, LLMStream
+from core.llm_endpoint_pool import EndpointPool
+from core.llm_scheduler import LLMScheduler
+from core.llm_singleflight import SingleFlight
+from tests.fake_lm_studio import FakeLMStudio
+
+with FakeLMStudio(ttft=0.2, default_reply="A") as fake_a, FakeLMStudio(ttft=0.2, default_reply="B") as fake_b:
+    client = LLMClient(endpoints=[fake_a.url, fake_b.url], scheduler=LLMScheduler(concurrency=4))
+    client.cache = None
+    # pool แยกสำหรับการทดสอบ (cooldown สั้น)
+    client.pool = EndpointPool([fake_a.url, fake_b.url], failure_threshold=2, cooldown=1.0)
+
+    print("\n=== [1] least-outstanding: 8 คำถามพร้อมกัน ===")
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        replies = list(executor.map(lambda i: client.ask(f"คำถามที่ {i}"), range(8)))
+    print(f"A: {replies.count('A')} | B: {replies.count('B')}")
+
+    print("\n=== [2] sticky: บทสนทนาเดียวกัน 5 รอบ ===")
+    history = [{"role": "system", "content": "คุณคือผู้ช่วย"}, {"role": "user", "content": "สวัสดี"},
+               {"role": "assistant", "content": "สวัสดีครับ"}]
+    print("ตอบจาก:", [client.ask(f"รอบที่ {i}", history=history) for i in range(5)])
+
+    print("\n=== [3] circuit breaker: A ตอบ 500 ===")
+    fake_a.fail_next(2, status=500)
+    print("ตอบจาก (ส่งซ้ำที่ B อัตโนมัติ):", [client.ask(f"ทดสอบ {i}")[:12] for i in range(6)])
+    print("สถานะ A:", client.pool.endpoints[0].get_stats())
+    time.sleep(1.2)
+    print("หลัง cooldown:", [client.ask(f"หลังพัก {i}")[:12] for i in range(4)])
+    print("สถานะ A:", client.pool.endpoints[0].get_stats())
+
+    print("\n=== [4] half-open: สิทธิ์ลองต้องถูกคืนเมื่อ request ไม่ได้ส่งจริง ===")
+    endpoint = EndpointPool([fake_a.url], failure_threshold=1, cooldown=0.1).endpoints[0]
+    payload = {"model": client.model, "messages": [{"role": "user", "content": "ลอง"}], "stream": True}
+
+    endpoint.report_error(RuntimeError("ทดสอบ"))
+    time.sleep(0.15)
+    full = LLMScheduler(concurrency=1, queue_limits={"interactive": 0})
+    reply = LLMStream(endpoint.url, payload, scheduler=full, health=endpoint).collect()
+    print(f"คิวเต็ม: {reply[:10]} | breaker={endpoint.breaker} | รับงานต่อได้: {endpoint.available()}")
+
+    endpoint.report_error(RuntimeError("ทดสอบ"))
+    time.sleep(0.15)
+    busy = LLMScheduler(concurrency=1)
+    held = busy.acquire("interactive")
+    stream = LLMStream(endpoint.url, payload, scheduler=busy, health=endpoint)
+    threading.Timer(0.1, stream.cancel).start()
+    stream.collect()
+    busy.release(held)
+    print(f"ยกเลิกระหว่างรอคิว: cancelled={stream.cancelled} | breaker={endpoint.breaker} "
+          f"| รับงานต่อได้: {endpoint.available()}")
+    reply = LLMStream(endpoint.url, payload, health=endpoint).collect()
+    print(f"ส่งจริงหลังคืนสิทธิ์: {reply[:12]} | breaker={endpoint.breaker}")
+
+    print("\n=== [5] SharedStream: ทิ้งทุก view ก่อนวน ===")
+    client.pool = EndpointPool([fake_a.url], failure_threshold=1, cooldown=0.1)
+    client.singleflight = SingleFlight()
+    endpoint = client.pool.endpoints[0]
+    endpoint.report_error(RuntimeError("ทดสอบ"))
+    time.sleep(0.15)
+    views = [client.ask_stream("ไม่มีใครอ่าน") for _ in range(3)]
+    print(f"เปิด 3 view: outstanding={endpoint.outstanding} | in_flight={client.singleflight.get_stats()['in_flight']}")
+    del views
+    gc.collect()
+    print(f"ทิ้งทุก view: outstanding={endpoint.outstanding} (ต้องเป็น 0) "
+          f"| in_flight={client.singleflight.get_stats()['in_flight']} | active={len(client._active)}")
+    print(f"สิทธิ์ลอง half-open ยังอยู่: breaker={endpoint.breaker} | รับงานต่อได้: {endpoint.available()}")
+    print(f"ส่งจริง: {client.ask('หลังทิ้ง view')[:12]} | breaker={endpoint.breaker} | outstanding={endpoint.outstanding}")
@@ -0,0 +1,64 @@
+# test_frame_hub.py
+# -------------------------
+# ทดสอบ FrameHub ด้วยเฟรมสังเคราะห์ (producer=False ส่งเฟรมเองผ่าน publish ไม่ต้องจับหน้าจอจริง)
+#   1. producer 30 FPS, subscriber 3 ราย (ทุกเฟรม / 10 FPS / 1 FPS) -> ได้ตามความถี่ของตัวเอง
+#   2. subscriber ช้า (latest-only) -> ได้เฟรมล่าสุดเสมอ ไม่ค้างเฟรมเก่า
+#   3. get_frame(max_age_ms) -> ใช้เฟรมใน ring ซ้ำ / invalidate แล้วต้องจับใหม่
+# รัน: python -m tests.test_frame_hub
+# -------------------------
+
+import threading
+import time
+
+import numpy as np
+
+from core.screen_capturer import Frame
+from core.vision_share_manager import FrameHub
+
+hub = FrameHub(monitor=1, producer=False)
+canvas = np.zeros((1080, 1920, 4), dtype=np.uint8)
+canvas.flags.writeable = False
+
+print("=== [1] ความถี่ต่อ subscriber ===")
+every = hub.subscribe("change-detect")
+preview = hub.subscribe("preview", max_fps=10)
+analysis = hub.subscribe("analysis", max_fps=1)
+received = {"change-detect": 0, "preview": 0, "analysis": 0}
+stop = threading.Event()
+
+
+def consume(sub):
+    while not stop.is_set():
+        if sub.get(timeout=0.2) is not None:
+            received[sub.name] += 1
+
+
+threads = [threading.Thread(target=consume, args=(sub,), daemon=True) for sub in (every, preview, analysis)]
+for t in threads:
+    t.start()
+
+start = time.time()
+while time.time() - start < 2.0:
+    hub.publish(Frame(canvas, monitor=1))
+    time.sleep(1 / 30)
+stop.set()
+for t in threads:
+    t.join()
+print(f"ใน 2 วินาที: {received} (คาด ~60 / ~20 / ~2-3)")
+
+print("\n=== [2] subscriber ช้า ได้เฟรมล่าสุด ===")
+slow = hub.subscribe("slow-ocr")
+frames = [Frame(canvas, monitor=1) for _ in range(5)]
+for frame in frames:
+    hub.publish(frame)
+got = slow.poll()
+print(f"ได้ frame id {got.id} (ล่าสุด = {frames[-1].id}) | dropped {slow.dropped}")
+
+print("\n=== [3] get_frame ใช้เฟรมใน ring ซ้ำ ===")
+hub.publish(Frame(canvas, monitor=1))
+a = hub.get_frame(max_age_ms=500)
+b = hub.get_frame(region=(100, 100, 300, 200), max_age_ms=500)
+print(f"เฟรมเดียวกัน: {a.id} | crop ขนาด {b.size} view ไม่ copy: {np.shares_memory(a.bgra, b.bgra)}")
+hub.invalidate()
+print(f"หลัง invalidate latest(): {hub.latest()}")
+print(hub.get_stats())
@@ -0,0 +1,70 @@
+# test_ocr_cache.py
+# -------------------------
+# ทดสอบ OCRCache ด้วยภาพสังเคราะห์ (ไม่ต้องมี Tesseract: OCR จำลองด้วย sleep)
+#   1. perceptual hash: noise เล็กน้อย -> hash เดิม, ตัวอักษรเปลี่ยน 1 ตัว -> hash ใหม่
+#      จุด/เส้นกว้าง 1 px ที่พิกัดคี่ (เช่นจุดบน "i" หรือ "." ที่เพิ่มเข้ามา) -> hash ใหม่
+#   2. เวลา: OCR จริง (จำลอง 0.5s) vs hit ด้วยภาพใหม่ที่เนื้อหาเดิม vs hit ด้วยเฟรมเดิม (id เดิม)
+#   3. LRU จำกัดจำนวนรายการ
+# รัน: python -m tests.test_ocr_cache
+# -------------------------
+
+import time
+
+import numpy as np
+
+from core.ocr_cache import OCRCache, perceptual_hash
+
+rng = np.random.default_rng(0)
+screen = np.full((1080, 1920, 4), 212, dtype=np.uint8)
+screen[200:216, 300:700, :3] = 30   # บรรทัดข้อความ
+
+print("=== [1] perceptual hash ===")
+base = perceptual_hash(screen)
+noisy = np.clip(screen.astype(np.int16) + rng.integers(-2, 3, screen.shape), 0, 255).astype(np.uint8)
+edited = screen.copy()
+edited[202:212, 710:716, :3] = 30   # ตัวอักษรเพิ่ม 1 ตัวท้ายบรรทัด
+print(f"noise ±2: {'เหมือนเดิม' if perceptual_hash(noisy) == base else 'เปลี่ยน'} (ควรเหมือนเดิม)")
+print(f"ตัวอักษรเพิ่ม 1 ตัว: {'เหมือนเดิม' if perceptual_hash(edited) == base else 'เปลี่ยน'} (ควรเปลี่ยน)")
+missed = 0
+for y, x in ((201, 711), (333, 1001), (1079, 1919), (7, 7)):
+    for value in (30, 84):   # ข้อความเข้ม / ข้อความเทาอ่อน (ต่างจากพื้น 128)
+        dot = screen.copy()
+        dot[y, x, :3] = value
+        missed += perceptual_hash(dot) == base
+vline = screen.copy()
+vline[400:440, 901, :3] = 30   # เส้นตั้งกว้าง 1 px ที่คอลัมน์คี่
+missed += perceptual_hash(vline) == base
+print(f"จุด/เส้น 1 px ที่พิกัดคี่: พลาด {missed}/9 (ควรเป็น 0)")
+
+
+class FakeFrame:
+    """มี id + bgra เหมือน Frame ของ screen_capturer"""
+    _ids = iter(range(1, 10_000))
+
+    def __init__(self, bgra):
+        self.bgra = bgra
+        self.id = next(self._ids)
+
+
+def fake_ocr():
+    time.sleep(0.5)
+    return [{"text": "File", "x": 300, "y": 200, "w": 40, "h": 16, "confidence": 95}]
+
+
+print("\n=== [2] เวลา ===")
+cache = OCRCache()
+frame = FakeFrame(screen)
+for label, image in (("OCR จริง (miss)", frame), ("เฟรมใหม่ เนื้อหาเดิม", FakeFrame(screen.copy())),
+                     ("เฟรมเดิม (id เดิม)", frame)):
+    start = time.perf_counter()
+    cache.get_or_compute(image, "tha+eng", fake_ocr)
+    print(f"{label:<22} {(time.perf_counter() - start) * 1000:9.3f} ms")
+print(cache.get_stats())
+
+print("\n=== [3] LRU ===")
+small = OCRCache(max_entries=3)
+for i in range(5):
+    img = screen.copy()
+    img[500:520, 100 + i * 50:140 + i * 50, :3] = 0
+    small.get_or_compute(img, "eng", lambda: f"text {i}", kind="text")
+print(f"entries: {small.get_stats()['entries']} (จำกัด 3)")
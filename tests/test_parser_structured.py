@@ -0,0 +1,44 @@
+# test_parser_structured.py
+# -------------------------
+# ทดสอบการถอยจากโหมด structured output ของ CommandParser กับ FakeLMStudio
+#   1. 400 ที่ไม่เกี่ยวกับ response_format -> ถอยเฉพาะรอบนี้ โหมด structured ยังเปิดอยู่
+#   2. 400 ที่บอกว่าไม่รองรับ response_format -> พักโหมด structured
+#   3. พ้นช่วงพัก -> กลับมาลอง structured อีกครั้ง
+# รัน: python -m tests.test_parser_structured
+# -------------------------
+
+from core.command_parser import CommandParser
+from core.llm_cache import ResponseCache
+from core.llm_client import LLMClient
+from core.llm_singleflight import SingleFlight
+from tests.fake_lm_studio import FakeLMStudio
+
+
+def check(name, ok):
+    print(f"{'✅' if ok else '❌'} {name}")
+    return ok
+
+
+results = []
+with FakeLMStudio(default_reply='{"action": "unknown"}') as fake:
+    llm = LLMClient(endpoints=[fake.url], cache=ResponseCache(use_disk=False), singleflight=SingleFlight())
+    parser = CommandParser(llm_client=llm, structured_output=True)
+
+    print("=== [1] 400 ทั่วไป ===")
+    fake.fail_next(1, status=400, message="context length exceeded")
+    results.append(check("ถอยไปโหมดข้อความอิสระรอบนี้", parser._parse_structured("ทดสอบ 1") is None))
+    results.append(check("ไม่พักโหมด structured", parser._structured_retry_at == 0.0))
+
+    print("\n=== [2] 400 ไม่รองรับ response_format ===")
+    fake.fail_next(1, status=400, message="'response_format' of type 'json_schema' is not supported")
+    results.append(check("ถอยไปโหมดข้อความอิสระ", parser._parse_structured("ทดสอบ 2") is None))
+    results.append(check("พักโหมด structured", parser._structured_retry_at > 0))
+    parser._parse_with_ai("ทดสอบ 3")
+    results.append(check("ระหว่างพักไม่ส่ง response_format", "response_format" not in fake.last_payload))
+
+    print("\n=== [3] พ้นช่วงพัก ===")
+    parser._structured_retry_at = 0.0
+    parser._parse_with_ai("ทดสอบ 4")
+    results.append(check("กลับมาส่ง response_format", "response_format" in fake.last_payload))
+
+print(f"\nผ่าน {sum(results)}/{len(results)}")
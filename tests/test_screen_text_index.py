@@ -0,0 +1,59 @@
+# test_screen_text_index.py
+# -------------------------
+# ทดสอบ ScreenTextIndex ด้วยผล OCR จำลอง (ไม่ต้องมี Tesseract)
+#   1. วลีหลายคำ / คำไทยที่ OCR เว้นวรรคกลางคำ / วรรณยุกต์หาย / OCR อ่านผิด 1 ตัว (fuzzy)
+#   2. หลายผลลัพธ์: near เปลี่ยนอันดับ
+#   3. prefix
+#   4. เวลา: สร้างดัชนี 1 ครั้ง vs ค้นซ้ำ (เทียบกับวนหาคำทีละคำแบบเดิม)
+# รัน: python -m tests.test_screen_text_index
+# -------------------------
+
+import time
+
+from core.screen_text_index import ScreenTextIndex
+
+
+def word(text, x, y, line, conf=90.0, w=None):
+    return {"text": text, "x": x, "y": y, "w": w or 12 * len(text), "h": 18, "confidence": conf, "line": line}
+
+
+words = [
+    word("File", 10, 5, 0), word("Edit", 70, 5, 0), word("Save", 130, 5, 0), word("As", 190, 5, 0),
+    word("บัน", 20, 100, 1), word("ทึก", 60, 100, 1), word("ไฟล์", 100, 100, 1),
+    word("ยกเลก", 20, 140, 2, conf=60),                       # OCR ทำวรรณยุกต์/สระบนหาย (ยกเลิก)
+    word("Settngs", 20, 180, 3, conf=70),                     # OCR อ่านตัว i หาย
+    word("Save", 900, 700, 4), word("Save", 1800, 1000, 5, conf=95),
+]
+index = ScreenTextIndex(words, origin=(1920, 0))
+
+print("=== [1] ค้นหา ===")
+for query in ("Save As", "save as", "บันทึก", "ยกเลิก", "Settings", "ไม่มีคำนี้"):
+    found = index.find(query, limit=1)
+    print(f"{query!r:<14} -> " + (f"{found[0].text!r} @ {found[0].center} [{found[0].kind}] "
+                                   f"score={found[0].score:.2f}" if found else "ไม่พบ"))
+
+print("\n=== [2] หลายผลลัพธ์ ('Save') ===")
+for near in (None, (1920 + 900, 700)):
+    ranked = index.find("Save", near=near)
+    print(f"near={near}: " + ", ".join(f"{m.text}@{m.center}" for m in ranked))
+
+print("\n=== [3] prefix ('Ed') ===")
+print([(m.text, m.center) for m in index.find_prefix("Ed")])
+
+print("\n=== [4] เวลา (หน้าจอ 2,000 คำ) ===")
+many = [word(f"item{i}", (i % 40) * 60, (i // 40) * 20, i // 40) for i in range(2000)]
+start = time.perf_counter()
+big = ScreenTextIndex(many)
+build_ms = (time.perf_counter() - start) * 1000
+start = time.perf_counter()
+for _ in range(100):
+    big.find("item1999", limit=1)
+find_ms = (time.perf_counter() - start) * 10
+start = time.perf_counter()
+for _ in range(100):
+    next(w for w in many if "item1999" in w["text"].lower())
+scan_ms = (time.perf_counter() - start) * 10
+print(f"สร้างดัชนี {build_ms:.1f} ms | ค้น {find_ms:.3f} ms/ครั้ง | วนหาทีละคำ (แบบเดิม) {scan_ms:.3f} ms/ครั้ง")
+start = time.perf_counter()
+big.find("itme1999", limit=1)
+print(f"fuzzy ('itme1999') {(time.perf_counter() - start) * 1000:.1f} ms")
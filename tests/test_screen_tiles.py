@@ -0,0 +1,58 @@
+# test_screen_tiles.py
+# -------------------------
+# ทดสอบการแบ่งภาพหน้าจอสำหรับ LLM ด้วย layout จอสมมติ (ไม่ต้องจับหน้าจอจริง)
+#   1. จอเดียว 16:9 -> ภาพเดียว คงสัดส่วน
+#   2. 2 จอ (2560x1440 + 1920x1080 ต่ำกว่า) -> 1 ภาพต่อจอ ไม่มีพื้นที่ว่าง
+#   3. ultra-wide 5120x1440 -> ตัดเป็น 2 ช่อง 16:9
+#   4. encode ภาพ noise ตามแผน -> พิกเซลรวมไม่เกินงบ + ส่งหลาย image_url ไป FakeLMStudio
+# รัน: python -m tests.test_screen_tiles
+# -------------------------
+
+import numpy as np
+
+from core.image_encoder import get_encoder
+from core.llm_client import LLMClient
+from core.screen_tiles import TiledScreenshot, plan_tiles, scaled_size, tile_scale
+from tests.fake_lm_studio import FakeLMStudio
+
+BUDGET = 1_572_864
+
+
+def show(title, tiles):
+    scale = tile_scale(tiles, BUDGET)
+    print(f"\n=== {title} === (ย่อ {scale * 100:.0f}%)")
+    for tile in tiles:
+        width, height = scaled_size(tile, scale)
+        print(f"  {tile.label:<16} rect={tile.rect} -> {width}x{height} (สัดส่วน {width / height:.2f})")
+    total = sum(w * h for w, h in (scaled_size(t, scale) for t in tiles))
+    print(f"  พิกเซลรวม {total:,} / งบ {BUDGET:,}")
+
+
+show("[1] จอเดียว 1920x1080", plan_tiles((1920, 1080)))
+
+dual = [
+    {"left": 0, "top": 0, "width": 2560, "height": 1440},
+    {"left": 2560, "top": 360, "width": 1920, "height": 1080},
+]
+show("[2] 2 จอ (virtual desktop 4480x1440)", plan_tiles((4480, 1440), monitors=dual))
+show("[2b] 2 จอ โหมด single (แบบเดิมแต่คงสัดส่วน)", plan_tiles((4480, 1440), monitors=dual, mode="single"))
+show("[3] ultra-wide 5120x1440", plan_tiles((5120, 1440), label="จอ 1", monitor=1))
+
+print("\n=== [4] encode + ส่งหลายภาพ ===")
+desktop = np.random.randint(0, 256, (1440, 4480, 4), dtype=np.uint8)
+tiles = plan_tiles((4480, 1440), monitors=dual)
+scale = tile_scale(tiles, BUDGET)
+images = []
+for tile in tiles:
+    left, top, width, height = tile.rect
+    crop = desktop[top:top + height, left:left + width, :3]
+    images.append(get_encoder().encode(crop, resize_to=scaled_size(tile, scale), target_bytes=0, quality=70))
+shot = TiledScreenshot(images, tiles, origin=(0, 0), scale=scale)
+print(shot.describe())
+print(f"ภาพที่ 2 พิกัด (100, 50) -> จอจริง {shot.to_screen(1, 100, 50)}")
+
+with FakeLMStudio() as fake:
+    client = LLMClient(endpoints=[fake.url])
+    client.ask_with_image(shot.prompt("อธิบายหน้าจอ"), shot.images)
+    parts = fake.last_payload["messages"][-1]["content"]
+    print(f"content: {[p['type'] for p in parts]}")
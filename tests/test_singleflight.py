@@ -0,0 +1,112 @@
+# test_singleflight.py
+# -------------------------
+# ทดสอบ SingleFlight.share_stream ด้วย stream จำลอง (ไม่ต้องมี LM Studio)
+#   1. หลาย view อ่านจนจบ -> ได้ข้อความเดียวกัน, request จริงไม่ถูกยกเลิก
+#   2. follower ที่ถูกทิ้งโดยไม่ได้อ่าน + leader เลิกอ่านกลางทาง -> request จริงถูกยกเลิก
+#   3. view ที่อ่านครึ่งเดียวแล้วถูกทิ้ง (GC) -> คืน slot, key ถูกเอาออก
+#   4. close() ตรงๆ
+#   5. LLMClient จริง (FakeLMStudio): stream ที่ถูกยกเลิก / ปิดก่อนเริ่มวน -> endpoint ไม่มีงานค้าง
+# รัน: python -m tests.test_singleflight
+# -------------------------
+
+import gc
+
+from core.llm_cache import ResponseCache
+from core.llm_client import LLMClient
+from core.llm_singleflight import SingleFlight
+from tests.fake_lm_studio import FakeLMStudio
+
+
+class FakeStream:
+    """หน้าตาเหมือน LLMStream: วนได้ครั้งเดียว, cancel() จะหยุดการวน"""
+
+    def __init__(self, deltas):
+        self.deltas = list(deltas)
+        self.cancelled = False
+        self.error = None
+        self.finish_reason = None
+
+    def cancel(self):
+        self.cancelled = True
+
+    def __iter__(self):
+        for delta in self.deltas:
+            if self.cancelled:
+                return
+            yield delta
+        self.finish_reason = "stop"
+
+
+def check(name, ok):
+    print(f"{'✅' if ok else '❌'} {name}")
+    return ok
+
+
+results = []
+
+print("=== [1] อ่านจนจบทุก view ===")
+sf = SingleFlight()
+real = FakeStream(["สวัส", "ดี", "ครับ"])
+a = sf.share_stream("k", lambda: real)
+b = sf.share_stream("k", lambda: FakeStream(["ไม่ควรถูกสร้าง"]))
+results.append(check("ได้ข้อความเดียวกัน", a.collect() == b.collect() == "สวัสดีครับ"))
+results.append(check("request จริงไม่ถูกยกเลิก", not real.cancelled))
+results.append(check("key ถูกเอาออก", sf.get_stats()["in_flight"] == 0))
+
+print("\n=== [2] follower ถูกทิ้ง + leader เลิกอ่าน ===")
+sf = SingleFlight()
+real = FakeStream(["a", "b", "c", "d"])
+leader = sf.share_stream("k", lambda: real)
+follower = sf.share_stream("k", lambda: real)
+del follower
+gc.collect()
+it = iter(leader)
+next(it)
+it.close()  # เลิกอ่านกลางทาง (เหมือน break ออกจาก for)
+results.append(check("request จริงถูกยกเลิก", real.cancelled))
+results.append(check("key ถูกเอาออก", sf.get_stats()["in_flight"] == 0))
+
+print("\n=== [3] อ่านครึ่งเดียวแล้วถูกทิ้ง (GC) ===")
+sf = SingleFlight()
+real = FakeStream(["a", "b", "c", "d"])
+leader = sf.share_stream("k", lambda: real)
+follower = sf.share_stream("k", lambda: real)
+next(iter(follower))  # generator ถูกทิ้งทันทีหลังอ่าน 1 ชิ้น
+gc.collect()
+results.append(check("leader ยังอ่านต่อได้จนจบ", leader.collect() == "abcd"))
+results.append(check("request จริงไม่ถูกยกเลิก (leader ยังอ่านอยู่)", not real.cancelled))
+results.append(check("key ถูกเอาออก", sf.get_stats()["in_flight"] == 0))
+
+print("\n=== [4] close() ===")
+sf = SingleFlight()
+real = FakeStream(["a", "b"])
+views = [sf.share_stream("k", lambda: real) for _ in range(3)]
+for view in views:
+    view.close()
+results.append(check("ปิดครบทุก view -> request จริงถูกยกเลิก", real.cancelled))
+results.append(check("key ถูกเอาออก", sf.get_stats()["in_flight"] == 0))
+
+print("\n=== [5] LLMClient: ยกเลิกก่อนเริ่มวน -> คืน endpoint ===")
+with FakeLMStudio() as fake:
+    client = LLMClient(endpoints=[fake.url], cache=ResponseCache(use_disk=False), singleflight=None)
+    endpoint = client.pool.endpoints[0]
+    stream = client.ask_stream("ไม่ได้อ่าน")
+    results.append(check("เปิด stream แล้วนับเป็นงานค้าง", endpoint.outstanding == 1))
+    stream.cancel()
+    results.append(check("cancel() ก่อนวน -> outstanding == 0", endpoint.outstanding == 0))
+    stream.cancel()
+    results.append(check("cancel() ซ้ำไม่ลดเกิน", endpoint.outstanding == 0))
+    stream = client.ask_stream("ถูกทิ้ง")
+    del stream
+    gc.collect()
+    results.append(check("ทิ้งโดยไม่ได้วน (GC) -> outstanding == 0", endpoint.outstanding == 0))
+
+    client.singleflight = SingleFlight()
+    views = [client.ask_stream("ร่วมกัน") for _ in range(2)]
+    for view in views:
+        view.close()
+    results.append(check("ปิดทุก view ก่อนวน -> outstanding == 0", endpoint.outstanding == 0))
+    results.append(check("ไม่มี request ค้างใน client", len(client._active) == 0))
+    results.append(check("ยังถามต่อได้ปกติ", client.ask("ถามต่อ") == fake.default_reply))
+
+print(f"\nผ่าน {sum(results)}/{len(results)}")
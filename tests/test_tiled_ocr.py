@@ -0,0 +1,95 @@
+# test_tiled_ocr.py
+# -------------------------
+# ทดสอบ TiledOCR ด้วยหน้าจอ 2560x1440 สังเคราะห์ (ไม่ต้องมี Tesseract)
+#   คำ = สี่เหลี่ยมทึบ ระดับเทาบอกเลขคำ, OCR จำลอง = หากรอบของแต่ละระดับเทา + sleep ตามพื้นที่ภาพ
+#   1. ผลรวมทุกช่องตรงกับคำจริง (ไม่ซ้ำ ไม่ขาด กรอบเต็มแม้คำอยู่บนรอยต่อช่อง)
+#   2. หลัง "คลิก" (เปลี่ยนแค่บริเวณเล็กๆ) OCR ใหม่กี่ช่อง ใช้เวลาเท่าไร เทียบกับ OCR ทั้งจอ
+#   3. คำยาวกว่าส่วนซ้อน (ถูกตัดทั้งสองช่อง) -> ได้คำเดียวกรอบเต็ม (OCR กรอบรวมใหม่ / ต่อข้อความเมื่อไม่มีภาพ)
+# รัน: python -m tests.test_tiled_ocr
+# -------------------------
+
+import time
+
+import numpy as np
+from PIL import Image
+
+from core.tiled_ocr import TiledOCR, merge_tile_words, plan_ocr_tiles
+
+WIDTH, HEIGHT = 2560, 1440
+MS_PER_MEGAPIXEL = 150   # เวลา OCR จำลองต่อ 1 ล้านพิกเซล
+
+rng = np.random.default_rng(1)
+screen = np.full((HEIGHT, WIDTH, 4), 255, dtype=np.uint8)
+truth = {}
+for value in range(10, 210):
+    w, h = int(rng.integers(30, 90)), 16
+    x, y = int(rng.integers(0, WIDTH - w)), int(rng.integers(0, HEIGHT // 20)) * 20
+    if (screen[y:y + h, x - 8 if x >= 8 else 0:x + w + 8, 0] != 255).any():
+        continue   # ไม่ให้คำทับ/ติดกัน
+    screen[y:y + h, x:x + w, :3] = value
+    truth[f"w{value}"] = (x, y, w, h)
+
+
+def fake_ocr(img: Image.Image):
+    gray = np.asarray(img.convert("L"))
+    time.sleep(gray.size / 1e6 * MS_PER_MEGAPIXEL / 1000)
+    ys, xs = np.nonzero(gray != 255)
+    values = gray[ys, xs]
+    order = np.argsort(values, kind="stable")
+    values, ys, xs = values[order], ys[order], xs[order]
+    bounds = np.flatnonzero(np.diff(values)) + 1
+    words = []
+    for vy, vx, vv in zip(np.split(ys, bounds), np.split(xs, bounds), np.split(values, bounds)):
+        if len(vv):
+            words.append({"text": f"w{vv[0]}", "x": int(vx.min()), "y": int(vy.min()),
+                          "w": int(vx.max() - vx.min() + 1), "h": int(vy.max() - vy.min() + 1),
+                          "confidence": 90.0})
+    return words
+
+
+print(f"=== [1] ความถูกต้อง ({len(truth)} คำ, {len(plan_ocr_tiles((WIDTH, HEIGHT)))} ช่อง) ===")
+tiled = TiledOCR(ocr=fake_ocr, workers=1)
+start = time.perf_counter()
+words = tiled.words(screen)
+first_ms = (time.perf_counter() - start) * 1000
+found = {w["text"]: (w["x"], w["y"], w["w"], w["h"]) for w in words}
+print(f"พบ {len(words)} คำ | ซ้ำ {len(words) - len(found)} | ขาด {len(set(truth) - set(found))} | "
+      f"กรอบผิด {sum(found.get(k) != v for k, v in truth.items())}")
+
+print("\n=== [2] เวลา ===")
+start = time.perf_counter()
+fake_ocr(Image.fromarray(screen))
+full_ms = (time.perf_counter() - start) * 1000
+print(f"OCR ทั้งจอ (แบบเดิม)            {full_ms:7.1f} ms")
+print(f"แบ่งช่อง ครั้งแรก (ทุกช่อง)         {first_ms:7.1f} ms")
+
+screen[700:716, 1200:1260, :3] = 5      # "คลิก" -> มีคำใหม่ขึ้นมา 1 คำ
+before = tiled.tiles_ocr
+start = time.perf_counter()
+words = tiled.words(screen)
+print(f"แบ่งช่อง หลังคลิก                  {(time.perf_counter() - start) * 1000:7.1f} ms "
+      f"(OCR ใหม่ {tiled.tiles_ocr - before} ช่อง, พบ w5: {any(w['text'] == 'w5' for w in words)})")
+print(tiled.get_stats())
+
+print("\n=== [3] คำยาวกว่าส่วนซ้อน ===")
+rects = plan_ocr_tiles((WIDTH, HEIGHT))
+seam_left, seam_right = rects[1][0], rects[0][0] + rects[0][2]        # ส่วนซ้อนของช่องแรกกับช่องที่สอง
+long_screen = np.full((HEIGHT, WIDTH, 4), 255, dtype=np.uint8)
+long_box = (seam_left - 150, 300, (seam_right - seam_left) + 300, 16)  # กว้างกว่าส่วนซ้อน 300 px
+x, y, w, h = long_box
+long_screen[y:y + h, x:x + w, :3] = 77
+long_screen[y:y + h, x - 120:x - 40, :3] = 78                           # คำสั้นข้างๆ ต้องไม่หาย
+words = TiledOCR(ocr=fake_ocr, workers=1).words(long_screen)
+found = [(wd["text"], (wd["x"], wd["y"], wd["w"], wd["h"])) for wd in words]
+print(f"ส่วนซ้อน {seam_right - seam_left} px, คำกว้าง {w} px -> {found}")
+print(f"w77 ได้ 1 คำกรอบเต็ม: {found.count(('w77', long_box)) == 1 and len(found) == 2}")
+
+# "Configuration" x 480..740 (20 px/ตัว) บนรอยต่อของช่อง 0..640 กับ 544..1184
+size = (1184, 100)
+tiles = [(0, 0, 640, 100), (544, 0, 640, 100)]
+for left_text, right_text in (("Configur", "figuration"), ("Configu~", "~iguration")):   # OCR อ่านตัวที่ขอบผิด
+    merged = merge_tile_words([(tiles[0], [{"text": left_text, "x": 480, "y": 40, "w": 160, "h": 16, "confidence": 90}]),
+                               (tiles[1], [{"text": right_text, "x": 0, "y": 40, "w": 196, "h": 16, "confidence": 85}])],
+                              size)
+    print(f"ไม่มีภาพ: {left_text!r} + {right_text!r} -> "
+          f"{[(m['text'], m['x'], m['w']) for m in merged]} (ควรเป็น Configuration, 480, 260)")